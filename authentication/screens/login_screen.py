@@ -4,7 +4,7 @@ Pantalla de login para aplicación web
 
 import flet as ft
 from typing import Optional
-from authentication.services.auth_service import AuthService
+from authentication.services.auth_service import get_auth_service
 from core.logger import get_logger
 
 class LoginScreen:
@@ -14,7 +14,7 @@ class LoginScreen:
         self.app = app
         self.page = app.page
         self.logger = get_logger(__name__)
-        self.auth_service = AuthService()
+        self.auth_service = get_auth_service()
         
         # Controles de la interfaz
         self.username_field = None
@@ -263,7 +263,7 @@ class LoginScreen:
         username = self.username_field.value
         password = self.password_field.value
         
-        self.logger.info(f"Intento de login web - Usuario: '{username}'")
+        self.logger.info("Intento de login web - Usuario: '%s'", username)
         
         if not username or not password:
             self._show_error("Complete todos los campos")
@@ -274,10 +274,10 @@ class LoginScreen:
         try:
             result = self.auth_service.login(username, password)
             
-            self.logger.info(f"Resultado de autenticación: {result}")
+            self.logger.info("Resultado de autenticación: %s", result)
             
             if result["success"]:
-                self.logger.info(f"Login exitoso para: {username}")
+                self.logger.info("Login exitoso para: %s", username)
                 
                 self.app.set_current_user(result["user"])
                 self.app.navigate_to("dashboard")
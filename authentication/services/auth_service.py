@@ -163,7 +163,7 @@ class AuthService:
             Dict con resultado de autenticación
         """
         try:
-            self.logger.info(f"Intento de login web para usuario: {username}")
+            self.logger.info("Intento de login web para usuario: %s", username)
             
             # Validar entrada
             if not username or not password:
@@ -177,7 +177,7 @@ class AuthService:
             username = username.strip()
             password = password.strip()
             
-            self.logger.info(f"Buscando usuario web: '{username}'")
+            self.logger.info("Buscando usuario web: '%s'", username)
             
             # Buscar usuario en storage web
             user = self.storage.get_user_by_credentials(username, password)
@@ -197,7 +197,7 @@ class AuthService:
                     f"Login web exitoso - Sesión: {session_id[:8]}"
                 )
                 
-                self.logger.info(f"Login web exitoso para: {username}")
+                self.logger.info("Login web exitoso para: %s", username)
                 
                 # Agregar información de sesión
                 user["session_id"] = session_id
@@ -250,7 +250,7 @@ class AuthService:
                 f"Logout web - Sesión: {session_id[:8] if session_id else 'N/A'}"
             )
             
-            self.logger.info(f"Logout web exitoso para usuario ID: {user_id}")
+            self.logger.info("Logout web exitoso para usuario ID: %s", user_id)
             return True
             
         except Exception as e:
@@ -622,7 +622,7 @@ class AuthService:
                 del self._active_sessions[session_id]
             
             if expired_sessions:
-                self.logger.info(f"Limpiadas {len(expired_sessions)} sesiones expiradas")
+                self.logger.info("Limpiadas %s sesiones expiradas", len(expired_sessions))
                 
         except Exception as e:
             self.logger.error(f"Error limpiando sesiones web: {e}")
@@ -722,15 +722,21 @@ class AuthService:
             self.logger.error(f"Error obteniendo estadísticas web: {e}")
             return {}
 
+# Instancia global del servicio (las sesiones activas se comparten en el proceso)
+_auth_service = None
+
 # Función de utilidad para obtener el servicio de auth
 def get_auth_service() -> AuthService:
     """
-    Obtiene una instancia del servicio de autenticación
+    Obtiene la instancia del servicio de autenticación
     
     Returns:
         Instancia de AuthService
     """
-    return AuthService()
+    global _auth_service
+    if _auth_service is None:
+        _auth_service = AuthService()
+    return _auth_service
 
 # Función para inicializar datos de prueba adicionales
 def initialize_test_data():
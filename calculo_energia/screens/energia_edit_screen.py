@@ -57,7 +57,7 @@ class EnergiaEditScreen:
                 if not self.current_registro:
                     self.logger.error(f"Registro no encontrado: {self.registro_id}")
             
-            self.logger.info(f"Datos iniciales cargados - Modo: {self.mode}")
+            self.logger.info("Datos iniciales cargados - Modo: %s", self.mode)
             
         except Exception as e:
             self.logger.error(f"Error cargando datos iniciales: {e}")
@@ -422,7 +422,7 @@ class EnergiaEditScreen:
                     self.callback()
                 
                 # Volver a la pantalla anterior
-                self._navigate_back()
+                self._navigate_back(changed=True)
             else:
                 self._show_error(f"Error al {action.replace('ado', 'ar')} el registro")
                 
@@ -440,11 +440,17 @@ class EnergiaEditScreen:
         """Maneja el clic del botón volver"""
         self._navigate_back()
     
-    def _navigate_back(self):
-        """Navega de vuelta - CORREGIDO"""
+    def _navigate_back(self, changed: bool = False):
+        """Navega de vuelta - CORREGIDO
+
+        Sin cambios se reanuda el listado cacheado; si se guardó o eliminó
+        algo, el listado se vuelve a cargar.
+        """
         try:
-            # ✅ USAR NOMBRE CORRECTO
-            self.app.navigate_to("calculo_energia")
+            if changed:
+                self.app.navigate_to("calculo_energia")
+            else:
+                self.app.go_back("calculo_energia")
         except Exception as e:
             self.logger.error(f"Error navegando de vuelta: {e}") 
     def _set_loading(self, loading: bool):
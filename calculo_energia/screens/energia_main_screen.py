@@ -7,12 +7,17 @@ import flet as ft
 from typing import List, Dict, Any
 from datetime import datetime
 from core.logger import get_logger
-from calculo_energia.services.energia_service import EnergiaService
+from core.page_updates import flush_now
+from core.components import PagedDataTable
+from calculo_energia.services.energia_service import EnergiaService, EnergiaRecord
 from calculo_energia.models.energia_barra_model import EnergiaBarra
 
 class EnergiaMainScreen:
     """Pantalla principal de gestión de energía - VERSIÓN WEB MEJORADA"""
     
+    # Se conserva viva al editar/ver registros: volver no recarga el período
+    keep_alive = True
+    
     def __init__(self, app):
         self.app = app
         self.page = app.page
@@ -20,12 +25,13 @@ class EnergiaMainScreen:
         self.energia_service = EnergiaService()
         
         # Estado
-        self.current_data: List[EnergiaBarra] = []
-        self.filtered_data: List[EnergiaBarra] = []
+        # Totales de la búsqueda; las filas se piden por páginas al servicio
+        self.resumen: Dict[str, Any] = {}
         self.selected_año = datetime.now().year
         self.selected_mes = datetime.now().month
         self.search_text = ""
         self.is_loading = False
+        self.paged_table = None
         
         # ✅ FilePicker según documentación oficial de Flet
         self.file_picker = ft.FilePicker(on_result=self._on_file_result)
@@ -163,7 +169,7 @@ class EnergiaMainScreen:
                 alignment=ft.alignment.center
             )
         
-        if not self.filtered_data:
+        if not self.resumen.get('registros'):
             return ft.Container(
                 content=ft.Column([
                     ft.Icon(ft.Icons.INBOX, size=64, color=ft.Colors.GREY_400),
@@ -183,67 +189,70 @@ class EnergiaMainScreen:
                 alignment=ft.alignment.center
             )
         
-        # Crear filas de la tabla
-        rows = []
-        for i, record in enumerate(self.filtered_data):
-            rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(str(i + 1))),
-                        ft.DataCell(ft.Text(record.municipio_codigo)),
-                        ft.DataCell(ft.Text(record.municipio_nombre)),
-                        ft.DataCell(ft.Text(f"{record.energia_mwh:,.1f}")),
-                        ft.DataCell(ft.Text(record.observaciones or "")),
-                        ft.DataCell(
-                            ft.Row([
-                                ft.IconButton(
-                                    icon=ft.Icons.VISIBILITY,
-                                    tooltip="Ver",
-                                    on_click=lambda e, r=record: self._on_view_click(r)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.EDIT,
-                                    tooltip="Editar",
-                                    on_click=lambda e, r=record: self._on_edit_click(r)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.DELETE,
-                                    tooltip="Eliminar",
-                                    on_click=lambda e, r=record: self._on_delete_click(r),
-                                    icon_color=ft.Colors.RED_400
-                                )
-                            ])
-                        )
-                    ]
-                )
-            )
+        # Tabla paginada: solo se construyen las filas de la página visible
+        self.paged_table = PagedDataTable(
+            self.page,
+            columns=[
+                ft.DataColumn(ft.Text("#")),
+                ft.DataColumn(ft.Text("Código")),
+                ft.DataColumn(ft.Text("Municipio")),
+                ft.DataColumn(ft.Text("Energía (MWh)")),
+                ft.DataColumn(ft.Text("Observaciones")),
+                ft.DataColumn(ft.Text("Acciones"))
+            ],
+            row_builder=self._build_data_row,
+            border=ft.border.all(1, ft.Colors.GREY_300),
+            border_radius=10,
+            vertical_lines=ft.BorderSide(1, ft.Colors.GREY_200),
+            horizontal_lines=ft.BorderSide(1, ft.Colors.GREY_200)
+        )
+        self.paged_table.set_source(*self._page_source())
         
         return ft.Container(
-            content=ft.DataTable(
-                columns=[
-                    ft.DataColumn(ft.Text("#")),
-                    ft.DataColumn(ft.Text("Código")),
-                    ft.DataColumn(ft.Text("Municipio")),
-                    ft.DataColumn(ft.Text("Energía (MWh)")),
-                    ft.DataColumn(ft.Text("Observaciones")),
-                    ft.DataColumn(ft.Text("Acciones"))
-                ],
-                rows=rows,
-                border=ft.border.all(1, ft.Colors.GREY_300),
-                border_radius=10,
-                vertical_lines=ft.BorderSide(1, ft.Colors.GREY_200),
-                horizontal_lines=ft.BorderSide(1, ft.Colors.GREY_200)
-            ),
+            content=self.paged_table.build(),
             bgcolor=ft.Colors.WHITE,
             padding=10,
             border_radius=10
         )
     
+    def _build_data_row(self, entry) -> ft.DataRow:
+        """Construye la fila de un registro (posición, registro)"""
+        i, record = entry
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(str(i + 1))),
+                ft.DataCell(ft.Text(record.municipio_codigo)),
+                ft.DataCell(ft.Text(record.municipio_nombre)),
+                ft.DataCell(ft.Text(f"{record.energia_mwh:,.1f}")),
+                ft.DataCell(ft.Text(record.observaciones or "")),
+                ft.DataCell(
+                    ft.Row([
+                        ft.IconButton(
+                            icon=ft.Icons.VISIBILITY,
+                            tooltip="Ver",
+                            on_click=lambda e, r=record: self._on_view_click(r)
+                        ),
+                        ft.IconButton(
+                            icon=ft.Icons.EDIT,
+                            tooltip="Editar",
+                            on_click=lambda e, r=record: self._on_edit_click(r)
+                        ),
+                        ft.IconButton(
+                            icon=ft.Icons.DELETE,
+                            tooltip="Eliminar",
+                            on_click=lambda e, r=record: self._on_delete_click(r),
+                            icon_color=ft.Colors.RED_400
+                        )
+                    ])
+                )
+            ]
+        )
+    
     def _build_footer(self) -> ft.Control:
         """Construye el pie de página con estadísticas"""
-        total_registros = len(self.filtered_data)
-        total_energia = sum(r.energia_mwh for r in self.filtered_data)
-        promedio_energia = total_energia / total_registros if total_registros > 0 else 0
+        total_registros = self.resumen.get('registros', 0)
+        total_energia = self.resumen.get('total_energia', 0.0)
+        promedio_energia = self.resumen.get('promedio_energia', 0.0)
         
         return ft.Container(
             content=ft.Row([
@@ -489,7 +498,7 @@ class EnergiaMainScreen:
             
             # Procesar encabezado
             headers = [h.strip().lower() for h in lines[0].split(separator)]
-            self.logger.info(f"Encabezados detectados: {headers}")
+            self.logger.info("Encabezados detectados: %s", headers)
             
             # Mapear columnas
             column_mapping = self._map_columns(headers)
@@ -560,7 +569,7 @@ class EnergiaMainScreen:
                     mapping['observaciones'] = i
                     break
             
-            self.logger.info(f"Mapeo de columnas: {mapping}")
+            self.logger.info("Mapeo de columnas: %s", mapping)
             
             return {
                 'success': True,
@@ -672,7 +681,7 @@ class EnergiaMainScreen:
             if error_count > 0:
                 message += f", {error_count} errores"
             
-            self.logger.info(f"Importación completada: {imported_count} importados, {error_count} errores")
+            self.logger.info("Importación completada: %s importados, %s errores", imported_count, error_count)
             
             return {
                 'success': success,
@@ -915,7 +924,7 @@ class EnergiaMainScreen:
         try:
             if e.files:
                 file_info = e.files[0]
-                self.logger.info(f"Archivo seleccionado: {file_info.name}")
+                self.logger.info("Archivo seleccionado: %s", file_info.name)
                 
                 # En web, mostrar limitaciones
                 self._show_file_limitation_dialog(file_info)
@@ -987,33 +996,12 @@ class EnergiaMainScreen:
     
     # ✅ MÉTODOS DE CARGA Y FILTRADO
     def _load_data(self):
-        """Carga los datos del período seleccionado"""
+        """Carga los totales del período seleccionado y reinicia la tabla"""
         try:
             self.is_loading = True
             self.page.update()
             
-            self.logger.info(f"Cargando datos para {self.selected_año}-{self.selected_mes:02d}")
-            
-            # Obtener datos del servicio
-            records = self.energia_service.get_energia_by_periodo(self.selected_año, self.selected_mes)
-            
-            # Convertir a objetos EnergiaBarra
-            self.current_data = []
-            for record in records:
-                energia_obj = EnergiaBarra(
-                    id=record.id,
-                    municipio_id=record.municipio_id,
-                    municipio_nombre=record.municipio_nombre,
-                    municipio_codigo=record.municipio_codigo,
-                    año=record.año,
-                    mes=record.mes,
-                    energia_mwh=record.energia_mwh,
-                    observaciones=record.observaciones,
-                    usuario_id=record.usuario_id,
-                    fecha_registro=record.fecha_registro,
-                    fecha_modificacion=record.fecha_modificacion
-                )
-                self.current_data.append(energia_obj)
+            self.logger.info("Cargando datos para %s-%02d", self.selected_año, self.selected_mes)
             
             # Aplicar filtros
             self._apply_filters()
@@ -1021,7 +1009,7 @@ class EnergiaMainScreen:
             self.is_loading = False
             self.page.update()
             
-            self.logger.info(f"Cargados {len(self.current_data)} registros")
+            self.logger.info("Cargados %s registros", self.resumen.get('registros', 0))
             
         except Exception as e:
             self.is_loading = False
@@ -1030,28 +1018,49 @@ class EnergiaMainScreen:
             self.page.update()
     
     def _apply_filters(self):
-        """Aplica filtros a los datos"""
+        """Aplica los filtros: resume la búsqueda y vuelve a la primera página"""
         try:
-            self.filtered_data = self.current_data.copy()
+            self.resumen = self.energia_service.resumir_registros(self._filtros())
             
-            # Filtro de búsqueda
-            if self.search_text:
-                self.filtered_data = [
-                    record for record in self.filtered_data
-                    if (self.search_text in record.municipio_nombre.lower() or
-                        self.search_text in record.municipio_codigo.lower())
-                ]
+            if self.paged_table is not None:
+                self.paged_table.set_source(*self._page_source())
             
-            self.logger.info(f"Filtros aplicados: {len(self.filtered_data)} registros")
+            self.logger.info("Filtros aplicados: %s registros", self.resumen.get('registros', 0))
             
         except Exception as e:
             self.logger.error(f"Error aplicando filtros: {e}")
     
+    def _filtros(self) -> Dict[str, Any]:
+        """Filtros de ``buscar_registros`` para el período y el texto buscado"""
+        return {'año': self.selected_año, 'mes': self.selected_mes, 'busqueda': self.search_text}
+    
+    def _page_source(self):
+        """Páginas de ``buscar_registros`` por cursor (año, mes, municipio_id)
+
+        Cada fila es (posición, registro) y el cursor guarda también la
+        posición para numerar la página siguiente.
+        """
+        filtros = self._filtros()
+        
+        def fetch_page(despues_de, limite):
+            pagina = dict(filtros, limite=limite)
+            inicio = 0
+            if despues_de:
+                pagina['despues_de'] = despues_de[0]
+                inicio = despues_de[1] + 1
+            return list(enumerate(self.energia_service.buscar_registros(pagina), inicio))
+        
+        return fetch_page, lambda entry: (entry[1].cursor, entry[0])
+    
+    def _registros_filtrados(self) -> List[EnergiaRecord]:
+        """Todos los registros de la búsqueda (exportación y estadísticas)"""
+        return self.energia_service.buscar_registros(self._filtros())
+    
     def _load_municipios(self):
         """Carga la lista de municipios"""
         try:
             municipios = self.energia_service.get_municipios()
-            self.logger.info(f"Cargados {len(municipios)} municipios")
+            self.logger.info("Cargados %s municipios", len(municipios))
         except Exception as e:
             self.logger.error(f"Error cargando municipios: {e}")
     
@@ -1120,7 +1129,7 @@ class EnergiaMainScreen:
         
         self.page.dialog = self.processing_dialog
         self.processing_dialog.open = True
-        self.page.update()
+        flush_now(self.page)
     
     def _hide_processing_dialog(self):
         """Oculta diálogo de procesamiento"""
@@ -1180,7 +1189,7 @@ class EnergiaMainScreen:
     def _export_current_data(self):
         """Exporta los datos actuales (funcionalidad futura)"""
         try:
-            if not self.filtered_data:
+            if not self.resumen.get('registros'):
                 self._show_error("No hay datos para exportar")
                 return
             
@@ -1201,7 +1210,7 @@ class EnergiaMainScreen:
         def copy_data(e):
             # Crear texto para copiar
             export_text = "Municipio\tCódigo\tEnergía (MWh)\tObservaciones\n"
-            for record in self.filtered_data:
+            for record in self._registros_filtrados():
                 export_text += f"{record.municipio_nombre}\t{record.municipio_codigo}\t{record.energia_mwh}\t{record.observaciones or ''}\n"
             
             # En una aplicación real, aquí se copiaría al clipboard
@@ -1213,7 +1222,7 @@ class EnergiaMainScreen:
             title=ft.Text("Exportar Datos"),
             content=ft.Container(
                 content=ft.Column([
-                    ft.Text(f"📊 Registros a exportar: {len(self.filtered_data)}"),
+                    ft.Text(f"📊 Registros a exportar: {self.resumen.get('registros', 0)}"),
                     ft.Text(f"📅 Período: {self.selected_mes:02d}/{self.selected_año}"),
                     ft.Divider(),
                     
@@ -1242,20 +1251,21 @@ class EnergiaMainScreen:
     def _show_statistics_dialog(self):
         """Muestra estadísticas del período actual"""
         try:
-            if not self.filtered_data:
+            registros = self._registros_filtrados()
+            if not registros:
                 self._show_error("No hay datos para mostrar estadísticas")
                 return
             
             # Calcular estadísticas
-            total_registros = len(self.filtered_data)
-            total_energia = sum(r.energia_mwh for r in self.filtered_data)
+            total_registros = len(registros)
+            total_energia = sum(r.energia_mwh for r in registros)
             promedio_energia = total_energia / total_registros if total_registros > 0 else 0
-            max_energia = max(r.energia_mwh for r in self.filtered_data) if self.filtered_data else 0
-            min_energia = min(r.energia_mwh for r in self.filtered_data) if self.filtered_data else 0
+            max_energia = max(r.energia_mwh for r in registros)
+            min_energia = min(r.energia_mwh for r in registros)
             
             # Municipio con mayor y menor consumo
-            municipio_max = max(self.filtered_data, key=lambda x: x.energia_mwh) if self.filtered_data else None
-            municipio_min = min(self.filtered_data, key=lambda x: x.energia_mwh) if self.filtered_data else None
+            municipio_max = max(registros, key=lambda x: x.energia_mwh)
+            municipio_min = min(registros, key=lambda x: x.energia_mwh)
             
             def close_dlg(e):
                 dlg.open = False
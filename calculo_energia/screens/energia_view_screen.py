@@ -9,6 +9,7 @@ from datetime import datetime
 from calculo_energia.services.energia_service import EnergiaService
 from calculo_energia.models.energia_barra_model import EnergiaBarra
 from core.logger import get_logger
+from core.page_updates import flush_now
 
 
 class EnergiaViewScreen:
@@ -44,7 +45,7 @@ class EnergiaViewScreen:
                 if not self.current_registro:
                     self.logger.error(f"Registro no encontrado: {self.registro_id}")
             
-            self.logger.info(f"Datos cargados para visualización: ID {self.registro_id}")
+            self.logger.info("Datos cargados para visualización: ID %s", self.registro_id)
             
         except Exception as e:
             self.logger.error(f"Error cargando datos: {e}")
@@ -578,7 +579,7 @@ class EnergiaViewScreen:
                             self.callback()
                         
                         # Volver a la pantalla anterior
-                        self._navigate_back()
+                        self._navigate_back(changed=True)
                     else:
                         self._show_error("Error eliminando registro")
                 except Exception as ex:
@@ -645,7 +646,7 @@ class EnergiaViewScreen:
             
             file_picker = ft.FilePicker(on_result=on_save_location)
             self.page.overlay.append(file_picker)
-            self.page.update()
+            flush_now(self.page)
             
             # Nombre sugerido
             suggested_name = f"energia_{self.current_registro.municipio_codigo}_{self.current_registro.año}_{self.current_registro.mes:02d}.xlsx"
@@ -682,11 +683,17 @@ class EnergiaViewScreen:
         """Maneja el clic del botón volver"""
         self._navigate_back()
     
-    def _navigate_back(self):
-        """Navega de vuelta - CORREGIDO"""
+    def _navigate_back(self, changed: bool = False):
+        """Navega de vuelta - CORREGIDO
+
+        Sin cambios se reanuda el listado cacheado; si se guardó o eliminó
+        algo, el listado se vuelve a cargar.
+        """
         try:
-            # ✅ USAR NOMBRE CORRECTO
-            self.app.navigate_to("calculo_energia")
+            if changed:
+                self.app.navigate_to("calculo_energia")
+            else:
+                self.app.go_back("calculo_energia")
         except Exception as e:
             self.logger.error(f"Error navegando de vuelta: {e}")
     def _set_loading(self, loading: bool):
@@ -12,7 +12,9 @@ SERVICES_INFO = {
         'description': 'Servicio para gestión de registros de energía',
         'methods': [
             'get_energia_list',                 # ✅ Existe
+            'iter_energia_list',                # ✅ Existe
             'get_energia_by_periodo',           # ✅ Existe  
+            'iter_energia_by_periodo',          # ✅ Existe
             'get_energia_by_id',                # ✅ Existe
             'crear_energia',                    # ✅ Existe
             'actualizar_energia',               # ✅ Existe
@@ -29,6 +31,7 @@ SERVICES_INFO = {
             'duplicar_periodo',                 # ✅ Existe
             'generar_plantilla_excel',          # ✅ Existe
             'get_historial_cambios',            # ✅ Existe
+            'iter_historial_cambios',           # ✅ Existe
             'calcular_tendencias'               # ✅ Existe
         ],
         'dependencies': ['core.database', 'core.logger'],
@@ -3,17 +3,22 @@ Servicio para gestión de datos de energía eléctrica
 Maneja operaciones CRUD y lógica de negocio para energía por barra
 """
 
-from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from typing import List, Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
 from dataclasses import dataclass
+from itertools import chain
 from datetime import datetime
+import time
 from core.logger import get_logger
 from core.database import get_db_manager
+from core.records import row_mapper
+from core.metrics import record_import
+from core.query_cache import cached_query
 
 # Import condicional para type hints
 if TYPE_CHECKING:
     import pandas as pd
 
-@dataclass
+@dataclass(slots=True)
 class EnergiaRecord:
     """Clase para representar un registro de energía"""
     id: int
@@ -39,6 +44,11 @@ class EnergiaRecord:
     def energia_formateada(self) -> str:
         """Retorna la energía formateada"""
         return f"{self.energia_mwh:,.1f} MWh"
+    
+    @property
+    def cursor(self) -> tuple:
+        """Clave de paginación (año, mes, municipio_id)"""
+        return (self.año, self.mes, self.municipio_id)
 
 
 class EnergiaService:
@@ -48,43 +58,35 @@ class EnergiaService:
         self.logger = get_logger(__name__)
         self.db_manager = get_db_manager()
 
+    @cached_query(tables=["energia_barra", "municipios"])
     def get_energia_by_periodo(self, año: int, mes: int) -> List[EnergiaRecord]:
         """Obtiene registros de energía por período"""
         try:
-            query = """
-            SELECT eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo
-            FROM energia_barra eb
-            JOIN municipios m ON eb.municipio_id = m.id
-            WHERE eb.año = ? AND eb.mes = ?
-            ORDER BY m.nombre
-            """
-            
-            results = self.db_manager.execute_query(query, (año, mes))
-            
-            records = []
-            for row in results:
-                record = EnergiaRecord(
-                    id=row['id'],
-                    municipio_id=row['municipio_id'],
-                    municipio_nombre=row['municipio_nombre'],
-                    municipio_codigo=row['municipio_codigo'],
-                    año=row['año'],
-                    mes=row['mes'],
-                    energia_mwh=row['energia_mwh'],
-                    observaciones=row.get('observaciones'),
-                    fecha_registro=row['fecha_registro'],
-                    fecha_modificacion=row.get('fecha_modificacion', row['fecha_registro']),
-                    usuario_id=row['usuario_id']
-                )
-                records.append(record)
-            
-            self.logger.info(f"Obtenidos {len(records)} registros para {año}-{mes:02d}")
+            records = list(self.iter_energia_by_periodo(año, mes))
+            self.logger.info("Obtenidos %d registros para %s-%02d", len(records), año, mes)
             return records
             
         except Exception as e:
             self.logger.error(f"Error obteniendo energía por período: {e}")
             return []
     
+    def iter_energia_by_periodo(self, año: int, mes: int) -> Iterator[EnergiaRecord]:
+        """Registros de energía del período, generados a medida que se leen (para exportar)"""
+        query = """
+        SELECT eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo
+        FROM energia_barra eb
+        JOIN municipios m ON eb.municipio_id = m.id
+        WHERE eb.año = ? AND eb.mes = ?
+        ORDER BY m.nombre
+        """
+        for row in self.db_manager.iter_query(query, (año, mes)):
+            yield self._row_to_record(row)
+    
+    # Fila de energia_barra (con su municipio) → EnergiaRecord
+    _row_to_record = staticmethod(row_mapper(
+        EnergiaRecord, {'fecha_modificacion': ('fecha_modificacion', 'fecha_registro')}
+    ))
+    
     def get_energia_by_id(self, energia_id: int) -> Optional[EnergiaRecord]:
         """Obtiene un registro de energía por ID"""
         try:
@@ -98,20 +100,7 @@ class EnergiaService:
             results = self.db_manager.execute_query(query, (energia_id,))
             
             if results:
-                row = results[0]
-                return EnergiaRecord(
-                    id=row['id'],
-                    municipio_id=row['municipio_id'],
-                    municipio_nombre=row['municipio_nombre'],
-                    municipio_codigo=row['municipio_codigo'],
-                    año=row['año'],
-                    mes=row['mes'],
-                    energia_mwh=row['energia_mwh'],
-                    observaciones=row.get('observaciones'),
-                    fecha_registro=row['fecha_registro'],
-                    fecha_modificacion=row.get('fecha_modificacion', row['fecha_registro']),
-                    usuario_id=row['usuario_id']
-                )
+                return self._row_to_record(results[0])
             
             return None
             
@@ -164,7 +153,7 @@ class EnergiaService:
             
             success = rows_affected > 0
             if success:
-                self.logger.info(f"Registro de energía creado: Municipio {data['municipio_id']}, {data['año']}-{data['mes']:02d}")
+                self.logger.info("Registro de energía creado: Municipio %s, %s-%02d", data['municipio_id'], data['año'], data['mes'])
             
             return success
             
@@ -203,7 +192,7 @@ class EnergiaService:
             
             success = rows_affected > 0
             if success:
-                self.logger.info(f"Registro de energía actualizado: ID {energia_id}")
+                self.logger.info("Registro de energía actualizado: ID %s", energia_id)
             
             return success
             
@@ -226,7 +215,7 @@ class EnergiaService:
             
             success = rows_affected > 0
             if success:
-                self.logger.info(f"Registro de energía eliminado: ID {energia_id}")
+                self.logger.info("Registro de energía eliminado: ID %s", energia_id)
             
             return success
             
@@ -234,19 +223,21 @@ class EnergiaService:
             self.logger.error(f"Error eliminando registro de energía: {e}")
             return False
     
+    @cached_query(tables=["municipios"], maxsize=1)
     def get_municipios(self) -> List[Dict[str, Any]]:
         """Obtiene la lista de municipios activos"""
         try:
             query = "SELECT * FROM municipios WHERE activo = 1 ORDER BY nombre"
             results = self.db_manager.execute_query(query)
             
-            self.logger.info(f"Obtenidos {len(results)} municipios")
+            self.logger.info("Obtenidos %d municipios", len(results))
             return results
             
         except Exception as e:
             self.logger.error(f"Error obteniendo municipios: {e}")
             return []
     
+    @cached_query(tables=["energia_barra", "municipios"])
     def get_resumen_periodo(self, año: int, mes: int) -> Dict[str, Any]:
         """Obtiene resumen estadístico de un período"""
         try:
@@ -310,6 +301,7 @@ class EnergiaService:
                 'error': str(e)
             }
 
+    @cached_query(tables=["energia_barra"], maxsize=1)
     def get_periodos_disponibles(self) -> List[Dict[str, Any]]:
         """Obtiene lista de períodos con datos disponibles"""
         try:
@@ -335,7 +327,7 @@ class EnergiaService:
                     'registros': row['registros']
                 })
             
-            self.logger.info(f"Encontrados {len(periodos)} períodos con datos")
+            self.logger.info("Encontrados %d períodos con datos", len(periodos))
             return periodos
             
         except Exception as e:
@@ -421,12 +413,12 @@ class EnergiaService:
             if not os.path.exists(file_path):
                 return {"success": False, "message": "Archivo no encontrado", "imported": 0, "errors": 0}
             
-            self.logger.info(f"Iniciando importación desde: {file_path}")
+            self.logger.info("Iniciando importación desde: %s", file_path)
             
             # Leer el archivo Excel
             try:
                 df = pd.read_excel(file_path)
-                self.logger.info(f"Archivo leído: {len(df)} filas, columnas: {list(df.columns)}")
+                self.logger.info("Archivo leído: %s filas, columnas: %s", len(df), list(df.columns))
             except Exception as e:
                 self.logger.error(f"Error leyendo Excel: {e}")
                 return {"success": False, "message": f"Error leyendo Excel: {str(e)}", "imported": 0, "errors": 0}
@@ -438,8 +430,11 @@ class EnergiaService:
             
             df = result["dataframe"]
             
-            # Procesar registros
-            return self._process_excel_records(df, usuario_id, año, mes)
+            # Procesar registros (midiendo throughput para /metrics)
+            inicio = time.perf_counter()
+            resultado = self._process_excel_records(df, usuario_id, año, mes)
+            record_import("energia", len(df), time.perf_counter() - inicio)
+            return resultado
             
         except ImportError:
             return {"success": False, "message": "pandas no está instalado. Instale con: pip install pandas openpyxl", "imported": 0, "errors": 0}
@@ -468,7 +463,7 @@ class EnergiaService:
             # Normalizar nombres de columnas (minúsculas, sin espacios)
             df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_').str.replace('.', '_')
             
-            self.logger.info(f"Columnas normalizadas: {list(df.columns)}")
+            self.logger.info("Columnas normalizadas: %s", list(df.columns))
             
             # Encontrar columnas requeridas
             found_columns = {}
@@ -487,7 +482,7 @@ class EnergiaService:
                 
                 found_columns[required_col] = found
             
-            self.logger.info(f"Columnas encontradas: {found_columns}")
+            self.logger.info("Columnas encontradas: %s", found_columns)
             
             # Renombrar columnas
             rename_dict = {v: k for k, v in found_columns.items() if v is not None}
@@ -528,7 +523,7 @@ class EnergiaService:
             municipios_dict = {m['nombre'].lower(): m['id'] for m in municipios}
             municipios_dict.update({m['codigo'].lower(): m['id'] for m in municipios})
             
-            self.logger.info(f"Procesando {len(df)} filas del Excel")
+            self.logger.info("Procesando %s filas del Excel", len(df))
             
             for index, row in df.iterrows():
                 try:
@@ -585,7 +580,7 @@ class EnergiaService:
             elif len(errors) > 5:
                 message += f". Primeros errores: {'; '.join(errors[:3])}... y {len(errors)-3} más"
             
-            self.logger.info(f"Importación completada: {imported_count} importados, {error_count} errores")
+            self.logger.info("Importación completada: %s importados, %s errores", imported_count, error_count)
             
             return {
                 "success": success,
@@ -722,59 +717,30 @@ class EnergiaService:
             return False
 
     def exportar_a_excel(self, año: int, mes: int, file_path: str) -> bool:
-        """Exporta datos de energía a Excel"""
+        """Exporta datos de energía a Excel (o CSV / CSV.gz según la extensión)"""
         try:
-            # Import local de pandas
-            try:
-                import pandas as pd
-            except ImportError:
-                self.logger.error("pandas no está instalado. Instale con: pip install pandas openpyxl")
-                return False
+            from core.export import export_rows
             
-            # Obtener datos
-            records = self.get_energia_by_periodo(año, mes)
+            # Los registros se leen a medida que se escriben
+            records = self.iter_energia_by_periodo(año, mes)
+            first = next(records, None)
             
-            if not records:
+            if first is None:
                 self.logger.warning(f"No hay datos para exportar: {año}-{mes:02d}")
                 return False
             
-            # Convertir a DataFrame
-            data = []
-            for record in records:
-                data.append({
-                    'Municipio': record.municipio_nombre,
-                    'Código': record.municipio_codigo,
-                    'Año': record.año,
-                    'Mes': record.mes,
-                    'Energía (MWh)': record.energia_mwh,
-                    'Observaciones': record.observaciones or '',
-                    'Fecha Registro': record.fecha_registro,
-                    'Fecha Modificación': record.fecha_modificacion
-                })
+            headers = ['Municipio', 'Código', 'Año', 'Mes', 'Energía (MWh)', 'Observaciones',
+                       'Fecha Registro', 'Fecha Modificación']
+            rows = (
+                (record.municipio_nombre, record.municipio_codigo, record.año, record.mes,
+                 record.energia_mwh, record.observaciones or '', record.fecha_registro,
+                 record.fecha_modificacion)
+                for record in chain([first], records)
+            )
             
-            df = pd.DataFrame(data)
+            export_rows(file_path, headers, rows, sheet_name=f'Energía {año}-{mes:02d}')
             
-            # Exportar a Excel
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=f'Energía {año}-{mes:02d}', index=False)
-                
-                # Formatear hoja
-                worksheet = writer.sheets[f'Energía {año}-{mes:02d}']
-                
-                # Ajustar ancho de columnas
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            self.logger.info(f"Datos exportados a: {file_path}")
+            self.logger.info("Datos exportados a: %s", file_path)
             return True
             
         except Exception as e:
@@ -840,6 +806,7 @@ class EnergiaService:
                 'error': str(e)
             }
 
+    @cached_query(tables=["energia_barra"], maxsize=16)
     def get_estadisticas_anuales(self, año: int) -> Dict[str, Any]:
         """Obtiene estadísticas anuales de energía"""
         try:
@@ -900,35 +867,20 @@ class EnergiaService:
             }
 
     def buscar_registros(self, filtros: Dict[str, Any]) -> List[EnergiaRecord]:
-        """Busca registros con filtros específicos"""
+        """Busca registros con filtros específicos
+
+        Admite paginación por cursor: ``limite`` acota la página y
+        ``despues_de`` es la tupla (año, mes, municipio_id) de la última fila
+        de la página anterior. Los resultados se ordenan del período más
+        reciente al más antiguo.
+        """
         try:
-            conditions = []
-            params = []
-            
-            # Construir condiciones WHERE
-            if filtros.get('municipio_id'):
-                conditions.append("eb.municipio_id = ?")
-                params.append(filtros['municipio_id'])
-            
-            if filtros.get('año'):
-                conditions.append("eb.año = ?")
-                params.append(filtros['año'])
+            conditions, params = self._condiciones_busqueda(filtros)
             
-            if filtros.get('mes'):
-                conditions.append("eb.mes = ?")
-                params.append(filtros['mes'])
-            
-            if filtros.get('energia_min'):
-                conditions.append("eb.energia_mwh >= ?")
-                params.append(filtros['energia_min'])
-            
-            if filtros.get('energia_max'):
-                conditions.append("eb.energia_mwh <= ?")
-                params.append(filtros['energia_max'])
-            
-            if filtros.get('municipio_nombre'):
-                conditions.append("LOWER(m.nombre) LIKE ?")
-                params.append(f"%{filtros['municipio_nombre'].lower()}%")
+            # Cursor de la página anterior (año, mes, municipio_id)
+            if filtros.get('despues_de'):
+                conditions.append("(eb.año, eb.mes, eb.municipio_id) < (?, ?, ?)")
+                params.extend(filtros['despues_de'])
             
             # Construir query
             base_query = """
@@ -942,39 +894,93 @@ class EnergiaService:
             else:
                 query = base_query
             
-            query += " ORDER BY eb.año DESC, eb.mes DESC, m.nombre"
+            # Orden total para que el cursor sea estable entre páginas
+            query += " ORDER BY eb.año DESC, eb.mes DESC, eb.municipio_id DESC"
             
             # Aplicar límite si se especifica
             if filtros.get('limite'):
-                query += f" LIMIT {filtros['limite']}"
+                query += " LIMIT ?"
+                params.append(int(filtros['limite']))
             
             results = self.db_manager.execute_query(query, tuple(params))
             
             # Convertir a objetos EnergiaRecord
-            records = []
-            for row in results:
-                record = EnergiaRecord(
-                    id=row['id'],
-                    municipio_id=row['municipio_id'],
-                    municipio_nombre=row['municipio_nombre'],
-                    municipio_codigo=row['municipio_codigo'],
-                    año=row['año'],
-                    mes=row['mes'],
-                    energia_mwh=row['energia_mwh'],
-                    observaciones=row.get('observaciones'),
-                    fecha_registro=row['fecha_registro'],
-                    fecha_modificacion=row.get('fecha_modificacion', row['fecha_registro']),
-                    usuario_id=row['usuario_id']
-                )
-                records.append(record)
+            records = list(map(self._row_to_record, results))
             
-            self.logger.info(f"Búsqueda completada: {len(records)} registros encontrados")
+            self.logger.info("Búsqueda completada: %d registros encontrados", len(records))
             return records
             
         except Exception as e:
             self.logger.error(f"Error en búsqueda: {e}")
             return []
 
+    def resumir_registros(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """Totales de una búsqueda (mismos filtros que ``buscar_registros``) sin leer las filas"""
+        try:
+            conditions, params = self._condiciones_busqueda(filtros)
+            query = """
+            SELECT COUNT(*) as registros, SUM(eb.energia_mwh) as total_energia,
+                   MAX(eb.energia_mwh) as max_energia, MIN(eb.energia_mwh) as min_energia
+            FROM energia_barra eb
+            JOIN municipios m ON eb.municipio_id = m.id
+            """
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            
+            results = self.db_manager.execute_query(query, tuple(params))
+            row = results[0] if results else {}
+            registros = row.get('registros') or 0
+            total = row.get('total_energia') or 0.0
+            return {
+                'registros': registros,
+                'total_energia': total,
+                'promedio_energia': total / registros if registros else 0.0,
+                'max_energia': row.get('max_energia') or 0.0,
+                'min_energia': row.get('min_energia') or 0.0
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Error resumiendo búsqueda: {e}")
+            return {'registros': 0, 'total_energia': 0.0, 'promedio_energia': 0.0,
+                    'max_energia': 0.0, 'min_energia': 0.0}
+
+    def _condiciones_busqueda(self, filtros: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+        """Condiciones WHERE y parámetros de los filtros de búsqueda"""
+        conditions = []
+        params = []
+        
+        if filtros.get('municipio_id'):
+            conditions.append("eb.municipio_id = ?")
+            params.append(filtros['municipio_id'])
+        
+        if filtros.get('año'):
+            conditions.append("eb.año = ?")
+            params.append(filtros['año'])
+        
+        if filtros.get('mes'):
+            conditions.append("eb.mes = ?")
+            params.append(filtros['mes'])
+        
+        if filtros.get('energia_min'):
+            conditions.append("eb.energia_mwh >= ?")
+            params.append(filtros['energia_min'])
+        
+        if filtros.get('energia_max'):
+            conditions.append("eb.energia_mwh <= ?")
+            params.append(filtros['energia_max'])
+        
+        if filtros.get('municipio_nombre'):
+            conditions.append("LOWER(m.nombre) LIKE ?")
+            params.append(f"%{filtros['municipio_nombre'].lower()}%")
+        
+        # Texto libre: nombre o código del municipio
+        if filtros.get('busqueda'):
+            conditions.append("(LOWER(m.nombre) LIKE ? OR LOWER(m.codigo) LIKE ?)")
+            patron = f"%{filtros['busqueda'].lower()}%"
+            params.extend([patron, patron])
+        
+        return conditions, params
+
     def duplicar_periodo(self, año_origen: int, mes_origen: int, año_destino: int, mes_destino: int, usuario_id: int) -> Dict[str, Any]:
         """Duplica registros de un período a otro"""
         try:
@@ -1021,7 +1027,7 @@ class EnergiaService:
             if errores > 0:
                 message += f", {errores} errores"
             
-            self.logger.info(f"Duplicación completada: {duplicados} registros duplicados")
+            self.logger.info("Duplicación completada: %s registros duplicados", duplicados)
             
             return {
                 "success": success,
@@ -1108,7 +1114,7 @@ class EnergiaService:
                 df_instrucciones = pd.DataFrame(instrucciones)
                 df_instrucciones.to_excel(writer, sheet_name='Instrucciones', index=False, header=False)
             
-            self.logger.info(f"Plantilla Excel generada: {file_path}")
+            self.logger.info("Plantilla Excel generada: %s", file_path)
             return True
             
         except Exception as e:
@@ -1118,48 +1124,48 @@ class EnergiaService:
     def get_historial_cambios(self, municipio_id: int = None, limite: int = 50) -> List[Dict[str, Any]]:
         """Obtiene el historial de cambios en los registros"""
         try:
-            # Esta función requeriría una tabla de auditoría
-            # Por ahora, retornamos los registros más recientes ordenados por fecha de modificación
-            
-            base_query = """
-            SELECT eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo,
-                   u.nombre_completo as usuario_nombre
-            FROM energia_barra eb
-            JOIN municipios m ON eb.municipio_id = m.id
-            LEFT JOIN usuarios u ON eb.usuario_id = u.id
-            """
-            
-            params = []
-            if municipio_id:
-                base_query += " WHERE eb.municipio_id = ?"
-                params.append(municipio_id)
-            
-            query = base_query + " ORDER BY eb.fecha_modificacion DESC"
-            
-            if limite:
-                query += f" LIMIT {limite}"
-            
-            results = self.db_manager.execute_query(query, tuple(params))
-            
-            historial = []
-            for row in results:
-                historial.append({
-                    'id': row['id'],
-                    'municipio_nombre': row['municipio_nombre'],
-                    'año': row['año'],
-                    'mes': row['mes'],
-                    'energia_mwh': row['energia_mwh'],
-                    'fecha_modificacion': row.get('fecha_modificacion', row['fecha_registro']),
-                    'usuario_nombre': row.get('usuario_nombre', 'Sistema'),
-                    'accion': 'Modificación'  # En una implementación completa, esto vendría de la tabla de auditoría
-                })
-            
-            return historial
+            return list(self.iter_historial_cambios(municipio_id, limite))
             
         except Exception as e:
             self.logger.error(f"Error obteniendo historial: {e}")
             return []
 
+    def iter_historial_cambios(self, municipio_id: int = None, limite: int = None) -> Iterator[Dict[str, Any]]:
+        """Historial de cambios generado fila a fila; sin ``limite`` recorre todo el historial"""
+        # Esta función requeriría una tabla de auditoría
+        # Por ahora, retornamos los registros más recientes ordenados por fecha de modificación
+        
+        base_query = """
+        SELECT eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo,
+               u.nombre_completo as usuario_nombre
+        FROM energia_barra eb
+        JOIN municipios m ON eb.municipio_id = m.id
+        LEFT JOIN usuarios u ON eb.usuario_id = u.id
+        """
+        
+        params = []
+        if municipio_id:
+            base_query += " WHERE eb.municipio_id = ?"
+            params.append(municipio_id)
+        
+        query = base_query + " ORDER BY eb.fecha_modificacion DESC"
+        
+        if limite:
+            query += " LIMIT ?"
+            params.append(int(limite))
+        
+        for row in self.db_manager.iter_query(query, tuple(params)):
+            yield {
+                'id': row['id'],
+                'municipio_nombre': row['municipio_nombre'],
+                'año': row['año'],
+                'mes': row['mes'],
+                'energia_mwh': row['energia_mwh'],
+                'fecha_modificacion': row.get('fecha_modificacion', row['fecha_registro']),
+                'usuario_nombre': row.get('usuario_nombre', 'Sistema'),
+                'accion': 'Modificación'  # En una implementación completa, esto vendría de la tabla de auditoría
+            }
+
     def calcular_tendencias(self, municipio_id: int, meses: int = 12) -> Dict[str, Any]:
         """Calcula tendencias de consumo para un municipio"""
         try:
@@ -1217,34 +1223,38 @@ class EnergiaService:
     def get_energia_list(self, año: int = None, mes: int = None, municipio_id: int = None) -> List[Dict[str, Any]]:
         """Obtiene lista de registros de energía con filtros"""
         try:
-            # Base query
-            query = """
-            SELECT eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo
-            FROM energia_barra eb
-            JOIN municipios m ON eb.municipio_id = m.id
-            WHERE 1=1
-            """
-            params = []
-            
-            # Add filters
-            if año:
-                query += " AND eb.año = ?"
-                params.append(año)
-            
-            if mes:
-                query += " AND eb.mes = ?"
-                params.append(mes)
-                
-            if municipio_id:
-                query += " AND eb.municipio_id = ?"
-                params.append(municipio_id)
-            
-            query += " ORDER BY eb.año DESC, eb.mes DESC, m.nombre ASC"
-            
-            result = self.db_manager.execute_query(query, tuple(params))
-            self.logger.info(f"Obtenidos {len(result)} registros de energía")
+            result = list(self.iter_energia_list(año, mes, municipio_id))
+            self.logger.info("Obtenidos %d registros de energía", len(result))
             return result
             
         except Exception as e:
             self.logger.error(f"Error obteniendo lista de energía: {e}")
             return []
+
+    def iter_energia_list(self, año: int = None, mes: int = None, municipio_id: int = None) -> Iterator[Dict[str, Any]]:
+        """Como ``get_energia_list`` pero sin cargar todas las filas (exportaciones y procesos por lotes)"""
+        # Base query
+        query = """
+        SELECT eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo
+        FROM energia_barra eb
+        JOIN municipios m ON eb.municipio_id = m.id
+        WHERE 1=1
+        """
+        params = []
+        
+        # Add filters
+        if año:
+            query += " AND eb.año = ?"
+            params.append(año)
+        
+        if mes:
+            query += " AND eb.mes = ?"
+            params.append(mes)
+            
+        if municipio_id:
+            query += " AND eb.municipio_id = ?"
+            params.append(municipio_id)
+        
+        query += " ORDER BY eb.año DESC, eb.mes DESC, m.nombre ASC"
+        
+        yield from self.db_manager.iter_query(query, tuple(params))
@@ -7,6 +7,7 @@ from typing import Optional, Dict, Any
 from core.logger import get_logger
 from core.database import get_db_manager
 from core.screen_manager import ScreenManager
+from core.page_updates import install_update_coalescer
 from authentication.screens.login_screen import LoginScreen
 from dashboard.screens.main_dashboard import MainDashboard
 from calculo_energia.screens.energia_main_screen import EnergiaMainScreen
@@ -28,6 +29,7 @@ class PerdidasMatanzasApp:
         self.current_user = None
         
         # Inicializar componentes
+        self.page_updates = install_update_coalescer(page)
         self.screen_manager = ScreenManager(page)
         self.screen_manager.app_instance = self
         self.db_manager = get_db_manager()
@@ -78,7 +80,7 @@ class PerdidasMatanzasApp:
     def navigate_to(self, screen_name: str, **kwargs):
         """Navega a una pantalla específica"""
         try:
-            self.logger.info(f"Navegando a: {screen_name}")
+            self.logger.info("Navegando a: %s", screen_name)
             
             if screen_name not in ["login"] and not self.is_authenticated():
                 self.logger.warning("Intento de acceso sin autenticación")
@@ -88,17 +90,30 @@ class PerdidasMatanzasApp:
             success = self.screen_manager.navigate_to(screen_name, **kwargs)
             
             if success:
-                self.logger.info(f"Navegación exitosa a: {screen_name}")
+                self.logger.info("Navegación exitosa a: %s", screen_name)
             else:
                 self.logger.error(f"Navegación falló a: {screen_name}")
                 
         except Exception as e:
             self.logger.error(f"Error en navegación a {screen_name}: {e}")
     
+    def go_back(self, fallback: str = None):
+        """Vuelve a la pantalla anterior, reanudándola si sigue en caché"""
+        try:
+            if not self.is_authenticated():
+                self.navigate_to("login")
+                return
+            
+            if not self.screen_manager.go_back(fallback):
+                self.logger.error("No se pudo volver a la pantalla anterior")
+                
+        except Exception as e:
+            self.logger.error(f"Error volviendo a la pantalla anterior: {e}")
+    
     def set_current_user(self, user: Dict[str, Any]):
         """Establece el usuario actual"""
         self.current_user = user
-        self.logger.info(f"Usuario establecido: {user.get('username')}")
+        self.logger.info("Usuario establecido: %s", user.get('username'))
     
     def get_current_user(self) -> Optional[Dict[str, Any]]:
         """Obtiene el usuario actual"""
@@ -111,10 +126,11 @@ class PerdidasMatanzasApp:
     def logout(self):
         """Cierra la sesión del usuario"""
         if self.current_user:
-            self.logger.info(f"Cerrando sesión: {self.current_user.get('username')}")
+            self.logger.info("Cerrando sesión: %s", self.current_user.get('username'))
             self.current_user = None
         
         self.screen_manager.clear_history()
+        self.screen_manager.clear_cache()
         self.navigate_to("login")
     
     def _show_error_screen(self, error_message: str):
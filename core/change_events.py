@@ -0,0 +1,217 @@
+"""
+Notificaciones de cambios de datos entre sesiones
+
+Cada escritura que pasa por ``execute_update`` (ver ``core.table_stats``)
+se convierte en un ``ChangeEvent`` con la tabla, la acción y los valores de
+``año``, ``mes`` y ``municipio_id`` que se pudieron leer de la sentencia
+(``None`` si no se conocen: el evento puede afectar a cualquier valor). Los
+eventos se agrupan durante ``CHANGE_EVENTS_DELAY_MS`` y se publican por
+tabla con ``page.pubsub`` de Flet (tema ``cambios:<tabla>``), de modo que
+una importación de cientos de filas llega a las demás sesiones como un
+único mensaje.
+
+Las pantallas no se suscriben directamente: declaran ``change_tables`` y
+``on_data_changed(events)`` y el ``ScreenManager`` las suscribe mientras
+están visibles. Por defecto una sesión no recibe sus propios cambios, que
+ya refresca la pantalla que los hizo.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from core.logger import get_logger
+
+TOPIC_PREFIX = "cambios:"
+# Tabla de los eventos que afectan a todas (restauraciones, importaciones completas)
+ALL_TABLES = "*"
+
+ChangeHandler = Callable[[List["ChangeEvent"]], None]
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Escritura en una tabla; ``None`` en un campo significa "cualquier valor\""""
+    table: str
+    action: str
+    año: Any = None
+    mes: Any = None
+    municipio_id: Any = None
+    # Sesión de Flet que hizo la escritura (None si fue fuera de una sesión)
+    origin: Optional[str] = None
+
+    def affects(self, año: Any = None, mes: Any = None, municipio_id: Any = None,
+                hasta_mes: bool = False) -> bool:
+        """Indica si el evento puede cambiar los datos de ese período/municipio
+
+        Con ``hasta_mes=True`` se comparan acumulados: afecta cualquier mes
+        del año hasta ``mes`` inclusive.
+        """
+        if not _same(self.año, año) or not _same(self.municipio_id, municipio_id):
+            return False
+        if self.mes is None or mes is None:
+            return True
+        return self.mes <= mes if hasta_mes else self.mes == mes
+
+
+def _same(event_value: Any, value: Any) -> bool:
+    return event_value is None or value is None or event_value == value
+
+
+class ChangeEventBus:
+    """Agrupa las escrituras y las publica a las sesiones suscritas"""
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.enabled = os.getenv("CHANGE_EVENTS", "true").lower() == "true"
+        self.delay = float(os.getenv("CHANGE_EVENTS_DELAY_MS", "300")) / 1000.0
+
+        self._lock = threading.Lock()
+        # Eventos pendientes de publicar, sin duplicados y en orden de llegada
+        self._pending: Dict[ChangeEvent, None] = {}
+        self._timer: Optional[threading.Timer] = None
+        # Cliente pubsub de la última sesión conectada (todas comparten el mismo hub)
+        self._pubsub = None
+        # (sesión, tabla) → [(handler, incluir propios)]
+        self._handlers: Dict[Tuple[str, str], List[Tuple[ChangeHandler, bool]]] = {}
+
+        from core.table_stats import get_table_stats
+        get_table_stats().add_listener(self._on_write)
+
+    # === PUBLICACIÓN ===
+
+    def attach(self, page):
+        """Registra el pubsub de una sesión para publicar escrituras hechas fuera de ella"""
+        pubsub = _pubsub_of(page)
+        if pubsub is not None:
+            self._pubsub = pubsub
+
+    def publish(self, event: ChangeEvent):
+        """Encola un evento; se publica al cerrar la ventana de agrupación"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending[event] = None
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Publica los eventos pendientes: un mensaje por tabla"""
+        with self._lock:
+            events, self._pending = list(self._pending), {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pubsub = self._pubsub
+        if not events:
+            return
+        if pubsub is None:
+            self.logger.debug("Sin sesiones conectadas: %s eventos de cambio descartados", len(events))
+            return
+
+        by_table: Dict[str, List[ChangeEvent]] = {}
+        for event in events:
+            by_table.setdefault(event.table, []).append(event)
+        for table, table_events in by_table.items():
+            try:
+                pubsub.send_all_on_topic(TOPIC_PREFIX + table, tuple(table_events))
+            except Exception as e:
+                self.logger.error(f"Error publicando cambios de {table}: {e}")
+
+    def _on_write(self, table: str, action: str, values: Dict[str, Any]):
+        page = _current_page()
+        if page is not None:
+            self.attach(page)
+        self.publish(ChangeEvent(
+            table=table,
+            action=action,
+            año=values.get("año"),
+            mes=values.get("mes"),
+            municipio_id=values.get("municipio_id"),
+            origin=getattr(page, "session_id", None)
+        ))
+
+    # === SUSCRIPCIÓN ===
+
+    def subscribe(self, page, tables: Iterable[str], handler: ChangeHandler, include_own: bool = False):
+        """Avisa a ``handler`` con la lista de eventos de ``tables`` de otras sesiones
+
+        Los eventos de ``ALL_TABLES`` (p. ej. una restauración) se entregan
+        siempre. ``handler`` se ejecuta en un hilo del ejecutor de Flet.
+        """
+        pubsub = _pubsub_of(page)
+        if pubsub is None:
+            return
+        self._pubsub = pubsub
+        session_id = page.session_id
+        for table in set(tables) | {ALL_TABLES}:
+            key = (session_id, table)
+            with self._lock:
+                handlers = self._handlers.setdefault(key, [])
+                first = not handlers
+                handlers.append((handler, include_own))
+            if first:
+                pubsub.subscribe_topic(TOPIC_PREFIX + table, self._dispatcher(session_id, table))
+
+    def unsubscribe(self, page, handler: ChangeHandler):
+        """Retira ``handler`` de todas las tablas a las que estaba suscrito"""
+        pubsub = _pubsub_of(page)
+        if pubsub is None:
+            return
+        session_id = page.session_id
+        with self._lock:
+            keys = [key for key in self._handlers if key[0] == session_id]
+            emptied = []
+            for key in keys:
+                self._handlers[key] = [entry for entry in self._handlers[key] if entry[0] != handler]
+                if not self._handlers[key]:
+                    del self._handlers[key]
+                    emptied.append(key[1])
+        for table in emptied:
+            try:
+                pubsub.unsubscribe_topic(TOPIC_PREFIX + table)
+            except Exception as e:
+                self.logger.debug("No se pudo cancelar la suscripción a %s: %s", table, e)
+
+    def _dispatcher(self, session_id: str, table: str) -> Callable[[str, Tuple[ChangeEvent, ...]], None]:
+        def dispatch(topic: str, events: Tuple[ChangeEvent, ...]):
+            with self._lock:
+                handlers = list(self._handlers.get((session_id, table), []))
+            others = [event for event in events if event.origin != session_id]
+            for handler, include_own in handlers:
+                selected = list(events) if include_own else others
+                if not selected:
+                    continue
+                try:
+                    handler(selected)
+                except Exception as e:
+                    self.logger.error(f"Error aplicando cambios de {table}: {e}")
+        return dispatch
+
+
+def _pubsub_of(page):
+    """Cliente pubsub de la página (None si no lo tiene, p. ej. en las pruebas de carga)"""
+    pubsub = getattr(page, "pubsub", None)
+    return pubsub if hasattr(pubsub, "send_all_on_topic") else None
+
+
+def _current_page():
+    """Página de Flet de la sesión que está ejecutando el código (o None)"""
+    try:
+        import flet as ft
+        return ft.context.page
+    except Exception:
+        return None
+
+
+# Instancia global del bus
+_change_bus = None
+
+def get_change_bus() -> ChangeEventBus:
+    """Obtiene el bus global de eventos de cambio"""
+    global _change_bus
+    if _change_bus is None:
+        _change_bus = ChangeEventBus()
+    return _change_bus
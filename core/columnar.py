@@ -0,0 +1,324 @@
+"""
+Tablas columnares en memoria respaldadas por NumPy
+
+Alternativa opcional a las listas de diccionarios de ``WebDatabaseManager``
+para las tablas de hechos. Cada columna es un array contiguo: enteros
+(``int16``/``int32``, con un centinela para NULL), reales ``float64`` (NULL
+como NaN) o texto codificado por diccionario (códigos ``int32`` más la lista
+de valores distintos, de modo que fechas y observaciones repetidas se guardan
+una sola vez).
+
+La tabla se comporta como una secuencia de filas ``dict`` (iterar, ``len``,
+índices, ``append``), así que el código existente sigue funcionando, y
+además ofrece ``mask`` y ``aggregate`` vectorizados: SUM, AVG, MIN, MAX y
+COUNT con filtros y GROUP BY mediante ``np.add.reduceat``.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy es opcional
+    np = None
+
+INT16 = "int16"
+INT32 = "int32"
+FLOAT = "float64"
+TEXT = "text"
+
+_INITIAL_CAPACITY = 64
+_ITER_BATCH = 4096
+
+
+def columnar_available() -> bool:
+    """Indica si NumPy está instalado"""
+    return np is not None
+
+
+class _Column:
+    """Array de una columna con capacidad creciente"""
+
+    __slots__ = ("kind", "data", "null", "values", "index")
+
+    def __init__(self, kind: str, capacity: int):
+        self.kind = kind
+        if kind == TEXT:
+            self.data = np.empty(capacity, dtype=np.int32)
+            self.values: List[Any] = []
+            self.index: Dict[Any, int] = {}
+            self.null = None
+        else:
+            self.data = np.empty(capacity, dtype=kind)
+            self.null = np.iinfo(kind).min if kind != FLOAT else None
+
+    def encode(self, value: Any) -> Any:
+        if self.kind == TEXT:
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            return code
+        if value is None:
+            return np.nan if self.kind == FLOAT else self.null
+        return value
+
+    def decode(self, data: "np.ndarray") -> List[Any]:
+        """Valores Python de un tramo de la columna"""
+        if self.kind == TEXT:
+            values = self.values
+            return [values[code] for code in data.tolist()]
+        items = data.tolist()
+        if self.kind == FLOAT:
+            return [None if value != value else value for value in items]
+        null = self.null
+        return [None if value == null else value for value in items]
+
+    def resize(self, capacity: int):
+        data = np.empty(capacity, dtype=self.data.dtype)
+        data[:len(self.data)] = self.data
+        self.data = data
+
+
+class ColumnarTable:
+    """Tabla de hechos en columnas NumPy con interfaz de lista de filas"""
+
+    def __init__(self, schema: Dict[str, str], rows: Iterable[Dict[str, Any]] = ()):
+        """
+        Args:
+            schema: Columna → tipo (``INT16``, ``INT32``, ``FLOAT`` o ``TEXT``).
+                Las columnas no declaradas que aparezcan en las filas se
+                guardan como ``TEXT``.
+            rows: Filas iniciales
+        """
+        if np is None:
+            raise RuntimeError("NumPy no está instalado: las tablas columnares no están disponibles")
+        self._size = 0
+        self._capacity = _INITIAL_CAPACITY
+        self._columns: Dict[str, _Column] = {name: _Column(kind, self._capacity) for name, kind in schema.items()}
+        self.extend(rows)
+
+    # === SECUENCIA DE FILAS ===
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows()
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.rows(np.arange(self._size)[item])
+        if item < 0:
+            item += self._size
+        if not 0 <= item < self._size:
+            raise IndexError("índice de fila fuera de rango")
+        return self.rows(np.array([item]))[0]
+
+    def __repr__(self) -> str:
+        return f"ColumnarTable({self._size} filas, {len(self._columns)} columnas)"
+
+    def append(self, row: Dict[str, Any]):
+        """Agrega una fila (amortizado O(1))"""
+        if self._size == self._capacity:
+            self._capacity *= 2
+            for column in self._columns.values():
+                column.resize(self._capacity)
+        for name in row:
+            if name not in self._columns:
+                self._add_text_column(name)
+        index = self._size
+        for name, column in self._columns.items():
+            column.data[index] = column.encode(row.get(name))
+        self._size += 1
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.append(row)
+
+    def iter_rows(self, mask: "np.ndarray" = None, names: Sequence[str] = None,
+                  batch_size: int = _ITER_BATCH) -> Iterator[Dict[str, Any]]:
+        """Filas (opcionalmente filtradas por ``mask``) decodificadas por lotes de ``batch_size``
+
+        Solo un lote está materializado como ``dict`` en cada momento.
+        """
+        names = list(names or self._columns)
+        indices = np.flatnonzero(mask) if mask is not None else None
+        total = self._size if indices is None else len(indices)
+        for start in range(0, total, max(1, batch_size)):
+            stop = min(start + max(1, batch_size), total)
+            batch = slice(start, stop) if indices is None else indices[start:stop]
+            columns = [self._columns[name].decode(self._columns[name].data[:self._size][batch]) for name in names]
+            for values in zip(*columns):
+                yield dict(zip(names, values))
+
+    def rows(self, indices: "np.ndarray", names: Sequence[str] = None) -> List[Dict[str, Any]]:
+        """Materializa como ``dict`` solo las filas indicadas (y las columnas ``names``)"""
+        names = list(names or self._columns)
+        columns = [self._columns[name].decode(self._columns[name].data[:self._size][indices]) for name in names]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    # === CONSULTAS VECTORIZADAS ===
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> "np.ndarray":
+        """Vista de la columna (códigos para las columnas de texto)"""
+        return self._columns[name].data[:self._size]
+
+    def values(self, name: str, mask: "np.ndarray" = None) -> List[Any]:
+        """Valores Python de una columna, opcionalmente filtrados"""
+        data = self.column(name)
+        return self._columns[name].decode(data if mask is None else data[mask])
+
+    def select(self, conditions: Sequence[Tuple[str, str, Any]] = (), names: Sequence[str] = None) -> List[Dict[str, Any]]:
+        """Filas que cumplen las condiciones (ver ``mask``), sin recorrer el resto"""
+        return self.rows(np.flatnonzero(self.mask(conditions)), names)
+
+    def mask(self, conditions: Sequence[Tuple[str, str, Any]] = ()) -> "np.ndarray":
+        """Máscara booleana de las filas que cumplen ``(columna, operador, valor)``
+
+        Operadores: ``=``, ``<``, ``<=``, ``>``, ``>=``. Igual que en SQL,
+        una columna NULL no cumple ninguna condición.
+        """
+        result = np.ones(self._size, dtype=bool)
+        for name, operator, value in conditions:
+            column = self._columns.get(name)
+            if column is None or value is None:
+                return np.zeros(self._size, dtype=bool)
+            data = self.column(name)
+            if column.kind == TEXT:
+                # Se compara sobre los valores distintos y se expande por código
+                matches = np.array([v is not None and _compare(v, operator, value) for v in column.values] or [False])
+                result &= matches[data]
+                continue
+            result &= _compare(data, operator, value)
+            if column.kind == FLOAT:
+                result &= ~np.isnan(data)
+            else:
+                result &= data != column.null
+        return result
+
+    def aggregate(self, aggregates: Dict[str, Tuple[str, Optional[str]]], mask: "np.ndarray" = None,
+                  group_by: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """Agrega las filas filtradas, opcionalmente agrupadas
+
+        Args:
+            aggregates: Alias → ``(función, columna)``; funciones ``count``,
+                ``sum``, ``avg``, ``min`` y ``max``. ``("count", None)`` es
+                ``COUNT(*)``; el resto ignora los NULL como en SQL.
+            mask: Filas a considerar (ver ``mask``)
+            group_by: Columnas de agrupación; sin ellas se devuelve una fila
+
+        Returns:
+            Una fila por grupo, ordenadas por las claves de agrupación
+        """
+        selected = np.flatnonzero(mask) if mask is not None else np.arange(self._size)
+
+        if group_by:
+            keys = [self.column(name)[selected] for name in group_by]
+            order = np.lexsort(keys[::-1])
+            selected = selected[order]
+            keys = [key[order] for key in keys]
+            if len(selected):
+                changed = np.zeros(len(selected), dtype=bool)
+                changed[0] = True
+                for key in keys:
+                    changed[1:] |= key[1:] != key[:-1]
+                starts = np.flatnonzero(changed)
+            else:
+                starts = np.array([], dtype=np.intp)
+            result = [{name: value for name, value in zip(group_by, group)}
+                      for group in zip(*(self._columns[name].decode(key[starts]) for name, key in zip(group_by, keys)))]
+        else:
+            starts = np.array([0], dtype=np.intp)
+            result = [{}]
+
+        counts = np.diff(np.append(starts, len(selected)))
+        for alias, (function, name) in aggregates.items():
+            values = self._aggregate_column(function.lower(), name, selected, starts, counts)
+            for row, value in zip(result, values):
+                row[alias] = value
+        return result
+
+    def _aggregate_column(self, function: str, name: Optional[str], selected: "np.ndarray",
+                          starts: "np.ndarray", counts: "np.ndarray") -> List[Any]:
+        if name is None:
+            if function != "count":
+                raise ValueError(f"{function.upper()}(*) no es válido")
+            return counts.tolist()
+
+        column = self._columns[name]
+        if column.kind == TEXT:
+            # Texto: solo COUNT/MIN/MAX, sobre los valores decodificados de cada grupo
+            values = column.decode(column.data[:self._size][selected])
+            groups = [values[start:start + count] for start, count in zip(starts.tolist(), counts.tolist())]
+            present = [[value for value in group if value is not None] for group in groups]
+            if function == "count":
+                return [len(group) for group in present]
+            if function in ("min", "max"):
+                pick = min if function == "min" else max
+                return [pick(group) if group else None for group in present]
+            raise ValueError(f"{function.upper()} no es válido sobre texto")
+
+        data = column.data[:self._size][selected].astype(np.float64)
+        if column.kind != FLOAT:
+            data[column.data[:self._size][selected] == column.null] = np.nan
+        valid = ~np.isnan(data)
+        if not len(data):
+            # reduceat no admite entradas vacías
+            return [0 if function == "count" else None for _ in starts]
+
+        present = np.add.reduceat(valid.astype(np.int64), starts)
+        if function == "count":
+            return present.tolist()
+        if function in ("sum", "avg"):
+            totals = np.add.reduceat(np.where(valid, data, 0.0), starts)
+            if function == "avg":
+                totals = totals / np.maximum(present, 1)
+        elif function == "min":
+            totals = np.fmin.reduceat(data, starts)
+        elif function == "max":
+            totals = np.fmax.reduceat(data, starts)
+        else:
+            raise ValueError(f"Función de agregación no soportada: {function}")
+
+        as_int = column.kind != FLOAT and function != "avg"
+        return [None if count == 0 else (int(value) if as_int else float(value))
+                for value, count in zip(totals.tolist(), present.tolist())]
+
+    # === MEMORIA ===
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada de las filas ocupadas (arrays y diccionarios de texto)"""
+        total = 0
+        for column in self._columns.values():
+            total += column.data.itemsize * self._size
+            if column.kind == TEXT:
+                total += sum(_text_size(value) for value in column.values) + 100 * len(column.values)
+        return total
+
+    def _add_text_column(self, name: str):
+        column = _Column(TEXT, self._capacity)
+        column.data[:self._size] = column.encode(None)
+        self._columns[name] = column
+
+
+def _compare(left, operator: str, right):
+    if operator == "=":
+        return left == right
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    if operator == ">=":
+        return left >= right
+    raise ValueError(f"Operador no soportado: {operator}")
+
+
+def _text_size(value: Any) -> int:
+    return len(value) + 49 if isinstance(value, str) else 16
@@ -1 +1,7 @@
- 
+"""
+Componentes reutilizables de la interfaz
+"""
+
+from .paged_table import PagedDataTable, list_page_source
+
+__all__ = ['PagedDataTable', 'list_page_source']
@@ -0,0 +1,257 @@
+"""
+Tabla paginada reutilizable
+
+Solo materializa como ``ft.DataRow`` las filas de la página visible. Las
+páginas se piden a una función ``fetch_page(despues_de, limite)`` que usa
+paginación por cursor (keyset): ``despues_de`` es el cursor de la última fila
+de la página anterior (o ``None`` para la primera). Se piden ``limite + 1``
+filas para saber si existe página siguiente, y la siguiente página se
+precarga en segundo plano mientras el usuario ve la actual.
+
+El tamaño de página y las opciones del selector salen de
+``PAGINATION_CONFIG`` (l_ventas/screens/tabs/config.py).
+"""
+
+import threading
+import flet as ft
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from core.logger import get_logger
+
+FetchPage = Callable[[Optional[Tuple], int], List[Any]]
+
+
+def _pagination_defaults() -> Tuple[int, List[int]]:
+    """Tamaño de página por defecto y opciones del selector"""
+    try:
+        from l_ventas.screens.tabs.config import get_default_page_size, get_page_size_options
+        return get_default_page_size(), get_page_size_options()
+    except Exception:
+        return 10, [5, 10, 20, 50, 100]
+
+
+def list_page_source(items: Sequence[Any]) -> Tuple[FetchPage, Callable[[Any], Tuple]]:
+    """Fuente de páginas sobre una lista ya cargada
+
+    El cursor es la posición de la fila, de modo que las pantallas con pocos
+    datos en memoria usan la misma tabla sin materializar todas las filas.
+    """
+    indexed = list(enumerate(items))
+
+    def fetch_page(despues_de: Optional[Tuple], limite: int) -> List[Any]:
+        start = despues_de[0] + 1 if despues_de else 0
+        return indexed[start:start + limite]
+
+    return fetch_page, lambda entry: (entry[0],)
+
+
+class PagedDataTable:
+    """DataTable con paginación por cursor y precarga de la página siguiente"""
+
+    def __init__(self, page: ft.Page, columns: List[ft.DataColumn], row_builder: Callable[[Any], ft.DataRow],
+                 page_size: int = None, empty_message: str = "Sin registros", **table_kwargs):
+        """
+        Args:
+            page: Página de Flet a actualizar
+            columns: Columnas de la tabla
+            row_builder: Construye el ``ft.DataRow`` de una fila
+            page_size: Filas por página (por defecto el de PAGINATION_CONFIG)
+            empty_message: Texto cuando no hay filas
+            **table_kwargs: Estilo adicional del ``ft.DataTable``
+        """
+        self.page = page
+        self.logger = get_logger(__name__)
+        self.row_builder = row_builder
+        self.empty_message = empty_message
+
+        default_size, self.page_size_options = _pagination_defaults()
+        self.page_size = page_size or default_size
+
+        self._fetch_page: Optional[FetchPage] = None
+        self._cursor_of: Callable[[Any], Tuple] = lambda item: item
+        self._unwrap = lambda item: item
+        self._cursors: List[Optional[Tuple]] = [None]  # cursor de inicio de cada página visitada
+        self._items: List[Any] = []
+        self._has_next = False
+        self._generation = 0
+        self._prefetch_lock = threading.Lock()
+        self._prefetched: Optional[Tuple[int, Optional[Tuple], int, List[Any]]] = None
+
+        self.data_table = ft.DataTable(columns=columns, rows=[], **table_kwargs)
+        self._status_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
+        self._prev_button = ft.IconButton(ft.Icons.CHEVRON_LEFT, tooltip="Página anterior",
+                                          on_click=lambda _: self.previous_page(), disabled=True)
+        self._next_button = ft.IconButton(ft.Icons.CHEVRON_RIGHT, tooltip="Página siguiente",
+                                          on_click=lambda _: self.next_page(), disabled=True)
+        self._size_dropdown = ft.Dropdown(
+            width=90,
+            value=str(self.page_size),
+            options=[ft.dropdown.Option(str(size)) for size in self.page_size_options],
+            on_change=self._on_page_size_change
+        )
+
+    # === API ===
+
+    def build(self) -> ft.Control:
+        """Construye la tabla con su barra de paginación"""
+        return ft.Column([
+            self.data_table,
+            ft.Row([
+                self._status_text,
+                ft.Container(expand=True),
+                ft.Text("Filas por página", size=12, color=ft.Colors.GREY_600),
+                self._size_dropdown,
+                self._prev_button,
+                self._next_button
+            ], vertical_alignment=ft.CrossAxisAlignment.CENTER)
+        ], spacing=5)
+
+    def set_source(self, fetch_page: FetchPage, cursor_of: Callable[[Any], Tuple]):
+        """Cambia la fuente de datos y muestra la primera página"""
+        self._fetch_page = fetch_page
+        self._cursor_of = cursor_of
+        self._unwrap = lambda item: item
+        self.first_page()
+
+    def set_items(self, items: Sequence[Any]):
+        """Muestra una lista ya cargada, paginada en memoria"""
+        fetch_page, cursor_of = list_page_source(items)
+        self._fetch_page = fetch_page
+        self._cursor_of = cursor_of
+        self._unwrap = lambda entry: entry[1]
+        self.first_page()
+
+    @property
+    def items(self) -> List[Any]:
+        """Filas de la página visible"""
+        return [self._unwrap(item) for item in self._items]
+
+    @property
+    def page_number(self) -> int:
+        return len(self._cursors)
+
+    @property
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def first_page(self):
+        self._cursors = [None]
+        self._show_page()
+
+    def next_page(self):
+        if not self._has_next or not self._items:
+            return
+        self._cursors.append(self._cursor_of(self._items[-1]))
+        self._show_page()
+
+    def previous_page(self):
+        if len(self._cursors) <= 1:
+            return
+        self._cursors.pop()
+        self._show_page()
+
+    def reload(self):
+        """Vuelve a consultar la página visible (p. ej. tras eliminar una fila)"""
+        self._show_page()
+
+    def refresh(self) -> int:
+        """Vuelve a consultar la página visible y reconstruye solo las filas que cambiaron
+
+        Las filas iguales a las mostradas conservan su ``ft.DataRow``, así que
+        la actualización solo envía al cliente las que cambiaron.
+
+        Returns:
+            Número de filas reconstruidas
+        """
+        previous = {self._cursor_of(item): (item, row) for item, row in zip(self._items, self.data_table.rows)}
+        self._generation += 1
+        rows = self._fetch(self._cursors[-1])
+        self._has_next = len(rows) > self.page_size
+        self._items = rows[:self.page_size]
+
+        rebuilt = 0
+        table_rows = []
+        for item in self._items:
+            old_item, old_row = previous.get(self._cursor_of(item), (None, None))
+            if old_row is not None and old_item == item:
+                table_rows.append(old_row)
+            else:
+                table_rows.append(self.row_builder(self._unwrap(item)))
+                rebuilt += 1
+        self.data_table.rows = table_rows
+        self._render_status()
+
+        if self._has_next:
+            self._start_prefetch(self._generation, self._cursor_of(self._items[-1]))
+        return rebuilt
+
+    # === INTERNOS ===
+
+    def _show_page(self):
+        self._generation += 1
+        cursor = self._cursors[-1]
+        rows = self._take_prefetched(cursor)
+        if rows is None:
+            rows = self._fetch(cursor)
+
+        self._has_next = len(rows) > self.page_size
+        self._items = rows[:self.page_size]
+        self._render()
+
+        if self._has_next:
+            self._start_prefetch(self._generation, self._cursor_of(self._items[-1]))
+
+    def _fetch(self, cursor: Optional[Tuple]) -> List[Any]:
+        if self._fetch_page is None:
+            return []
+        try:
+            return list(self._fetch_page(cursor, self.page_size + 1))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo página: {e}")
+            return []
+
+    def _render(self):
+        self.data_table.rows = [self.row_builder(self._unwrap(item)) for item in self._items]
+        self._render_status()
+
+    def _render_status(self):
+        first = (self.page_number - 1) * self.page_size
+        if self._items:
+            self._status_text.value = f"Página {self.page_number} · filas {first + 1}-{first + len(self._items)}"
+        else:
+            self._status_text.value = self.empty_message
+        self._prev_button.disabled = self.page_number <= 1
+        self._next_button.disabled = not self._has_next
+
+        try:
+            self.page.update()
+        except Exception:
+            # La tabla aún no está montada en la página
+            pass
+
+    def _start_prefetch(self, generation: int, cursor: Tuple):
+        def prefetch():
+            rows = self._fetch(cursor)
+            with self._prefetch_lock:
+                # Descartar si el usuario ya cambió de página o de fuente
+                if generation == self._generation:
+                    self._prefetched = (generation, cursor, self.page_size, rows)
+
+        threading.Thread(target=prefetch, daemon=True, name="paged-table-prefetch").start()
+
+    def _take_prefetched(self, cursor: Optional[Tuple]) -> Optional[List[Any]]:
+        with self._prefetch_lock:
+            prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None:
+            return None
+        generation, prefetched_cursor, page_size, rows = prefetched
+        # Solo es válida si procede de la página inmediatamente anterior
+        if generation == self._generation - 1 and prefetched_cursor == cursor and page_size == self.page_size:
+            return rows
+        return None
+
+    def _on_page_size_change(self, e):
+        try:
+            self.page_size = int(e.control.value)
+        except (TypeError, ValueError):
+            return
+        self.first_page()
@@ -3,17 +3,77 @@ Gestor de base de datos para aplicación web
 Usa datos simulados en memoria - SINCRONIZADO CON MIGRACIONES
 """
 
-from typing import List, Dict, Any, Optional
+import os
+import re
+from itertools import islice
+from typing import List, Dict, Any, Iterator, Optional, Callable
+from core.columnar import ColumnarTable, columnar_available, FLOAT, INT16, INT32, TEXT
 from core.logger import get_logger
+from core.query_ops import hash_aggregate, hash_index, hash_left_join
+from core.query_stats import instrumented
+from core.table_stats import get_table_stats
 import hashlib
 from datetime import datetime
 
+def _fact_table(name: str) -> property:
+    """Tabla de hechos que se guarda en columnas si el gestor usa modo columnar"""
+    def getter(self):
+        return self._tables[name]
+
+    def setter(self, rows):
+        if self.columnar and not isinstance(rows, ColumnarTable):
+            rows = ColumnarTable(self._COLUMNAR_SCHEMAS[name], rows)
+        self._tables[name] = rows
+
+    return property(getter, setter)
+
+
 class WebDatabaseManager:
     """Gestor de base de datos web con datos simulados - ESTRUCTURA REAL"""
     
-    def __init__(self):
+    _COMMON_COLUMNS = {"id": INT32, "municipio_id": INT16, "año": INT16, "mes": INT16,
+                       "usuario_id": INT32, "observaciones": TEXT}
+    _COLUMNAR_SCHEMAS = {
+        "energia_barra": {**_COMMON_COLUMNS, "energia_mwh": FLOAT,
+                          "fecha_registro": TEXT, "fecha_modificacion": TEXT},
+        "facturacion": {**_COMMON_COLUMNS, "facturacion_mayor": FLOAT, "facturacion_menor": FLOAT,
+                        "facturacion_total": FLOAT, "fecha_creacion": TEXT, "fecha_actualizacion": TEXT},
+        "planes_perdidas": {**_COMMON_COLUMNS, "plan_perdidas_pct": FLOAT,
+                            "fecha_creacion": TEXT, "fecha_modificacion": TEXT},
+        "calculos_perdidas": {**_COMMON_COLUMNS, "energia_barra_mwh": FLOAT, "facturacion_mayor": FLOAT,
+                              "facturacion_menor": FLOAT, "total_ventas": FLOAT,
+                              "perdidas_distribucion_mwh": FLOAT, "perdidas_pct": FLOAT,
+                              "plan_perdidas_pct": FLOAT, "energia_barra_acumulada": FLOAT,
+                              "perdidas_acumuladas_mwh": FLOAT, "perdidas_acumuladas_pct": FLOAT,
+                              "plan_perdidas_acumulado_pct": FLOAT, "fecha_calculo": TEXT,
+                              "fecha_actualizacion": TEXT}
+    }
+    
+    energia_barra = _fact_table("energia_barra")
+    facturacion = _fact_table("facturacion")
+    planes_perdidas = _fact_table("planes_perdidas")
+    calculos_perdidas = _fact_table("calculos_perdidas")
+    
+    def __init__(self, columnar: bool = None):
+        """
+        Args:
+            columnar: Guarda las tablas de hechos en columnas NumPy
+                (por defecto según DB_COLUMNAR)
+        """
         self.logger = get_logger(__name__)
         self._initialized = False
+        
+        if columnar is None:
+            columnar = os.getenv("DB_COLUMNAR", "false").lower() == "true"
+        if columnar and not columnar_available():
+            self.logger.warning("DB_COLUMNAR activo pero NumPy no está instalado: se usan listas")
+            columnar = False
+        self.columnar = columnar
+        self.iter_batch_size = int(os.getenv("DB_ITER_BATCH_SIZE", "500"))
+        self._tables: Dict[str, Any] = {}
+        for table in self._COLUMNAR_SCHEMAS:
+            setattr(self, table, [])
+        
         self._setup_sample_data()
     
     def _setup_sample_data(self):
@@ -134,7 +194,7 @@ class WebDatabaseManager:
         # Logs del sistema
         self.logs = []
         
-        self.logger.info(f"Datos de muestra inicializados: {len(self.energia_barra)} registros de energía, {len(self.facturacion)} registros de facturación")
+        self.logger.info("Datos de muestra inicializados: %s registros de energía, %s registros de facturación", len(self.energia_barra), len(self.facturacion))
 
     def initialize(self):
         """Inicializa la base de datos"""
@@ -147,6 +207,7 @@ class WebDatabaseManager:
         self.debug_data_status()
         self.logger.info("✅ Base de datos web inicializada con 14 municipios (incluye Varadero)")
     
+    @instrumented("query")
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Simula consultas SELECT"""
         try:
@@ -171,12 +232,16 @@ class WebDatabaseManager:
                     return [{"count": len([u for u in self.users if u["activo"] == 1])}]
                 return [{"count": len(self.users)}]
             
-            elif "select count(*) as count from energia_barra" in query_normalized:
+            elif "select count(*) as count from energia_barra" in query_normalized and " where " not in query_normalized:
                 return [{"count": len(self.energia_barra)}]
             
-            elif "select count(*) as count from facturacion" in query_normalized:
+            elif "select count(*) as count from facturacion" in query_normalized and " where " not in query_normalized:
                 return [{"count": len(self.facturacion)}]
             
+            # Energía o facturación con su municipio (listados, búsquedas y páginas por cursor)
+            elif self._is_scan_query(query_normalized):
+                return list(self._iter_scan_query(query_normalized, tuple(params or ())))
+            
             # Consultas de municipios
             elif "select * from municipios" in query_normalized:
                 if "where activo = 1" in query_normalized:
@@ -188,76 +253,34 @@ class WebDatabaseManager:
                     return [u for u in self.users if u["activo"] == 1]
                 return self.users
             
-            # Consultas de energía con JOIN
-            elif ("select eb.*, m.nombre as municipio_nombre, m.codigo as municipio_codigo" in query_normalized and
-                  "from energia_barra eb" in query_normalized and
-                  "join municipios m" in query_normalized):
-                
-                if params and len(params) >= 2:
-                    año, mes = params[0], params[1]
-                    result = []
-                    
-                    # Buscar registros que coincidan
-                    for registro in self.energia_barra:
-                        if registro.get("año") == año and registro.get("mes") == mes:
-                            # Buscar municipio correspondiente
-                            municipio = next((m for m in self.municipios if m["id"] == registro["municipio_id"]), None)
-                            if municipio:
-                                registro_completo = registro.copy()
-                                registro_completo["municipio_nombre"] = municipio["nombre"]
-                                registro_completo["municipio_codigo"] = municipio["codigo"]
-                                result.append(registro_completo)
-                    
-                    self.logger.info(f"Consulta JOIN energía: encontrados {len(result)} registros para {año}-{mes:02d}")
-                    return result
-                return []
-            
             # Consultas de energía simples
             elif "select * from energia_barra" in query_normalized:
                 if params and len(params) >= 2:
                     año, mes = params[0], params[1]
-                    result = [e for e in self.energia_barra if e.get("año") == año and e.get("mes") == mes]
-                    self.logger.info(f"Consulta simple energía: encontrados {len(result)} registros para {año}-{mes:02d}")
+                    result = self._where("energia_barra", año=año, mes=mes)
+                    self.logger.info("Consulta simple energía: encontrados %d registros para %s-%02d", len(result), año, mes)
                     return result
-                return self.energia_barra
+                return list(self.energia_barra)
             
-            # Consulta de resumen mensual - más específica
-            elif ("select" in query_normalized and 
-                  "count(*) as total_registros" in query_normalized and
-                  "from energia_barra" in query_normalized):
-                
-                if params and len(params) >= 2:
-                    año, mes = params[0], params[1]
-                    registros_periodo = [e for e in self.energia_barra if e.get("año") == año and e.get("mes") == mes]
-                    
-                    total_registros = len(registros_periodo)
-                    registros_completos = len([r for r in registros_periodo if r.get("energia_mwh") is not None and r.get("energia_mwh") > 0])
-                    total_energia = sum(r.get("energia_mwh", 0) for r in registros_periodo if r.get("energia_mwh") is not None)
-                    
-                    # Última actualización
-                    ultima_actualizacion = None
-                    if registros_periodo:
-                        fechas = [r.get("fecha_registro") for r in registros_periodo if r.get("fecha_registro")]
-                        if fechas:
-                            ultima_actualizacion = max(fechas)
-                    
-                    result = [{
-                        "total_registros": total_registros,
-                        "registros_completos": registros_completos,
-                        "total_energia": total_energia,
-                        "ultima_actualizacion": ultima_actualizacion
-                    }]
-                    
-                    self.logger.info(f"Consulta resumen: {total_registros} registros, {registros_completos} completos, {total_energia} MWh total")
-                    return result
-                return []
+            # Totales de una búsqueda sobre energía o facturación con su municipio
+            elif self._SCAN_AGGREGATE_QUERY.match(query_normalized):
+                return self._execute_scan_aggregate(query_normalized, tuple(params or ()))
+            
+            # LEFT JOIN por hash (municipios con los datos de cada tabla del período)
+            elif " left join " in query_normalized:
+                return self._execute_join_query(query_normalized, tuple(params or ()))
+            
+            # Agregaciones (COUNT/SUM/AVG/MIN/MAX, GROUP BY) sobre una tabla
+            elif (self._AGGREGATE_CALL.search(query_normalized) or " group by " in query_normalized) and \
+                    " join " not in query_normalized:
+                return self._execute_aggregate_query(query_normalized, tuple(params or ()))
             
             # Consultas de facturación
             elif "select * from facturacion" in query_normalized:
                 if params and len(params) >= 2:
                     año, mes = params[0], params[1]
-                    return [f for f in self.facturacion if f.get("año") == año and f.get("mes") == mes]
-                return self.facturacion
+                    return self._where("facturacion", año=año, mes=mes)
+                return list(self.facturacion)
             
             # Consultas de login
             elif ("select id, username, nombre_completo, email, tipo_usuario, activo from usuarios" in query_normalized and
@@ -277,7 +300,7 @@ class WebDatabaseManager:
                 registro_id = params[0]
                 
                 if "from energia_barra" in query_normalized:
-                    registro = next((e for e in self.energia_barra if e.get("id") == registro_id), None)
+                    registro = next(iter(self._where("energia_barra", id=registro_id)), None)
                     if registro:
                         # Agregar información del municipio
                         municipio = next((m for m in self.municipios if m["id"] == registro["municipio_id"]), None)
@@ -289,7 +312,7 @@ class WebDatabaseManager:
                     return []
                 
                 elif "from facturacion" in query_normalized:
-                    registro = next((f for f in self.facturacion if f.get("id") == registro_id), None)
+                    registro = next(iter(self._where("facturacion", id=registro_id)), None)
                     return [registro] if registro else []
             
             # Consultas con WHERE municipio_id, año, mes
@@ -299,10 +322,7 @@ class WebDatabaseManager:
                 municipio_id, año, mes = params[0], params[1], params[2]
                 
                 if "from energia_barra" in query_normalized:
-                    registro = next((e for e in self.energia_barra 
-                                   if e.get("municipio_id") == municipio_id and 
-                                      e.get("año") == año and 
-                                      e.get("mes") == mes), None)
+                    registro = next(iter(self._where("energia_barra", municipio_id=municipio_id, año=año, mes=mes)), None)
                     if registro:
                         # Agregar información del municipio
                         municipio = next((m for m in self.municipios if m["id"] == municipio_id), None)
@@ -314,12 +334,13 @@ class WebDatabaseManager:
                     return []
                 
                 elif "from facturacion" in query_normalized:
-                    registro = next((f for f in self.facturacion 
-                                   if f.get("municipio_id") == municipio_id and 
-                                      f.get("año") == año and 
-                                      f.get("mes") == mes), None)
+                    registro = next(iter(self._where("facturacion", municipio_id=municipio_id, año=año, mes=mes)), None)
                     return [registro] if registro else []
             
+            elif self._PROJECTION_QUERY.match(query_normalized):
+                return list(self._iter_projection_query(self._PROJECTION_QUERY.match(query_normalized),
+                                                        tuple(params or ())))
+            
             else:
                 self.logger.warning(f"Consulta no soportada: {query[:100]}...")
                 return []
@@ -330,15 +351,684 @@ class WebDatabaseManager:
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             return []
 
+    @instrumented("query")
+    def iter_query(self, query: str, params: tuple = None, batch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """Como ``execute_query`` pero entrega las filas de forma perezosa
+
+        Los recorridos de una tabla (listados de energía y facturación,
+        proyecciones de columnas y ``SELECT *`` sin filtros) se generan fila a
+        fila sin construir la lista del resultado; las tablas columnares se
+        decodifican por lotes de ``batch_size`` filas (por defecto
+        DB_ITER_BATCH_SIZE). El resto de consultas se resuelve con
+        ``execute_query`` y se recorre su resultado.
+        """
+        query_normalized = ' '.join(query.lower().split())
+        params = tuple(params or ())
+        batch_size = batch_size or self.iter_batch_size
+        projection = self._PROJECTION_QUERY.match(query_normalized)
+        full_table = re.fullmatch(r"select \* from (\w+)", query_normalized)
+
+        try:
+            if self._is_scan_query(query_normalized):
+                rows = self._iter_scan_query(query_normalized, params)
+            elif projection:
+                rows = self._iter_projection_query(projection, params, batch_size)
+            elif full_table and full_table.group(1) in self._tables:
+                table = self._tables[full_table.group(1)]
+                if isinstance(table, ColumnarTable):
+                    rows = table.iter_rows(batch_size=batch_size)
+                else:
+                    # Copias: el llamador puede modificar las filas sin tocar la tabla
+                    rows = (dict(row) for row in table)
+            else:
+                # Sin instrumentar de nuevo: la consulta ya se registra aquí
+                rows = self.execute_query.__wrapped__(self, query, params)
+            yield from rows
+        except Exception as e:
+            self.logger.error(f"Error recorriendo consulta: {e}")
+            raise
+
+    # Condiciones WHERE soportadas en consultas paginadas
+    _ROW_VALUE_CONDITION = re.compile(r"^\(([\w., ]+)\) (<|>) \(([?, ]+)\)$")
+    _COLUMN_CONDITION = re.compile(r"^(?:\w+\.)?(\w+) (=|>=|<=|<|>) \?$")
+    _LITERAL_CONDITION = re.compile(r"^(?:\w+\.)?(\w+) ?(=|!=|<>|>=|<=|<|>) ?(-?\d+(?:\.\d+)?|'[^']*')$")
+    _NULL_CONDITION = re.compile(r"^(?:\w+\.)?(\w+) is (not )?null$")
+    _LIKE_CONDITION = re.compile(r"^lower\((?:\w+\.)?(\w+)\) like \?$")
+    _OR_CONDITION = re.compile(r"^\((.+ or .+)\)$")
+
+    _SCAN_QUERY = re.compile(
+        r"^select (\w+)\.\*, m\.nombre as municipio_nombre\b.* from (energia_barra|facturacion) \1 "
+        r"(?:left )?join municipios m\b"
+    )
+
+    def _is_scan_query(self, query_normalized: str) -> bool:
+        """Consultas que resuelve ``_iter_scan_query``"""
+        if " limit ?" in query_normalized and re.search(r"from (energia_barra|facturacion)\b", query_normalized):
+            return True
+        return bool(self._SCAN_QUERY.match(query_normalized))
+
+    def _iter_scan_query(self, query_normalized: str, params: tuple) -> Iterator[Dict[str, Any]]:
+        """Recorre energía o facturación con WHERE, ORDER BY y LIMIT ? opcionales
+
+        Cada fila se completa con ``municipio_nombre``, ``municipio_codigo`` y
+        ``usuario_nombre`` (los JOIN con municipios y usuarios). Soporta
+        igualdades y rangos por columna, ``LOWER(m.nombre) LIKE ?`` (también
+        ``m.codigo`` y alternativas entre paréntesis unidas por OR) y la
+        comparación por valor de fila ``(año, mes, municipio_id) < (?, ?, ?)``
+        que usa la paginación por cursor. Sin ORDER BY las filas se generan
+        a medida que se recorren; con ORDER BY se ordenan las que cumplen el
+        filtro antes de entregarlas.
+        """
+        table = "energia_barra" if re.search(r"from energia_barra\b", query_normalized) else "facturacion"
+        municipios = {m["id"]: m for m in self.municipios}
+        usuarios = {u["id"]: u for u in self.users}
+
+        where = re.search(r" where (.+?)(?: order by | limit \?|$)", query_normalized)
+        order = re.search(r" order by (.+?)(?: limit \?|$)", query_normalized)
+        conditions = self._split_conditions(where.group(1) if where else None)
+        values = list(params)
+        limit = int(values.pop()) if " limit ?" in query_normalized else None
+
+        filters = self._build_filters(conditions, values)
+        if filters is None:
+            return
+
+        def enriched():
+            for registro in getattr(self, table):
+                municipio = municipios.get(registro.get("municipio_id"))
+                if table == "energia_barra" and municipio is None:
+                    continue  # INNER JOIN con municipios
+                fila = dict(registro)
+                fila["municipio_nombre"] = municipio["nombre"] if municipio else None
+                fila["municipio_codigo"] = municipio["codigo"] if municipio else None
+                usuario = usuarios.get(registro.get("usuario_id"))
+                fila["usuario_nombre"] = usuario["nombre_completo"] if usuario else None
+                # Las columnas de municipios (m.nombre) se evalúan con su alias
+                fila["nombre"] = fila["municipio_nombre"]
+                fila["codigo"] = fila["municipio_codigo"]
+                if all(check(fila) for check in filters):
+                    yield fila
+
+        rows = enriched()
+        if order:
+            rows = list(rows)
+            self._sort_rows(rows, order.group(1))
+        if limit is not None:
+            rows = islice(rows, limit)
+        for fila in rows:
+            fila.pop("nombre", None)
+            fila.pop("codigo", None)
+            yield fila
+
+    _SCAN_AGGREGATE_QUERY = re.compile(
+        r"^select ((?:(?!\bfrom\b).)*\b(?:count|sum|avg|min|max)\((?:(?!\bfrom\b).)*) "
+        r"from (energia_barra|facturacion) (\w+) join municipios m on [\w.]+ = [\w.]+(?: where (.+))?$"
+    )
+
+    def _execute_scan_aggregate(self, query_normalized: str, params: tuple) -> List[Dict[str, Any]]:
+        """Agregados sin GROUP BY sobre las filas de ``_iter_scan_query``
+
+        Resume una búsqueda (``SELECT COUNT(*), SUM(eb.energia_mwh) ... FROM
+        energia_barra eb JOIN municipios m ON ... WHERE ...``) con los mismos
+        filtros que su listado paginado, en una pasada y sin guardar las filas.
+        """
+        match = self._SCAN_AGGREGATE_QUERY.match(query_normalized)
+        values = list(params)
+        aggregates, outputs = {}, []
+        try:
+            for item in self._split_top_level(match.group(1)):
+                expression, alias = self._SELECT_ITEM.match(item).groups()
+                outputs.append((alias or expression, self._compile_output(expression, values, aggregates, [])))
+        except (ValueError, AttributeError) as e:
+            self.logger.warning(f"Agregación no soportada ({e}): {query_normalized[:100]}...")
+            return []
+        rows = self._iter_scan_query(query_normalized, tuple(values))
+        result = hash_aggregate(rows, [], {name: spec[:2] for name, spec in aggregates.items()})
+        return [{name: value_of(row) for name, value_of in outputs} for row in result]
+
+    # SELECT de columnas simples sobre una sola tabla, sin JOIN ni funciones
+    _PROJECTION_QUERY = re.compile(
+        r"^select ([\w, ]+) from (energia_barra|facturacion|planes_perdidas)"
+        r"(?: where (.+?))?(?: order by ([\w., ]+))?$"
+    )
+
+    def _iter_projection_query(self, match: re.Match, params: tuple,
+                               batch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """Evalúa ``SELECT col1, col2 FROM tabla [WHERE ...] [ORDER BY ...]``
+
+        Permite a los servicios leer un año completo de una tabla en una sola
+        consulta en lugar de una consulta por municipio y mes. Sin ORDER BY
+        las filas se generan de forma perezosa.
+        """
+        columns = [c.strip() for c in match.group(1).split(",")]
+        conditions = self._split_conditions(match.group(3))
+        table = getattr(self, match.group(2), [])
+        
+        simple = self._simple_conditions(conditions, list(params)) if isinstance(table, ColumnarTable) else None
+        if simple is not None:
+            # Filtro vectorizado: solo se materializan las filas seleccionadas
+            rows = table.iter_rows(table.mask(simple), columns, batch_size or self.iter_batch_size)
+        else:
+            filters = self._build_filters(conditions, list(params))
+            if filters is None:
+                return
+            rows = (
+                {column: registro.get(column) for column in columns}
+                for registro in table
+                if all(check(registro) for check in filters)
+            )
+        
+        if match.group(4):
+            rows = list(rows)
+            self._sort_rows(rows, match.group(4))
+        yield from rows
+
+    def _build_filters(self, conditions: List[str], values: list) -> Optional[List[Callable[[Dict], bool]]]:
+        """Convierte condiciones WHERE en filtros; ``None`` si alguna no está soportada"""
+        filters = []
+        for condition in conditions:
+            if condition == "1=1":
+                continue
+            match = self._ROW_VALUE_CONDITION.match(condition)
+            if match:
+                columns = [c.strip().split(".")[-1] for c in match.group(1).split(",")]
+                cursor = tuple(values[:len(columns)])
+                del values[:len(columns)]
+                if match.group(2) == "<":
+                    filters.append(lambda r, cols=columns, cur=cursor: tuple(r.get(c) for c in cols) < cur)
+                else:
+                    filters.append(lambda r, cols=columns, cur=cursor: tuple(r.get(c) for c in cols) > cur)
+                continue
+            match = self._OR_CONDITION.match(condition)
+            if match and self._balanced(match.group(1)):
+                alternatives = [self._build_filters([part.strip()], values) for part in match.group(1).split(" or ")]
+                if any(alternative is None for alternative in alternatives):
+                    return None
+                filters.append(lambda r, alts=alternatives: any(all(check(r) for check in alt) for alt in alts))
+                continue
+            match = self._LIKE_CONDITION.match(condition)
+            if match:
+                text = str(values.pop(0)).strip("%").lower()
+                filters.append(lambda r, col=match.group(1), t=text: t in str(r.get(col) or "").lower())
+                continue
+            match = self._NULL_CONDITION.match(condition)
+            if match:
+                if match.group(2):
+                    filters.append(lambda r, col=match.group(1): r.get(col) is not None)
+                else:
+                    filters.append(lambda r, col=match.group(1): r.get(col) is None)
+                continue
+            simple = self._simple_condition(condition, values)
+            if simple is None:
+                self.logger.warning(f"Condición no soportada: {condition}")
+                return None
+            column, operator, value = simple
+            filters.append(lambda r, col=column, op=operator, v=value: self._compare(r.get(col), op, v))
+        return filters
+
+    def _simple_condition(self, condition: str, values: list) -> Optional[tuple]:
+        """``columna op ?`` o ``columna op literal`` como ``(columna, op, valor)``"""
+        match = self._COLUMN_CONDITION.match(condition)
+        if match:
+            return match.group(1), match.group(2), values.pop(0)
+        match = self._LITERAL_CONDITION.match(condition)
+        if match and match.group(2) in ("=", ">=", "<=", "<", ">"):
+            return match.group(1), match.group(2), self._literal(match.group(3))
+        return None
+
+    def _simple_conditions(self, conditions: List[str], values: list) -> Optional[List[tuple]]:
+        """Todas las condiciones como tuplas para filtrar en columnas; ``None`` si alguna no es simple"""
+        result = []
+        for condition in conditions:
+            if condition == "1=1":
+                continue
+            simple = self._simple_condition(condition, values)
+            if simple is None:
+                return None
+            result.append(simple)
+        return result if not values else None
+
+    _BETWEEN_CONDITION = re.compile(r"^(.+?) between (.+)$")
+
+    def _split_conditions(self, text: Optional[str]) -> List[str]:
+        """Condiciones unidas por AND; ``x BETWEEN a AND b`` se expande a ``x >= a`` y ``x <= b``"""
+        parts = [c.strip() for c in text.split(" and ")] if text else []
+        conditions, index = [], 0
+        while index < len(parts):
+            between = self._BETWEEN_CONDITION.match(parts[index])
+            if between and index + 1 < len(parts):
+                column, low = between.groups()
+                conditions += [f"{column} >= {low}", f"{column} <= {parts[index + 1]}"]
+                index += 2
+            else:
+                conditions.append(parts[index])
+                index += 1
+        return conditions
+
+    # === AGREGACIONES ===
+
+    _AGGREGATE_CALL = re.compile(r"\b(?:count|sum|avg|min|max)\(")
+    _AGGREGATE_QUERY = re.compile(
+        r"^select (distinct )?(.+?) from (\w+)(?: (?!where\b|group\b|order\b)(?:as )?\w+)?"
+        r"(?: where (.+?))?(?: group by (.+?))?(?: order by (.+?))?$"
+    )
+    _AGGREGATE_EXPRESSION = re.compile(r"^(count|sum|avg|min|max)\((.+)\)$")
+    _COALESCE_EXPRESSION = re.compile(r"^coalesce\((.+), (-?\d+(?:\.\d+)?|'[^']*')\)$")
+    _CASE_EXPRESSION = re.compile(r"^case when (.+?) then (.+?)(?: else (.+?))? end$")
+    _SELECT_ITEM = re.compile(r"^(.+?)(?: as (\w+))?$")
+    _TABLE_ATTRIBUTES = {"usuarios": "users"}
+
+    def _execute_aggregate_query(self, query_normalized: str, params: tuple) -> List[Dict[str, Any]]:
+        """Agregación genérica por hash: COUNT, SUM, AVG, MIN, MAX y conteos condicionales
+
+        Soporta ``SELECT [DISTINCT] claves, agregados FROM tabla [WHERE ...]
+        [GROUP BY ...] [ORDER BY ...]`` sobre una sola tabla, en una pasada.
+        Los agregados aceptan una columna, ``*``, aritmética simple entre
+        columnas o ``CASE WHEN cond THEN valor [ELSE valor] END``, y pueden ir
+        dentro de ``COALESCE(agregado, literal)``. Con tablas columnares el
+        filtro (y los agregados simples) se vectorizan.
+        """
+        match = self._AGGREGATE_QUERY.match(query_normalized)
+        table_name = match and self._TABLE_ATTRIBUTES.get(match.group(3), match.group(3))
+        if not match or not hasattr(self, table_name):
+            self.logger.warning(f"Agregación no soportada: {query_normalized[:100]}...")
+            return []
+        table = getattr(self, table_name)
+        values = list(params)
+        group_by = [c.strip().split(".")[-1] for c in match.group(5).split(",")] if match.group(5) else []
+
+        # La lista SELECT consume sus parámetros antes que el WHERE
+        aggregates, outputs = {}, []
+        try:
+            for item in self._split_top_level(match.group(2)):
+                expression, alias = self._SELECT_ITEM.match(item).groups()
+                outputs.append((alias or expression, self._compile_output(expression, values, aggregates, group_by)))
+        except (ValueError, AttributeError) as e:
+            self.logger.warning(f"Agregación no soportada ({e}): {query_normalized[:100]}...")
+            return []
+
+        conditions = self._split_conditions(match.group(4))
+        result = None
+        if isinstance(table, ColumnarTable):
+            simple = self._simple_conditions(conditions, list(values))
+            if simple is not None:
+                mask = table.mask(simple)
+                plain = all(argument == "*" or argument in table.columns for _, _, argument in aggregates.values())
+                if plain and all(column in table.columns for column in group_by):
+                    result = table.aggregate({name: (function, None if argument == "*" else argument)
+                                              for name, (function, _, argument) in aggregates.items()},
+                                             mask, group_by)
+                else:
+                    rows = table.rows(mask.nonzero()[0])
+                    result = hash_aggregate(rows, group_by, {name: spec[:2] for name, spec in aggregates.items()})
+
+        if result is None:
+            filters = self._build_filters(conditions, values)
+            if filters is None:
+                return []
+            rows = (row for row in table if all(check(row) for check in filters))
+            result = hash_aggregate(rows, group_by, {name: spec[:2] for name, spec in aggregates.items()})
+
+        result = [{name: value_of(row) for name, value_of in outputs} for row in result]
+        if match.group(6):
+            self._sort_rows(result, match.group(6))
+        return result
+
+    # === JOINS ===
+
+    _JOIN_KEYWORDS = (" from ", " left join ", " where ", " group by ", " order by ")
+    _TABLE_SOURCE = re.compile(r"^(\w+)(?: (?:as )?(\w+))?$")
+    _JOIN_SOURCE = re.compile(r"^(\w+|\(select .+\)) (?:as )?(\w+) on (.+)$")
+    _JOIN_KEY = re.compile(r"^(\w+)\.(\w+) = (\w+)\.(\w+)$")
+    _QUALIFIER = re.compile(r"\b([a-z_]\w*)\.[a-z_]")
+
+    def _execute_join_query(self, query_normalized: str, params: tuple) -> List[Dict[str, Any]]:
+        """LEFT JOIN por hash de una tabla base con tablas o subconsultas
+
+        Soporta ``SELECT ... FROM tabla alias LEFT JOIN fuente alias ON
+        a.col = alias.col [AND filtros] ... [WHERE ...] [GROUP BY ...]
+        [ORDER BY ...]``. Cada fuente es una tabla o una subconsulta entre
+        paréntesis (p. ej. una agregación por municipio); se filtra con las
+        condiciones de su ON y se indexa por la clave de unión, así que el
+        coste es lineal en el número de filas. Las columnas deben ir
+        calificadas con el alias de su tabla.
+        """
+        clauses = self._split_clauses(query_normalized)
+        source = self._TABLE_SOURCE.match(clauses.get(" from ", [""])[0])
+        if not clauses.get("select") or not source or len(clauses.get(" where ", ())) > 1:
+            self.logger.warning(f"JOIN no soportado: {query_normalized[:100]}...")
+            return []
+        select = clauses["select"][0]
+        base_name, base_alias = source.group(1), source.group(2) or source.group(1)
+        group_by = [c.strip() for c in clauses[" group by "][0].split(",")] if " group by " in clauses else []
+        aggregated = bool(group_by) or bool(self._AGGREGATE_CALL.search(select))
+        values = list(params)
+
+        # Parámetros en orden de aparición: SELECT, cada JOIN y por último WHERE
+        aggregates, outputs = {}, []
+        try:
+            if select.startswith("distinct "):
+                raise ValueError("SELECT DISTINCT")
+            for item in self._split_top_level(select):
+                expression, alias = self._SELECT_ITEM.match(item).groups()
+                if aggregated:
+                    value_of = self._compile_output(expression, values, aggregates, group_by, qualified=True)
+                else:
+                    value_of = self._compile_expression(expression, values, qualified=True)
+                outputs.append((alias or expression, value_of))
+
+            joins = [self._join_index(join, values) for join in clauses.get(" left join ", [])]
+            base = self._filtered_rows(base_name, base_alias, clauses.get(" where ", [None])[0], values)
+        except (ValueError, AttributeError) as e:
+            self.logger.warning(f"JOIN no soportado ({e}): {query_normalized[:100]}...")
+            return []
+
+        rows = ({f"{base_alias}.{column}": value for column, value in row.items()} for row in base)
+        for key, index in joins:
+            rows = hash_left_join(rows, key, index)
+        if aggregated:
+            rows = hash_aggregate(rows, group_by, {name: spec[:2] for name, spec in aggregates.items()})
+
+        # ORDER BY puede usar alias del SELECT o columnas calificadas
+        pairs = [(row, {name: value_of(row) for name, value_of in outputs}) for row in rows]
+        if " order by " in clauses:
+            names = {name for name, _ in outputs}
+            self._sort_rows(pairs, clauses[" order by "][0],
+                            lambda pair, term: pair[1][term] if term in names else pair[0].get(term))
+        return [output for _, output in pairs]
+
+    def _split_clauses(self, query: str) -> Dict[str, List[str]]:
+        """Cláusulas de una consulta (``select``, `` from ``, `` left join ``...) fuera de paréntesis"""
+        clauses: Dict[str, List[str]] = {}
+        keyword, start, depth = "select", len("select "), 0
+        if not query.startswith("select "):
+            return clauses
+        index = start
+        while index < len(query):
+            char = query[index]
+            depth += 1 if char == "(" else -1 if char == ")" else 0
+            found = depth == 0 and next((k for k in self._JOIN_KEYWORDS if query.startswith(k, index)), None)
+            if found:
+                clauses.setdefault(keyword, []).append(query[start:index].strip())
+                keyword, start = found, index + len(found)
+                index = start
+                continue
+            index += 1
+        clauses.setdefault(keyword, []).append(query[start:].strip())
+        return clauses
+
+    def _join_index(self, join: str, values: list) -> tuple:
+        """Filas del lado derecho de un LEFT JOIN indexadas por su clave
+
+        Returns:
+            ``(clave calificada del lado izquierdo, índice hash del lado derecho)``
+        """
+        match = self._JOIN_SOURCE.match(join)
+        if not match:
+            raise ValueError(f"JOIN {join[:40]}")
+        source, alias, on = match.groups()
+        conditions = self._split_conditions(on)
+        keys = [c for c in conditions if self._JOIN_KEY.match(c)]
+        if len(keys) != 1:
+            raise ValueError(f"se espera una igualdad de claves en el ON de {alias}")
+        left_alias, left_column, right_alias, right_column = self._JOIN_KEY.match(keys[0]).groups()
+        if left_alias == alias:
+            left_alias, left_column, right_alias, right_column = right_alias, right_column, left_alias, left_column
+        if right_alias != alias:
+            raise ValueError(f"la clave del ON no usa el alias {alias}")
+        filters = " and ".join(c for c in conditions if c != keys[0]) or None
+
+        if source.startswith("("):
+            subquery = source[1:-1].strip()
+            own = values[:subquery.count("?")]
+            del values[:len(own)]
+            rows = self.execute_query(subquery, tuple(own))
+            rows = self._filtered_rows(rows, alias, filters, values)
+        else:
+            rows = self._filtered_rows(source, alias, filters, values)
+
+        index = hash_index(({f"{alias}.{column}": value for column, value in row.items()} for row in rows),
+                           f"{alias}.{right_column}")
+        return f"{left_alias}.{left_column}", index
+
+    def _filtered_rows(self, source, alias: str, where: Optional[str], values: list) -> List[Dict[str, Any]]:
+        """Filas de una tabla (o lista) que cumplen ``where``; sus condiciones solo pueden usar ``alias``
+
+        Consume de ``values`` los parámetros de ``where``. Con tablas
+        columnares el filtro se vectoriza.
+        """
+        conditions = self._split_conditions(where)
+        if any(qualifier != alias for condition in conditions for qualifier in self._QUALIFIER.findall(condition)):
+            raise ValueError(f"condición sobre otra tabla en {where}")
+        own = values[:sum(condition.count("?") for condition in conditions)]
+        del values[:len(own)]
+
+        if isinstance(source, str):
+            table = getattr(self, self._TABLE_ATTRIBUTES.get(source, source), None)
+            if table is None:
+                raise ValueError(f"tabla desconocida {source}")
+        else:
+            table = source
+        if isinstance(table, ColumnarTable):
+            simple = self._simple_conditions(conditions, list(own))
+            if simple is not None:
+                return table.select(simple)
+        filters = self._build_filters(conditions, list(own))
+        if filters is None:
+            raise ValueError(f"condición no soportada en {where}")
+        return [row for row in table if all(check(row) for check in filters)]
+
+    def _compile_output(self, expression: str, values: list, aggregates: Dict[str, tuple],
+                        group_by: List[str], qualified: bool = False) -> Callable[[Dict[str, Any]], Any]:
+        """Función sobre la fila agregada para un elemento del SELECT
+
+        Registra en ``aggregates`` los agregados que aparecen en la expresión
+        (p. ej. ``COALESCE(SUM(a), 0) / 1000.0`` o ``SUM(a) - SUM(b)``).
+        """
+        expression = expression.strip()
+        coalesce = self._COALESCE_EXPRESSION.match(expression)
+        if coalesce and self._balanced(coalesce.group(1)):
+            inner = self._compile_output(coalesce.group(1), values, aggregates, group_by, qualified)
+            default = self._literal(coalesce.group(2))
+            return lambda row: default if inner(row) is None else inner(row)
+
+        for operators in (("+", "-"), ("*", "/")):
+            parts = self._split_top_level(expression, operators)
+            if len(parts) > 1:
+                operands = [self._compile_output(part, values, aggregates, group_by, qualified)
+                            for part in parts[::2]]
+                symbols = parts[1::2]
+                return lambda row: self._arithmetic(row, operands, symbols)
+
+        aggregate = self._AGGREGATE_EXPRESSION.match(expression)
+        if aggregate and self._balanced(aggregate.group(2)):
+            argument = aggregate.group(2).strip()
+            if argument.startswith("distinct "):
+                raise ValueError("DISTINCT dentro de agregados")
+            if expression not in aggregates:
+                value_of = None if argument == "*" else self._compile_expression(argument, values, qualified)
+                aggregates[expression] = (aggregate.group(1), value_of, argument)
+            return lambda row: row[expression]
+
+        if expression.startswith("(") and expression.endswith(")") and self._balanced(expression[1:-1]):
+            return self._compile_output(expression[1:-1], values, aggregates, group_by, qualified)
+        if re.fullmatch(r"-?\d+(?:\.\d+)?|'[^']*'|null", expression):
+            value = self._literal(expression)
+            return lambda row: value
+        column = expression if qualified else expression.split(".")[-1]
+        if re.fullmatch(r"(?:\w+\.)?\w+", expression) and column in group_by:
+            return lambda row: row[column]
+        raise ValueError(f"expresión fuera del GROUP BY: {expression}")
+
+    def _compile_expression(self, expression: str, values: list,
+                            qualified: bool = False) -> Callable[[Dict[str, Any]], Any]:
+        """Función fila → valor para columnas, literales, ``?``, aritmética, COALESCE y CASE WHEN
+
+        Con ``qualified`` las columnas se leen con su alias (``eb.energia_mwh``),
+        como en las filas combinadas de un JOIN.
+        """
+        expression = expression.strip()
+        coalesce = self._COALESCE_EXPRESSION.match(expression)
+        if coalesce and self._balanced(coalesce.group(1)):
+            inner = self._compile_expression(coalesce.group(1), values, qualified)
+            default = self._literal(coalesce.group(2))
+            return lambda row: default if inner(row) is None else inner(row)
+
+        case = self._CASE_EXPRESSION.match(expression)
+        if case:
+            if qualified:
+                raise ValueError("CASE WHEN en consultas con JOIN")
+            filters = self._build_filters(self._split_conditions(case.group(1)), values)
+            if filters is None:
+                raise ValueError(f"condición no soportada: {case.group(1)}")
+            then = self._compile_expression(case.group(2), values)
+            otherwise = self._compile_expression(case.group(3), values) if case.group(3) else (lambda row: None)
+            return lambda row: then(row) if all(check(row) for check in filters) else otherwise(row)
+
+        for operators in (("+", "-"), ("*", "/")):
+            parts = self._split_top_level(expression, operators)
+            if len(parts) > 1:
+                # Evaluación de izquierda a derecha con la precedencia habitual
+                operands = [self._compile_expression(part, values, qualified) for part in parts[::2]]
+                symbols = parts[1::2]
+                return lambda row: self._arithmetic(row, operands, symbols)
+
+        if expression.startswith("(") and expression.endswith(")") and self._balanced(expression[1:-1]):
+            return self._compile_expression(expression[1:-1], values, qualified)
+        if expression == "?":
+            value = values.pop(0)
+            return lambda row: value
+        if re.fullmatch(r"-?\d+(?:\.\d+)?|'[^']*'|null", expression):
+            value = self._literal(expression)
+            return lambda row: value
+        if re.fullmatch(r"(?:\w+\.)?\w+", expression):
+            column = expression if qualified else expression.split(".")[-1]
+            return lambda row: row.get(column)
+        raise ValueError(f"expresión no soportada: {expression}")
+
+    @staticmethod
+    def _arithmetic(row: Dict[str, Any], operands: list, symbols: list) -> Any:
+        result = operands[0](row)
+        for symbol, operand in zip(symbols, operands[1:]):
+            value = operand(row)
+            if result is None or value is None:
+                return None  # NULL se propaga como en SQL
+            if symbol == "+":
+                result += value
+            elif symbol == "-":
+                result -= value
+            elif symbol == "*":
+                result *= value
+            else:
+                result = result / value if value else None
+        return result
+
+    @staticmethod
+    def _split_top_level(text: str, separators: tuple = (",",)) -> List[str]:
+        """Parte por separadores fuera de paréntesis; los operadores se conservan en la lista"""
+        parts, depth, start = [], 0, 0
+        index = 0
+        while index < len(text):
+            char = text[index]
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif depth == 0 and char in separators and (char == "," or text[index - 1:index] == " "):
+                parts.append(text[start:index].strip())
+                if char != ",":
+                    parts.append(char)
+                start = index + 1
+            index += 1
+        parts.append(text[start:].strip())
+        return parts
+
+    @staticmethod
+    def _balanced(text: str) -> bool:
+        depth = 0
+        for char in text:
+            depth += 1 if char == "(" else -1 if char == ")" else 0
+            if depth < 0:
+                return False
+        return depth == 0
+
+    @staticmethod
+    def _literal(text: str) -> Any:
+        if text == "null":
+            return None
+        if text.startswith("'"):
+            return text[1:-1]
+        return float(text) if "." in text else int(text)
+
+    @staticmethod
+    def _sort_rows(rows: List[Any], order_by: str, value_of: Callable[[Any, str], Any] = None):
+        """Ordena en sitio; ``value_of(fila, expresión)`` resuelve cada clave (por defecto la columna sin alias)"""
+        # Ordenación estable: de la última clave a la primera
+        for term in reversed([t.strip() for t in order_by.split(",")]):
+            expression = term.split()[0]
+            if value_of is None:
+                get = lambda r, col=expression.split(".")[-1]: r.get(col)
+            else:
+                get = lambda r, expr=expression: value_of(r, expr)
+            descending = term.endswith(" desc")
+            # NULL primero en ASC y último en DESC, como SQLite
+            rows.sort(key=lambda r: (get(r) is not None, get(r) if get(r) is not None else 0), reverse=descending)
+
+    def _where(self, table: str, **values) -> List[Dict[str, Any]]:
+        """Filas de una tabla de hechos cuyas columnas son iguales a ``values``"""
+        rows = getattr(self, table)
+        if isinstance(rows, ColumnarTable):
+            return rows.select([(column, "=", value) for column, value in values.items()])
+        return [r for r in rows if all(r.get(column) == value for column, value in values.items())]
+
+    def _next_id(self, table: str) -> int:
+        rows = getattr(self, table)
+        if isinstance(rows, ColumnarTable):
+            return int(rows.column("id").max()) + 1 if len(rows) else 1
+        return max([r.get("id", 0) for r in rows], default=0) + 1
+
+    def get_memory_usage(self) -> Dict[str, int]:
+        """Memoria aproximada de las tablas de hechos en modo columnar (bytes)"""
+        return {table: rows.nbytes for table, rows in self._tables.items() if isinstance(rows, ColumnarTable)}
+
+    @staticmethod
+    def _compare(left: Any, operator: str, right: Any) -> bool:
+        if left is None:
+            return False
+        if operator == "=":
+            return left == right
+        if operator == ">=":
+            return left >= right
+        if operator == "<=":
+            return left <= right
+        if operator == "<":
+            return left < right
+        return left > right
+
+    @instrumented("update")
     def execute_update(self, query: str, params: tuple = None) -> int:
         """Simula consultas INSERT/UPDATE/DELETE"""
+        affected = self._apply_update(query, params)
+        if affected:
+            get_table_stats().record_write(query, affected, params)
+        return affected
+
+    def version(self, table: str, año: int = None) -> int:
+        """Versión de los datos de ``table`` (o de su partición ``año``)
+
+        Aumenta con cada escritura que la afecta: quien guarde la versión
+        junto a un resultado calculado sabe si debe recalcularlo.
+        """
+        return get_table_stats().version(table, año)
+
+    def _apply_update(self, query: str, params: tuple = None) -> int:
         try:
             query_lower = query.lower().strip()
             
             # INSERT INTO energia_barra
             if "insert into energia_barra" in query_lower:
                 if params and len(params) >= 4:
-                    new_id = max([e.get("id", 0) for e in self.energia_barra], default=0) + 1
+                    new_id = self._next_id("energia_barra")
                     
                     new_record = {
                         "id": new_id,
@@ -353,14 +1043,14 @@ class WebDatabaseManager:
                     }
                     
                     self.energia_barra.append(new_record)
-                    self.logger.info(f"Registro de energía creado: ID {new_id}, Municipio {params[0]}, {params[1]}-{params[2]:02d}, {params[3]} MWh")
+                    self.logger.info("Registro de energía creado: ID %d, Municipio %s, %s-%02d, %s MWh", new_id, params[0], params[1], params[2], params[3])
                     return 1
                 return 0
             
             # INSERT INTO facturacion
             elif "insert into facturacion" in query_lower:
                 if params and len(params) >= 6:
-                    new_id = max([f.get("id", 0) for f in self.facturacion], default=0) + 1
+                    new_id = self._next_id("facturacion")
                     new_record = {
                         "id": new_id,
                         "municipio_id": params[0],
@@ -432,7 +1122,7 @@ class WebDatabaseManager:
             if user.get("id") == user_id:
                 user["ultimo_acceso"] = datetime.now().isoformat()
                 break
-        self.logger.info(f"Actualizando último acceso para usuario {user_id}")
+        self.logger.info("Actualizando último acceso para usuario %s", user_id)
     
     def get_municipios(self) -> List[Dict[str, Any]]:
         """Obtiene todos los municipios activos"""
@@ -449,26 +1139,26 @@ class WebDatabaseManager:
             "fecha": datetime.now().isoformat()
         }
         self.logs.append(log_entry)
-        self.logger.info(f"Acción registrada: {action}")
+        self.logger.info("Acción registrada: %s", action)
 
     def debug_data_status(self):
         """Método de debug para verificar el estado de los datos"""
         self.logger.info("=== DEBUG: Estado de los datos ===")
-        self.logger.info(f"Usuarios: {len(self.users)}")
-        self.logger.info(f"Municipios: {len(self.municipios)}")
-        self.logger.info(f"Registros de energía: {len(self.energia_barra)}")
-        self.logger.info(f"Registros de facturación: {len(self.facturacion)}")
+        self.logger.info("Usuarios: %s", len(self.users))
+        self.logger.info("Municipios: %s", len(self.municipios))
+        self.logger.info("Registros de energía: %s", len(self.energia_barra))
+        self.logger.info("Registros de facturación: %s", len(self.facturacion))
         
         # Mostrar algunos registros de energía
         if self.energia_barra:
             self.logger.info("Primeros 3 registros de energía:")
             for i, registro in enumerate(self.energia_barra[:3]):
-                self.logger.info(f"  {i+1}: ID={registro['id']}, Municipio={registro['municipio_id']}, {registro['año']}-{registro['mes']:02d}, {registro['energia_mwh']} MWh")
+                self.logger.info("  %s: ID=%s, Municipio=%s, %s-%02d, %s MWh", i+1, registro['id'], registro['municipio_id'], registro['año'], registro['mes'], registro['energia_mwh'])
         
         # Verificar datos por período
         for mes in [1, 2, 3]:
             registros_mes = [e for e in self.energia_barra if e.get("año") == 2024 and e.get("mes") == mes]
-            self.logger.info(f"Registros para 2024-{mes:02d}: {len(registros_mes)}")
+            self.logger.info("Registros para 2024-%02d: %s", mes, len(registros_mes))
         
         self.logger.info("=== FIN DEBUG ===")
 
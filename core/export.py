@@ -0,0 +1,171 @@
+"""
+Motor de exportación en streaming
+
+Escribe filas a medida que llegan (de una consulta, un generador o una lista)
+en hojas ``write_only`` de openpyxl, en CSV o en CSV comprimido con gzip. El
+formato se elige por la extensión del archivo: ``.xlsx``, ``.csv`` o
+``.csv.gz``. La memoria no crece con el número de filas.
+
+El ancho de las columnas de Excel se calcula con las primeras filas (hasta
+``EXPORT_WIDTH_SAMPLE_ROWS``), que se retienen en un búfer acotado porque
+openpyxl necesita los anchos antes de escribir la primera fila. No hay una
+segunda pasada sobre los datos.
+"""
+
+import csv
+import gzip
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Union
+from core.logger import get_logger
+
+WIDTH_SAMPLE_ROWS = int(os.getenv("EXPORT_WIDTH_SAMPLE_ROWS", "500"))
+MAX_COLUMN_WIDTH = 50
+
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+@dataclass
+class ExportSheet:
+    """Hoja a exportar: nombre, encabezados y filas (cualquier iterable)"""
+    name: str
+    headers: List[str]
+    rows: Iterable[Sequence[Any]]
+
+
+def export_format(path: Union[str, Path]) -> str:
+    """Formato según la extensión: ``xlsx``, ``csv`` o ``csv.gz``"""
+    name = str(path).lower()
+    if name.endswith(".csv.gz"):
+        return "csv.gz"
+    if name.endswith(".csv"):
+        return "csv"
+    return "xlsx"
+
+
+def default_export_path(prefix: str, extension: str = None) -> Path:
+    """Ruta de exportación con marca de tiempo en EXPORT_DIR (por defecto ~/Downloads)
+
+    La extensión por defecto sale de EXPORT_FORMAT (``xlsx``, ``csv`` o ``csv.gz``).
+    """
+    extension = extension or os.getenv("EXPORT_FORMAT", "xlsx")
+    directory = Path(os.getenv("EXPORT_DIR", str(Path.home() / "Downloads")))
+    directory.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return directory / f"{prefix}_{timestamp}.{extension.lstrip('.')}"
+
+
+def export_rows(path: Union[str, Path], headers: List[str], rows: Iterable[Sequence[Any]],
+                sheet_name: str = "Datos") -> Dict[str, Any]:
+    """Exporta una sola hoja; ver ``export_sheets``"""
+    return export_sheets(path, [ExportSheet(sheet_name, headers, rows)])
+
+
+def export_sheets(path: Union[str, Path], sheets: Iterable[ExportSheet]) -> Dict[str, Any]:
+    """Exporta una o varias hojas en streaming
+
+    En CSV cada hoja adicional se escribe en su propio archivo
+    (``<nombre>-<hoja>.csv``), ya que el formato no admite varias hojas.
+
+    Returns:
+        Diccionario con ``paths`` (archivos escritos) y ``rows`` (filas por hoja)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fmt = export_format(path)
+
+    if fmt == "xlsx":
+        result = _export_xlsx(path, sheets)
+    else:
+        result = _export_csv(path, sheets, compressed=fmt == "csv.gz")
+
+    get_logger(__name__).info("Exportación %s completada: %s (%d filas)", fmt, path, sum(result["rows"].values()))
+    return result
+
+
+def _export_xlsx(path: Path, sheets: Iterable[ExportSheet]) -> Dict[str, Any]:
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    counts: Dict[str, int] = {}
+    used_names = set()
+
+    for sheet in sheets:
+        title = _sheet_title(sheet.name, used_names)
+        worksheet = workbook.create_sheet(title=title)
+
+        rows = iter(sheet.rows)
+        sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+        for index, width in enumerate(_column_widths(sheet.headers, sample), 1):
+            worksheet.column_dimensions[get_column_letter(index)].width = width
+
+        worksheet.append(list(sheet.headers))
+        count = 0
+        for row in sample:
+            worksheet.append(list(row))
+            count += 1
+        for row in rows:
+            worksheet.append(list(row))
+            count += 1
+        counts[title] = count
+
+    if not counts:
+        workbook.create_sheet(title="Datos")
+    workbook.save(path)
+    return {"paths": [str(path)], "rows": counts}
+
+
+def _export_csv(path: Path, sheets: Iterable[ExportSheet], compressed: bool) -> Dict[str, Any]:
+    counts: Dict[str, int] = {}
+    paths: List[str] = []
+
+    for index, sheet in enumerate(sheets):
+        target = path if index == 0 else _sibling_path(path, sheet.name, compressed)
+        opener = gzip.open if compressed else open
+        # utf-8-sig para que Excel reconozca los acentos al abrir el CSV
+        with opener(target, "wt", newline="", encoding="utf-8-sig") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(sheet.headers)
+            count = 0
+            for row in sheet.rows:
+                writer.writerow(row)
+                count += 1
+        counts[sheet.name] = count
+        paths.append(str(target))
+
+    return {"paths": paths, "rows": counts}
+
+
+def _column_widths(headers: Sequence[str], sample: List[Sequence[Any]]) -> List[float]:
+    widths = [len(str(header)) for header in headers]
+    for row in sample:
+        for index, value in enumerate(row):
+            length = len(str(value)) if value is not None else 0
+            if index >= len(widths):
+                widths.append(length)
+            elif length > widths[index]:
+                widths[index] = length
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+def _sheet_title(name: str, used_names: set) -> str:
+    # Excel: máximo 31 caracteres, sin []:*?/\ y sin repetir
+    base = _INVALID_SHEET_CHARS.sub("-", name).strip() or "Hoja"
+    title, suffix = base[:31], 2
+    while title.lower() in used_names:
+        tail = f" ({suffix})"
+        title, suffix = base[:31 - len(tail)] + tail, suffix + 1
+    used_names.add(title.lower())
+    return title
+
+
+def _sibling_path(path: Path, sheet_name: str, compressed: bool) -> Path:
+    extension = ".csv.gz" if compressed else ".csv"
+    stem = path.name[:-len(extension)]
+    slug = re.sub(r"[^\w-]+", "_", sheet_name).strip("_") or "hoja"
+    return path.with_name(f"{stem}-{slug}{extension}")
@@ -0,0 +1,82 @@
+"""
+Comprobación de salud del proceso que ejecuta las sesiones de Flet
+
+``check_health`` consulta los backends reales de este proceso: el gestor de
+datos que usan las sesiones (``get_db_manager``) y, si existe o se trabaja en
+modo escritorio, el archivo SQLite (``PRAGMA quick_check`` en solo lectura).
+Se sirve en ``/health`` junto a ``/metrics`` (``start_metrics_server``); el
+``/health`` de wsgi.py consulta este endpoint en lugar de su propio proceso.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+SQLITE_PATH = Path(__file__).parent.parent / "database" / "perdidas_matanzas.db"
+
+
+def check_health(db_path: Path = None) -> Tuple[bool, Dict[str, Any]]:
+    """Ejecuta las comprobaciones
+
+    Returns:
+        ``(sano, informe)``; el informe incluye cada comprobación con ``ok``,
+        latencia o error
+    """
+    web_mode = os.environ.get("FLET_WEB_MODE", "false").lower() == "true"
+    db_path = Path(db_path or SQLITE_PATH)
+    checks = {"storage": _check_storage()}
+    if db_path.exists() or not web_mode:
+        checks["sqlite"] = _check_sqlite(db_path)
+
+    healthy = all(check["ok"] for check in checks.values())
+    try:
+        from core.config import get_config
+        version = get_config().APP_VERSION
+    except Exception:
+        version = None
+    return healthy, {
+        "status": "healthy" if healthy else "unhealthy",
+        "service": "perdidas-matanzas-web",
+        "version": version,
+        "mode": "web" if web_mode else "desktop",
+        "pid": os.getpid(),
+        "checks": checks
+    }
+
+
+def _check_storage() -> Dict[str, Any]:
+    """Municipios activos en el gestor de datos de las sesiones"""
+    inicio = time.perf_counter()
+    try:
+        from core.database import get_db_manager
+        rows = get_db_manager().execute_query("SELECT COUNT(*) as count FROM municipios WHERE activo = 1")
+        count = rows[0].get("count", 0) if rows else 0
+        result = {"ok": count > 0, "municipios": count}
+        if not count:
+            result["error"] = "sin municipios activos"
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+    return result
+
+
+def _check_sqlite(db_path: Path) -> Dict[str, Any]:
+    """Archivo SQLite legible y consistente"""
+    inicio = time.perf_counter()
+    try:
+        if not db_path.exists():
+            raise FileNotFoundError(f"no existe {db_path}")
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=2)
+        try:
+            quick_check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        result = {"ok": quick_check == "ok"}
+        if quick_check != "ok":
+            result["error"] = quick_check
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+    return result
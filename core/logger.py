@@ -1,76 +1,248 @@
 """
 Sistema de logging para aplicación web
+
+Los registros se encolan en un QueueHandler y un único QueueListener en
+segundo plano los escribe en consola y en el archivo rotativo logs/app.log,
+de modo que un handler de la UI nunca espera por E/S de logging.
 """
 
+import atexit
 import logging
+import os
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional, Tuple
+
+LOG_DIR = Path(__file__).parent.parent / "logs"
+LOG_FILE = LOG_DIR / "app.log"
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler que difiere el formateo al hilo del listener
+
+    El QueueHandler estándar llama a ``format()`` en el hilo que emite el log;
+    aquí el registro se encola tal cual (msg + args) y la interpolación de
+    argumentos %-style ocurre en el listener. Es seguro porque la cola es en
+    memoria dentro del mismo proceso (no hay pickling).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Limita mensajes de alta frecuencia por logger y plantilla de mensaje
+
+    Usa la plantilla sin interpolar (``record.msg``) como clave, por lo que
+    todas las llamadas ``logger.info("Consulta %s", x)`` comparten ventana.
+    WARNING y superiores nunca se descartan. Cuando una ventana termina con
+    mensajes descartados, el siguiente registro admitido indica cuántos se
+    suprimieron.
+
+    Las ventanas vencidas se eliminan al crear una nueva (como mucho una vez
+    por ventana) y el número de claves está acotado por ``max_keys`` (LRU),
+    para que los mensajes con texto variable no acumulen entradas.
+    """
+
+    def __init__(self, max_per_window: int = 20, window_seconds: float = 10.0, max_keys: int = 1024):
+        super().__init__()
+        self.max_per_window = max_per_window
+        self.window_seconds = window_seconds
+        self.max_keys = max(1, max_keys)
+        self._windows: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._last_prune = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.max_per_window <= 0:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window else 0
+                if window is None:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0]
+                self._windows.move_to_end(key)
+                if suppressed:
+                    record.msg = f"{record.msg} [+{suppressed} mensajes similares suprimidos]"
+                return True
+
+            if window[1] < self.max_per_window:
+                window[1] += 1
+                return True
+
+            window[2] += 1
+            return False
+
+    def _prune(self, now: float):
+        """Elimina ventanas vencidas y, si sigue lleno, las menos recientes"""
+        if now - self._last_prune >= self.window_seconds:
+            self._last_prune = now
+            expired = [key for key, window in self._windows.items() if now - window[0] >= self.window_seconds]
+            for key in expired:
+                del self._windows[key]
+        while len(self._windows) >= self.max_keys:
+            self._windows.popitem(last=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar 1 de cada N registros DEBUG/INFO de un logger"""
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(1, every)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.every == 1:
+            return True
+        with self._lock:
+            self._counter += 1
+            return self._counter % self.every == 1
+
 
 class WebLogger:
     """Logger optimizado para aplicaciones web"""
-    
+
     def __init__(self):
         self.loggers = {}
         self.setup_done = False
-    
-    def setup_logger(self, name: str = "perdidas_web", level: str = "INFO") -> logging.Logger:
-        """Configura el sistema de logging para web"""
-        
-        if name in self.loggers:
-            return self.loggers[name]
-        
-        logger = logging.getLogger(name)
-        logger.setLevel(getattr(logging, level.upper()))
-        
-        if logger.handlers:
-            logger.handlers.clear()
-        
-        # Formato simple para web
-        formatter = logging.Formatter(
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.listener: Optional[QueueListener] = None
+        self.rate_limit = int(os.getenv("LOG_RATE_LIMIT", "20"))
+        self.rate_window = float(os.getenv("LOG_RATE_WINDOW", "10"))
+
+    def _start_listener(self):
+        """Crea los sinks (consola + archivo rotativo) y arranca el listener"""
+        if self.listener is not None:
+            return
+
+        # Formato simple para consola
+        console_formatter = logging.Formatter(
             '%(asctime)s | %(levelname)-5s | %(message)s',
             datefmt='%H:%M:%S'
         )
-        
-        # Solo handler de consola para web
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(formatter)
-        
+        console_handler.setFormatter(console_formatter)
+
         if hasattr(console_handler.stream, 'reconfigure'):
             try:
                 console_handler.stream.reconfigure(encoding='utf-8')
             except:
                 pass
-        
-        logger.addHandler(console_handler)
+
+        handlers = [console_handler]
+
+        # Archivo rotativo (mismo formato que logs/app.log)
+        if os.getenv("LOG_TO_FILE", "true").lower() == "true":
+            try:
+                LOG_DIR.mkdir(parents=True, exist_ok=True)
+                file_handler = RotatingFileHandler(
+                    LOG_FILE,
+                    maxBytes=int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024))),
+                    backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+                    encoding="utf-8"
+                )
+                file_handler.setFormatter(logging.Formatter(
+                    '%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d - %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S'
+                ))
+                handlers.append(file_handler)
+            except OSError:
+                # Sin permisos de escritura (p. ej. hosting web): solo consola
+                pass
+
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.shutdown)
+
+    def setup_logger(self, name: str = "perdidas_web", level: str = "INFO") -> logging.Logger:
+        """Configura el sistema de logging para web"""
+
+        if name in self.loggers:
+            return self.loggers[name]
+
+        self._start_listener()
+
+        logger = logging.getLogger(name)
+        logger.setLevel(getattr(logging, level.upper()))
+        logger.propagate = False
+
+        if logger.handlers:
+            logger.handlers.clear()
+
+        queue_handler = LazyQueueHandler(self.queue)
+        queue_handler.addFilter(RateLimitFilter(self.rate_limit, self.rate_window))
+
+        logger.addHandler(queue_handler)
         self.loggers[name] = logger
-        
+
         if not self.setup_done:
             logger.info("=== Sistema de logging WEB inicializado ===")
             self.setup_done = True
-        
+
         return logger
-    
+
     def get_logger(self, name: str = "perdidas_web") -> logging.Logger:
         """Obtiene un logger existente o crea uno nuevo"""
         if name not in self.loggers:
             return self.setup_logger(name)
         return self.loggers[name]
 
+    def set_sampling(self, name: str, every: int):
+        """Registra solo 1 de cada ``every`` mensajes DEBUG/INFO del logger"""
+        logger = self.get_logger(name)
+        for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+            logger.removeFilter(existing)
+        if every > 1:
+            logger.addFilter(SamplingFilter(every))
+
+    def queue_size(self) -> int:
+        """Registros pendientes de escribir por el listener"""
+        return self.queue.qsize()
+
+    def shutdown(self):
+        """Detiene el listener vaciando la cola pendiente"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
 # Instancia global del logger
 _web_logger = None
 
-def setup_logger(name: str = "perdidas_web", level: str = "INFO") -> logging.Logger:
-    """Función para configurar el logger principal"""
+def _get_web_logger() -> WebLogger:
     global _web_logger
     if _web_logger is None:
         _web_logger = WebLogger()
-    
-    return _web_logger.setup_logger(name, level)
+    return _web_logger
+
+def setup_logger(name: str = "perdidas_web", level: str = "INFO") -> logging.Logger:
+    """Función para configurar el logger principal"""
+    return _get_web_logger().setup_logger(name, level)
 
 def get_logger(name: str = "perdidas_web") -> logging.Logger:
     """Función para obtener un logger"""
-    global _web_logger
-    if _web_logger is None:
-        _web_logger = WebLogger()
-    
-    return _web_logger.get_logger(name)
+    return _get_web_logger().get_logger(name)
+
+def set_logger_sampling(name: str, every: int):
+    """Activa el muestreo 1-de-N para un logger de alta frecuencia"""
+    _get_web_logger().set_sampling(name, every)
+
+def get_log_queue_size() -> int:
+    """Obtiene el número de registros pendientes en la cola de logging"""
+    return _get_web_logger().queue_size()
+
+def shutdown_logging():
+    """Vacía la cola y detiene el listener de logging"""
+    _get_web_logger().shutdown()
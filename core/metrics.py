@@ -0,0 +1,255 @@
+"""
+Registro de métricas de la aplicación en formato de exposición Prometheus
+
+Los módulos registran contadores y gauges (o callbacks que se evalúan en
+cada scrape); ``render_prometheus`` los combina con los histogramas de
+latencia de consultas y la memoria residente del proceso.
+
+Las métricas son del proceso que las registra: deben exponerse desde el
+proceso que ejecuta las sesiones de Flet (``start_metrics_server``, que
+arranca ``web_main.py`` en ``METRICS_PORT``).
+"""
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from core.logger import get_log_queue_size
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Optional[Dict[str, str]]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Contadores, gauges y gauges calculados bajo demanda"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelSet, float]] = {}
+        self._callbacks: Dict[str, List[Tuple[LabelSet, Callable[[], float]]]] = {}
+
+    def _declare(self, name: str, metric_type: str, help_text: str):
+        if name not in self._meta:
+            self._meta[name] = (metric_type, help_text)
+            self._values.setdefault(name, {})
+
+    def describe(self, name: str, metric_type: str, help_text: str):
+        """Declara una métrica para que se exponga aunque aún no tenga series"""
+        with self._lock:
+            self._declare(name, metric_type, help_text)
+
+    def inc(self, name: str, value: float = 1.0, labels: Dict[str, str] = None, help_text: str = ""):
+        """Incrementa un contador"""
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            key = _labels_key(labels)
+            self._values[name][key] = self._values[name].get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: Dict[str, str] = None, help_text: str = ""):
+        """Fija el valor de un gauge"""
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values[name][_labels_key(labels)] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float], labels: Dict[str, str] = None,
+                       help_text: str = ""):
+        """Registra un gauge cuyo valor se calcula en cada scrape"""
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            key = _labels_key(labels)
+            callbacks = [c for c in self._callbacks.get(name, []) if c[0] != key]
+            callbacks.append((key, callback))
+            self._callbacks[name] = callbacks
+
+    def get(self, name: str, labels: Dict[str, str] = None) -> float:
+        with self._lock:
+            return self._values.get(name, {}).get(_labels_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            meta = dict(self._meta)
+            values = {name: dict(series) for name, series in self._values.items()}
+            callbacks = {name: list(items) for name, items in self._callbacks.items()}
+
+        lines = []
+        for name in sorted(meta):
+            metric_type, help_text = meta[name]
+            series = values.get(name, {})
+            for key, callback in callbacks.get(name, []):
+                try:
+                    series[key] = float(callback())
+                except Exception:
+                    continue
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+# Instancia global del registro
+_registry = None
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Obtiene el registro global de métricas"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+        _registry.describe(
+            "perdidas_cache_requests_total", "counter",
+            "Accesos a cachés de la aplicación por resultado"
+        )
+        _registry.register_gauge(
+            "perdidas_background_queue_depth", get_log_queue_size, {"queue": "logging"},
+            "Trabajos pendientes en colas de segundo plano"
+        )
+    return _registry
+
+# === ATAJOS PARA LOS MÓDULOS ===
+
+def record_cache_access(cache: str, hit: bool):
+    """Cuenta un acierto o fallo de caché"""
+    get_metrics_registry().inc(
+        "perdidas_cache_requests_total", 1, {"cache": cache, "result": "hit" if hit else "miss"},
+        "Accesos a cachés de la aplicación por resultado"
+    )
+
+def record_import(module: str, rows: int, seconds: float):
+    """Registra una importación de datos y su throughput en filas/segundo"""
+    registry = get_metrics_registry()
+    labels = {"module": module}
+    registry.inc("perdidas_import_rows_total", rows, labels, "Filas importadas desde archivos")
+    registry.inc("perdidas_import_seconds_total", seconds, labels, "Tiempo total dedicado a importaciones")
+    registry.set(
+        "perdidas_import_rows_per_second", rows / seconds if seconds > 0 else 0.0, labels,
+        "Throughput de la última importación en filas por segundo"
+    )
+
+def record_maintenance(task: str, seconds: float, pages: int = 0):
+    """Registra una tarea de mantenimiento de SQLite y las páginas liberadas"""
+    registry = get_metrics_registry()
+    labels = {"task": task}
+    registry.inc("perdidas_db_maintenance_total", 1, labels, "Tareas de mantenimiento de SQLite ejecutadas")
+    registry.inc("perdidas_db_maintenance_seconds_total", seconds, labels, "Tiempo dedicado al mantenimiento de SQLite")
+    if pages:
+        registry.inc("perdidas_db_maintenance_pages_total", pages, labels, "Páginas liberadas por el mantenimiento de SQLite")
+
+def register_queue_depth(queue_name: str, callback: Callable[[], float]):
+    """Publica la profundidad de una cola de trabajos en segundo plano"""
+    get_metrics_registry().register_gauge(
+        "perdidas_background_queue_depth", callback, {"queue": queue_name},
+        "Trabajos pendientes en colas de segundo plano"
+    )
+
+def get_process_rss_bytes() -> int:
+    """Memoria residente del proceso actual en bytes"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+        # ru_maxrss es el pico (KB en Linux, bytes en macOS); mejor que nada
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return 0
+
+def _render_query_histograms() -> List[str]:
+    from core.query_stats import get_query_stats, LATENCY_BUCKETS_MS
+
+    name = "perdidas_query_duration_seconds"
+    lines = [
+        f"# HELP {name} Latencia de consultas por huella normalizada",
+        f"# TYPE {name} histogram"
+    ]
+    for stats in get_query_stats().get_stats(order_by="fingerprint"):
+        base = (("kind", stats["kind"]), ("query", stats["fingerprint"][:200]))
+        cumulative = 0
+        for bound, count in zip(list(LATENCY_BUCKETS_MS) + [float("inf")], stats["histogram"].values()):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound / 1000.0)
+            lines.append(f"{name}_bucket{_format_labels(base + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(base)} {_format_value(stats['total_ms'] / 1000.0)}")
+        lines.append(f"{name}_count{_format_labels(base)} {stats['count']}")
+
+    rows_name = "perdidas_query_rows_total"
+    lines.append(f"# HELP {rows_name} Filas devueltas o afectadas por huella")
+    lines.append(f"# TYPE {rows_name} counter")
+    for stats in get_query_stats().get_stats(order_by="fingerprint"):
+        base = (("kind", stats["kind"]), ("query", stats["fingerprint"][:200]))
+        lines.append(f"{rows_name}{_format_labels(base)} {stats['rows']}")
+    return lines
+
+def render_prometheus() -> str:
+    """Genera el texto de exposición de todas las métricas"""
+    lines = _render_query_histograms()
+    lines.extend(get_metrics_registry().render())
+    lines.append("# HELP process_resident_memory_bytes Memoria residente del proceso")
+    lines.append("# TYPE process_resident_memory_bytes gauge")
+    lines.append(f"process_resident_memory_bytes {get_process_rss_bytes()}")
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """Sirve ``/metrics`` y ``/health`` en un hilo de fondo de este proceso
+
+    ``ft.app`` no admite rutas propias, así que el proceso de la aplicación
+    Flet expone sus métricas y su salud (``core.health``) en un puerto aparte.
+
+    Returns:
+        El servidor HTTP (``shutdown()`` para detenerlo)
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                status, content_type = 200, "text/plain; version=0.0.4; charset=utf-8"
+                body = render_prometheus().encode("utf-8")
+            elif path == "/health":
+                from core.health import check_health
+                healthy, report = check_health()
+                status, content_type = (200 if healthy else 503), "application/json"
+                body = json.dumps(report, ensure_ascii=False).encode("utf-8")
+            else:
+                self.send_error(404)
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
@@ -0,0 +1,240 @@
+"""
+Agrupación de ``page.update()`` por sesión
+
+Cada ``page.update()`` de Flet calcula el diff del árbol de controles y lo
+envía por el websocket, y un mismo manejador suele llamarlo varias veces
+(cerrar un diálogo, refrescar la tabla, mostrar un aviso). Con el
+agrupador instalado, ``page.update()`` solo marca la página como pendiente
+y el envío se hace una vez:
+
+- al terminar el manejador de eventos que lo pidió, o
+- si no hay ningún manejador en curso en la sesión (actualizaciones desde
+  hilos en segundo plano), al cerrar la ventana de ``PAGE_UPDATE_WINDOW_MS``.
+
+Mientras un manejador está en curso no se envía nada desde otro hilo: el
+diff se calcularía con los controles a medio modificar. Un manejador largo
+que quiera mostrar progreso usa ``flush_now``. Si un envío falla, lo
+pendiente se conserva para el siguiente.
+
+``page.update(control)`` se agrupa igual y se descarta si ya hay pendiente
+una actualización completa. ``page.add`` envía el diff completo en el acto,
+así que vacía lo pendiente; ``page.open`` abre el control en el acto (Flet
+lo actualiza nada más añadirlo) y ``page.close`` envía antes lo pendiente
+porque el control tiene que estar montado. Para mostrar algo de inmediato (un
+diálogo de progreso antes de un trabajo largo, un ``FilePicker`` recién
+añadido) se usa ``flush_now(page)``. Con ``PAGE_UPDATE_COALESCE=false``
+``page.update()`` se comporta como siempre.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+from core.logger import get_logger
+
+
+class PageUpdateCoalescer:
+    """Sustituye ``page.update`` por una versión que agrupa los envíos"""
+
+    def __init__(self, page):
+        self.logger = get_logger(__name__)
+        self.page = page
+        self.enabled = os.getenv("PAGE_UPDATE_COALESCE", "true").lower() == "true"
+        self.window = float(os.getenv("PAGE_UPDATE_WINDOW_MS", "30")) / 1000.0
+
+        # Métodos originales de la página
+        self._update = page.update
+        self._add = page.add
+        self._open = page.open
+        self._close = page.close
+        self._run_thread = page.run_thread
+
+        self._lock = threading.Lock()
+        # Actualización completa pendiente o, si no, controles concretos (por id)
+        self._full = False
+        self._controls: Dict[int, Any] = {}
+        self._timer: Optional[threading.Timer] = None
+        # Hilos que envían sin agrupar (dentro de page.open)
+        self._direct = threading.local()
+        # Manejadores de eventos en curso en la sesión
+        self._active_handlers = 0
+
+        self.requested = 0
+        self.sent = 0
+
+    def install(self):
+        """Reemplaza los métodos de la página por los del agrupador"""
+        if not self.enabled:
+            return
+        self.page.update = self.update
+        self.page.add = self.add
+        self.page.open = self.open
+        self.page.close = self.close
+        self.page.run_thread = self.run_thread
+        self.page._update_coalescer = self
+
+    # === MÉTODOS DE LA PÁGINA ===
+
+    def update(self, *controls):
+        """Marca la página (o los controles) como pendientes de enviar"""
+        with self._lock:
+            self.requested += 1
+        _record("requested")
+        if getattr(self._direct, "active", False):
+            self._update(*controls)
+            self._count_sent()
+            return
+
+        with self._lock:
+            if not controls:
+                self._full = True
+                self._controls.clear()
+            elif not self._full:
+                for control in controls:
+                    self._controls[id(control)] = control
+            # Con un manejador en curso, lo envía su bloque finally
+            if self._timer is None and self._active_handlers == 0:
+                self._timer = threading.Timer(self.window, self._flush_window)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def add(self, *controls):
+        # add() envía el diff completo de la página: cubre todo lo pendiente
+        self._discard_pending()
+        with self._lock:
+            self.requested += 1
+        _record("requested")
+        self._add(*controls)
+        self._count_sent()
+
+    def open(self, control):
+        # Flet llama a control.update() justo después de montarlo: sin agrupar
+        self.flush()
+        self._direct.active = True
+        try:
+            self._open(control)
+        finally:
+            self._direct.active = False
+
+    def close(self, control):
+        # El control debe estar montado antes de cerrarlo
+        self.flush()
+        self._close(control)
+
+    def run_thread(self, handler: Callable, *args, **kwargs):
+        """Ejecuta el manejador y envía lo pendiente al terminar"""
+        def handler_with_flush(*handler_args, **handler_kwargs):
+            with self._lock:
+                self._active_handlers += 1
+            try:
+                handler(*handler_args, **handler_kwargs)
+            finally:
+                with self._lock:
+                    self._active_handlers -= 1
+                self.flush()
+
+        self._run_thread(handler_with_flush, *args, **kwargs)
+
+    # === ENVÍO ===
+
+    def flush_now(self):
+        """Como ``page.update()``, pero enviando en el acto junto con lo pendiente"""
+        with self._lock:
+            self.requested += 1
+            self._full = True
+        _record("requested")
+        self.flush()
+
+    def flush(self):
+        """Envía las actualizaciones pendientes (si las hay) en un único diff"""
+        full, controls = self._discard_pending()
+        if full:
+            targets = ()
+        else:
+            # Los controles retirados de la página desde que se pidieron ya no se pueden enviar
+            targets = tuple(control for control in controls if getattr(control, "page", None) is not None)
+            if not targets:
+                return
+        try:
+            self._update(*targets)
+            self._count_sent()
+        except Exception as e:
+            self.logger.error(f"Error enviando actualización de la página: {e}")
+            self._restore_pending(full, targets)
+
+    def _flush_window(self):
+        """Fin de la ventana: envía salvo que un manejador haya empezado entretanto"""
+        with self._lock:
+            self._timer = None
+            if self._active_handlers:
+                return
+        self.flush()
+
+    def _restore_pending(self, full: bool, controls):
+        with self._lock:
+            if full:
+                self._full = True
+                self._controls.clear()
+            elif not self._full:
+                for control in controls:
+                    self._controls.setdefault(id(control), control)
+
+    def _discard_pending(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            full, controls = self._full, list(self._controls.values())
+            self._full = False
+            self._controls = {}
+        return full, controls
+
+    def _count_sent(self):
+        with self._lock:
+            self.sent += 1
+        _record("sent")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Actualizaciones pedidas, enviadas y envíos ahorrados"""
+        with self._lock:
+            requested, sent = self.requested, self.sent
+        return {
+            "requested": requested,
+            "sent": sent,
+            "saved": max(requested - sent, 0),
+            "window_ms": self.window * 1000.0
+        }
+
+
+def _record(stage: str):
+    try:
+        from core.metrics import get_metrics_registry
+        get_metrics_registry().inc(
+            "perdidas_page_updates_total", 1, {"stage": stage},
+            "Actualizaciones de página pedidas por los manejadores y enviadas al cliente"
+        )
+    except Exception:
+        pass
+
+
+def install_update_coalescer(page) -> PageUpdateCoalescer:
+    """Instala el agrupador en la página (una sola vez por sesión)"""
+    coalescer = get_update_coalescer(page)
+    if coalescer is None:
+        coalescer = PageUpdateCoalescer(page)
+        coalescer.install()
+    return coalescer
+
+
+def get_update_coalescer(page) -> Optional[PageUpdateCoalescer]:
+    """Agrupador instalado en la página (None si no hay)"""
+    coalescer = getattr(page, "_update_coalescer", None)
+    return coalescer if isinstance(coalescer, PageUpdateCoalescer) else None
+
+
+def flush_now(page):
+    """Envía ya las actualizaciones pendientes de la página (barras de progreso, diálogos)"""
+    coalescer = get_update_coalescer(page)
+    if coalescer is not None:
+        coalescer.flush_now()
+    else:
+        page.update()
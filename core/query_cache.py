@@ -0,0 +1,287 @@
+"""
+Caché de resultados de consultas para los métodos de los servicios
+
+``@cached_query(tables=[...])`` memoriza el resultado de un método de
+lectura según sus argumentos. Cada entrada guarda la versión de datos de
+las tablas de las que depende (ver ``core.table_stats``) y deja de valer en
+cuanto alguna cambia; si el método recibe un ``año``, se usa la versión de
+esa partición, de modo que guardar datos de 2024 no invalida las lecturas
+de 2025. Opcionalmente caduca también por tiempo (``ttl``).
+
+Cada método tiene su propia caché LRU, acotada por número de entradas
+(``maxsize``) y por memoria estimada (``max_bytes``, por defecto
+``QUERY_CACHE_MAX_MB``). Los aciertos y fallos se publican en
+``perdidas_cache_requests_total`` con ``cache="query:<Clase.método>"``.
+
+Los resultados se comparten entre llamadas: en un acierto se devuelve una
+copia superficial de listas y diccionarios, pero los elementos son los
+mismos objetos y no deben modificarse. Con ``QUERY_CACHE=false`` el
+decorador no guarda nada.
+"""
+
+import dataclasses
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from core.logger import get_logger
+from core.metrics import get_metrics_registry, record_cache_access
+from core.table_stats import PARTITION_COLUMN, get_table_stats
+
+# Profundidad máxima al estimar el tamaño de un resultado
+_SIZE_DEPTH = 4
+# Atributos de __slots__ por clase (se calculan una vez)
+_SLOT_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+
+class _Entry:
+    """Resultado cacheado con las versiones y el origen de datos con que se calculó"""
+
+    __slots__ = ("value", "versions", "source", "expires", "size_bytes")
+
+    def __init__(self, value: Any, versions: Tuple[int, ...], source: Any, expires: Optional[float], size_bytes: int):
+        self.value = value
+        self.versions = versions
+        self.source = source
+        self.expires = expires
+        self.size_bytes = size_bytes
+
+
+class QueryCache:
+    """Caché LRU de un método, validada contra las versiones de sus tablas"""
+
+    def __init__(self, name: str, tables: Iterable[str], maxsize: int = 128, ttl: float = None,
+                 max_bytes: int = None, partition: Optional[str] = PARTITION_COLUMN):
+        self.name = name
+        self.tables = tuple(table.lower() for table in tables)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes if max_bytes is not None else get_query_caches().max_bytes
+        self.partition = partition
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def versions(self, año: Any = None) -> Tuple[int, ...]:
+        """Versión actual de cada tabla (de la partición ``año`` si se indica)"""
+        table_stats = get_table_stats()
+        return tuple(table_stats.version(table, año) for table in self.tables)
+
+    def get(self, key: Any, versions: Tuple[int, ...], source: Any) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            valid = (
+                entry is not None and entry.versions == versions and entry.source is source
+                and (entry.expires is None or entry.expires > time.monotonic())
+            )
+            if valid:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+        record_cache_access(f"query:{self.name}", valid)
+        return valid, entry.value if valid else None
+
+    def put(self, key: Any, value: Any, versions: Tuple[int, ...], source: Any):
+        size = estimate_size(value)
+        if self.maxsize <= 0 or size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = _Entry(value, versions, source, expires, size)
+            self.size_bytes += size
+            while self._entries and (len(self._entries) > self.maxsize or self.size_bytes > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tables": list(self.tables),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "evictions": self.evictions,
+                "maxsize": self.maxsize,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl
+            }
+
+    def _discard(self, key: Any):
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry.size_bytes
+
+
+class QueryCacheRegistry:
+    """Cachés de consultas registradas por los servicios"""
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.enabled = os.getenv("QUERY_CACHE", "true").lower() == "true"
+        self.max_bytes = int(float(os.getenv("QUERY_CACHE_MAX_MB", "16")) * 1024 * 1024)
+        self._caches: Dict[str, QueryCache] = {}
+        self._lock = threading.Lock()
+
+    def register(self, cache: QueryCache):
+        with self._lock:
+            self._caches[cache.name] = cache
+        try:
+            get_metrics_registry().register_gauge(
+                "perdidas_query_cache_bytes", lambda: cache.size_bytes, {"cache": cache.name},
+                "Memoria estimada de los resultados cacheados por método"
+            )
+        except Exception as e:
+            self.logger.debug("No se pudo registrar la caché %s en métricas: %s", cache.name, e)
+
+    def clear(self):
+        """Vacía todas las cachés (p. ej. tras cambiar de base de datos)"""
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Aciertos, fallos, tasa de acierto y memoria de cada caché"""
+        with self._lock:
+            caches = list(self._caches.values())
+        return {cache.name: cache.info() for cache in caches}
+
+
+# Instancia global del registro
+_query_caches = None
+
+def get_query_caches() -> QueryCacheRegistry:
+    """Obtiene el registro global de cachés de consultas"""
+    global _query_caches
+    if _query_caches is None:
+        _query_caches = QueryCacheRegistry()
+    return _query_caches
+
+
+def cached_query(tables: List[str], maxsize: int = 128, ttl: float = None, max_bytes: int = None,
+                 partition: Optional[str] = PARTITION_COLUMN) -> Callable:
+    """Decorador de métodos de lectura de un servicio
+
+    Args:
+        tables: Tablas que lee el método; cualquier escritura en ellas invalida el resultado
+        maxsize: Entradas como máximo (LRU)
+        ttl: Segundos de validez además de la versión de datos (None: sin caducidad)
+        max_bytes: Memoria estimada máxima de la caché
+        partition: Argumento que selecciona la partición de las tablas (None: tabla completa)
+
+    La clave son los argumentos normalizados con la firma del método (sin
+    ``self``); si alguno no es hashable, la llamada no se cachea. El
+    resultado queda asociado al ``db_manager`` de la instancia, así que
+    cambiar de gestor no devuelve datos del anterior. Los diccionarios con
+    clave ``error`` (la forma en que los servicios informan de un fallo) no
+    se guardan.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        is_method = next(iter(signature.parameters), None) == "self"
+        cache = QueryCache(func.__qualname__, tables, maxsize, ttl, max_bytes, partition)
+        get_query_caches().register(cache)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not get_query_caches().enabled:
+                return func(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = list(bound.arguments.items())
+                if is_method:
+                    arguments = arguments[1:]
+                key = tuple(arguments)
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            source = getattr(args[0], "db_manager", None) if is_method and args else None
+            año = bound.arguments.get(partition) if partition else None
+            versions = cache.versions(año)
+            hit, value = cache.get(key, versions, source)
+            if hit:
+                return _shallow_copy(value)
+
+            value = func(*args, **kwargs)
+            if not (isinstance(value, dict) and "error" in value):
+                # Las versiones son las de antes de leer: una escritura concurrente invalida la entrada
+                cache.put(key, value, versions, source)
+            return _shallow_copy(value)
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+def _shallow_copy(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def estimate_size(value: Any, depth: int = _SIZE_DEPTH) -> int:
+    """Memoria aproximada de un resultado: contenedores, diccionarios y objetos
+
+    Los objetos se recorren por ``__dict__`` o, si no lo tienen (dataclasses
+    con ``slots=True`` como ``EnergiaRecord`` o ``FacturacionModel``), por sus
+    ``__slots__``.
+    """
+    size = sys.getsizeof(value, 64)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k, depth - 1) + estimate_size(v, depth - 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, depth - 1) for item in value)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return size
+    attributes = getattr(value, "__dict__", None)
+    if isinstance(attributes, dict):
+        return size + estimate_size(attributes, depth - 1)
+    for name in _slot_names(type(value)):
+        attribute = getattr(value, name, None)
+        if attribute is not None:
+            size += estimate_size(attribute, depth - 1)
+    return size
+
+
+def _slot_names(cls: type) -> Tuple[str, ...]:
+    """Atributos declarados en ``__slots__`` por la clase y sus bases"""
+    names = _SLOT_NAMES.get(cls)
+    if names is None:
+        collected = []
+        for klass in cls.__mro__:
+            slots = klass.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            collected.extend(slot for slot in slots if slot not in ("__dict__", "__weakref__"))
+        if not collected and dataclasses.is_dataclass(cls):
+            collected = [field.name for field in dataclasses.fields(cls)]
+        names = _SLOT_NAMES[cls] = tuple(dict.fromkeys(collected))
+    return names
@@ -0,0 +1,102 @@
+"""
+Operadores relacionales sobre filas en memoria
+
+Piezas reutilizables por los motores de consulta: reciben filas ``dict`` y
+no dependen del SQL de origen.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+AGGREGATE_FUNCTIONS = ("count", "sum", "avg", "min", "max")
+
+# Alias → (función, valor de la fila); valor None solo para COUNT(*)
+AggregateSpec = Dict[str, Tuple[str, Optional[Callable[[Dict[str, Any]], Any]]]]
+
+
+def hash_aggregate(rows: Iterable[Dict[str, Any]], group_by: Sequence[str],
+                   aggregates: AggregateSpec) -> List[Dict[str, Any]]:
+    """Agregación por hash en una sola pasada (O(n))
+
+    Cada grupo guarda un acumulador por agregado. Igual que en SQL, los
+    valores NULL no cuentan para COUNT(col), SUM, AVG, MIN ni MAX, y sin
+    GROUP BY siempre se devuelve una fila aunque no haya datos.
+
+    Returns:
+        Una fila por grupo con las claves y los alias, en orden de aparición
+    """
+    specs = [(alias, function.lower(), value_of) for alias, (function, value_of) in aggregates.items()]
+    for _, function, _ in specs:
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Función de agregación no soportada: {function}")
+
+    groups: Dict[tuple, List[list]] = {}
+    for row in rows:
+        key = tuple(row.get(column) for column in group_by)
+        state = groups.get(key)
+        if state is None:
+            state = groups[key] = [[None, 0] for _ in specs]
+        for accumulator, (_, function, value_of) in zip(state, specs):
+            if value_of is None:
+                accumulator[1] += 1
+                continue
+            value = value_of(row)
+            if value is None:
+                continue
+            accumulator[1] += 1
+            current = accumulator[0]
+            if function in ("sum", "avg"):
+                accumulator[0] = value if current is None else current + value
+            elif function == "min":
+                if current is None or value < current:
+                    accumulator[0] = value
+            elif function == "max":
+                if current is None or value > current:
+                    accumulator[0] = value
+
+    if not groups and not group_by:
+        groups[()] = [[None, 0] for _ in specs]
+
+    result = []
+    for key, state in groups.items():
+        row = dict(zip(group_by, key))
+        for (alias, function, _), (value, count) in zip(specs, state):
+            if function == "count":
+                row[alias] = count
+            elif function == "avg":
+                row[alias] = value / count if count else None
+            else:
+                row[alias] = value
+        result.append(row)
+    return result
+
+
+def hash_index(rows: Iterable[Dict[str, Any]], key: str) -> Dict[Any, List[Dict[str, Any]]]:
+    """Tabla hash ``valor de la clave → filas`` para el lado derecho de un join
+
+    Las filas con clave NULL no se indexan: en SQL nunca cumplen la igualdad.
+    """
+    index: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in rows:
+        value = row.get(key)
+        if value is not None:
+            index.setdefault(value, []).append(row)
+    return index
+
+
+def hash_left_join(rows: Iterable[Dict[str, Any]], key: str,
+                   index: Dict[Any, List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """LEFT JOIN por hash: combina cada fila con las de ``index`` de igual clave
+
+    Las filas sin coincidencia se conservan sin columnas del lado derecho
+    (que se leen como NULL con ``row.get``). Coste O(filas + coincidencias).
+    """
+    for row in rows:
+        value = row.get(key)
+        matches = index.get(value) if value is not None else None
+        if not matches:
+            yield row
+            continue
+        for match in matches:
+            combined = dict(row)
+            combined.update(match)
+            yield combined
@@ -0,0 +1,315 @@
+"""
+Instrumentación de consultas del gestor de base de datos
+
+Agrupa cada consulta por su huella (fingerprint) normalizada y acumula
+ejecuciones, filas devueltas e histograma de latencias. Las consultas que
+superan el umbral configurado se escriben en el log de consultas lentas, y
+dentro de una acción de pantalla se detectan patrones N+1 (la misma huella
+ejecutada muchas veces con distintos parámetros).
+"""
+
+import inspect
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+from core.logger import get_logger
+
+# Límites superiores (ms) de los buckets del histograma de latencias
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Normaliza una consulta a su huella: sin literales ni espacios extra"""
+    fingerprint = query.strip().lower()
+    fingerprint = _STRING_LITERAL.sub("?", fingerprint)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _WHITESPACE.sub(" ", fingerprint)
+    fingerprint = _IN_LIST.sub("in (?+)", fingerprint)
+    return fingerprint
+
+
+class _FingerprintStats:
+    """Contadores acumulados de una huella de consulta"""
+
+    __slots__ = ("fingerprint", "kind", "count", "rows", "errors", "total_ms",
+                 "max_ms", "buckets", "samples")
+
+    def __init__(self, fingerprint: str, kind: str, sample_size: int):
+        self.fingerprint = fingerprint
+        self.kind = kind
+        self.count = 0
+        self.rows = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=sample_size)
+
+    def record(self, elapsed_ms: float, rows: int, error: bool):
+        self.count += 1
+        self.rows += rows
+        self.errors += 1 if error else 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.samples.append(elapsed_ms)
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "kind": self.kind,
+            "count": self.count,
+            "rows": self.rows,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "histogram": dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"], self.buckets))
+        }
+
+
+class QueryStats:
+    """Registro de estadísticas de consultas por huella"""
+
+    def __init__(self, slow_query_ms: float = None, n_plus_one_threshold: int = None,
+                 sample_size: int = 500, slow_log_size: int = 100):
+        self.logger = get_logger(__name__)
+        self.slow_logger = get_logger("perdidas_web.slow_queries")
+        self.enabled = os.getenv("QUERY_STATS", "true").lower() == "true"
+        self.slow_query_ms = slow_query_ms if slow_query_ms is not None else float(os.getenv("SLOW_QUERY_MS", "100"))
+        self.n_plus_one_threshold = n_plus_one_threshold if n_plus_one_threshold is not None else int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+        self.sample_size = sample_size
+        self._stats: Dict[str, _FingerprintStats] = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+        self._n_plus_one = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_activity = 0.0
+
+    # === REGISTRO ===
+
+    def idle_seconds(self) -> float:
+        """Segundos desde la última consulta de la aplicación (sin contar mantenimiento)"""
+        return time.monotonic() - self._last_activity
+
+    def record(self, query: str, params: Optional[tuple], kind: str, elapsed_ms: float,
+               rows: int, error: bool = False):
+        """Registra una ejecución de consulta"""
+        fingerprint = normalize_query(query)
+        if kind != "maintenance":
+            self._last_activity = time.monotonic()
+
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                stats = self._stats[fingerprint] = _FingerprintStats(fingerprint, kind, self.sample_size)
+            stats.record(elapsed_ms, rows, error)
+
+            if elapsed_ms >= self.slow_query_ms:
+                self._slow_queries.append({
+                    "fingerprint": fingerprint,
+                    "params": repr(params)[:200] if params else None,
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "rows": rows,
+                    "action": self.current_action(),
+                    "timestamp": time.time()
+                })
+
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_logger.warning("Consulta lenta (%.1f ms, %d filas): %s | params=%r",
+                                     elapsed_ms, rows, fingerprint[:300], params)
+
+        action = getattr(self._local, "action", None)
+        if action is not None:
+            action["counts"][fingerprint] = action["counts"].get(fingerprint, 0) + 1
+
+    # === ACCIONES DE PANTALLA (DETECCIÓN N+1) ===
+
+    @contextmanager
+    def action(self, name: str):
+        """Agrupa las consultas ejecutadas durante una acción de pantalla
+
+        Al cerrar la acción, cualquier huella ejecutada al menos
+        ``n_plus_one_threshold`` veces se registra como posible N+1.
+        """
+        parent = getattr(self._local, "action", None)
+        if parent is not None:
+            # Acciones anidadas cuentan dentro de la acción exterior
+            yield
+            return
+
+        self._local.action = {"name": name, "counts": {}, "start": time.perf_counter()}
+        try:
+            yield
+        finally:
+            action = self._local.action
+            self._local.action = None
+            self._finish_action(action)
+
+    def current_action(self) -> Optional[str]:
+        action = getattr(self._local, "action", None)
+        return action["name"] if action else None
+
+    def _finish_action(self, action: Dict[str, Any]):
+        elapsed_ms = (time.perf_counter() - action["start"]) * 1000.0
+        total = sum(action["counts"].values())
+        for fingerprint, count in action["counts"].items():
+            if count >= self.n_plus_one_threshold:
+                entry = {
+                    "action": action["name"],
+                    "fingerprint": fingerprint,
+                    "executions": count,
+                    "timestamp": time.time()
+                }
+                with self._lock:
+                    self._n_plus_one.append(entry)
+                self.slow_logger.warning("Posible N+1 en '%s': %d ejecuciones de %s",
+                                         action["name"], count, fingerprint[:300])
+        self.logger.debug("Acción '%s': %d consultas en %.1f ms", action["name"], total, elapsed_ms)
+
+    # === LECTURA ===
+
+    def get_stats(self, order_by: str = "total_ms", limit: int = None) -> List[Dict[str, Any]]:
+        """Estadísticas por huella ordenadas de mayor a menor"""
+        with self._lock:
+            rows = [s.to_dict() for s in self._stats.values()]
+        rows.sort(key=lambda r: r.get(order_by, 0), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def get_fingerprint_stats(self, query: str) -> Optional[Dict[str, Any]]:
+        """Estadísticas de una consulta concreta (se normaliza antes de buscar)"""
+        with self._lock:
+            stats = self._stats.get(normalize_query(query))
+            return stats.to_dict() if stats else None
+
+    def get_slow_queries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._slow_queries)
+
+    def get_n_plus_one(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._n_plus_one)
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Resumen global para vistas de administración"""
+        with self._lock:
+            stats = list(self._stats.values())
+            slow = len(self._slow_queries)
+            n_plus_one = len(self._n_plus_one)
+        return {
+            "fingerprints": len(stats),
+            "executions": sum(s.count for s in stats),
+            "rows": sum(s.rows for s in stats),
+            "errors": sum(s.errors for s in stats),
+            "total_ms": round(sum(s.total_ms for s in stats), 3),
+            "slow_queries": slow,
+            "n_plus_one": n_plus_one,
+            "slow_query_ms": self.slow_query_ms
+        }
+
+    def reset(self):
+        """Limpia todas las estadísticas acumuladas"""
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+            self._n_plus_one.clear()
+
+# Instancia global
+_query_stats = None
+
+def get_query_stats() -> QueryStats:
+    """Obtiene el registro global de estadísticas de consultas"""
+    global _query_stats
+    if _query_stats is None:
+        _query_stats = QueryStats()
+    return _query_stats
+
+def instrumented(kind: str) -> Callable:
+    """Decorador para execute_query / execute_update de un gestor de BD
+
+    ``kind`` es "query" o "update". Para consultas se cuentan las filas
+    devueltas; para actualizaciones, las filas afectadas.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+            return _instrumented_generator(func, kind)
+
+        @wraps(func)
+        def wrapper(manager, query: str, params: tuple = None, *args, **kwargs):
+            stats = get_query_stats()
+            if not stats.enabled:
+                return func(manager, query, params, *args, **kwargs)
+
+            start = time.perf_counter()
+            error = False
+            result = None
+            try:
+                result = func(manager, query, params, *args, **kwargs)
+                return result
+            except Exception:
+                error = True
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                if isinstance(result, list):
+                    rows = len(result)
+                elif isinstance(result, int):
+                    rows = result
+                else:
+                    rows = 0
+                stats.record(query, params, kind, elapsed_ms, rows, error)
+        return wrapper
+    return decorator
+
+def _instrumented_generator(func: Callable, kind: str) -> Callable:
+    """Variante para consultas que devuelven filas de forma perezosa (``iter_query``)
+
+    Se registra al agotar o cerrar el iterador: el tiempo incluye el consumo
+    de las filas y se cuentan las filas entregadas.
+    """
+    @wraps(func)
+    def wrapper(manager, query: str, params: tuple = None, *args, **kwargs):
+        stats = get_query_stats()
+        if not stats.enabled:
+            yield from func(manager, query, params, *args, **kwargs)
+            return
+
+        start = time.perf_counter()
+        error = False
+        rows = 0
+        try:
+            for row in func(manager, query, params, *args, **kwargs):
+                rows += 1
+                yield row
+        except Exception:
+            error = True
+            raise
+        finally:
+            stats.record(query, params, kind, (time.perf_counter() - start) * 1000.0, rows, error)
+    return wrapper
+
+@contextmanager
+def query_action(name: str):
+    """Atajo para agrupar las consultas de una acción de pantalla"""
+    with get_query_stats().action(name):
+        yield
@@ -0,0 +1,72 @@
+"""
+Conversión directa de filas de consulta a modelos
+
+Los modelos (``EnergiaRecord``, ``FacturacionModel``, ``PlanPerdidasModel``...)
+son dataclasses con ``slots=True``: sin ``__dict__`` por instancia, lo que
+reduce la memoria de los listados grandes. ``row_mapper`` genera una vez, por
+modelo y forma de fila, la función que construye el modelo en una sola
+llamada, en lugar de copiar campo a campo en cada servicio.
+"""
+
+import threading
+from dataclasses import MISSING, fields
+from typing import Any, Callable, Dict, Mapping, Tuple, Union
+
+# Campo del modelo → columna de la fila, o columnas candidatas (la primera presente)
+ColumnMap = Mapping[str, Union[str, Tuple[str, ...]]]
+
+_lock = threading.Lock()
+_mappers: Dict[tuple, Callable] = {}
+
+
+def row_mapper(model: type, columns: ColumnMap = None) -> Callable[[Mapping[str, Any]], Any]:
+    """Función ``fila dict → model`` compilada (y reutilizada) para el modelo
+
+    Cada campo se lee de la columna del mismo nombre salvo que ``columns``
+    indique otra. Si la fila no trae la columna se usa el valor por defecto
+    del campo (o ``None`` si no tiene).
+    """
+    key = ("dict", model, _freeze(columns))
+    with _lock:
+        mapper = _mappers.get(key)
+    if mapper is None:
+        def source(candidates: Tuple[str, ...], default: str) -> str:
+            expression = default
+            for column in reversed(candidates):
+                expression = f"(row[{column!r}] if {column!r} in row else {expression})"
+            return expression
+
+        mapper = _compile(model, columns, source)
+        with _lock:
+            _mappers[key] = mapper
+    return mapper
+
+
+def _compile(model: type, columns: ColumnMap, source: Callable[[Tuple[str, ...], str], str]) -> Callable:
+    namespace: Dict[str, Any] = {"model": model}
+    arguments = []
+    for index, field in enumerate(fields(model)):
+        if not field.init:
+            continue
+        candidates = (columns or {}).get(field.name, field.name)
+        if isinstance(candidates, str):
+            candidates = (candidates,)
+        if field.default is not MISSING:
+            namespace[f"_default{index}"] = field.default
+            default = f"_default{index}"
+        elif field.default_factory is not MISSING:
+            namespace[f"_factory{index}"] = field.default_factory
+            default = f"_factory{index}()"
+        else:
+            default = "None"
+        value = source(tuple(candidates), default)
+        arguments.append(f"{field.name}={value}" if field.kw_only is True else value)
+
+    # Argumentos por posición (en el orden de los campos) salvo los kw_only
+    code = f"def mapper(row):\n    return model({', '.join(arguments)})\n"
+    exec(compile(code, f"<row_mapper {model.__name__}>", "exec"), namespace)
+    return namespace["mapper"]
+
+
+def _freeze(columns: ColumnMap) -> tuple:
+    return tuple(sorted((columns or {}).items()))
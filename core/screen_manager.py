@@ -1,76 +1,274 @@
 """
 Gestor de pantallas de la aplicación
 Maneja la navegación entre diferentes pantallas
+
+Las pantallas que declaran ``keep_alive = True`` se conservan vivas en una
+caché LRU (acotada por número y por memoria estimada). Al volver a ellas con
+``go_back`` se reanudan con sus datos y filtros cargados, sin llamar a la
+factoría ni a ``build()``. Las pantallas pueden definir ``on_show()`` y
+``on_hide()`` para reaccionar al mostrarse u ocultarse.
+
+Las pantallas que declaran ``change_tables`` reciben en
+``on_data_changed(events)`` las escrituras de otras sesiones en esas tablas
+mientras están visibles (ver ``core.change_events``). Si una pantalla
+cacheada se reanuda tras cambios que no vio, recibe un evento de
+invalidación por cada tabla afectada.
 """
 
+import os
 import flet as ft
+from collections import OrderedDict
 from typing import Dict, Callable, Any, Optional
 from core.logger import get_logger
+from core.change_events import ChangeEvent, get_change_bus
+from core.metrics import record_cache_access
+from core.query_stats import query_action
+from core.table_stats import get_table_stats
+
+# Estimación de memoria por control vivo y por elemento de datos cacheado
+_BYTES_PER_CONTROL = 2048
+_BYTES_PER_ITEM = 512
+
+
+class _CachedScreen:
+    """Instancia viva de una pantalla con su árbol de controles"""
+
+    __slots__ = ("instance", "content", "size_bytes", "versions")
+
+    def __init__(self, instance: Any, content: ft.Control, size_bytes: int):
+        self.instance = instance
+        self.content = content
+        self.size_bytes = size_bytes
+        # Versiones de change_tables al ocultarse la pantalla
+        self.versions: Dict[str, int] = {}
+
 
 class ScreenManager:
     """Gestor de pantallas y navegación"""
-    
+
     def __init__(self, page: ft.Page):
         self.page = page
         self.logger = get_logger(__name__)
         self.screens: Dict[str, Callable] = {}
         self.current_screen = None
+        self.current_instance = None
+        self.current_content = None
+        self.current_kwargs: Dict[str, Any] = {}
         self.history = []
-    
+
+        # Caché LRU de pantallas keep-alive
+        self.cache_max_screens = int(os.getenv("SCREEN_CACHE_SIZE", "4"))
+        self.cache_max_bytes = int(float(os.getenv("SCREEN_CACHE_MAX_MB", "32")) * 1024 * 1024)
+        self._cache: "OrderedDict[str, _CachedScreen]" = OrderedDict()
+
+        get_change_bus().attach(page)
+
     def register_screen(self, name: str, screen_factory: Callable):
         """Registra una pantalla en el gestor"""
         self.screens[name] = screen_factory
-        self.logger.info(f"Pantalla registrada: {name}")
-    
-    def navigate_to(self, screen_name: str, **kwargs) -> bool:
-        """Navega a una pantalla específica"""
+        self.logger.info("Pantalla registrada: %s", name)
+
+    def navigate_to(self, screen_name: str, resume: bool = False, _push_history: bool = True, **kwargs) -> bool:
+        """Navega a una pantalla específica
+
+        Con ``resume=True`` se reutiliza la instancia cacheada de la pantalla
+        si existe; si no, se crea como siempre.
+        """
         try:
             if screen_name not in self.screens:
                 self.logger.error(f"Pantalla no encontrada: {screen_name}")
                 return False
-            
-            # Crear la pantalla usando la función registrada
-            screen_factory = self.screens[screen_name]
-            
-            screen_instance = screen_factory(**kwargs)
-            
-            # Construir la interfaz
-            screen_content = screen_instance.build()
-            
+
+            cached = None
+            if resume and not kwargs:
+                cached = self._cache.get(screen_name)
+                record_cache_access("screens", cached is not None)
+
+            if cached is not None:
+                self._cache.move_to_end(screen_name)
+                screen_instance, screen_content = cached.instance, cached.content
+            else:
+                # Crear la pantalla usando la función registrada
+                screen_factory = self.screens[screen_name]
+
+                # Las consultas de construcción cuentan como una acción de pantalla
+                with query_action(f"navigate:{screen_name}"):
+                    screen_instance = screen_factory(**kwargs)
+
+                    # Construir la interfaz
+                    screen_content = screen_instance.build()
+
+            self._hide_current()
+
             # Limpiar la página y agregar el nuevo contenido
             self.page.clean()
             self.page.add(screen_content)
             self.page.update()
-            
+
             # Actualizar historial
-            if self.current_screen:
-                self.history.append(self.current_screen)
-            
+            if self.current_screen and _push_history:
+                self.history.append((self.current_screen, self.current_kwargs))
+
             self.current_screen = screen_name
-            self.logger.info(f"Navegación exitosa a: {screen_name}")
-            
+            self.current_instance = screen_instance
+            self.current_content = screen_content
+            self.current_kwargs = kwargs
+
+            if cached is None and getattr(screen_instance, "keep_alive", False) and not kwargs:
+                self._cache_screen(screen_name, screen_instance, screen_content)
+
+            self._call_hook(screen_instance, "on_show")
+            self._subscribe_changes(screen_instance, cached)
+            self.logger.info("Navegación exitosa a: %s%s", screen_name, " (reanudada)" if cached else "")
+
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Error al navegar a {screen_name}: {e}")
             import traceback
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             return False
 
-    def go_back(self) -> bool:
-        """Navega a la pantalla anterior"""
+    def go_back(self, fallback: str = None) -> bool:
+        """Navega a la pantalla anterior reanudándola si está en caché
+
+        Si no hay historial y se indica ``fallback``, navega a esa pantalla.
+        """
         if not self.history:
+            if fallback:
+                return self.navigate_to(fallback, resume=True)
             self.logger.warning("No hay pantalla anterior en el historial")
             return False
-        
-        previous_screen = self.history.pop()
-        return self.navigate_to(previous_screen)
-    
+
+        previous_screen, previous_kwargs = self.history.pop()
+        return self.navigate_to(previous_screen, resume=True, _push_history=False, **previous_kwargs)
+
     def clear_history(self):
         """Limpia el historial de navegación"""
         self.history.clear()
         self.logger.info("Historial de navegación limpiado")
-    
+
     def get_current_screen(self) -> Optional[str]:
         """Obtiene el nombre de la pantalla actual"""
         return self.current_screen
+
+    # === CACHÉ DE PANTALLAS ===
+
+    def invalidate(self, screen_name: str):
+        """Descarta la instancia cacheada de una pantalla (p. ej. tras guardar)"""
+        entry = self._cache.pop(screen_name, None)
+        if entry is not None and entry.instance is not self.current_instance:
+            self._call_hook(entry.instance, "cleanup")
+
+    def clear_cache(self):
+        """Descarta todas las pantallas cacheadas (p. ej. al cerrar sesión)"""
+        for name in list(self._cache):
+            self.invalidate(name)
+        self.logger.info("Caché de pantallas limpiada")
+
+    def get_cache_info(self) -> Dict[str, Any]:
+        """Pantallas cacheadas y memoria estimada"""
+        return {
+            "screens": list(self._cache),
+            "size_bytes": sum(entry.size_bytes for entry in self._cache.values()),
+            "max_screens": self.cache_max_screens,
+            "max_bytes": self.cache_max_bytes
+        }
+
+    def _cache_screen(self, screen_name: str, instance: Any, content: ft.Control):
+        if self.cache_max_screens <= 0:
+            return
+        previous = self._cache.pop(screen_name, None)
+        if previous is not None and previous.instance is not instance:
+            self._call_hook(previous.instance, "cleanup")
+
+        self._cache[screen_name] = _CachedScreen(instance, content, self._estimate_size(instance, content))
+
+        # Expulsar las menos usadas hasta respetar ambos límites (nunca la actual)
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.cache_max_screens or
+            sum(entry.size_bytes for entry in self._cache.values()) > self.cache_max_bytes
+        ):
+            oldest = next(iter(self._cache))
+            if oldest == screen_name:
+                break
+            self.logger.info("Expulsando pantalla de la caché: %s", oldest)
+            self.invalidate(oldest)
+
+    def _estimate_size(self, instance: Any, content: ft.Control) -> int:
+        """Memoria aproximada: controles del árbol y colecciones de datos de la pantalla"""
+        estimate = getattr(instance, "estimate_memory", None)
+        if callable(estimate):
+            try:
+                return int(estimate())
+            except Exception:
+                pass
+
+        controls = 0
+        pending = [content]
+        while pending:
+            control = pending.pop()
+            if control is None:
+                continue
+            controls += 1
+            try:
+                pending.extend(control._get_children())
+            except Exception:
+                pass
+
+        items = sum(len(value) for value in vars(instance).values() if isinstance(value, (list, dict)))
+        return controls * _BYTES_PER_CONTROL + items * _BYTES_PER_ITEM
+
+    def _hide_current(self):
+        if self.current_instance is None:
+            return
+        # Las pantallas pueden haber reconstruido su contenido (p. ej. _refresh_page)
+        entry = self._cache.get(self.current_screen)
+        if entry is not None and entry.instance is self.current_instance and getattr(self.page, "controls", None):
+            entry.content = self.page.controls[0]
+        self._unsubscribe_changes(self.current_instance, entry)
+        self._call_hook(self.current_instance, "on_hide")
+
+    # === CAMBIOS DE OTRAS SESIONES ===
+
+    def _subscribe_changes(self, instance: Any, resumed: Optional[_CachedScreen] = None):
+        tables = getattr(instance, "change_tables", None)
+        handler = getattr(instance, "on_data_changed", None)
+        if not tables or not callable(handler):
+            return
+        try:
+            get_change_bus().subscribe(self.page, tables, handler)
+        except Exception as e:
+            self.logger.error(f"No se pudo suscribir {type(instance).__name__} a cambios: {e}")
+            return
+
+        if resumed is not None and resumed.versions:
+            # Cambios ocurridos mientras la pantalla estaba oculta
+            table_stats = get_table_stats()
+            stale = [table for table, version in resumed.versions.items() if table_stats.version(table) != version]
+            if stale:
+                try:
+                    handler([ChangeEvent(table, "invalidate") for table in stale])
+                except Exception as e:
+                    self.logger.error(f"Error en on_data_changed de {type(instance).__name__}: {e}")
+
+    def _unsubscribe_changes(self, instance: Any, entry: Optional[_CachedScreen] = None):
+        tables = getattr(instance, "change_tables", None)
+        handler = getattr(instance, "on_data_changed", None)
+        if not tables or not callable(handler):
+            return
+        try:
+            get_change_bus().unsubscribe(self.page, handler)
+        except Exception as e:
+            self.logger.debug("No se pudo cancelar la suscripción de %s: %s", type(instance).__name__, e)
+        if entry is not None and entry.instance is instance:
+            table_stats = get_table_stats()
+            entry.versions = {table: table_stats.version(table) for table in tables}
+
+    def _call_hook(self, instance: Any, hook: str):
+        method = getattr(instance, hook, None)
+        if callable(method):
+            try:
+                method()
+            except Exception as e:
+                self.logger.error(f"Error en {hook} de {type(instance).__name__}: {e}")
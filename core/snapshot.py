@@ -0,0 +1,279 @@
+"""
+Formato binario de instantáneas de datos
+
+Sustituye a los volcados JSON (una lista de diccionarios por tabla, con las
+claves repetidas en cada fila) para mover datos entre SQLite, el
+almacenamiento web y las copias completas. El formato es:
+
+- Cabecera ``PMSNAP`` + versión, sin comprimir.
+- Flujo zlib con, por cada tabla, su esquema (nombre, columnas y tipo
+  declarado) seguido de bloques de hasta ``chunk_rows`` filas guardados por
+  columnas. Cada columna de un bloque lleva su tipo (entero ``q``, real
+  ``d``, texto, bytes o JSON), una máscara de NULL si hace falta y los
+  valores empaquetados con ``struct``.
+
+La escritura y la lectura son en streaming: ``write_snapshot`` consume las
+filas de cada tabla según llegan y ``read_snapshot`` entrega tuplas por
+bloque, sin construir diccionarios intermedios.
+"""
+
+import json
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"PMSNAP"
+VERSION = 1
+CHUNK_ROWS = 4096
+
+# Tipos de columna dentro de un bloque
+_INT = b"i"
+_FLOAT = b"f"
+_TEXT = b"t"
+_BYTES = b"b"
+_JSON = b"j"
+_NULL = b"n"
+
+_TABLE = b"T"
+_END = b"E"
+
+_U32 = struct.Struct("<I")
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+# Enteros que un real de 64 bits representa sin pérdida
+_FLOAT_EXACT = 1 << 53
+
+
+class SnapshotError(ValueError):
+    """Instantánea con formato no válido o de una versión no soportada"""
+
+
+@dataclass
+class SnapshotTable:
+    """Tabla a escribir: nombre, columnas, filas (secuencias en el orden de ``columns``)"""
+    name: str
+    columns: List[str]
+    rows: Iterable[Sequence[Any]]
+    # Tipo declarado de cada columna (p. ej. el de SQLite); solo informativo
+    types: Optional[List[str]] = None
+
+
+# === ESCRITURA ===
+
+def write_snapshot(fileobj: BinaryIO, tables: Iterable[SnapshotTable], level: int = 6,
+                   chunk_rows: int = CHUNK_ROWS) -> int:
+    """Escribe las tablas en ``fileobj``
+
+    Returns:
+        Número total de filas escritas
+    """
+    fileobj.write(MAGIC + bytes([VERSION]))
+    compressor = zlib.compressobj(level)
+
+    def emit(data: bytes):
+        compressed = compressor.compress(data)
+        if compressed:
+            fileobj.write(compressed)
+
+    total = 0
+    for table in tables:
+        columns = list(table.columns)
+        types = list(table.types or [""] * len(columns))
+        header = [_TABLE, _pack_str(table.name), _U32.pack(len(columns))]
+        for column, declared in zip(columns, types):
+            header.append(_pack_str(column))
+            header.append(_pack_str(declared or ""))
+        emit(b"".join(header))
+
+        chunk: List[Sequence[Any]] = []
+        for row in table.rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                emit(_encode_chunk(chunk, len(columns)))
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            emit(_encode_chunk(chunk, len(columns)))
+            total += len(chunk)
+        emit(_U32.pack(0))
+
+    emit(_END)
+    fileobj.write(compressor.flush())
+    return total
+
+
+def _encode_chunk(rows: List[Sequence[Any]], width: int) -> bytes:
+    columns = list(zip(*rows)) if width else []
+    if len(columns) != width:
+        raise SnapshotError(f"Filas con un número de columnas distinto de {width}")
+    return _U32.pack(len(rows)) + b"".join(_encode_column(values) for values in columns)
+
+
+def _encode_column(values: Sequence[Any]) -> bytes:
+    present = [value for value in values if value is not None]
+    mask = b"" if len(present) == len(values) else bytes(value is None for value in values)
+    kind = _column_kind(present)
+
+    if kind == _NULL:
+        payload = b""
+    elif kind == _INT:
+        payload = struct.pack(f"<{len(present)}q", *present)
+    elif kind == _FLOAT:
+        payload = struct.pack(f"<{len(present)}d", *present)
+    else:
+        if kind == _TEXT:
+            encoded = [value.encode("utf-8") for value in present]
+        elif kind == _BYTES:
+            encoded = [bytes(value) for value in present]
+        else:
+            encoded = [json.dumps(value, ensure_ascii=False).encode("utf-8") for value in present]
+        payload = struct.pack(f"<{len(encoded)}I", *map(len, encoded)) + b"".join(encoded)
+
+    return kind + (b"\x01" + mask if mask else b"\x00") + payload
+
+
+def _column_kind(values: Sequence[Any]) -> bytes:
+    if not values:
+        return _NULL
+    types = {type(value) for value in values}
+    if types == {int} and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        return _INT
+    if types <= {int, float} and float in types and all(
+            -_FLOAT_EXACT <= value <= _FLOAT_EXACT for value in values if type(value) is int):
+        return _FLOAT
+    if types == {str}:
+        return _TEXT
+    if types <= {bytes, bytearray, memoryview}:
+        return _BYTES
+    # Mezclas (o bool, dict, list...): cada valor como JSON
+    return _JSON
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _U32.pack(len(data)) + data
+
+
+# === LECTURA ===
+
+class _Inflater:
+    """Lector de un flujo zlib por bloques"""
+
+    def __init__(self, fileobj: BinaryIO, block_size: int = 64 * 1024):
+        self._fileobj = fileobj
+        self._block_size = block_size
+        self._decompressor = zlib.decompressobj()
+        self._buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            data = self._fileobj.read(self._block_size)
+            if not data:
+                self._buffer += self._decompressor.flush()
+                if len(self._buffer) < size:
+                    raise SnapshotError("Instantánea truncada")
+                break
+            self._buffer += self._decompressor.decompress(data)
+        result = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return result
+
+    def u32(self) -> int:
+        return _U32.unpack(self.read(4))[0]
+
+    def string(self) -> str:
+        return self.read(self.u32()).decode("utf-8")
+
+
+def read_snapshot(fileobj: BinaryIO) -> Iterator[Tuple[str, List[str], List[str], Iterator[tuple]]]:
+    """Recorre las tablas de una instantánea
+
+    Entrega ``(tabla, columnas, tipos declarados, filas)``, donde ``filas``
+    es un iterador de tuplas. Igual que con ``itertools.groupby``, las filas
+    de una tabla deben consumirse antes de pasar a la siguiente; las que no
+    se consuman se saltan.
+    """
+    header = fileobj.read(len(MAGIC) + 1)
+    if len(header) <= len(MAGIC) or header[:len(MAGIC)] != MAGIC:
+        raise SnapshotError("No es una instantánea de datos")
+    if header[len(MAGIC)] != VERSION:
+        raise SnapshotError(f"Versión de instantánea no soportada: {header[len(MAGIC)]}")
+
+    stream = _Inflater(fileobj)
+    while True:
+        marker = stream.read(1)
+        if marker == _END:
+            return
+        if marker != _TABLE:
+            raise SnapshotError(f"Marcador de bloque no válido: {marker!r}")
+
+        name = stream.string()
+        width = stream.u32()
+        columns, types = [], []
+        for _ in range(width):
+            columns.append(stream.string())
+            types.append(stream.string())
+
+        rows = _iter_table_rows(stream, width)
+        yield name, columns, types, rows
+        # Saltar lo que el llamador no haya leído
+        for _ in rows:
+            pass
+
+
+def _iter_table_rows(stream: _Inflater, width: int) -> Iterator[tuple]:
+    while True:
+        count = stream.u32()
+        if count == 0:
+            return
+        columns = [_decode_column(stream, count) for _ in range(width)]
+        yield from zip(*columns) if width else (() for _ in range(count))
+
+
+def _decode_column(stream: _Inflater, count: int) -> List[Any]:
+    kind = stream.read(1)
+    has_mask = stream.read(1) == b"\x01"
+    mask = stream.read(count) if has_mask else None
+    present = count - sum(mask) if mask else count
+
+    if kind == _NULL:
+        return [None] * count
+    if kind == _INT:
+        values = list(struct.unpack(f"<{present}q", stream.read(8 * present)))
+    elif kind == _FLOAT:
+        values = list(struct.unpack(f"<{present}d", stream.read(8 * present)))
+    elif kind in (_TEXT, _BYTES, _JSON):
+        lengths = struct.unpack(f"<{present}I", stream.read(4 * present))
+        data = stream.read(sum(lengths))
+        values, offset = [], 0
+        for length in lengths:
+            values.append(data[offset:offset + length])
+            offset += length
+        if kind == _TEXT:
+            values = [value.decode("utf-8") for value in values]
+        elif kind == _JSON:
+            values = [json.loads(value) for value in values]
+    else:
+        raise SnapshotError(f"Tipo de columna no válido: {kind!r}")
+
+    if mask is None:
+        return values
+    source = iter(values)
+    return [None if is_null else next(source) for is_null in mask]
+
+
+# === CONVERSIONES ===
+
+def rows_from_dicts(records: Iterable[dict], columns: Sequence[str]) -> Iterator[tuple]:
+    """Filas ``dict`` como tuplas en el orden de ``columns`` (claves ausentes → None)"""
+    for record in records:
+        yield tuple(record.get(column) for column in columns)
+
+
+def columns_of(records: Sequence[dict]) -> List[str]:
+    """Columnas de una lista de diccionarios, en orden de primera aparición"""
+    columns: dict = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+    return list(columns)
@@ -0,0 +1,218 @@
+"""
+Registro de estadísticas por tabla mantenidas de forma incremental
+
+Guarda el número de filas y la fecha de la última escritura de cada tabla.
+Un contador se inicializa una sola vez con su consulta ``COUNT(*)`` y a
+partir de ahí se ajusta con cada INSERT/DELETE que pasa por
+``execute_update``, de modo que leerlo es O(1).
+
+Los contadores filtrados (p. ej. ``usuarios:activos``) dependen de valores
+de columnas: cualquier escritura en su tabla los invalida y se recuentan en
+la siguiente lectura.
+
+También lleva una versión monotónica por tabla y por partición
+``(tabla, año)``: cada escritura la incrementa, así que cachés, ETags o
+resúmenes pueden guardar la versión con la que se calcularon y comparar.
+Si la escritura no permite saber el año (INSERT ... SELECT, UPDATE que
+cambia el año, sin parámetros...), cambian todas las particiones de la tabla.
+
+Los oyentes registrados con ``add_listener`` reciben cada escritura con los
+valores de ``año``, ``mes`` y ``municipio_id`` que se pudieron leer de la
+sentencia (ver ``core.change_events``).
+"""
+
+import re
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from core.logger import get_logger
+
+_WRITE_STATEMENT = re.compile(
+    r"^\s*(insert(?:\s+or\s+(\w+))?\s+into|update(?:\s+or\s+\w+)?|delete\s+from)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE
+)
+_INSERT_COLUMNS = re.compile(r"\(([^()]*)\)\s*values\s*\(([^()]*)\)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+_SET_CLAUSE = re.compile(r"\bset\b(.*?)(?:\bwhere\b|$)", re.IGNORECASE | re.DOTALL)
+_WHERE_CLAUSE = re.compile(r"\bwhere\b(.*)$", re.IGNORECASE | re.DOTALL)
+
+PARTITION_COLUMN = "año"
+# Columnas que se informan a los oyentes de escrituras
+EVENT_COLUMNS = (PARTITION_COLUMN, "mes", "municipio_id")
+
+# (tabla, acción, {columna: valor o None si no se conoce})
+WriteListener = Callable[[str, str, Dict[str, Any]], None]
+
+
+class TableStats:
+    """Contadores de filas y marcas de última actualización por tabla"""
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._updated: Dict[str, str] = {}
+        self._writes: Dict[str, int] = {}
+        self._epoch = 0
+        # Versiones: por tabla, por (tabla, año) y cambios sin partición conocida
+        self._versions: Dict[str, int] = {}
+        self._partition_versions: Dict[Tuple[str, Any], int] = {}
+        self._unpartitioned: Dict[str, int] = {}
+        self._listeners: List[WriteListener] = []
+
+    def add_listener(self, listener: WriteListener):
+        """Registra una función a la que se avisa de cada escritura e invalidación"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def count(self, key: str, loader: Callable[[], int]) -> int:
+        """Número de filas de ``key`` (``tabla`` o ``tabla:filtro``)
+
+        ``loader`` solo se ejecuta si el contador no está inicializado.
+        """
+        table = key.split(":", 1)[0]
+        with self._lock:
+            if key in self._counts:
+                return self._counts[key]
+            writes = (self._epoch, self._writes.get(table, 0))
+        value = int(loader())
+        with self._lock:
+            # Si hubo escrituras durante el recuento, no se guarda
+            if (self._epoch, self._writes.get(table, 0)) == writes:
+                self._counts.setdefault(key, value)
+        return value
+
+    def last_updated(self, table: str) -> Optional[str]:
+        """Fecha ISO de la última escritura registrada en la tabla"""
+        with self._lock:
+            return self._updated.get(table)
+
+    def version(self, table: str, año: Any = None) -> int:
+        """Versión de los datos de la tabla (o solo de un año); cambia con cada escritura"""
+        table = table.lower()
+        with self._lock:
+            if año is None:
+                return self._epoch + self._versions.get(table, 0)
+            return (self._epoch + self._unpartitioned.get(table, 0)
+                    + self._partition_versions.get((table, año), 0))
+
+    def record_write(self, query: str, affected: int, params: Sequence[Any] = None):
+        """Ajusta los contadores y las versiones tras una sentencia de escritura"""
+        match = _WRITE_STATEMENT.match(query)
+        if not match or affected <= 0:
+            return
+        statement, conflict, table = match.group(1).lower(), (match.group(2) or "").lower(), match.group(3).lower()
+        partition = _column_value(statement, query, params, PARTITION_COLUMN)
+
+        with self._lock:
+            self._updated[table] = datetime.now().isoformat()
+            self._writes[table] = self._writes.get(table, 0) + 1
+            self._versions[table] = self._versions.get(table, 0) + 1
+            if partition is _UNKNOWN:
+                self._unpartitioned[table] = self._unpartitioned.get(table, 0) + 1
+            else:
+                key = (table, partition)
+                self._partition_versions[key] = self._partition_versions.get(key, 0) + 1
+            for key in [k for k in self._counts if k == table or k.startswith(table + ":")]:
+                if key != table or conflict == "replace":
+                    # El resultado depende de valores que no conocemos: recontar
+                    del self._counts[key]
+                elif statement.startswith("update"):
+                    continue
+                elif statement.startswith("insert"):
+                    self._counts[key] += affected
+                else:
+                    self._counts[key] = max(0, self._counts[key] - affected)
+            listeners = list(self._listeners)
+
+        if listeners:
+            values = {PARTITION_COLUMN: None if partition is _UNKNOWN else partition}
+            for column in EVENT_COLUMNS[1:]:
+                value = _column_value(statement, query, params, column)
+                values[column] = None if value is _UNKNOWN else value
+            action = "replace" if conflict == "replace" else statement.split()[0]
+            self._notify(listeners, table, action, values)
+
+    def invalidate(self, table: str = None):
+        """Descarta los contadores de una tabla, o todos (p. ej. tras restaurar datos)"""
+        with self._lock:
+            listeners = list(self._listeners)
+            if table is None:
+                self._counts.clear()
+                self._epoch += 1
+                self.logger.info("Contadores de tablas descartados")
+            else:
+                for key in [k for k in self._counts if k == table or k.startswith(table + ":")]:
+                    del self._counts[key]
+                self._writes[table] = self._writes.get(table, 0) + 1
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._unpartitioned[table] = self._unpartitioned.get(table, 0) + 1
+                self._updated[table] = datetime.now().isoformat()
+        # "*": todas las tablas
+        self._notify(listeners, table or "*", "invalidate", dict.fromkeys(EVENT_COLUMNS))
+
+    def _notify(self, listeners: List[WriteListener], table: str, action: str, values: Dict[str, Any]):
+        for listener in listeners:
+            try:
+                listener(table, action, values)
+            except Exception as e:
+                self.logger.error(f"Error notificando escritura en {table}: {e}")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Contadores inicializados, últimas escrituras y versiones"""
+        with self._lock:
+            versions = {table: self._epoch + value for table, value in self._versions.items()}
+            return {"counts": dict(self._counts), "last_updated": dict(self._updated), "versions": versions}
+
+
+_UNKNOWN = object()
+
+
+def _column_value(statement: str, query: str, params: Sequence[Any], column: str) -> Any:
+    """Valor de ``column`` en las filas escritas, o ``_UNKNOWN`` si no se puede saber"""
+    if statement.startswith("insert"):
+        match = _INSERT_COLUMNS.search(query)
+        if not match:
+            return _UNKNOWN
+        columns = [column.strip().strip('"`[]').lower() for column in match.group(1).split(",")]
+        values = [value.strip() for value in match.group(2).split(",")]
+        if column not in columns or len(columns) != len(values):
+            return _UNKNOWN
+        index = columns.index(column)
+        return _bound_value(values[index], values[:index].count("?"), params)
+
+    if statement.startswith("update"):
+        set_clause = _SET_CLAUSE.search(query)
+        if set_clause and re.search(rf"\b{column}\s*=", set_clause.group(1), re.IGNORECASE):
+            # Mueve filas de un valor a otro (p. ej. de un año a otro)
+            return _UNKNOWN
+
+    where = _WHERE_CLAUSE.search(query)
+    if not where:
+        return _UNKNOWN
+    condition = re.search(rf"\b{column}\s*=\s*(\?|-?\d+)", where.group(1), re.IGNORECASE)
+    if not condition:
+        return _UNKNOWN
+    return _bound_value(condition.group(1), query[:where.start(1) + condition.start(1)].count("?"), params)
+
+
+def _bound_value(token: str, position: int, params: Sequence[Any] = None) -> Any:
+    if token == "?":
+        if params is None or position >= len(params):
+            return _UNKNOWN
+        return params[position]
+    try:
+        return int(token)
+    except ValueError:
+        return _UNKNOWN
+
+
+# Instancia global del registro
+_table_stats = None
+
+def get_table_stats() -> TableStats:
+    """Obtiene el registro global de estadísticas por tabla"""
+    global _table_stats
+    if _table_stats is None:
+        _table_stats = TableStats()
+    return _table_stats
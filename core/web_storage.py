@@ -1,13 +1,79 @@
 """
 Sistema de almacenamiento web usando localStorage
 SINCRONIZADO CON ESTRUCTURA DE MIGRACIONES
+
+Los valores de más de WEB_STORAGE_COMPRESS_MIN_BYTES se guardan comprimidos
+(zlib + base64 con el prefijo ``z1:``) si así ocupan menos. Los valores sin
+prefijo se leen como JSON plano, de modo que las claves ya guardadas siguen
+funcionando. WEB_STORAGE_COMPRESSION=false desactiva la compresión.
+
+Las tablas importadas desde una instantánea (``import_snapshot``) se guardan
+en el formato binario de ``core.snapshot`` (base64 con el prefijo ``s1:``) y
+solo se decodifican cuando se leen; la siguiente escritura de la tabla la
+vuelve a guardar como JSON.
 """
 
+import base64
+import io
 import json
+import os
+import threading
+import zlib
 import flet as ft
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from core.logger import get_logger
 
+# Tablas guardadas en client_storage (mismo orden que las migraciones)
+STORAGE_TABLES = (
+    "municipios", "usuarios", "configuraciones", "energia_barra", "facturacion",
+    "transferencias_consumos", "planes_perdidas", "calculos_perdidas",
+    "resumen_perdidas_provincial", "lineas_venta", "mediciones_lineas",
+    "transformadores_linea", "clientes_municipio", "transferencias_municipios",
+    "logs_sistema"
+)
+
+CODEC_PREFIX = "z1:"
+SNAPSHOT_PREFIX = "s1:"
+
+
+def encode_value(text: str, min_bytes: int = 1024, level: int = 6) -> str:
+    """Comprime ``text`` si supera ``min_bytes`` y el resultado es menor"""
+    raw = text.encode("utf-8")
+    if len(raw) < min_bytes:
+        return text
+    encoded = CODEC_PREFIX + base64.b64encode(zlib.compress(raw, level)).decode("ascii")
+    return encoded if len(encoded) < len(text) else text
+
+
+def decode_value(stored: str) -> str:
+    """Inverso de ``encode_value``; los valores sin prefijo se devuelven tal cual"""
+    if stored.startswith(CODEC_PREFIX):
+        return zlib.decompress(base64.b64decode(stored[len(CODEC_PREFIX):])).decode("utf-8")
+    return stored
+
+
+def encode_snapshot_table(table: str, columns: List[str], rows, types: List[str] = None) -> Tuple[str, int]:
+    """Una tabla como instantánea binaria en texto (``s1:`` + base64)
+
+    Returns:
+        ``(valor a guardar, filas escritas)``
+    """
+    from core.snapshot import SnapshotTable, write_snapshot
+
+    buffer = io.BytesIO()
+    count = write_snapshot(buffer, [SnapshotTable(table, columns, rows, types)])
+    return SNAPSHOT_PREFIX + base64.b64encode(buffer.getvalue()).decode("ascii"), count
+
+
+def read_snapshot_table(stored: str):
+    """Inverso de ``encode_snapshot_table``: ``(columnas, tipos, filas)`` con las filas perezosas"""
+    from core.snapshot import read_snapshot
+
+    data = base64.b64decode(stored[len(SNAPSHOT_PREFIX):])
+    for _, columns, types, rows in read_snapshot(io.BytesIO(data)):
+        return columns, types, rows
+    return [], [], iter(())
+
 class WebStorageManager:
     """Gestor de almacenamiento web usando localStorage - ESTRUCTURA REAL"""
     
@@ -16,6 +82,10 @@ class WebStorageManager:
         self.prefix = prefix
         self.logger = get_logger(__name__)
         self._initialized = False
+        self.compression = os.getenv("WEB_STORAGE_COMPRESSION", "true").lower() == "true"
+        self.compress_min_bytes = int(os.getenv("WEB_STORAGE_COMPRESS_MIN_BYTES", "1024"))
+        self._codec_lock = threading.Lock()
+        self._codec_stats = {"writes": 0, "compressed_writes": 0, "raw_bytes": 0, "stored_bytes": 0}
         
         # Inicializar datos por defecto según migraciones
         self._init_default_data()
@@ -123,7 +193,10 @@ class WebStorageManager:
         try:
             full_key = f"{self.prefix}{key}"
             data = self.page.client_storage.get(full_key)
-            return json.loads(data) if data else None
+            if data and data.startswith(SNAPSHOT_PREFIX):
+                columns, _, rows = read_snapshot_table(data)
+                return [dict(zip(columns, row)) for row in rows]
+            return json.loads(decode_value(data)) if data else None
         except Exception as e:
             self.logger.error(f"Error al obtener {key}: {e}")
             return None
@@ -133,10 +206,36 @@ class WebStorageManager:
         try:
             full_key = f"{self.prefix}{key}"
             json_data = json.dumps(data, ensure_ascii=False)
-            self.page.client_storage.set(full_key, json_data)
+            stored = encode_value(json_data, self.compress_min_bytes) if self.compression else json_data
+            self.page.client_storage.set(full_key, stored)
+            self._record_codec(json_data, stored)
         except Exception as e:
             self.logger.error(f"Error al guardar {key}: {e}")
     
+    def _record_codec(self, json_data: str, stored: str):
+        raw_bytes = len(json_data.encode("utf-8"))
+        stored_bytes = len(stored.encode("utf-8"))
+        with self._codec_lock:
+            self._codec_stats["writes"] += 1
+            self._codec_stats["compressed_writes"] += stored is not json_data
+            self._codec_stats["raw_bytes"] += raw_bytes
+            self._codec_stats["stored_bytes"] += stored_bytes
+        try:
+            from core.metrics import get_metrics_registry
+            registry = get_metrics_registry()
+            help_text = "Bytes escritos en client_storage antes y después de comprimir"
+            registry.inc("perdidas_web_storage_bytes_total", raw_bytes, {"stage": "raw"}, help_text)
+            registry.inc("perdidas_web_storage_bytes_total", stored_bytes, {"stage": "stored"}, help_text)
+        except Exception:
+            pass
+    
+    def get_compression_stats(self) -> Dict[str, Any]:
+        """Escrituras, bytes antes/después de comprimir y ratio acumulado"""
+        with self._codec_lock:
+            stats = dict(self._codec_stats)
+        stats["ratio"] = round(stats["raw_bytes"] / stats["stored_bytes"], 2) if stats["stored_bytes"] else 1.0
+        return stats
+    
     def initialize(self):
         """Inicializa el storage web"""
         if self._initialized:
@@ -225,6 +324,18 @@ class WebStorageManager:
     
     def execute_update(self, query: str, params: tuple = None) -> int:
         """Simula actualizaciones SQL usando localStorage - ESTRUCTURA REAL"""
+        affected = self._apply_update(query, params)
+        if affected:
+            from core.table_stats import get_table_stats
+            get_table_stats().record_write(query, affected, params)
+        return affected
+    
+    def version(self, table: str, año: int = None) -> int:
+        """Versión de los datos de ``table`` (o de su partición ``año``); ver ``core.table_stats``"""
+        from core.table_stats import get_table_stats
+        return get_table_stats().version(table, año)
+    
+    def _apply_update(self, query: str, params: tuple = None) -> int:
         try:
             query_lower = query.lower().strip()
             
@@ -554,6 +665,51 @@ class WebStorageManager:
         
         self.logger.info("✅ Todos los datos han sido limpiados")
     
+    def export_snapshot(self) -> bytes:
+        """Todas las tablas en formato de instantánea binaria (ver ``core.snapshot``)"""
+        from core.snapshot import SnapshotTable, columns_of, rows_from_dicts, write_snapshot
+        
+        def tables():
+            for table in STORAGE_TABLES:
+                stored = self.page.client_storage.get(f"{self.prefix}{table}")
+                if stored and stored.startswith(SNAPSHOT_PREFIX):
+                    # Tabla importada sin cambios: se copian sus filas sin pasar por dict
+                    columns, types, rows = read_snapshot_table(stored)
+                    yield SnapshotTable(table, columns, rows, types)
+                    continue
+                data = self._get_raw(table) or []
+                columns = columns_of(data)
+                yield SnapshotTable(table, columns, rows_from_dicts(data, columns))
+        
+        buffer = io.BytesIO()
+        write_snapshot(buffer, tables())
+        return buffer.getvalue()
+    
+    def import_snapshot(self, data: bytes) -> Dict[str, int]:
+        """Sustituye las tablas por las de una instantánea; devuelve las filas por tabla
+
+        Cada tabla se guarda como su propia instantánea binaria, sin
+        convertirla a JSON; ``_get_raw`` la decodifica al leerla.
+        """
+        from core.snapshot import read_snapshot
+        
+        counts = {}
+        for table, columns, types, rows in read_snapshot(io.BytesIO(data)):
+            if table not in STORAGE_TABLES:
+                continue
+            stored, counts[table] = encode_snapshot_table(table, columns, rows, types)
+            self.page.client_storage.set(f"{self.prefix}{table}", stored)
+        
+        # Contadores, versiones y cachés de consultas describen los datos anteriores
+        try:
+            from core.table_stats import get_table_stats
+            get_table_stats().invalidate()
+        except Exception:
+            pass
+        
+        self.logger.info("✅ Instantánea importada: %s filas", sum(counts.values()))
+        return counts
+    
     def get_database_stats(self) -> Dict[str, int]:
         """Obtiene estadísticas de la base de datos"""
         stats = {}
@@ -7,6 +7,8 @@ import flet as ft
 from typing import Dict, List
 from core.logger import get_logger
 from core.database import get_db_manager
+from core.query_stats import get_query_stats
+from core.table_stats import get_table_stats
 
 
 class MainDashboard:
@@ -17,6 +19,8 @@ class MainDashboard:
         self.page = app.page
         self.logger = get_logger(__name__)
         self.db_manager = get_db_manager()
+        self.stat_texts: Dict[str, ft.Text] = {}
+        self.stat_cards: Dict[str, ft.Container] = {}
         
     def build(self) -> ft.Container:
         """Construye el dashboard principal con mejoras estéticas web"""
@@ -239,6 +243,35 @@ class MainDashboard:
                         
                         ft.Container(width=25),
                         
+                        # Estadísticas de consultas (solo administradores)
+                        ft.Container(
+                            content=ft.Column([
+                                ft.Container(
+                                    content=ft.IconButton(
+                                        icon=ft.Icons.SPEED,
+                                        icon_color=ft.Colors.WHITE,
+                                        tooltip="Estadísticas de consultas",
+                                        on_click=lambda e: self._show_query_stats()
+                                    ),
+                                    width=50,
+                                    height=50,
+                                    bgcolor=ft.Colors.PURPLE_500,
+                                    border_radius=25,
+                                    alignment=ft.alignment.center,
+                                    shadow=ft.BoxShadow(
+                                        spread_radius=1,
+                                        blur_radius=8,
+                                        color=ft.Colors.PURPLE_200,
+                                        offset=ft.Offset(0, 3)
+                                    )
+                                ),
+                                ft.Container(height=5),
+                                ft.Text("Consultas", size=11, weight=ft.FontWeight.BOLD, color=ft.Colors.PURPLE_700)
+                            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=0),
+                            margin=ft.margin.only(right=25),
+                            visible=user.get('tipo_usuario') == 'administrador'
+                        ),
+                        
                         # Dashboard icon mejorado
                         ft.Container(
                             content=ft.Column([
@@ -583,7 +616,15 @@ class MainDashboard:
 
     def _create_stat_card(self, title: str, value: str, icon, color, bg_color, subtitle: str = None) -> ft.Container:
         """Crea una tarjeta de estadística con tamaño original y contenido reducido"""
-        return ft.Container(
+        value_text = ft.Text(
+            value, 
+            size=28,  # Reducido de 42 a 28
+            weight=ft.FontWeight.BOLD,
+            color=color
+        )
+        self.stat_texts[title] = value_text
+        
+        card = ft.Container(
             content=ft.Container(
                 content=ft.Column([
                     # Fila principal con icono y datos - Contenido compacto
@@ -609,12 +650,7 @@ class MainDashboard:
                         # Columna con datos - Contenido compacto
                         ft.Column([
                             # Valor principal
-                            ft.Text(
-                                value, 
-                                size=28,  # Reducido de 42 a 28
-                                weight=ft.FontWeight.BOLD,
-                                color=color
-                            ),
+                            value_text,
                             # Título principal - Sin espaciado extra
                             ft.Text(
                                 title, 
@@ -639,29 +675,33 @@ class MainDashboard:
             ),
             border=ft.border.all(2, bg_color)
         )
+        self.stat_cards[title] = card
+        return card
 
     def _build_stats_cards(self) -> ft.Row:
-        """Construye las tarjetas de estadísticas compactas"""
-        stats = self._get_dashboard_stats()
+        """Construye las tarjetas de estadísticas compactas
         
+        Las cifras se muestran como "…" y se rellenan en ``on_show`` para que
+        el dashboard aparezca sin esperar a las consultas.
+        """
         cards = [
             self._create_stat_card(
                 "Municipios",  # Título simplificado
-                str(stats.get('municipios', 14)),
+                "…",
                 ft.Icons.LOCATION_CITY,
                 ft.Colors.BLUE_600,
                 ft.Colors.BLUE_50
             ),
             self._create_stat_card(
                 "Usuarios",  # Título simplificado
-                str(stats.get('usuarios', 2)),
+                "…",
                 ft.Icons.PEOPLE,
                 ft.Colors.GREEN_600,
                 ft.Colors.GREEN_50
             ),
             self._create_stat_card(
                 "Registros",  # Título simplificado
-                str(stats.get('registros', 0)),
+                "…",
                 ft.Icons.DATA_USAGE,
                 ft.Colors.ORANGE_600,
                 ft.Colors.ORANGE_50
@@ -925,26 +965,60 @@ class MainDashboard:
             bgcolor=ft.Colors.GREY_50
         )
 
+    def on_show(self):
+        """Rellena las tarjetas de estadísticas en segundo plano"""
+        self.page.run_thread(self._load_stats_cards)
+    
+    def _load_stats_cards(self):
+        """Carga las cifras de las tarjetas y actualiza la página"""
+        stats = self._get_dashboard_stats()
+        table_stats = get_table_stats()
+        
+        for title, key, table in (("Municipios", "municipios", "municipios"),
+                                  ("Usuarios", "usuarios", "usuarios"),
+                                  ("Registros", "registros", "energia_barra")):
+            if title in self.stat_texts:
+                self.stat_texts[title].value = str(stats.get(key, 0))
+            ultima = table_stats.last_updated(table)
+            if ultima and title in self.stat_cards:
+                self.stat_cards[title].tooltip = f"Última actualización: {ultima[:16].replace('T', ' ')}"
+        
+        try:
+            self.page.update()
+        except Exception as e:
+            self.logger.error(f"Error actualizando estadísticas del dashboard: {e}")
+
     def _get_dashboard_stats(self) -> Dict:
-        """Obtiene estadísticas para el dashboard - ACTUALIZADO"""
+        """Obtiene estadísticas para el dashboard desde los contadores mantenidos
+        
+        Cada contador se inicializa una vez con su COUNT(*) y después se ajusta
+        con cada escritura, así que la lectura es O(1).
+        """
         try:
+            table_stats = get_table_stats()
             stats = {}
             
             # Contar municipios (ahora son 14 con Varadero)
-            municipios = self.db_manager.execute_query("SELECT COUNT(*) as count FROM municipios WHERE activo = 1")
-            stats['municipios'] = municipios[0]['count'] if municipios else 14
+            stats['municipios'] = table_stats.count(
+                "municipios:activos",
+                lambda: self._count("SELECT COUNT(*) as count FROM municipios WHERE activo = 1", 14)
+            )
             
             # Contar usuarios activos (admin + operador = 2)
-            usuarios = self.db_manager.execute_query("SELECT COUNT(*) as count FROM usuarios WHERE activo = 1")
-            stats['usuarios'] = usuarios[0]['count'] if usuarios else 2
+            stats['usuarios'] = table_stats.count(
+                "usuarios:activos",
+                lambda: self._count("SELECT COUNT(*) as count FROM usuarios WHERE activo = 1", 2)
+            )
             
             # Contar registros de datos
-            registros = self.db_manager.execute_query("SELECT COUNT(*) as count FROM energia_barra")
-            stats['registros'] = registros[0]['count'] if registros else 0
+            stats['registros'] = table_stats.count(
+                "energia_barra", lambda: self._count("SELECT COUNT(*) as count FROM energia_barra")
+            )
             
             # Contar registros de facturación
-            facturacion = self.db_manager.execute_query("SELECT COUNT(*) as count FROM facturacion")
-            stats['facturacion'] = facturacion[0]['count'] if facturacion else 0
+            stats['facturacion'] = table_stats.count(
+                "facturacion", lambda: self._count("SELECT COUNT(*) as count FROM facturacion")
+            )
             
             return stats
             
@@ -957,9 +1031,14 @@ class MainDashboard:
                 'facturacion': 0
             }
     
+    def _count(self, query: str, default: int = 0) -> int:
+        """Ejecuta un COUNT(*) para inicializar un contador"""
+        result = self.db_manager.execute_query(query)
+        return result[0]['count'] if result else default
+    
     def _navigate_to_module(self, route: str):
         """Navega a un módulo específico - MEJORADO"""
-        self.logger.info(f"Navegando a módulo: {route}")
+        self.logger.info("Navegando a módulo: %s", route)
         
         # Rutas de módulos implementados
         implemented_routes = ["calculo_energia", "facturacion", "infoperdidas", "l_ventas"]
@@ -1061,6 +1140,92 @@ class MainDashboard:
         self.page.open(dialog)
 
     
+    def _show_query_stats(self):
+        """Muestra las estadísticas de consultas por huella (vista de administración)"""
+        def close_dialog(e):
+            dialog.open = False
+            self.page.update()
+        
+        query_stats = get_query_stats()
+        summary = query_stats.get_summary()
+        top_queries = query_stats.get_stats(order_by="total_ms", limit=15)
+        n_plus_one = query_stats.get_n_plus_one()[-5:]
+        
+        rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(q["fingerprint"][:70], size=11, tooltip=q["fingerprint"])),
+                ft.DataCell(ft.Text(str(q["count"]), size=11)),
+                ft.DataCell(ft.Text(str(q["rows"]), size=11)),
+                ft.DataCell(ft.Text(f"{q['p50_ms']:.2f}", size=11)),
+                ft.DataCell(ft.Text(f"{q['p95_ms']:.2f}", size=11)),
+                ft.DataCell(ft.Text(f"{q['max_ms']:.2f}", size=11))
+            ])
+            for q in top_queries
+        ]
+        
+        table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Consulta", weight=ft.FontWeight.BOLD)),
+                ft.DataColumn(ft.Text("Ejec.", weight=ft.FontWeight.BOLD), numeric=True),
+                ft.DataColumn(ft.Text("Filas", weight=ft.FontWeight.BOLD), numeric=True),
+                ft.DataColumn(ft.Text("p50 ms", weight=ft.FontWeight.BOLD), numeric=True),
+                ft.DataColumn(ft.Text("p95 ms", weight=ft.FontWeight.BOLD), numeric=True),
+                ft.DataColumn(ft.Text("máx ms", weight=ft.FontWeight.BOLD), numeric=True)
+            ],
+            rows=rows,
+            column_spacing=15,
+            data_row_min_height=30
+        )
+        
+        alerts = [
+            ft.Text(
+                f"⚠️ N+1 en {item['action']}: {item['executions']}× {item['fingerprint'][:60]}",
+                size=11,
+                color=ft.Colors.ORANGE_800
+            )
+            for item in n_plus_one
+        ]
+        
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Row([
+                ft.Icon(ft.Icons.SPEED, color=ft.Colors.PURPLE_600, size=28),
+                ft.Container(width=10),
+                ft.Text("Estadísticas de Consultas", color=ft.Colors.PURPLE_800, weight=ft.FontWeight.BOLD)
+            ]),
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Text(
+                        f"{summary['executions']} ejecuciones · {summary['fingerprints']} consultas distintas · "
+                        f"{summary['slow_queries']} lentas (≥{summary['slow_query_ms']:.0f} ms) · "
+                        f"{summary['n_plus_one']} posibles N+1",
+                        size=12,
+                        color=ft.Colors.GREY_700
+                    ),
+                    *alerts,
+                    ft.Container(height=10),
+                    table
+                ], scroll=ft.ScrollMode.AUTO),
+                width=800,
+                height=450
+            ),
+            actions=[
+                ft.Container(
+                    content=ft.ElevatedButton(
+                        "Cerrar",
+                        on_click=close_dialog,
+                        bgcolor=ft.Colors.PURPLE_600,
+                        color=ft.Colors.WHITE,
+                        icon=ft.Icons.CLOSE
+                    ),
+                    alignment=ft.alignment.center
+                )
+            ],
+            actions_alignment=ft.MainAxisAlignment.CENTER
+        )
+        
+        self.page.open(dialog)
+
     def _show_coming_soon_dialog(self, module_name: str):
         """Muestra diálogo de 'próximamente' con mejoras estéticas"""
         def close_dialog(e):
@@ -30,6 +30,10 @@ def setup_database(web_mode: bool = False):
         from .seeds import run_seeds
         run_seeds(str(db_path))
         
+        # 3. Mantenimiento en segundo plano (ANALYZE / vacuum incremental)
+        from .maintenance import get_maintenance_scheduler
+        get_maintenance_scheduler().start()
+        
         logger.info("✅ Base de datos SQLite configurada correctamente")
         return str(db_path)
         
@@ -82,8 +86,8 @@ def get_database_info(web_mode: bool = False) -> dict:
             info["size_mb"] = round(db_path.stat().st_size / (1024 * 1024), 2)
             
             # Obtener lista de tablas
-            import sqlite3
-            with sqlite3.connect(str(db_path)) as conn:
+            from .maintenance import get_maintenance_scheduler
+            with get_maintenance_scheduler().connect(db_path) as conn:
                 cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
                 info["tables"] = [row[0] for row in cursor.fetchall()]
         
@@ -140,8 +144,8 @@ def validate_database(web_mode: bool = False) -> dict:
         
         # Verificar legibilidad
         try:
-            import sqlite3
-            with sqlite3.connect(str(db_path)) as conn:
+            from .maintenance import get_maintenance_scheduler
+            with get_maintenance_scheduler().connect(db_path) as conn:
                 validation["checks"]["file_readable"] = True
                 
                 # Verificar tablas principales
@@ -155,14 +159,13 @@ def validate_database(web_mode: bool = False) -> dict:
                 else:
                     validation["checks"]["tables_exist"] = True
                 
-                # Verificar datos
-                cursor = conn.execute("SELECT COUNT(*) FROM usuarios")
-                user_count = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT COUNT(*) FROM municipios")
-                municipio_count = cursor.fetchone()[0]
+                # Verificar datos (EXISTS se detiene en la primera fila)
+                cursor = conn.execute(
+                    "SELECT EXISTS(SELECT 1 FROM usuarios), EXISTS(SELECT 1 FROM municipios)"
+                )
+                has_users, has_municipios = cursor.fetchone()
                 
-                if user_count > 0 and municipio_count > 0:
+                if has_users and has_municipios:
                     validation["checks"]["data_present"] = True
                 else:
                     validation["errors"].append("No data found in core tables")
@@ -226,125 +229,92 @@ def reset_database(web_mode: bool = False) -> bool:
         return False
 
 def backup_database(backup_path: str = None) -> str:
-    """Crea una copia de seguridad de la base de datos SQLite"""
+    """Crea una copia de seguridad en caliente de la base de datos SQLite
+
+    Usa la API de backup de SQLite (segura aunque la app esté escribiendo) y
+    guarda un archivo comprimido con retención en ``DB_BACKUP_DIR``. Para no
+    bloquear al llamador usar ``schedule_backup``.
+    """
     logger = get_logger(__name__)
     
     try:
-        import shutil
-        from datetime import datetime
-        
-        db_dir = Path(__file__).parent
-        db_path = db_dir / "perdidas_matanzas.db"
-        
-        if not db_path.exists():
-            raise Exception("Database file does not exist")
-        
-        # Generar nombre de backup si no se proporciona
-        if backup_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = db_dir / f"backup_perdidas_matanzas_{timestamp}.db"
-        else:
-            backup_path = Path(backup_path)
-        
-        # Crear directorio de backup si no existe
-        backup_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Copiar archivo
-        shutil.copy2(str(db_path), str(backup_path))
-        
-        logger.info(f"✅ Backup creado: {backup_path}")
-        return str(backup_path)
+        from .backup import get_backup_manager
+        return get_backup_manager().create_backup(backup_path)
         
     except Exception as e:
         logger.error(f"❌ Error creando backup: {e}")
         raise
 
+def schedule_backup(progress=None):
+    """Encola una copia de seguridad en segundo plano y devuelve su ``Future``"""
+    from .backup import get_backup_manager
+    return get_backup_manager().submit(progress)
+
+def list_backups() -> list:
+    """Copias de seguridad disponibles, de la más reciente a la más antigua"""
+    from .backup import get_backup_manager
+    return get_backup_manager().list_backups()
+
 def restore_database(backup_path: str) -> bool:
-    """Restaura la base de datos desde un backup"""
+    """Restaura la base de datos desde un backup verificado (``.db.gz`` o ``.db``)"""
     logger = get_logger(__name__)
     
     try:
-        import shutil
-        
-        backup_file = Path(backup_path)
-        if not backup_file.exists():
-            raise Exception(f"Backup file does not exist: {backup_path}")
-        
-        db_dir = Path(__file__).parent
-        db_path = db_dir / "perdidas_matanzas.db"
-        
-        # Crear backup del archivo actual si existe
-        if db_path.exists():
-            current_backup = db_dir / f"current_backup_{int(datetime.now().timestamp())}.db"
-            shutil.copy2(str(db_path), str(current_backup))
-            logger.info(f"📋 Backup actual creado: {current_backup}")
-        
-        # Restaurar desde backup
-        shutil.copy2(str(backup_file), str(db_path))
-        
-        logger.info(f"✅ Base de datos restaurada desde: {backup_path}")
-        return True
+        from .backup import get_backup_manager
+        return get_backup_manager().restore_backup(backup_path)
         
     except Exception as e:
         logger.error(f"❌ Error restaurando base de datos: {e}")
         return False
 
 def optimize_database() -> bool:
-    """Optimiza la base de datos SQLite"""
+    """Ejecuta ya el mantenimiento de SQLite (ANALYZE de tablas cambiadas y vacuum incremental)
+
+    Ya no hace VACUUM/REINDEX completos: el mantenimiento periódico lo lleva
+    ``database.maintenance`` en segundo plano durante los periodos inactivos.
+    """
     logger = get_logger(__name__)
     
     try:
-        import sqlite3
-        
-        db_dir = Path(__file__).parent
-        db_path = db_dir / "perdidas_matanzas.db"
-        
-        if not db_path.exists():
-            raise Exception("Database file does not exist")
-        
-        with sqlite3.connect(str(db_path)) as conn:
-            # Ejecutar VACUUM para optimizar
-            logger.info("🔧 Ejecutando VACUUM...")
-            conn.execute("VACUUM")
-            
-            # Analizar estadísticas
-            logger.info("📊 Analizando estadísticas...")
-            conn.execute("ANALYZE")
-            
-            # Reindexar
-            logger.info("🔍 Reindexando...")
-            conn.execute("REINDEX")
-            
-            conn.commit()
-        
-        logger.info("✅ Base de datos optimizada correctamente")
-        return True
+        from .maintenance import get_maintenance_scheduler
+        summary = get_maintenance_scheduler().run_maintenance(force=True)
+        logger.info(
+            "✅ Mantenimiento completado: %s tablas analizadas, %s páginas liberadas", len(summary['analyzed']), summary['vacuum_pages']
+        )
+        return not summary["skipped"]
         
     except Exception as e:
         logger.error(f"❌ Error optimizando base de datos: {e}")
         return False
 
-def get_database_statistics(web_mode: bool = False) -> dict:
-    """Obtiene estadísticas de la base de datos"""
+def get_maintenance_report() -> dict:
+    """Última ejecución de cada tarea de mantenimiento de SQLite"""
+    from .maintenance import get_maintenance_scheduler
+    return get_maintenance_scheduler().get_report()
+
+def get_database_statistics(web_mode: bool = False, exact: bool = False) -> dict:
+    """Obtiene estadísticas de la base de datos sin recorrer las tablas
+
+    Los conteos son estimaciones (``sqlite_stat1`` o ``MAX(rowid)``; en modo
+    web, el tamaño de cada tabla en memoria). ``exact=True`` ejecuta
+    ``COUNT(*)`` en cada tabla: usarlo solo a petición del usuario.
+    """
     logger = get_logger(__name__)
     
     if web_mode:
         try:
-            # Estadísticas simuladas para WebStorage
-            from core.web_storage import WebStorageManager
-            storage = WebStorageManager()
+            from core.database import get_db_manager
+            from .statistics import memory_table_statistics
             
+            details = memory_table_statistics(get_db_manager())
+            tables = {table: entry["rows"] for table, entry in details["tables"].items()}
             return {
                 "mode": "web",
                 "type": "WebStorage",
-                "tables": {
-                    "usuarios": len(storage._users) if hasattr(storage, '_users') else 0,
-                    "municipios": len(storage._municipios) if hasattr(storage, '_municipios') else 0,
-                    "energia_barra": len(storage._energia_barra) if hasattr(storage, '_energia_barra') else 0,
-                    "facturacion": len(storage._facturacion) if hasattr(storage, '_facturacion') else 0,
-                    "logs_sistema": len(storage._logs) if hasattr(storage, '_logs') else 0
-                },
-                "total_records": 0,  # Se calculará después
+                "tables": tables,
+                "table_details": details["tables"],
+                "total_records": sum(tables.values()),
+                "exact": True,
                 "memory_usage": "Variable",
                 "last_updated": "Real-time"
             }
@@ -353,7 +323,8 @@ def get_database_statistics(web_mode: bool = False) -> dict:
             return {"mode": "web", "error": str(e)}
     
     try:
-        import sqlite3
+        from .maintenance import get_maintenance_scheduler
+        from .statistics import sqlite_table_statistics
         
         db_dir = Path(__file__).parent
         db_path = db_dir / "perdidas_matanzas.db"
@@ -366,23 +337,19 @@ def get_database_statistics(web_mode: bool = False) -> dict:
             "type": "SQLite",
             "file_size_mb": round(db_path.stat().st_size / (1024 * 1024), 2),
             "tables": {},
+            "table_details": {},
             "indexes": [],
-            "total_records": 0
+            "total_records": 0,
+            "exact": exact
         }
         
-        with sqlite3.connect(str(db_path)) as conn:
-            # Obtener información de tablas
-            cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            for table in tables:
-                try:
-                    cursor = conn.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = cursor.fetchone()[0]
-                    stats["tables"][table] = count
-                    stats["total_records"] += count
-                except Exception:
-                    stats["tables"][table] = "Error"
+        with get_maintenance_scheduler().connect(db_path) as conn:
+            details = sqlite_table_statistics(conn, db_path, exact=exact)
+            stats["table_details"] = details["tables"]
+            stats["sizes_available"] = details["sizes_available"]
+            for table, entry in details["tables"].items():
+                stats["tables"][table] = entry["rows"] if entry["rows"] is not None else "Error"
+                stats["total_records"] += entry["rows"] or 0
             
             # Obtener información de índices
             cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
@@ -407,7 +374,7 @@ def check_database_integrity(web_mode: bool = False) -> dict:
         }
     
     try:
-        import sqlite3
+        from .maintenance import get_maintenance_scheduler
         
         db_dir = Path(__file__).parent
         db_path = db_dir / "perdidas_matanzas.db"
@@ -419,7 +386,7 @@ def check_database_integrity(web_mode: bool = False) -> dict:
                 "message": "Database file does not exist"
             }
         
-        with sqlite3.connect(str(db_path)) as conn:
+        with get_maintenance_scheduler().connect(db_path) as conn:
             # Verificar integridad
             cursor = conn.execute("PRAGMA integrity_check")
             result = cursor.fetchone()[0]
@@ -491,18 +458,85 @@ def get_supported_features(web_mode: bool = False) -> list:
         "Views and triggers"
     ]
 
-def migrate_to_web_mode() -> dict:
-    """Migra datos de SQLite a WebStorage (para testing)"""
+def export_snapshot(path: str = None, web_mode: bool = False) -> dict:
+    """Exporta todos los datos a una instantánea binaria comprimida
+
+    En modo web se exportan las tablas del gestor en memoria; en escritorio,
+    las del archivo SQLite. Por defecto se guarda en el directorio de backups.
+    """
+    logger = get_logger(__name__)
+    
+    try:
+        from datetime import datetime
+        from .backup import get_backup_manager
+        from .snapshots import SNAPSHOT_SUFFIX, export_memory_snapshot, export_sqlite_snapshot
+        
+        if path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = get_backup_manager().backup_dir / f"datos_{timestamp}{SNAPSHOT_SUFFIX}"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(path, "wb") as handle:
+            if web_mode:
+                from core.database import get_db_manager
+                rows = export_memory_snapshot(get_db_manager(), handle)
+            else:
+                rows = export_sqlite_snapshot(Path(__file__).parent / "perdidas_matanzas.db", handle)
+        
+        size = path.stat().st_size
+        logger.info("✅ Instantánea exportada: %s (%s filas, %.1f KB)", path, rows, size / 1024)
+        return {"success": True, "path": str(path), "rows": rows, "size_bytes": size}
+        
+    except Exception as e:
+        logger.error(f"❌ Error exportando instantánea: {e}")
+        return {"success": False, "error": str(e)}
+
+def import_snapshot(path: str, web_mode: bool = False) -> dict:
+    """Importa una instantánea en el gestor en memoria (web) o en el archivo SQLite"""
+    logger = get_logger(__name__)
+    
+    try:
+        from .snapshots import import_memory_snapshot, import_sqlite_snapshot
+        
+        with open(path, "rb") as handle:
+            if web_mode:
+                from core.database import get_db_manager
+                counts = import_memory_snapshot(get_db_manager(), handle)
+            else:
+                counts = import_sqlite_snapshot(Path(__file__).parent / "perdidas_matanzas.db", handle)
+        
+        logger.info("✅ Instantánea importada: %s filas de %s tablas", sum(counts.values()), len(counts))
+        return {"success": True, "tables": counts}
+        
+    except Exception as e:
+        logger.error(f"❌ Error importando instantánea: {e}")
+        return {"success": False, "error": str(e)}
+
+def migrate_to_web_mode(storage=None) -> dict:
+    """Migra los datos de SQLite a WebStorage mediante una instantánea binaria
+
+    Args:
+        storage: ``WebStorageManager`` de destino. Sin él solo se genera la
+            instantánea (útil para medir su tamaño).
+    """
     logger = get_logger(__name__)
     
     try:
-        # Esta función sería útil para migrar datos existentes
-        # de SQLite a WebStorage para pruebas
-        logger.info("🔄 Migración a modo web no implementada")
+        import io
+        from .snapshots import export_sqlite_snapshot
+        
+        buffer = io.BytesIO()
+        rows = export_sqlite_snapshot(Path(__file__).parent / "perdidas_matanzas.db", buffer)
+        data = buffer.getvalue()
+        
+        tables = storage.import_snapshot(data) if storage is not None else {}
+        logger.info("✅ Migración a modo web: %s filas (%.1f KB)", rows, len(data) / 1024)
         return {
-            "success": False,
-            "message": "Migration to web mode not implemented",
-            "suggestion": "Use WebStorage directly for web mode"
+            "success": True,
+            "rows": rows,
+            "snapshot_bytes": len(data),
+            "tables": tables
         }
     except Exception as e:
         logger.error(f"Error en migración: {e}")
@@ -511,6 +545,22 @@ def migrate_to_web_mode() -> dict:
             "error": str(e)
         }
 
+def migrate_to_sqlite(storage) -> dict:
+    """Importa en SQLite los datos de un ``WebStorageManager`` mediante una instantánea"""
+    logger = get_logger(__name__)
+    
+    try:
+        import io
+        from .snapshots import import_sqlite_snapshot
+        
+        data = storage.export_snapshot()
+        tables = import_sqlite_snapshot(Path(__file__).parent / "perdidas_matanzas.db", io.BytesIO(data))
+        logger.info("✅ Migración a SQLite: %s filas (%.1f KB)", sum(tables.values()), len(data) / 1024)
+        return {"success": True, "snapshot_bytes": len(data), "tables": tables}
+    except Exception as e:
+        logger.error(f"Error en migración a SQLite: {e}")
+        return {"success": False, "error": str(e)}
+
 # ✅ CONFIGURACIÓN DE EXPORTACIÓN
 __all__ = [
     'setup_database',
@@ -518,11 +568,18 @@ __all__ = [
     'validate_database',
     'reset_database',
     'backup_database',
+    'schedule_backup',
+    'list_backups',
     'restore_database',
     'optimize_database',
+    'get_maintenance_report',
     'get_database_statistics',
     'check_database_integrity',
     'get_connection_string',
     'is_database_ready',
-    'get_supported_features'
+    'get_supported_features',
+    'export_snapshot',
+    'import_snapshot',
+    'migrate_to_web_mode',
+    'migrate_to_sqlite'
 ]
@@ -0,0 +1,264 @@
+"""
+Copias de seguridad en caliente de la base de datos SQLite
+
+Las copias usan la API de backup de SQLite (``sqlite3.Connection.backup``)
+en pasos de ``DB_BACKUP_STEP_PAGES`` páginas con una pausa entre pasos, de
+modo que los usuarios pueden seguir escribiendo mientras se copia. El
+resultado se verifica con ``PRAGMA integrity_check``, se comprime con gzip
+en un archivo con marca de tiempo y se aplica la política de retención
+(``DB_BACKUP_KEEP`` archivos más recientes).
+
+``submit`` encola la copia en un hilo de fondo y devuelve un ``Future``;
+``create_backup`` y ``restore_backup`` son las variantes síncronas.
+"""
+
+import gzip
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+from core.logger import get_logger
+
+DEFAULT_DB_PATH = Path(__file__).parent / "perdidas_matanzas.db"
+ARCHIVE_PREFIX = "perdidas_matanzas_"
+ARCHIVE_SUFFIX = ".db.gz"
+
+# (páginas restantes, páginas totales)
+ProgressCallback = Callable[[int, int], None]
+
+
+class _BackupRestarted(Exception):
+    """La copia por pasos se reinició más veces de las permitidas"""
+
+
+class BackupManager:
+    """Copias comprimidas con retención, ejecutadas en un hilo de fondo"""
+
+    def __init__(self, db_path: Union[str, Path] = None, backup_dir: Union[str, Path] = None):
+        self.logger = get_logger(__name__)
+        self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self.backup_dir = Path(backup_dir or os.getenv("DB_BACKUP_DIR", str(self.db_path.parent / "backups")))
+        self.keep = int(os.getenv("DB_BACKUP_KEEP", "7"))
+        self.step_pages = int(os.getenv("DB_BACKUP_STEP_PAGES", "256"))
+        self.step_pause = float(os.getenv("DB_BACKUP_STEP_PAUSE", "0.005"))
+        self.compress_level = int(os.getenv("DB_BACKUP_COMPRESSLEVEL", "6"))
+        self.max_restarts = int(os.getenv("DB_BACKUP_MAX_RESTARTS", "3"))
+
+        self.last_progress: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+        try:
+            from core.metrics import register_queue_depth
+            register_queue_depth("backup", self._jobs.qsize)
+        except Exception as e:
+            self.logger.debug("No se pudo registrar la cola de backups en métricas: %s", e)
+
+    # === HILO DE FONDO ===
+
+    def submit(self, progress: ProgressCallback = None) -> Future:
+        """Encola una copia de seguridad; el ``Future`` devuelve la ruta del archivo"""
+        future: Future = Future()
+        self._jobs.put((future, progress))
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_jobs, daemon=True, name="db-backup")
+                self._worker.start()
+        return future
+
+    def _run_jobs(self):
+        while True:
+            try:
+                future, progress = self._jobs.get(timeout=5)
+            except queue.Empty:
+                return
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(self.create_backup(progress=progress))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._jobs.task_done()
+
+    # === COPIA Y RESTAURACIÓN ===
+
+    def create_backup(self, target: Union[str, Path] = None, progress: ProgressCallback = None,
+                      prune: bool = True) -> str:
+        """Copia la base de datos en caliente, la verifica y la comprime
+
+        Args:
+            target: Ruta del archivo. Por defecto ``<DB_BACKUP_DIR>/perdidas_matanzas_<fecha>.db.gz``;
+                si no termina en ``.gz`` se guarda sin comprimir.
+            progress: Se llama tras cada paso con (páginas restantes, páginas totales)
+            prune: Aplica la retención si el archivo queda en ``DB_BACKUP_DIR``
+
+        Returns:
+            Ruta del archivo creado
+        """
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"La base de datos no existe: {self.db_path}")
+
+        if target is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            target = self.backup_dir / f"{ARCHIVE_PREFIX}{timestamp}{ARCHIVE_SUFFIX}"
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        started = time.perf_counter()
+        snapshot = self._temporary_path(target.parent)
+        try:
+            self._copy(self.db_path, snapshot, progress)
+            self._verify(snapshot)
+            if target.suffix == ".gz":
+                with open(snapshot, "rb") as source, gzip.open(target, "wb", compresslevel=self.compress_level) as archive:
+                    shutil.copyfileobj(source, archive, 1024 * 1024)
+            else:
+                os.replace(snapshot, target)
+        finally:
+            if snapshot.exists():
+                snapshot.unlink()
+
+        self.logger.info(
+            "✅ Backup creado: %s (%.1f KB, %.2fs)", target, target.stat().st_size / 1024, time.perf_counter() - started
+        )
+        if prune and target.parent == self.backup_dir:
+            self.prune()
+        return str(target)
+
+    def restore_backup(self, backup_path: Union[str, Path]) -> bool:
+        """Restaura desde un archivo (``.db.gz`` o ``.db``) tras verificar su integridad
+
+        Antes de sobrescribir se guarda una copia del estado actual, sin
+        aplicar la retención (podría borrar el archivo que se restaura). La
+        restauración usa la API de backup, así que es segura aunque haya
+        conexiones abiertas.
+        """
+        backup_file = Path(backup_path)
+        if not backup_file.exists():
+            raise FileNotFoundError(f"El backup no existe: {backup_path}")
+
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        candidate = self._temporary_path(self.backup_dir)
+        try:
+            opener = gzip.open if backup_file.suffix == ".gz" else open
+            with opener(backup_file, "rb") as source, open(candidate, "wb") as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            self._verify(candidate)
+
+            if self.db_path.exists():
+                current = self.create_backup(prune=False)
+                self.logger.info("📋 Backup del estado actual: %s", current)
+            self._copy(candidate, self.db_path)
+        finally:
+            if candidate.exists():
+                candidate.unlink()
+
+        try:
+            from core.table_stats import get_table_stats
+            get_table_stats().invalidate()
+        except Exception:
+            pass
+        self.logger.info("✅ Base de datos restaurada desde: %s", backup_file)
+        return True
+
+    # === RETENCIÓN ===
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Archivos de backup del directorio, del más reciente al más antiguo"""
+        if not self.backup_dir.exists():
+            return []
+        backups = []
+        for path in self.backup_dir.glob(f"{ARCHIVE_PREFIX}*{ARCHIVE_SUFFIX}"):
+            stat = path.stat()
+            backups.append({
+                "path": str(path),
+                "size_bytes": stat.st_size,
+                "created": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            })
+        return sorted(backups, key=lambda backup: backup["path"], reverse=True)
+
+    def prune(self) -> List[str]:
+        """Elimina los archivos más antiguos que excedan ``DB_BACKUP_KEEP``"""
+        if self.keep <= 0:
+            return []
+        removed = []
+        for backup in self.list_backups()[self.keep:]:
+            try:
+                Path(backup["path"]).unlink()
+                removed.append(backup["path"])
+            except OSError as e:
+                self.logger.warning(f"No se pudo eliminar el backup {backup['path']}: {e}")
+        if removed:
+            self.logger.info("🗑️ Backups antiguos eliminados: %s", len(removed))
+        return removed
+
+    # === AUXILIARES ===
+
+    def _copy(self, source_path: Path, target_path: Path, progress: ProgressCallback = None):
+        """Copia por pasos; si los escritores la reinician demasiadas veces, en un solo paso
+
+        SQLite reinicia la copia cada vez que otra conexión modifica el origen,
+        así que con escrituras continuas los pasos podrían no terminar nunca.
+        """
+        state = {"remaining": None, "restarts": 0}
+
+        def on_step(status, remaining, total):
+            if state["remaining"] is not None and remaining > state["remaining"]:
+                state["restarts"] += 1
+                if state["restarts"] > self.max_restarts:
+                    raise _BackupRestarted()
+            state["remaining"] = remaining
+            self.last_progress = {"remaining": remaining, "total": total, "source": str(source_path)}
+            if progress:
+                progress(remaining, total)
+            if remaining and self.step_pause > 0:
+                # Cede el bloqueo de lectura entre pasos para no frenar a los escritores
+                time.sleep(self.step_pause)
+
+        source = sqlite3.connect(str(source_path), timeout=30)
+        target = sqlite3.connect(str(target_path))
+        try:
+            try:
+                source.backup(target, pages=max(1, self.step_pages), progress=on_step)
+            except _BackupRestarted:
+                self.logger.info("Backup reiniciado %s veces por escrituras; copiando en un paso", state['restarts'])
+                source.backup(target, pages=-1)
+                if progress:
+                    progress(0, self.last_progress.get("total", 0))
+        finally:
+            target.close()
+            source.close()
+
+    def _verify(self, path: Path):
+        conn = sqlite3.connect(str(path))
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"Verificación de integridad fallida ({path.name}): {result}")
+
+    @staticmethod
+    def _temporary_path(directory: Path) -> Path:
+        handle, name = tempfile.mkstemp(prefix=".backup_", suffix=".db", dir=str(directory))
+        os.close(handle)
+        return Path(name)
+
+
+# Instancia global del gestor
+_backup_manager = None
+
+def get_backup_manager() -> BackupManager:
+    """Obtiene el gestor global de copias de seguridad"""
+    global _backup_manager
+    if _backup_manager is None:
+        _backup_manager = BackupManager()
+    return _backup_manager
@@ -0,0 +1,239 @@
+"""
+Mantenimiento automático de la base de datos SQLite
+
+Sustituye al ``VACUUM`` + ``ANALYZE`` + ``REINDEX`` completo (que reescribe el
+archivo bajo un bloqueo exclusivo) por tareas pequeñas:
+
+- ``PRAGMA optimize`` al cerrar cada conexión abierta con ``connect``.
+- ``PRAGMA incremental_vacuum(N)`` con un presupuesto de
+  ``DB_VACUUM_PAGES`` páginas, solo cuando la aplicación está inactiva
+  (``DB_MAINTENANCE_IDLE_SECONDS`` sin consultas).
+- ``ANALYZE`` de las tablas cuyo número de filas se desvió más de
+  ``DB_ANALYZE_THRESHOLD`` respecto a las estadísticas guardadas. Las filas
+  solo se cuentan si ``PRAGMA data_version`` indica que otra conexión
+  escribió en la base desde la pasada anterior.
+
+Cada tarea se registra en las métricas (``perdidas_db_maintenance_*``), en
+las estadísticas de consultas (tipo ``maintenance``) y en ``get_report``.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+from core.logger import get_logger
+from .statistics import stat1_row_estimates
+
+DEFAULT_DB_PATH = Path(__file__).parent / "perdidas_matanzas.db"
+
+# Valores de PRAGMA auto_vacuum
+AUTO_VACUUM_NONE = 0
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class MaintenanceScheduler:
+    """Tareas de mantenimiento periódicas en un hilo de fondo"""
+
+    def __init__(self, db_path: Union[str, Path] = None):
+        self.logger = get_logger(__name__)
+        self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self.interval = float(os.getenv("DB_MAINTENANCE_INTERVAL", "300"))
+        self.idle_seconds = float(os.getenv("DB_MAINTENANCE_IDLE_SECONDS", "60"))
+        self.vacuum_pages = int(os.getenv("DB_VACUUM_PAGES", "200"))
+        self.analyze_threshold = float(os.getenv("DB_ANALYZE_THRESHOLD", "0.2"))
+        self.analyze_min_rows = int(os.getenv("DB_ANALYZE_MIN_ROWS", "50"))
+        # Tamaño máximo para convertir una vez a auto_vacuum incremental (requiere VACUUM)
+        self.convert_max_bytes = int(float(os.getenv("DB_VACUUM_CONVERT_MAX_MB", "32")) * 1024 * 1024)
+
+        self._report: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Conexión propia para leer PRAGMA data_version y valor visto en la última pasada
+        self._watch: Optional[sqlite3.Connection] = None
+        self._analyzed_version: Optional[int] = None
+
+    # === CONEXIONES ===
+
+    @contextmanager
+    def connect(self, db_path: Union[str, Path] = None) -> Iterator[sqlite3.Connection]:
+        """Conexión que confirma al salir y ejecuta ``PRAGMA optimize`` antes de cerrarse"""
+        conn = sqlite3.connect(str(db_path or self.db_path))
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            try:
+                self._run(conn, "optimize", "PRAGMA optimize")
+            except sqlite3.Error as e:
+                self.logger.debug("PRAGMA optimize omitido: %s", e)
+            conn.close()
+
+    # === HILO DE FONDO ===
+
+    def start(self):
+        """Arranca el hilo de mantenimiento (idempotente)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="db-maintenance")
+            self._thread.start()
+        self.logger.info("🧹 Mantenimiento de SQLite programado cada %.0fs", self.interval)
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
+                self._analyzed_version = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                self.logger.error(f"❌ Error en mantenimiento de SQLite: {e}")
+
+    def is_idle(self) -> bool:
+        from core.query_stats import get_query_stats
+        return get_query_stats().idle_seconds() >= self.idle_seconds
+
+    # === TAREAS ===
+
+    def run_maintenance(self, force: bool = False) -> Dict[str, Any]:
+        """Ejecuta las tareas pendientes; sin ``force`` solo si la aplicación está inactiva
+
+        Returns:
+            Resumen de lo realizado (tablas analizadas, páginas liberadas...)
+        """
+        summary: Dict[str, Any] = {"skipped": False, "analyzed": [], "vacuum_pages": 0}
+        if not self.db_path.exists():
+            summary["skipped"] = "no_database"
+            return summary
+        if not force and not self.is_idle():
+            summary["skipped"] = "busy"
+            return summary
+
+        with self.connect() as conn:
+            summary["analyzed"] = self.analyze_changed_tables(conn)
+            summary["vacuum_pages"] = self.incremental_vacuum(conn, None if force else self.vacuum_pages)
+        return summary
+
+    def analyze_changed_tables(self, conn: sqlite3.Connection) -> List[str]:
+        """``ANALYZE`` de las tablas sin estadísticas o con un cambio de filas mayor al umbral
+
+        SQLite no lleva un contador de escrituras por tabla, así que la señal
+        de cambio es ``PRAGMA data_version`` de una conexión propia: si no
+        cambió desde la pasada anterior no se lee ninguna tabla. Si cambió,
+        las filas se cuentan con ``COUNT(*)`` (``MAX(rowid)`` deja de servir
+        en cuanto se borran filas). El ``ANALYZE`` de esta pasada también
+        cambia la versión, así que la siguiente pasada vuelve a contar, ya
+        sin diferencias.
+        """
+        version = self._data_version()
+        if version is not None and version == self._analyzed_version:
+            return []
+
+        estimates = stat1_row_estimates(conn)
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        analyzed = []
+        for table in tables:
+            estimate = estimates.get(table)
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            if estimate is None:
+                if rows == 0:
+                    continue
+            elif abs(rows - estimate) < max(self.analyze_min_rows, estimate * self.analyze_threshold):
+                continue
+            self._run(conn, "analyze", f'ANALYZE "{table}"', table=table, rows=rows, estimate=estimate)
+            analyzed.append(table)
+        self._analyzed_version = version
+        return analyzed
+
+    def _data_version(self) -> Optional[int]:
+        """``PRAGMA data_version`` de la conexión de vigilancia (None si no se puede leer)
+
+        Cambia cada vez que otra conexión confirma escrituras en la base.
+        """
+        with self._lock:
+            try:
+                if self._watch is None:
+                    self._watch = sqlite3.connect(str(self.db_path), check_same_thread=False)
+                return self._watch.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error as e:
+                self.logger.debug("PRAGMA data_version no disponible: %s", e)
+                return None
+
+    def incremental_vacuum(self, conn: sqlite3.Connection, pages: Optional[int] = None) -> int:
+        """Libera hasta ``pages`` páginas libres (todas si es None)
+
+        Las bases creadas antes de activar ``auto_vacuum`` se convierten una
+        vez (con un VACUUM) si no superan ``DB_VACUUM_CONVERT_MAX_MB``.
+        """
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != AUTO_VACUUM_INCREMENTAL:
+            if mode != AUTO_VACUUM_NONE or self.db_path.stat().st_size > self.convert_max_bytes:
+                return 0
+            conn.commit()
+            conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            self._run(conn, "vacuum_convert", "VACUUM")
+            return 0
+
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return 0
+        budget = free if pages is None else min(free, pages)
+        # incremental_vacuum devuelve una fila por página: hay que consumir el cursor
+        self._run(conn, "incremental_vacuum", f"PRAGMA incremental_vacuum({budget})", pages=budget)
+        return budget
+
+    # === INFORME ===
+
+    def get_report(self) -> Dict[str, Dict[str, Any]]:
+        """Última ejecución de cada tarea (fecha, duración y detalles)"""
+        with self._lock:
+            return {task: dict(entry) for task, entry in self._report.items()}
+
+    def _run(self, conn: sqlite3.Connection, task: str, statement: str, pages: int = 0, **details) -> float:
+        start = time.perf_counter()
+        conn.execute(statement).fetchall()
+        conn.commit()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            entry = self._report.setdefault(task, {"runs": 0})
+            entry.update(details, runs=entry["runs"] + 1, last_run=datetime.now().isoformat(),
+                         last_seconds=round(elapsed, 4), pages=pages)
+        try:
+            from core.metrics import record_maintenance
+            from core.query_stats import get_query_stats
+            record_maintenance(task, elapsed, pages)
+            get_query_stats().record(statement, None, "maintenance", elapsed * 1000.0, pages)
+        except Exception as e:
+            self.logger.debug("No se pudo registrar el mantenimiento: %s", e)
+
+        if task != "optimize":
+            self.logger.info("🧹 %s (%.1f ms)", statement, elapsed * 1000)
+        return elapsed
+
+
+# Instancia global del programador
+_maintenance_scheduler = None
+
+def get_maintenance_scheduler() -> MaintenanceScheduler:
+    """Obtiene el programador global de mantenimiento"""
+    global _maintenance_scheduler
+    if _maintenance_scheduler is None:
+        _maintenance_scheduler = MaintenanceScheduler()
+    return _maintenance_scheduler
@@ -1,43 +1,58 @@
 """
 Gestor de migraciones híbrido - SQLite + Web
+
+Las migraciones son pasos numerados (``MIGRATIONS``) que se aplican en orden.
+La versión aplicada se guarda en ``PRAGMA user_version`` del propio archivo:
+si coincide con ``SCHEMA_VERSION`` el arranque se limita a esa lectura, y si
+no, solo se ejecutan los pasos pendientes dentro de una única transacción.
 """
 import sqlite3
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
 from core.logger import get_logger
 
-def run_migrations(db_path: str, web_mode: bool = False):
-    """Ejecuta todas las migraciones según el modo"""
+def run_migrations(db_path: str, web_mode: bool = False) -> int:
+    """Aplica las migraciones pendientes y devuelve la versión del esquema"""
     logger = get_logger(__name__)
     
     if web_mode:
         logger.info("Modo web detectado - Las migraciones se manejan en WebStorageManager")
-        return
-    
-    logger.info("Ejecutando migraciones para SQLite...")
+        return SCHEMA_VERSION
     
-    # Crear conexión SQLite
-    conn = sqlite3.connect(db_path)
+    # isolation_level=None: la transacción se controla con BEGIN/COMMIT explícitos
+    conn = sqlite3.connect(db_path, isolation_level=None)
     
     try:
-        # 1. Crear tablas del CORE
-        _create_core_tables(conn)
-        
-        # 2. Crear tablas de CALCULO ENERGIA
-        _create_energia_tables(conn)
+        current = get_schema_version(conn)
+        if current >= SCHEMA_VERSION:
+            logger.debug("Esquema SQLite al día (versión %s)", current)
+            return current
         
-        # 3. Crear tablas de FACTURACIÓN
-        _create_facturacion_tables(conn)
+        pending = [(version, name, step) for version, name, step in MIGRATIONS if version > current]
+        logger.info("Ejecutando migraciones SQLite %s → %s...", current, SCHEMA_VERSION)
         
-        # 4. Crear tabla de transferencias de consumos
-        _create_transferencias_consumos_table(conn)
+        if current == 0:
+            # Solo tiene efecto en archivos nuevos (sin tablas); ver database.maintenance
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
         
-        # 5. Crear tablas de INFOPERDIDAS
-        _create_infoperdidas_tables(conn)
-        
-        # 6. Crear tablas de LVENTAS
-        _create_lventas_tables(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Otro proceso pudo migrar mientras se esperaba el bloqueo
+            current = get_schema_version(conn)
+            for version, name, step in pending:
+                if version > current:
+                    logger.info("Migración %03d: %s", version, name)
+                    step(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
        
-        logger.info("✅ Migraciones SQLite completadas")
+        logger.info("✅ Migraciones SQLite completadas (versión %s)", SCHEMA_VERSION)
+        return SCHEMA_VERSION
         
     except Exception as e:
         logger.error(f"❌ Error en migraciones SQLite: {e}")
@@ -45,6 +60,10 @@ def run_migrations(db_path: str, web_mode: bool = False):
     finally:
         conn.close()
 
+def get_schema_version(conn) -> int:
+    """Versión del esquema aplicada en la base de datos (0 si nunca se migró)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
 def _create_core_tables(conn):
     """Crea las tablas básicas del sistema"""
     logger = get_logger(__name__)
@@ -107,7 +126,6 @@ def _create_core_tables(conn):
     conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_fecha ON logs_sistema (fecha)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_usuario ON logs_sistema (usuario_id)")
     
-    conn.commit()
     logger.info("✅ Tablas del core creadas")
 
 def _create_energia_tables(conn):
@@ -137,8 +155,9 @@ def _create_energia_tables(conn):
     conn.execute("CREATE INDEX IF NOT EXISTS idx_energia_periodo ON energia_barra (año, mes)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_energia_municipio ON energia_barra (municipio_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_energia_usuario ON energia_barra (usuario_id)")
+    # Paginación por cursor (año, mes, municipio_id)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_energia_keyset ON energia_barra (año, mes, municipio_id)")
     
-    conn.commit()
     logger.info("✅ Tablas de energía creadas")
 
 def _create_facturacion_tables(conn):
@@ -205,10 +224,10 @@ def _create_facturacion_tables(conn):
     # Índices para facturación
     conn.execute("CREATE INDEX IF NOT EXISTS idx_facturacion_periodo ON facturacion (año, mes)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_facturacion_municipio ON facturacion (municipio_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_facturacion_keyset ON facturacion (año, mes, municipio_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_clientes_municipio ON clientes_municipio (municipio_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_transferencias_periodo ON transferencias_municipios (año, mes)")
     
-    conn.commit()
     logger.info("✅ Tablas de facturación creadas")
 
 def _create_transferencias_consumos_table(conn):
@@ -252,7 +271,6 @@ def _create_transferencias_consumos_table(conn):
             ON transferencias_consumos (usuario_id)
         """)
         
-        conn.commit()
         logger.info("✅ Tabla transferencias_consumos creada exitosamente")
         
     except Exception as e:
@@ -342,7 +360,6 @@ def _create_infoperdidas_tables(conn):
         conn.execute("CREATE INDEX IF NOT EXISTS idx_calculos_perdidas_municipio ON calculos_perdidas (municipio_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_resumen_provincial_periodo ON resumen_perdidas_provincial (año, mes)")
         
-        conn.commit()
         logger.info("✅ Tablas de InfoPérdidas creadas exitosamente")
         
     except Exception as e:
@@ -421,13 +438,27 @@ def _create_lventas_tables(conn):
         conn.execute("CREATE INDEX IF NOT EXISTS idx_mediciones_linea ON mediciones_lineas (linea_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_transformadores_linea ON transformadores_linea (linea_id)")
         
-        conn.commit()
         logger.info("✅ Tablas de Línea de Ventas creadas exitosamente")
         
     except Exception as e:
         logger.error(f"❌ Error creando tablas de Línea de Ventas: {e}")
         raise
 
+# ✅ REGISTRO DE MIGRACIONES
+# Cada paso es idempotente (IF NOT EXISTS) y no hace commit: run_migrations
+# los agrupa en una transacción. Los cambios nuevos se agregan al final con
+# el número siguiente; nunca se renumeran los existentes.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "tablas del core", _create_core_tables),
+    (2, "tablas de cálculo de energía", _create_energia_tables),
+    (3, "tablas de facturación", _create_facturacion_tables),
+    (4, "tabla de transferencias de consumos", _create_transferencias_consumos_table),
+    (5, "tablas de InfoPérdidas", _create_infoperdidas_tables),
+    (6, "tablas de Línea de Ventas", _create_lventas_tables),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
 # ✅ FUNCIONES DE UTILIDAD PARA MIGRACIONES
 def check_table_exists(conn, table_name: str) -> bool:
     """Verifica si una tabla existe en la base de datos"""
@@ -485,6 +516,8 @@ def get_migration_status() -> Dict[str, Any]:
     """Obtiene el estado de las migraciones"""
     return {
         "version": "1.0.0",
+        "schema_version": SCHEMA_VERSION,
+        "migrations": [f"{version:03d} {name}" for version, name, _ in MIGRATIONS],
         "last_migration": "2024-01-01",
         "tables_created": [
             "usuarios", "municipios", "configuraciones", "logs_sistema",
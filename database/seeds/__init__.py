@@ -1,45 +1,101 @@
+"""
+Datos iniciales de la base de datos SQLite
+
+``run_seeds`` guarda en ``configuraciones`` (clave ``seed_checksum``) la suma
+SHA-256 de los datos de ejemplo insertados. Si no han cambiado, el arranque
+se limita a leer esa fila; si cambian, se vuelven a insertar en una sola
+transacción.
+"""
+import hashlib
+import json
+import sqlite3
+from core.logger import get_logger
+
+SEED_CHECKSUM_KEY = "seed_checksum"
+
+# (municipio_id, año, mes, energia_mwh, observaciones)
+SAMPLE_ENERGIA = [
+    (1, 2024, 1, 150.5, "Datos de prueba enero"),
+    (2, 2024, 1, 120.3, "Datos de prueba enero"),
+    (3, 2024, 1, 98.7, "Datos de prueba enero"),
+    (1, 2024, 2, 145.2, "Datos de prueba febrero"),
+    (2, 2024, 2, 118.9, "Datos de prueba febrero")
+]
+
+# (municipio_id, año, mes, mayor, menor, total, observaciones)
+SAMPLE_FACTURACION = [
+    (1, 2024, 1, 80.2, 45.3, 125.5, "Facturación enero"),
+    (2, 2024, 1, 70.1, 38.9, 109.0, "Facturación enero"),
+    (3, 2024, 1, 55.4, 32.1, 87.5, "Facturación enero")
+]
+
+def seed_checksum() -> str:
+    """Suma SHA-256 de los datos de ejemplo"""
+    payload = json.dumps({"energia_barra": SAMPLE_ENERGIA, "facturacion": SAMPLE_FACTURACION},
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def run_seeds(db_path: str) -> bool:
+    """Inserta los datos iniciales si su checksum no coincide con el guardado
+
+    Returns:
+        True si se insertaron datos, False si ya estaban al día
+    """
+    logger = get_logger(__name__)
+    checksum = seed_checksum()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    
+    try:
+        row = conn.execute("SELECT valor FROM configuraciones WHERE clave = ?", (SEED_CHECKSUM_KEY,)).fetchone()
+        if row and row[0] == checksum:
+            logger.debug("Datos iniciales al día")
+            return False
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _create_sample_data(conn, logger)
+            conn.execute("""
+                INSERT INTO configuraciones (clave, valor, descripcion, fecha_modificacion)
+                VALUES (?, ?, 'Checksum de los datos iniciales', CURRENT_TIMESTAMP)
+                ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor,
+                    fecha_modificacion = excluded.fecha_modificacion
+            """, (SEED_CHECKSUM_KEY, checksum))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ Error ejecutando seeds: {e}")
+        raise
+    finally:
+        conn.close()
+
 def _create_sample_data(conn, logger):
-    """Crea datos de prueba básicos"""
+    """Crea datos de prueba básicos (sin commit: lo hace quien abre la transacción)
+
+    Cualquier error de inserción se propaga para que ``run_seeds`` deshaga
+    la transacción y no guarde el checksum.
+    """
     try:
         logger.info("Creando datos de prueba...")
         
         # Datos de energía de prueba para algunos municipios
-        sample_energia = [
-            (1, 2024, 1, 150.5, "Datos de prueba enero"),
-            (2, 2024, 1, 120.3, "Datos de prueba enero"),
-            (3, 2024, 1, 98.7, "Datos de prueba enero"),
-            (1, 2024, 2, 145.2, "Datos de prueba febrero"),
-            (2, 2024, 2, 118.9, "Datos de prueba febrero")
-        ]
-        
-        for energia in sample_energia:
-            try:
-                conn.execute("""
-                    INSERT OR IGNORE INTO energia_barra 
-                    (municipio_id, año, mes, energia_mwh, observaciones, usuario_id)
-                    VALUES (?, ?, ?, ?, ?, 1)
-                """, energia)
-            except Exception as e:
-                logger.warning(f"Error insertando energía: {e}")
+        conn.executemany("""
+            INSERT OR IGNORE INTO energia_barra 
+            (municipio_id, año, mes, energia_mwh, observaciones, usuario_id)
+            VALUES (?, ?, ?, ?, ?, 1)
+        """, SAMPLE_ENERGIA)
         
         # Datos de facturación de prueba
-        sample_facturacion = [
-            (1, 2024, 1, 80.2, 45.3, 125.5, "Facturación enero"),
-            (2, 2024, 1, 70.1, 38.9, 109.0, "Facturación enero"),
-            (3, 2024, 1, 55.4, 32.1, 87.5, "Facturación enero")
-        ]
-        
-        for fact in sample_facturacion:
-            try:
-                conn.execute("""
-                    INSERT OR IGNORE INTO facturacion 
-                    (municipio_id, año, mes, facturacion_mayor, facturacion_menor, facturacion_total, observaciones, usuario_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, 1)
-                """, fact)
-            except Exception as e:
-                logger.warning(f"Error insertando facturación: {e}")
+        conn.executemany("""
+            INSERT OR IGNORE INTO facturacion 
+            (municipio_id, año, mes, facturacion_mayor, facturacion_menor, facturacion_total, observaciones, usuario_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        """, SAMPLE_FACTURACION)
         
-        conn.commit()
         logger.info("Datos de prueba creados exitosamente")
         
     except Exception as e:
@@ -45,4 +45,4 @@ def seed_configuraciones_facturacion():
                 "INSERT INTO configuraciones (clave, valor, descripcion) VALUES (?, ?, ?)",
                 (clave, valor, descripcion)
             )
-            logger.info(f"Configuración de facturación creada: {clave}")
+            logger.info("Configuración de facturación creada: %s", clave)
@@ -0,0 +1,300 @@
+"""
+Generador de datos sintéticos reproducibles para pruebas de rendimiento
+
+Produce N años × M municipios de energía en barra, facturación, planes y
+cálculos de pérdidas y transferencias de consumos con la misma estructura
+que las migraciones, además de volcados de clientes CODCLI/KWHT como los que
+importa la pantalla de transferencias. Con la misma semilla se obtienen
+siempre los mismos datos.
+"""
+
+import hashlib
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Municipios reales de Matanzas con su energía mensual base (MWh)
+MUNICIPIOS_BASE = [
+    ("MAT", "Matanzas", 145.5),
+    ("CAR", "Cárdenas", 120.3),
+    ("MAR", "Martí", 98.7),
+    ("COL", "Colón", 110.2),
+    ("PER", "Perico", 85.4),
+    ("JOV", "Jovellanos", 92.1),
+    ("PBE", "Pedro Betancourt", 78.9),
+    ("LIM", "Limonar", 88.6),
+    ("URE", "Unión de Reyes", 95.3),
+    ("CZA", "Ciénaga de Zapata", 156.8),
+    ("JGR", "Jagüey Grande", 102.4),
+    ("CAL", "Calimete", 87.2),
+    ("ARA", "Los Arabos", 91.7),
+]
+
+# Factor estacional por mes (más consumo en verano)
+_ESTACIONALIDAD = [0.92, 0.90, 0.95, 1.00, 1.06, 1.12, 1.18, 1.20, 1.12, 1.03, 0.96, 0.93]
+
+
+@dataclass
+class SyntheticDataset:
+    """Conjunto de tablas generadas, listas para cargar en un gestor de BD"""
+
+    seed: int
+    años: List[int]
+    municipios: List[Dict[str, Any]] = field(default_factory=list)
+    users: List[Dict[str, Any]] = field(default_factory=list)
+    energia_barra: List[Dict[str, Any]] = field(default_factory=list)
+    facturacion: List[Dict[str, Any]] = field(default_factory=list)
+    planes_perdidas: List[Dict[str, Any]] = field(default_factory=list)
+    calculos_perdidas: List[Dict[str, Any]] = field(default_factory=list)
+    transferencias_consumos: List[Dict[str, Any]] = field(default_factory=list)
+
+    TABLES = ("municipios", "users", "energia_barra", "facturacion", "planes_perdidas",
+              "calculos_perdidas", "transferencias_consumos")
+
+    def counts(self) -> Dict[str, int]:
+        """Número de filas por tabla"""
+        return {table: len(getattr(self, table)) for table in self.TABLES}
+
+    def load_into(self, db_manager) -> None:
+        """Sustituye las tablas en memoria de un WebDatabaseManager"""
+        from core.table_stats import get_table_stats
+
+        for table in self.TABLES:
+            setattr(db_manager, table, [dict(row) for row in getattr(self, table)])
+        get_table_stats().invalidate()
+
+
+def _municipios(count: int) -> List[Dict[str, Any]]:
+    municipios = []
+    for index in range(count):
+        if index < len(MUNICIPIOS_BASE):
+            codigo, nombre, _ = MUNICIPIOS_BASE[index]
+        else:
+            codigo, nombre = f"M{index + 1:03d}", f"Municipio Sintético {index + 1}"
+        municipios.append({
+            "id": index + 1,
+            "codigo": codigo,
+            "nombre": nombre,
+            "provincia": "Matanzas",
+            "activo": 1
+        })
+    return municipios
+
+
+def _energia_base(index: int, rng: random.Random) -> float:
+    if index < len(MUNICIPIOS_BASE):
+        return MUNICIPIOS_BASE[index][2]
+    return round(rng.uniform(75.0, 160.0), 1)
+
+
+def _users() -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": 1,
+            "username": "admin",
+            "password_hash": hashlib.sha256("admin".encode()).hexdigest(),
+            "nombre_completo": "Administrador",
+            "email": "admin@une.cu",
+            "tipo_usuario": "administrador",
+            "activo": 1
+        },
+        {
+            "id": 2,
+            "username": "operador",
+            "password_hash": hashlib.sha256("operador".encode()).hexdigest(),
+            "nombre_completo": "Operador Sistema",
+            "email": "operador@une.cu",
+            "tipo_usuario": "operador",
+            "activo": 1
+        }
+    ]
+
+
+def generate_dataset(years: int = 1, municipios: int = 13, start_year: int = 2024,
+                     seed: int = 42, servicios_transferencia: int = 50) -> SyntheticDataset:
+    """Genera ``years`` años completos para ``municipios`` municipios
+
+    Args:
+        years: Años consecutivos a generar a partir de ``start_year``
+        municipios: Número de municipios (los 13 primeros son los reales)
+        start_year: Primer año generado
+        seed: Semilla del generador pseudoaleatorio
+        servicios_transferencia: Servicios con transferencias mensuales
+
+    Returns:
+        SyntheticDataset con todas las tablas
+    """
+    rng = random.Random(seed)
+    años = list(range(start_year, start_year + years))
+    dataset = SyntheticDataset(seed=seed, años=años)
+    dataset.municipios = _municipios(municipios)
+    dataset.users = _users()
+
+    bases = {m["id"]: _energia_base(i, rng) for i, m in enumerate(dataset.municipios)}
+    # Nivel de pérdidas propio de cada municipio (8-22 %)
+    perdidas_nivel = {m["id"]: rng.uniform(0.08, 0.22) for m in dataset.municipios}
+
+    for año in años:
+        acumulados = {mid: [0.0, 0.0, 0.0] for mid in bases}  # energía, pérdidas, plan
+        for mes in range(1, 13):
+            fecha = f"{año}-{mes:02d}-28T10:00:00"
+            estacional = _ESTACIONALIDAD[mes - 1]
+
+            for municipio_id, base in bases.items():
+                energia = round(base * estacional * rng.uniform(0.93, 1.07), 1)
+                perdida = perdidas_nivel[municipio_id] * rng.uniform(0.85, 1.15)
+                ventas = round(energia * (1 - perdida), 3)
+                mayor = round(ventas * rng.uniform(0.55, 0.70), 3)
+                menor = round(ventas - mayor, 3)
+                plan_pct = round(perdidas_nivel[municipio_id] * 100 * rng.uniform(0.90, 1.0), 2)
+                perdidas_mwh = round(energia - ventas, 3)
+
+                acumulado = acumulados[municipio_id]
+                acumulado[0] += energia
+                acumulado[1] += perdidas_mwh
+                acumulado[2] += plan_pct
+
+                dataset.energia_barra.append({
+                    "id": len(dataset.energia_barra) + 1,
+                    "municipio_id": municipio_id,
+                    "año": año,
+                    "mes": mes,
+                    "energia_mwh": energia,
+                    "observaciones": None,
+                    "usuario_id": 1,
+                    "fecha_registro": fecha,
+                    "fecha_modificacion": fecha
+                })
+                dataset.facturacion.append({
+                    "id": len(dataset.facturacion) + 1,
+                    "municipio_id": municipio_id,
+                    "año": año,
+                    "mes": mes,
+                    "facturacion_mayor": mayor,
+                    "facturacion_menor": menor,
+                    "facturacion_total": round(mayor + menor, 3),
+                    "observaciones": None,
+                    "usuario_id": 1,
+                    "fecha_creacion": fecha,
+                    "fecha_actualizacion": fecha
+                })
+                dataset.planes_perdidas.append({
+                    "id": len(dataset.planes_perdidas) + 1,
+                    "municipio_id": municipio_id,
+                    "año": año,
+                    "mes": mes,
+                    "plan_perdidas_pct": plan_pct,
+                    "observaciones": None,
+                    "usuario_id": 1,
+                    "fecha_creacion": fecha,
+                    "fecha_modificacion": fecha
+                })
+                dataset.calculos_perdidas.append({
+                    "id": len(dataset.calculos_perdidas) + 1,
+                    "municipio_id": municipio_id,
+                    "año": año,
+                    "mes": mes,
+                    "energia_barra_mwh": energia,
+                    "facturacion_mayor": mayor,
+                    "facturacion_menor": menor,
+                    "total_ventas": ventas,
+                    "perdidas_distribucion_mwh": perdidas_mwh,
+                    "perdidas_pct": round(perdidas_mwh / energia * 100, 2) if energia else 0.0,
+                    "plan_perdidas_pct": plan_pct,
+                    "energia_barra_acumulada": round(acumulado[0], 3),
+                    "perdidas_acumuladas_mwh": round(acumulado[1], 3),
+                    "perdidas_acumuladas_pct": round(acumulado[1] / acumulado[0] * 100, 2) if acumulado[0] else 0.0,
+                    "plan_perdidas_acumulado_pct": round(acumulado[2] / mes, 2),
+                    "usuario_id": 1,
+                    "fecha_calculo": fecha,
+                    "fecha_actualizacion": fecha
+                })
+
+            # Plan provincial (municipio_id NULL)
+            dataset.planes_perdidas.append({
+                "id": len(dataset.planes_perdidas) + 1,
+                "municipio_id": None,
+                "año": año,
+                "mes": mes,
+                "plan_perdidas_pct": round(rng.uniform(12.0, 16.0), 2),
+                "observaciones": "Plan provincial",
+                "usuario_id": 1,
+                "fecha_creacion": fecha,
+                "fecha_modificacion": fecha
+            })
+
+            for servicio in range(servicios_transferencia):
+                origen, destino = rng.sample(dataset.municipios, 2) if len(dataset.municipios) > 1 else (
+                    dataset.municipios[0], dataset.municipios[0])
+                dataset.transferencias_consumos.append({
+                    "id": len(dataset.transferencias_consumos) + 1,
+                    "servicio_id": str(servicio + 1),
+                    "año": año,
+                    "mes": mes,
+                    "consumo_kwh": round(rng.uniform(500.0, 250000.0), 1),
+                    "usuario_id": 1,
+                    "observaciones": None,
+                    "origen": origen["nombre"],
+                    "destino": destino["nombre"],
+                    "fecha_registro": fecha,
+                    "fecha_actualizacion": fecha
+                })
+
+    return dataset
+
+
+def generate_customer_dump(rows: int, seed: int = 42, servicios: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Genera un volcado de clientes con columnas CODCLI y KWHT
+
+    Los ``servicios`` indicados (p. ej. los de transferencias) se incluyen
+    repartidos por el volcado para que la búsqueda los encuentre.
+    """
+    rng = random.Random(seed)
+    dump = [
+        {"CODCLI": f"{rng.randrange(10 ** 7, 10 ** 8)}", "KWHT": round(rng.uniform(50.0, 5000.0), 1)}
+        for _ in range(rows)
+    ]
+    for servicio in servicios or []:
+        if dump:
+            dump[rng.randrange(len(dump))]["CODCLI"] = servicio
+    return dump
+
+
+def write_customer_dump(path, rows: int, seed: int = 42, servicios: Optional[List[str]] = None) -> Path:
+    """Escribe un volcado CODCLI/KWHT en .xlsx o .csv según la extensión"""
+    path = Path(path)
+    dump = generate_customer_dump(rows, seed, servicios)
+    _write_rows(path, ["CODCLI", "KWHT"], ([r["CODCLI"], r["KWHT"]] for r in dump))
+    return path
+
+
+def write_energia_workbook(path, dataset: SyntheticDataset, año: int, mes: int) -> Path:
+    """Escribe el libro de energía de un período con el formato que importa EnergiaService"""
+    path = Path(path)
+    nombres = {m["id"]: m["nombre"] for m in dataset.municipios}
+    filas = (
+        [nombres[e["municipio_id"]], e["año"], e["mes"], e["energia_mwh"], ""]
+        for e in dataset.energia_barra if e["año"] == año and e["mes"] == mes
+    )
+    _write_rows(path, ["Municipio", "Año", "Mes", "Energía MWh", "Observaciones"], filas)
+    return path
+
+
+def _write_rows(path: Path, headers: List[str], rows) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".csv":
+        import csv
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        return
+
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
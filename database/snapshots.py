@@ -0,0 +1,124 @@
+"""
+Instantáneas completas de datos (ver ``core.snapshot``)
+
+Exportación e importación entre la instantánea binaria y sus tres orígenes:
+el archivo SQLite, el gestor en memoria (``WebDatabaseManager``) y el
+almacenamiento web del navegador (``WebStorageManager``). SQLite se lee con
+cursores de tuplas y se escribe con ``executemany`` en una transacción, sin
+pasar por diccionarios.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Union
+from core.logger import get_logger
+from core.snapshot import SnapshotTable, columns_of, read_snapshot, rows_from_dicts, write_snapshot
+from .statistics import MEMORY_TABLES
+
+SNAPSHOT_SUFFIX = ".pmsnap"
+
+
+# === SQLITE ===
+
+def export_sqlite_snapshot(db_path: Union[str, Path], fileobj: BinaryIO) -> int:
+    """Escribe todas las tablas de usuario de la base SQLite; devuelve las filas escritas"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return write_snapshot(fileobj, _sqlite_tables(conn))
+    finally:
+        conn.close()
+
+
+def import_sqlite_snapshot(db_path: Union[str, Path], fileobj: BinaryIO) -> Dict[str, int]:
+    """Carga la instantánea en la base SQLite (INSERT OR REPLACE) en una sola transacción
+
+    Las tablas deben existir (``run_migrations``); las tablas y columnas que
+    la base no tenga se ignoran.
+
+    Returns:
+        Filas importadas por tabla
+    """
+    logger = get_logger(__name__)
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    counts: Dict[str, int] = {}
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table, columns, _, rows in read_snapshot(fileobj):
+                if table not in existing:
+                    logger.warning(f"Tabla {table} no existe en SQLite: se omite")
+                    continue
+                known = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+                keep = [index for index, column in enumerate(columns) if column in known]
+                if not keep:
+                    continue
+                names = ", ".join(f'"{columns[index]}"' for index in keep)
+                placeholders = ", ".join("?" for _ in keep)
+                if len(keep) != len(columns):
+                    rows = (tuple(row[index] for index in keep) for row in rows)
+                cursor = conn.executemany(f'INSERT OR REPLACE INTO "{table}" ({names}) VALUES ({placeholders})', rows)
+                counts[table] = cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    try:
+        from core.table_stats import get_table_stats
+        get_table_stats().invalidate()
+    except Exception:
+        pass
+    return counts
+
+
+def _sqlite_tables(conn: sqlite3.Connection) -> Iterator[SnapshotTable]:
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    for table in tables:
+        info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+        columns = [row[1] for row in info]
+        types = [row[2] for row in info]
+        # Cursor de tuplas: las filas se consumen a medida que se escriben
+        select_list = ", ".join(f'"{column}"' for column in columns)
+        cursor = conn.execute(f'SELECT {select_list} FROM "{table}"')
+        yield SnapshotTable(table, columns, cursor, types)
+
+
+# === GESTOR EN MEMORIA ===
+
+def export_memory_snapshot(manager, fileobj: BinaryIO) -> int:
+    """Escribe las tablas del gestor en memoria; devuelve las filas escritas"""
+    def tables() -> Iterator[SnapshotTable]:
+        for table, attribute in MEMORY_TABLES.items():
+            records = getattr(manager, attribute, None)
+            if records is None:
+                continue
+            if hasattr(records, "columns") and hasattr(records, "iter_rows"):
+                columns = list(records.columns)
+            else:
+                columns = columns_of(records)
+            yield SnapshotTable(table, columns, rows_from_dicts(records, columns))
+
+    return write_snapshot(fileobj, tables())
+
+
+def import_memory_snapshot(manager, fileobj: BinaryIO) -> Dict[str, int]:
+    """Sustituye las tablas del gestor en memoria por las de la instantánea"""
+    counts: Dict[str, int] = {}
+    for table, columns, _, rows in read_snapshot(fileobj):
+        attribute = MEMORY_TABLES.get(table)
+        if attribute is None:
+            continue
+        # El gestor guarda diccionarios (o columnas, si DB_COLUMNAR): se crean una sola vez aquí
+        records = [dict(zip(columns, row)) for row in rows]
+        setattr(manager, attribute, records)
+        counts[table] = len(records)
+
+    from core.table_stats import get_table_stats
+    get_table_stats().invalidate()
+    return counts
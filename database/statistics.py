@@ -0,0 +1,128 @@
+"""
+Estadísticas de tablas sin recorrer los datos
+
+Los conteos de SQLite salen de ``sqlite_stat1`` (que el mantenimiento
+mantiene al día, ver ``database.maintenance``) o, para las tablas sin
+estadísticas, de ``MAX(rowid)``, que se resuelve con el índice de la clave
+primaria. El tamaño por tabla e índices sale de la tabla virtual ``dbstat``
+cuando SQLite la incluye; como recorre las páginas, se guarda en caché
+mientras el archivo no cambie. Los ``COUNT(*)`` exactos solo se ejecutan si
+se piden con ``exact=True``.
+
+En modo web los conteos salen del gestor en memoria (``len`` de cada tabla).
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from core.logger import get_logger
+
+# Tabla → atributo del gestor en memoria
+MEMORY_TABLES = {
+    "usuarios": "users",
+    "municipios": "municipios",
+    "energia_barra": "energia_barra",
+    "facturacion": "facturacion",
+    "planes_perdidas": "planes_perdidas",
+    "calculos_perdidas": "calculos_perdidas",
+    "logs_sistema": "logs"
+}
+
+_lock = threading.Lock()
+# (ruta, mtime_ns, tamaño) → tamaños por tabla
+_size_cache: Dict[Tuple[str, int, int], Optional[Dict[str, Dict[str, int]]]] = {}
+
+
+def sqlite_table_statistics(conn: sqlite3.Connection, db_path: Path, exact: bool = False) -> Dict[str, Any]:
+    """Filas estimadas (o exactas) y tamaño de cada tabla de una base SQLite"""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    estimates = {} if exact else stat1_row_estimates(conn)
+    sizes = table_sizes(conn, db_path)
+
+    details = {}
+    for table in tables:
+        rows, source = _row_count(conn, table, estimates, exact)
+        entry = {"rows": rows, "source": source}
+        if sizes is not None:
+            entry.update(sizes.get(table, {"size_bytes": 0, "index_bytes": 0}))
+        details[table] = entry
+    return {"tables": details, "sizes_available": sizes is not None}
+
+
+def memory_table_statistics(manager) -> Dict[str, Any]:
+    """Filas de cada tabla del gestor en memoria y su última escritura"""
+    from core.table_stats import get_table_stats
+    table_stats = get_table_stats()
+    details = {}
+    for table, attribute in MEMORY_TABLES.items():
+        rows = getattr(manager, attribute, None)
+        if rows is None:
+            continue
+        details[table] = {
+            "rows": len(rows),
+            "source": "memory",
+            "last_updated": table_stats.last_updated(table)
+        }
+    return {"tables": details, "sizes_available": False}
+
+
+def table_sizes(conn: sqlite3.Connection, db_path: Path) -> Optional[Dict[str, Dict[str, int]]]:
+    """Bytes de datos e índices por tabla según ``dbstat`` (None si no está disponible)"""
+    try:
+        stat = Path(db_path).stat()
+        key = (str(db_path), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        key = None
+
+    with _lock:
+        if key is not None and key in _size_cache:
+            return _size_cache[key]
+
+    try:
+        owners = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"))
+        sizes: Dict[str, Dict[str, int]] = {}
+        for name, size in conn.execute("SELECT name, pgsize FROM dbstat WHERE aggregate = TRUE"):
+            table = owners.get(name, name)
+            entry = sizes.setdefault(table, {"size_bytes": 0, "index_bytes": 0})
+            entry["size_bytes" if name == table else "index_bytes"] += size
+    except sqlite3.Error as e:
+        get_logger(__name__).debug(f"dbstat no disponible: {e}")
+        sizes = None
+
+    if key is not None:
+        with _lock:
+            _size_cache.clear()
+            _size_cache[key] = sizes
+    return sizes
+
+
+def stat1_row_estimates(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Filas por tabla según ``sqlite_stat1`` (vacío si nunca se ejecutó ANALYZE)"""
+    # El primer número de sqlite_stat1.stat es el número de filas de la tabla
+    try:
+        rows = conn.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    estimates = {}
+    for table, stat in rows:
+        try:
+            estimates[table] = int(str(stat).split()[0])
+        except (ValueError, IndexError):
+            continue
+    return estimates
+
+
+def _row_count(conn: sqlite3.Connection, table: str, estimates: Dict[str, int], exact: bool) -> Tuple[Any, str]:
+    if exact:
+        return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0], "exact"
+    if table in estimates:
+        return estimates[table], "sqlite_stat1"
+    try:
+        # Cota superior: exacta mientras no se hayan borrado filas
+        value = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0]
+        return value or 0, "rowid"
+    except sqlite3.Error:
+        return None, "unknown"
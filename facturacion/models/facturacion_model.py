@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class FacturacionModel:
     """Modelo de facturación"""
     id: Optional[int] = None
@@ -45,6 +45,11 @@ class FacturacionModel:
         """Compatibilidad - campo de observaciones"""
         return None
     
+    @property
+    def cursor(self) -> tuple:
+        """Clave de paginación (año, mes, municipio_id)"""
+        return (self.año, self.mes, self.municipio_id)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convierte el modelo a diccionario"""
         return {
@@ -63,7 +63,7 @@ class FacturacionEditScreen:
                     ft.Container(
                         content=ft.IconButton(
                             icon=ft.Icons.ARROW_BACK,
-                            on_click=lambda _: self.app.navigate_to("facturacion"),
+                            on_click=lambda _: self.app.go_back("facturacion"),
                             tooltip="Volver a Facturación",
                             icon_color=ft.Colors.WHITE,
                             bgcolor=ft.Colors.BLUE_600,
@@ -337,7 +337,7 @@ class FacturacionEditScreen:
                             ft.Icon(ft.Icons.CANCEL, size=20),
                             ft.Text("Cancelar", size=16)
                         ], spacing=8),
-                        on_click=lambda _: self.app.navigate_to("facturacion"),
+                        on_click=lambda _: self.app.go_back("facturacion"),
                         style=ft.ButtonStyle(
                             bgcolor=ft.Colors.GREY_400,
                             color=ft.Colors.WHITE,
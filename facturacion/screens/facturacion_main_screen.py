@@ -10,10 +10,19 @@ import time
 from facturacion.services import get_facturacion_service
 from facturacion.models import FacturacionModel
 from core.logger import get_logger
+from core.page_updates import flush_now
+from core.metrics import record_import
+from core.change_events import ChangeEvent
+from core.components import PagedDataTable
 
 class FacturacionMainScreen:
     """Pantalla principal de facturación"""
     
+    # Se conserva viva al editar o gestionar transferencias
+    keep_alive = True
+    # Escrituras de otras sesiones que refrescan la página visible
+    change_tables = ("facturacion", "municipios")
+    
     def __init__(self, app):
         self.app = app
         self.page = app.page
@@ -21,7 +30,8 @@ class FacturacionMainScreen:
         self.facturacion_service = get_facturacion_service()
         
         # Inicializar variables
-        self.facturaciones = []
+        self.facturaciones = []  # filas de la página visible
+        self.filtros = None  # (municipio_id, año, mes) de la última carga
         self.municipios = []  # Inicializar lista vacía
         
         # Fechas actuales
@@ -35,7 +45,7 @@ class FacturacionMainScreen:
         """Carga la lista de municipios"""
         try:
             self.municipios = self.facturacion_service.get_municipios_activos()
-            self.logger.info(f"Municipios cargados: {len(self.municipios)}")
+            self.logger.info("Municipios cargados: %s", len(self.municipios))
         except Exception as e:
             self.logger.error(f"Error al cargar municipios: {e}")
             self.municipios = []       
@@ -222,8 +232,9 @@ class FacturacionMainScreen:
     def _build_data_table(self) -> ft.Control:
         """Construye la tabla de datos"""
         
-        # Crear tabla de datos
-        self.data_table = ft.DataTable(
+        # Crear tabla paginada: solo se construyen las filas de la página visible
+        self.paged_table = PagedDataTable(
+            self.page,
             columns=[
                 ft.DataColumn(ft.Text("ID", weight=ft.FontWeight.BOLD, color=ft.Colors.GREY_700)),
                 ft.DataColumn(ft.Text("Municipio", weight=ft.FontWeight.BOLD, color=ft.Colors.GREY_700)),
@@ -234,7 +245,8 @@ class FacturacionMainScreen:
                 ft.DataColumn(ft.Text("Total", weight=ft.FontWeight.BOLD, color=ft.Colors.GREY_700)),
                 ft.DataColumn(ft.Text("Acciones", weight=ft.FontWeight.BOLD, color=ft.Colors.GREY_700))
             ],
-            rows=[],
+            row_builder=self._build_data_row,
+            empty_message="Sin registros de facturación",
             bgcolor=ft.Colors.WHITE,
             border=ft.border.all(1, ft.Colors.GREY_200),
             border_radius=8,
@@ -242,9 +254,7 @@ class FacturacionMainScreen:
             heading_row_color=ft.Colors.GREY_100,
             heading_row_height=50
         )
-        
-        # Cargar datos iniciales
-        self._update_data_table()
+        self.data_table = self.paged_table.data_table
         
         return ft.Container(
             content=ft.Column([
@@ -256,7 +266,7 @@ class FacturacionMainScreen:
                 ft.Container(height=15),
                 ft.Container(
                     content=ft.Column([
-                        self.data_table
+                        self.paged_table.build()
                     ], scroll=ft.ScrollMode.AUTO),
                     bgcolor=ft.Colors.WHITE,
                     border_radius=10,
@@ -355,26 +365,25 @@ class FacturacionMainScreen:
             # Cargar datos según los filtros disponibles
             if municipio_id and año and mes:
                 # Filtro específico por municipio, año y mes
-                self.facturaciones = self.facturacion_service.get_facturacion_by_municipio(municipio_id, año, mes)
+                self.filtros = (municipio_id, año, mes)
             elif municipio_id:
                 # Solo por municipio (todos los períodos)
-                self.facturaciones = self.facturacion_service.get_facturacion_by_municipio(municipio_id)
+                self.filtros = (municipio_id, None, None)
             elif año and mes:
                 # Por período (todos los municipios)
-                self.facturaciones = self.facturacion_service.get_facturacion_by_periodo(año, mes)
+                self.filtros = (None, año, mes)
             else:
                 # Sin filtros específicos, usar período actual
-                current_year = datetime.now().year
-                current_month = datetime.now().month
-                self.facturaciones = self.facturacion_service.get_facturacion_by_periodo(current_year, current_month)
+                self.filtros = (None, datetime.now().year, datetime.now().month)
             
-            # Actualizar tabla
+            # Actualizar tabla (primera página)
             self._update_data_table()
             
             # Mostrar mensaje de éxito
-            self._show_success(f"Se cargaron {len(self.facturaciones)} registros")
+            mas = " (hay más páginas)" if self.paged_table.has_next else ""
+            self._show_success(f"Se cargaron {len(self.facturaciones)} registros{mas}")
             
-            self.logger.info(f"Datos cargados: {len(self.facturaciones)} registros")
+            self.logger.info("Datos cargados: %s registros en la página %s", len(self.facturaciones), self.paged_table.page_number)
             
         except Exception as ex:
             self.logger.error(f"Error al cargar datos: {ex}")
@@ -387,48 +396,67 @@ class FacturacionMainScreen:
             self.page.update()
 
     def _update_data_table(self):
-        """Actualiza la tabla de datos"""
-        self.data_table.rows.clear()
-        
-        for facturacion in self.facturaciones:
-            self.data_table.rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(str(facturacion.id), color=ft.Colors.GREY_700)),
-                        ft.DataCell(ft.Text(facturacion.municipio_nombre or "N/A", color=ft.Colors.GREY_800)),
-                        ft.DataCell(ft.Text(str(facturacion.año), color=ft.Colors.GREY_700)),
-                        ft.DataCell(ft.Text(str(facturacion.mes), color=ft.Colors.GREY_700)),
-                        ft.DataCell(ft.Text(f"{facturacion.facturacion_menor:,.2f}", color=ft.Colors.GREEN_700, weight=ft.FontWeight.W_500)),
-                        ft.DataCell(ft.Text(f"{facturacion.facturacion_mayor:,.2f}", color=ft.Colors.BLUE_700, weight=ft.FontWeight.W_500)),
-                        ft.DataCell(ft.Text(f"{facturacion.facturacion_total:,.2f}", color=ft.Colors.PURPLE_700, weight=ft.FontWeight.BOLD)),
-                        ft.DataCell(
-                            ft.Row([
-                                ft.IconButton(
-                                    icon=ft.Icons.EDIT,
-                                    tooltip="Editar facturación",
-                                    on_click=lambda e, f=facturacion: self._edit_facturacion(f),
-                                    icon_color=ft.Colors.BLUE,
-                                    bgcolor=ft.Colors.BLUE_50,
-                                    style=ft.ButtonStyle(shape=ft.CircleBorder())
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.DELETE,
-                                    tooltip="Eliminar facturación",
-                                    on_click=lambda e, f=facturacion: self._delete_facturacion(f),
-                                    icon_color=ft.Colors.RED,
-                                    bgcolor=ft.Colors.RED_50,
-                                    style=ft.ButtonStyle(shape=ft.CircleBorder())
-                                )
-                            ], spacing=5)
+        """Actualiza la tabla de datos mostrando la primera página"""
+        if self.filtros is None:
+            self.paged_table.set_items([])
+        else:
+            municipio_id, año, mes = self.filtros
+            self.paged_table.set_source(
+                lambda despues_de, limite: self.facturacion_service.get_facturacion_pagina(
+                    municipio_id, año, mes, despues_de, limite),
+                lambda facturacion: facturacion.cursor
+            )
+        self.facturaciones = self.paged_table.items
+
+    def _build_data_row(self, facturacion: FacturacionModel) -> ft.DataRow:
+        """Construye la fila de una facturación"""
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(str(facturacion.id), color=ft.Colors.GREY_700)),
+                ft.DataCell(ft.Text(facturacion.municipio_nombre or "N/A", color=ft.Colors.GREY_800)),
+                ft.DataCell(ft.Text(str(facturacion.año), color=ft.Colors.GREY_700)),
+                ft.DataCell(ft.Text(str(facturacion.mes), color=ft.Colors.GREY_700)),
+                ft.DataCell(ft.Text(f"{facturacion.facturacion_menor:,.2f}", color=ft.Colors.GREEN_700, weight=ft.FontWeight.W_500)),
+                ft.DataCell(ft.Text(f"{facturacion.facturacion_mayor:,.2f}", color=ft.Colors.BLUE_700, weight=ft.FontWeight.W_500)),
+                ft.DataCell(ft.Text(f"{facturacion.facturacion_total:,.2f}", color=ft.Colors.PURPLE_700, weight=ft.FontWeight.BOLD)),
+                ft.DataCell(
+                    ft.Row([
+                        ft.IconButton(
+                            icon=ft.Icons.EDIT,
+                            tooltip="Editar facturación",
+                            on_click=lambda e, f=facturacion: self._edit_facturacion(f),
+                            icon_color=ft.Colors.BLUE,
+                            bgcolor=ft.Colors.BLUE_50,
+                            style=ft.ButtonStyle(shape=ft.CircleBorder())
+                        ),
+                        ft.IconButton(
+                            icon=ft.Icons.DELETE,
+                            tooltip="Eliminar facturación",
+                            on_click=lambda e, f=facturacion: self._delete_facturacion(f),
+                            icon_color=ft.Colors.RED,
+                            bgcolor=ft.Colors.RED_50,
+                            style=ft.ButtonStyle(shape=ft.CircleBorder())
                         )
-                    ]
+                    ], spacing=5)
                 )
-            )
+            ]
+        )
 
     def _refresh_data(self, e):
         """Actualiza los datos"""
         self._load_data()
 
+    def on_data_changed(self, events: List[ChangeEvent]):
+        """Refresca las filas visibles si otra sesión cambió datos de los filtros cargados"""
+        if self.filtros is None:
+            return
+        municipio_id, año, mes = self.filtros
+        if not any(event.affects(año, mes, municipio_id) for event in events):
+            return
+        rebuilt = self.paged_table.refresh()
+        self.facturaciones = self.paged_table.items
+        self.logger.info("Facturación actualizada por cambios de otra sesión: %s filas", rebuilt)
+
     def _edit_facturacion(self, facturacion: FacturacionModel):
         """Edita una facturación"""
         self.app.navigate_to("facturacion_edit", facturacion=facturacion)
@@ -438,7 +466,7 @@ class FacturacionMainScreen:
         def confirm_delete(e):
             if self.facturacion_service.delete_facturacion(facturacion.id):
                 self._show_success("Facturación eliminada correctamente")
-                self._load_data()
+                self.paged_table.reload()
             else:
                 self._show_error("Error al eliminar la facturación")
             dialog.open = False
@@ -529,7 +557,7 @@ class FacturacionMainScreen:
         # Crear file picker
         file_picker = ft.FilePicker(on_result=on_file_selected)
         self.page.overlay.append(file_picker)
-        self.page.update()
+        flush_now(self.page)
         
         # Abrir diálogo de selección de archivo
         file_picker.pick_files(
@@ -565,10 +593,11 @@ class FacturacionMainScreen:
             processed_municipios = []
             
             try:
+                inicio = time.perf_counter()
                 excel_file = pd.ExcelFile(file_path)
                 sheet_names = excel_file.sheet_names
                 
-                self.logger.info(f"Procesando {len(sheet_names)} hojas del Excel")
+                self.logger.info("Procesando %s hojas del Excel", len(sheet_names))
                 
                 for sheet_name in sheet_names:
                     try:
@@ -618,7 +647,7 @@ class FacturacionMainScreen:
                             if self.facturacion_service.update_facturacion(existing):
                                 success_count += 1
                                 processed_municipios.append(f"{municipio['nombre']} (actualizado)")
-                                self.logger.info(f"Actualizado: {municipio['nombre']}")
+                                self.logger.info("Actualizado: %s", municipio['nombre'])
                             else:
                                 error_msg = f"Error al actualizar '{municipio['nombre']}'"
                                 errors.append(error_msg)
@@ -640,7 +669,7 @@ class FacturacionMainScreen:
                             if self.facturacion_service.save_facturacion(nueva_facturacion):
                                 success_count += 1
                                 processed_municipios.append(f"{municipio['nombre']} (nuevo)")
-                                self.logger.info(f"Creado: {municipio['nombre']}")
+                                self.logger.info("Creado: %s", municipio['nombre'])
                             else:
                                 error_msg = f"Error al crear '{municipio['nombre']}'"
                                 errors.append(error_msg)
@@ -652,6 +681,8 @@ class FacturacionMainScreen:
                         error_count += 1
                         self.logger.error(error_msg)
                 
+                record_import("facturacion", success_count + error_count, time.perf_counter() - inicio)
+                
                 # Cerrar diálogo de progreso
                 if progress_dialog.open:
                     progress_dialog.open = False
@@ -874,7 +905,7 @@ class FacturacionMainScreen:
         
         self.page.overlay.append(progress_dialog)
         progress_dialog.open = True
-        self.page.update()
+        flush_now(self.page)
         
         return progress_dialog
 
@@ -923,7 +954,7 @@ class FacturacionMainScreen:
             return None
         
         nombre_clean = nombre.lower().strip()
-        self.logger.info(f"Buscando municipio: '{nombre_clean}'")
+        self.logger.info("Buscando municipio: '%s'", nombre_clean)
         
         # Mapeo de nombres del Excel a nombres en BD
         name_mapping = {
@@ -944,21 +975,21 @@ class FacturacionMainScreen:
         for municipio in self.municipios:
             municipio_name = municipio['nombre'].lower().strip()
             if municipio_name == mapped_name:
-                self.logger.info(f"Municipio encontrado (mapeado): {municipio['nombre']}")
+                self.logger.info("Municipio encontrado (mapeado): %s", municipio['nombre'])
                 return municipio
         
         # Búsqueda exacta con nombre original
         for municipio in self.municipios:
             municipio_name = municipio['nombre'].lower().strip()
             if municipio_name == nombre_clean:
-                self.logger.info(f"Municipio encontrado (exacto): {municipio['nombre']}")
+                self.logger.info("Municipio encontrado (exacto): %s", municipio['nombre'])
                 return municipio
         
         # Búsqueda parcial
         for municipio in self.municipios:
             municipio_name = municipio['nombre'].lower().strip()
             if nombre_clean in municipio_name or municipio_name in nombre_clean:
-                self.logger.info(f"Municipio encontrado (parcial): {municipio['nombre']}")
+                self.logger.info("Municipio encontrado (parcial): %s", municipio['nombre'])
                 return municipio
         
         # Mostrar municipios disponibles para debug
@@ -974,25 +1005,25 @@ class FacturacionMainScreen:
             sheet_names = excel_file.sheet_names
             
             self.logger.info(f"=== DEBUG EXCEL ===")
-            self.logger.info(f"Archivo: {file_path}")
-            self.logger.info(f"Hojas encontradas: {sheet_names}")
-            self.logger.info(f"Municipios en BD: {[m['nombre'] for m in self.municipios]}")
+            self.logger.info("Archivo: %s", file_path)
+            self.logger.info("Hojas encontradas: %s", sheet_names)
+            self.logger.info("Municipios en BD: %s", [m['nombre'] for m in self.municipios])
             
             # Verificar primera hoja como ejemplo
             if sheet_names:
                 first_sheet = sheet_names[0]
                 df = pd.read_excel(file_path, sheet_name=first_sheet, header=None)
                 
-                self.logger.info(f"Hoja '{first_sheet}' - Dimensiones: {df.shape}")
+                self.logger.info("Hoja '%s' - Dimensiones: %s", first_sheet, df.shape)
                 
                 # Verificar celdas específicas
                 if len(df) > 37 and len(df.columns) > 2:
                     valor_c38 = df.iloc[37, 2]
-                    self.logger.info(f"Valor en C38: {valor_c38}")
+                    self.logger.info("Valor en C38: %s", valor_c38)
                 
                 if len(df) > 40 and len(df.columns) > 2:
                     valor_c41 = df.iloc[40, 2]
-                    self.logger.info(f"Valor en C41: {valor_c41}")
+                    self.logger.info("Valor en C41: %s", valor_c41)
             
             self.logger.info(f"=== FIN DEBUG ===")
             
@@ -1007,7 +1038,7 @@ class FacturacionMainScreen:
             self.mes_dropdown.value = ""
             
             # Limpiar datos
-            self.facturaciones = []
+            self.filtros = None
             self._update_data_table()
             
             self.page.update()
@@ -1020,33 +1051,23 @@ class FacturacionMainScreen:
     def _export_to_excel(self, e):
         """Exporta los datos actuales a Excel"""
         try:
-            if not self.facturaciones:
+            if not self.filtros:
                 self._show_warning("No hay datos para exportar")
                 return
             
-            # Preparar datos para exportación
-            export_data = []
-            for facturacion in self.facturaciones:
-                export_data.append({
-                    'ID': facturacion.id,
-                    'Municipio': facturacion.municipio_nombre,
-                    'Año': facturacion.año,
-                    'Mes': facturacion.mes,
-                    'Facturación Menor': facturacion.facturacion_menor,
-                    'Facturación Mayor': facturacion.facturacion_mayor,
-                    'Facturación Total': facturacion.facturacion_total,
-                    'Fecha Creación': facturacion.fecha_creacion
-                })
+            from core.export import default_export_path, export_rows
             
-            df = pd.DataFrame(export_data)
-            
-            # Guardar archivo
-            from pathlib import Path
-            downloads_path = Path.home() / "Downloads"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_path = downloads_path / f"facturacion_export_{timestamp}.xlsx"
+            # Se exportan todas las filas filtradas, no solo la página visible
+            headers = ['ID', 'Municipio', 'Año', 'Mes', 'Facturación Menor', 'Facturación Mayor',
+                       'Facturación Total', 'Fecha Creación']
+            rows = (
+                (f.id, f.municipio_nombre, f.año, f.mes, f.facturacion_menor, f.facturacion_mayor,
+                 f.facturacion_total, f.fecha_creacion)
+                for f in self.facturacion_service.iter_facturaciones_filtered(*self.filtros)
+            )
             
-            df.to_excel(file_path, index=False)
+            file_path = default_export_path("facturacion_export")
+            export_rows(file_path, headers, rows, sheet_name="Facturación")
             
             self._show_success(f"Datos exportados a: {file_path}")
             
@@ -6,9 +6,11 @@ Maneja clientes y transferencias entre municipios
 import flet as ft
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-import pandas as pd
+import time
 from facturacion.services import get_facturacion_service
 from core.logger import get_logger
+from core.page_updates import flush_now
+from core.metrics import record_import
 
 class FacturacionTransfersScreen:
     """Pantalla unificada de transferencias de energía"""
@@ -70,7 +72,7 @@ class FacturacionTransfersScreen:
         """Carga datos iniciales"""
         try:
             self.municipios = self.facturacion_service.get_municipios_activos()
-            self.logger.info(f"Municipios cargados: {len(self.municipios)}")
+            self.logger.info("Municipios cargados: %s", len(self.municipios))
         except Exception as e:
             self.logger.error(f"Error al cargar datos iniciales: {e}")
             self.municipios = []
@@ -98,7 +100,7 @@ class FacturacionTransfersScreen:
                     ft.Container(
                         content=ft.IconButton(
                             icon=ft.Icons.ARROW_BACK,
-                            on_click=lambda _: self.app.navigate_to("facturacion"),
+                            on_click=lambda _: self.app.go_back("facturacion"),
                             tooltip="Volver a Facturación",
                             icon_color=ft.Colors.WHITE,
                             bgcolor=ft.Colors.BLUE_600,
@@ -526,7 +528,7 @@ class FacturacionTransfersScreen:
                 if servicio_id in datos_ejemplo:
                     resultado[servicio_id] = datos_ejemplo[servicio_id]
             
-            self.logger.info(f"Consumos obtenidos: {len(resultado)} registros")
+            self.logger.info("Consumos obtenidos: %s registros", len(resultado))
             return resultado
             
         except Exception as e:
@@ -560,7 +562,7 @@ class FacturacionTransfersScreen:
         # Crear file picker
         file_picker = ft.FilePicker(on_result=on_file_selected)
         self.page.overlay.append(file_picker)
-        self.page.update()
+        flush_now(self.page)
         
         # Abrir diálogo de selección
         file_picker.pick_files(
@@ -575,16 +577,7 @@ class FacturacionTransfersScreen:
             año = int(self.año_field.value)
             mes = int(self.mes_dropdown.value)
             progress_dialog = self._show_progress_dialog("Procesando archivo Excel...")
-            
-            # Leer Excel con encabezados en primera fila
-            df = pd.read_excel(file_path, header=0)
-            
-            # Verificar que existan las columnas necesarias
-            if 'CODCLI' not in df.columns or 'KWHT' not in df.columns:
-                progress_dialog.open = False
-                self.page.update()
-                self._show_error("El archivo Excel debe contener las columnas 'CODCLI' y 'KWHT'")
-                return
+            inicio = time.perf_counter()
             
             # Crear lista de todos los IDs de servicios que buscamos
             servicios_ids = []
@@ -592,35 +585,18 @@ class FacturacionTransfersScreen:
                 for servicio in servicios:
                     servicios_ids.append(servicio["id"])
             
-            # Procesar datos del Excel
-            consumos_importados = {}
-            servicios_encontrados = []
-            servicios_no_encontrados = []
-            
-            # Convertir CODCLI a string para comparación
-            df['CODCLI'] = df['CODCLI'].astype(str)
+            try:
+                lectura = self.facturacion_service.leer_consumos_clientes(file_path, servicios_ids)
+            except ValueError as e:
+                progress_dialog.open = False
+                self.page.update()
+                self._show_error(str(e))
+                return
+            consumos_importados = lectura['consumos']
+            servicios_encontrados = lectura['encontrados']
+            servicios_no_encontrados = lectura['no_encontrados']
             
-            # Buscar cada servicio en el Excel
-            for servicio_id in servicios_ids:
-                # Buscar fila con este CODCLI
-                fila = df[df['CODCLI'] == servicio_id]
-                
-                if not fila.empty:
-                    # Servicio encontrado - obtener consumo
-                    kwht_value = fila['KWHT'].iloc[0]
-                    
-                    # Convertir a float, manejar valores nulos
-                    try:
-                        consumo = float(kwht_value) if pd.notna(kwht_value) else 0.0
-                        consumos_importados[servicio_id] = consumo
-                        servicios_encontrados.append(f"#{servicio_id}: {consumo:,.2f} kW")
-                    except (ValueError, TypeError):
-                        consumos_importados[servicio_id] = 0.0
-                        servicios_encontrados.append(f"#{servicio_id}: 0.00 kW (valor inválido)")
-                else:
-                    # Servicio no encontrado - asignar consumo = 0
-                    consumos_importados[servicio_id] = 0.0
-                    servicios_no_encontrados.append(f"#{servicio_id}")
+            record_import("transferencias", lectura['filas'], time.perf_counter() - inicio)
             
             # Cerrar diálogo de progreso
             progress_dialog.open = False
@@ -638,7 +614,7 @@ class FacturacionTransfersScreen:
             
             # Mostrar detalles si hay servicios no encontrados
             if servicios_no_encontrados:
-                self._show_import_results(servicios_encontrados, servicios_no_encontrados, len(df))
+                self._show_import_results(servicios_encontrados, servicios_no_encontrados, lectura['filas'])
             
         except Exception as e:
             self.logger.error(f"Error al procesar Excel: {e}")
@@ -764,7 +740,7 @@ class FacturacionTransfersScreen:
             # Contar servicios con consumo > 0
             servicios_con_consumo = len([v for v in self.consumos_actuales.values() if v > 0])
             
-            self.logger.info(f"Consumos mantenidos en memoria: {servicios_con_consumo}")
+            self.logger.info("Consumos mantenidos en memoria: %s", servicios_con_consumo)
             
             # Retornar cantidad de servicios procesados
             return servicios_con_consumo
@@ -776,28 +752,19 @@ class FacturacionTransfersScreen:
     def _export_summary(self, e):
         """Exporta resumen de transferencias"""
         try:
-            # Crear resumen
-            summary_data = []
-            for flow_key, servicios in self.servicios_fijos.items():
-                for servicio in servicios:
-                    consumo = self.consumos_actuales.get(servicio["id"], 0)
-                    summary_data.append({
-                        'ID': servicio["id"],
-                        'Servicio': servicio["nombre"],
-                        'Origen': servicio["origen"],
-                        'Destino': servicio["destino"],
-                        'Consumo_kW': consumo
-                    })
-            
-            # Crear DataFrame y exportar
-            df = pd.DataFrame(summary_data)
+            from core.export import default_export_path, export_rows
             
-            from pathlib import Path
-            downloads_path = Path.home() / "Downloads"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_path = downloads_path / f"transferencias_resumen_{timestamp}.xlsx"
+            # Crear resumen
+            rows = (
+                (servicio["id"], servicio["nombre"], servicio["origen"], servicio["destino"],
+                 self.consumos_actuales.get(servicio["id"], 0))
+                for servicios in self.servicios_fijos.values()
+                for servicio in servicios
+            )
             
-            df.to_excel(file_path, index=False)
+            file_path = default_export_path("transferencias_resumen")
+            export_rows(file_path, ['ID', 'Servicio', 'Origen', 'Destino', 'Consumo_kW'], rows,
+                        sheet_name="Transferencias")
             
             self._show_success(f"Resumen exportado a: {file_path}")
             
@@ -952,7 +919,7 @@ class FacturacionTransfersScreen:
         
         self.page.overlay.append(progress_dialog)
         progress_dialog.open = True
-        self.page.update()
+        flush_now(self.page)
         
         return progress_dialog
     
@@ -1292,7 +1259,7 @@ class FacturacionTransfersScreen:
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(self.servicios_fijos, f, indent=2, ensure_ascii=False)
             
-            self.logger.info(f"Servicios guardados en: {config_file}")
+            self.logger.info("Servicios guardados en: %s", config_file)
             
         except Exception as e:
             self.logger.error(f"Error al guardar JSON: {e}")
@@ -1414,7 +1381,7 @@ class FacturacionTransfersScreen:
                         transferencias[destino] += consumo
                         
                         # LOG SIN caracteres Unicode problemáticos
-                        self.logger.info(f"Transferencia: {servicio_id} -> {consumo:.2f} kWh ({origen} a {destino})")
+                        self.logger.info("Transferencia: %s -> %.2f kWh (%s a %s)", servicio_id, consumo, origen, destino)
             
             # Filtrar cambios muy pequeños
             transferencias_filtradas = {
@@ -1422,7 +1389,7 @@ class FacturacionTransfersScreen:
                 if abs(delta) >= 0.01
             }
             
-            self.logger.info(f"Transferencias calculadas: {len(transferencias_filtradas)} municipios afectados")
+            self.logger.info("Transferencias calculadas: %d municipios afectados", len(transferencias_filtradas))
             return transferencias_filtradas
             
         except Exception as e:
@@ -1458,7 +1425,7 @@ class FacturacionTransfersScreen:
                     if facturacion_service.update_facturacion(facturacion):
                         updated_count += 1
                         # LOG SIN emojis problemáticos
-                        self.logger.info(f"OK {municipio_nombre}: {facturacion_anterior:.2f} -> {facturacion.facturacion_mayor:.2f} kWh ({delta_consumo:+.2f})")
+                        self.logger.info("OK %s: %.2f -> %.2f kWh (%+.2f)", municipio_nombre, facturacion_anterior, facturacion.facturacion_mayor, delta_consumo)
                     else:
                         self.logger.error(f"ERROR al actualizar {municipio_nombre}")
                 else:
@@ -1476,7 +1443,7 @@ class FacturacionTransfersScreen:
                     
                     if facturacion_service.save_facturacion(nueva_facturacion):
                         updated_count += 1
-                        self.logger.info(f"CREADO {municipio_nombre}: {delta_consumo:.2f} kWh")
+                        self.logger.info("CREADO %s: %.2f kWh", municipio_nombre, delta_consumo)
                     else:
                         self.logger.error(f"ERROR al crear facturación para {municipio_nombre}")
             
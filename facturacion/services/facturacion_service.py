@@ -3,9 +3,11 @@ Servicio de facturación
 Maneja todas las operaciones de datos de facturación
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from core.database import get_db_manager
 from core.logger import get_logger
+from core.query_cache import cached_query
+from core.records import row_mapper
 from facturacion.models.facturacion_model import FacturacionModel
 
 class FacturacionService:
@@ -17,6 +19,7 @@ class FacturacionService:
     
     # === OPERACIONES DE FACTURACIÓN ===
     
+    @cached_query(tables=["facturacion", "municipios", "usuarios"])
     def get_facturacion_by_periodo(self, año: int, mes: int) -> List[FacturacionModel]:
         """Obtiene facturación por período"""
         query = """
@@ -59,6 +62,49 @@ class FacturacionService:
     
     def get_facturaciones_filtered(self, municipio_id: int = None, año: int = None, mes: int = None) -> List[FacturacionModel]:
         """Obtiene facturaciones filtradas"""
+        try:
+            return list(self.iter_facturaciones_filtered(municipio_id, año, mes))
+            
+        except Exception as e:
+            self.logger.error(f"Error al obtener facturaciones filtradas: {e}")
+            return []
+    
+    def iter_facturaciones_filtered(self, municipio_id: int = None, año: int = None,
+                                    mes: int = None) -> Iterator[FacturacionModel]:
+        """Facturaciones filtradas generadas a medida que se leen (exportaciones)"""
+        query = """
+            SELECT f.*, m.nombre as municipio_nombre, u.nombre_completo as usuario_nombre
+            FROM facturacion f
+            LEFT JOIN municipios m ON f.municipio_id = m.id
+            LEFT JOIN usuarios u ON f.usuario_id = u.id
+            WHERE 1=1
+        """
+        params = []
+        
+        if municipio_id:
+            query += " AND f.municipio_id = ?"
+            params.append(municipio_id)
+        
+        if año:
+            query += " AND f.año = ?"
+            params.append(año)
+        
+        if mes:
+            query += " AND f.mes = ?"
+            params.append(mes)
+        
+        query += " ORDER BY f.año DESC, f.mes DESC, m.nombre"
+        
+        for row in self.db_manager.iter_query(query, tuple(params)):
+            yield self._row_to_facturacion_model(row)
+    
+    def get_facturacion_pagina(self, municipio_id: int = None, año: int = None, mes: int = None,
+                               despues_de: tuple = None, limite: int = 10) -> List[FacturacionModel]:
+        """Obtiene una página de facturaciones paginando por cursor
+        
+        ``despues_de`` es la tupla (año, mes, municipio_id) de la última fila
+        de la página anterior; ``None`` devuelve la primera página.
+        """
         try:
             query = """
                 SELECT f.*, m.nombre as municipio_nombre, u.nombre_completo as usuario_nombre
@@ -81,13 +127,18 @@ class FacturacionService:
                 query += " AND f.mes = ?"
                 params.append(mes)
             
-            query += " ORDER BY f.año DESC, f.mes DESC, m.nombre"
+            if despues_de:
+                query += " AND (f.año, f.mes, f.municipio_id) < (?, ?, ?)"
+                params.extend(despues_de)
+            
+            query += " ORDER BY f.año DESC, f.mes DESC, f.municipio_id DESC LIMIT ?"
+            params.append(int(limite))
             
             results = self.db_manager.execute_query(query, tuple(params))
             return [self._row_to_facturacion_model(row) for row in results]
             
         except Exception as e:
-            self.logger.error(f"Error al obtener facturaciones filtradas: {e}")
+            self.logger.error(f"Error al obtener página de facturaciones: {e}")
             return []
     
     def get_facturacion_by_municipio_periodo(self, municipio_id: int, año: int, mes: int) -> Optional[FacturacionModel]:
@@ -173,12 +224,13 @@ class FacturacionService:
     
     # === OPERACIONES DE MUNICIPIOS ===
     
+    @cached_query(tables=["municipios"], maxsize=1)
     def get_municipios_activos(self) -> List[Dict[str, Any]]:
         """Obtiene todos los municipios activos"""
         try:
             query = "SELECT id, nombre FROM municipios WHERE activo = 1 ORDER BY nombre"
             result = self.db_manager.execute_query(query)
-            self.logger.info(f"Municipios obtenidos: {len(result)}")
+            self.logger.info("Municipios obtenidos: %s", len(result))
             return result
         except Exception as e:
             self.logger.error(f"Error al obtener municipios: {e}")
@@ -186,6 +238,7 @@ class FacturacionService:
     
     # === MÉTODOS AUXILIARES ===
     
+    @cached_query(tables=["facturacion"])
     def get_resumen_facturacion(self, año: int, mes: int) -> Dict[str, Any]:
         """Obtiene resumen de facturación por período"""
         try:
@@ -247,22 +300,51 @@ class FacturacionService:
             self.logger.error(f"Error al verificar facturación existente: {e}")
             return False
     
-    def _row_to_facturacion_model(self, row: Dict[str, Any]) -> FacturacionModel:
-        """Convierte una fila de BD a modelo de facturación"""
-        return FacturacionModel(
-            id=row.get('id'),
-            municipio_id=row.get('municipio_id'),
-            año=row.get('año'),
-            mes=row.get('mes'),
-            facturacion_menor=row.get('facturacion_menor', 0),
-            facturacion_mayor=row.get('facturacion_mayor', 0),
-            facturacion_total=row.get('facturacion_total', 0),
-            fecha_creacion=row.get('fecha_creacion'),
-            fecha_actualizacion=row.get('fecha_actualizacion'),
-            usuario_id=row.get('usuario_id'),
-            municipio_nombre=row.get('municipio_nombre'),
-            usuario_nombre=row.get('usuario_nombre')
-        )
+    # === TRANSFERENCIAS ===
+    
+    def leer_consumos_clientes(self, file_path: str, servicios_ids: List[str]) -> Dict[str, Any]:
+        """Lee un volcado de clientes (CODCLI/KWHT) y busca el consumo de cada servicio
+
+        El volcado se indexa una vez por CODCLI (primera fila de cada código),
+        así cada servicio se resuelve sin recorrer todas las filas.
+
+        Returns:
+            ``filas`` del Excel, ``consumos`` por servicio (0.0 si no aparece o
+            el valor no es numérico) y las listas ``encontrados`` y
+            ``no_encontrados`` para el informe
+
+        Raises:
+            ValueError: Si el Excel no tiene las columnas CODCLI y KWHT
+        """
+        import pandas as pd
+
+        df = pd.read_excel(file_path, header=0)
+        if 'CODCLI' not in df.columns or 'KWHT' not in df.columns:
+            raise ValueError("El archivo Excel debe contener las columnas 'CODCLI' y 'KWHT'")
+
+        # CODCLI como texto para comparar con los IDs de servicio
+        clientes = df.assign(CODCLI=df['CODCLI'].astype(str)).drop_duplicates('CODCLI')
+        kwht_por_cliente = clientes.set_index('CODCLI')['KWHT']
+        consumos, encontrados, no_encontrados = {}, [], []
+        for servicio_id in servicios_ids:
+            if servicio_id not in kwht_por_cliente.index:
+                consumos[servicio_id] = 0.0
+                no_encontrados.append(f"#{servicio_id}")
+                continue
+            kwht_value = kwht_por_cliente[servicio_id]
+            try:
+                consumo = float(kwht_value) if pd.notna(kwht_value) else 0.0
+                consumos[servicio_id] = consumo
+                encontrados.append(f"#{servicio_id}: {consumo:,.2f} kW")
+            except (ValueError, TypeError):
+                consumos[servicio_id] = 0.0
+                encontrados.append(f"#{servicio_id}: 0.00 kW (valor inválido)")
+
+        return {'filas': len(df), 'consumos': consumos,
+                'encontrados': encontrados, 'no_encontrados': no_encontrados}
+    
+    # Convierte una fila de BD a modelo de facturación
+    _row_to_facturacion_model = staticmethod(row_mapper(FacturacionModel))
 
 # Instancia global del servicio
 _facturacion_service = None
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class PlanPerdidasModel:
     """Modelo para planes de pérdidas"""
     id: Optional[int] = None
@@ -56,7 +56,7 @@ class PlanPerdidasModel:
             usuario_nombre=data.get('usuario_nombre')
         )
 
-@dataclass
+@dataclass(slots=True)
 class PerdidasCalculoModel:
     """Modelo para cálculos de pérdidas mensuales"""
     municipio_id: Optional[int] = None
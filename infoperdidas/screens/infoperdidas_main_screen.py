@@ -8,11 +8,15 @@ from datetime import datetime
 from typing import List, Dict, Any
 from infoperdidas.services import get_perdidas_service
 from infoperdidas.models import PerdidasCalculoModel, PerdidasResumenModel
+from core.change_events import ChangeEvent
 from core.logger import get_logger
 
 class InfoPerdidasMainScreen:
     """Pantalla principal de InfoPérdidas"""
     
+    # Escrituras de otras sesiones que cambian el cálculo (calculos_perdidas lo escribe esta pantalla)
+    change_tables = ("energia_barra", "facturacion", "planes_perdidas", "municipios")
+    
     def __init__(self, app):
         self.app = app
         self.page = app.page
@@ -22,6 +26,7 @@ class InfoPerdidasMainScreen:
         # Estado
         self.resumen_provincial = None
         self.municipios_data = []
+        self.periodo = None  # (año, mes) del último cálculo
         
         # Fechas actuales
         now = datetime.now()
@@ -288,6 +293,23 @@ class InfoPerdidasMainScreen:
                     )
                 ),
                 ft.Container(expand=True),
+                ft.Container(
+                    content=ft.ElevatedButton(
+                        content=ft.Row([
+                            ft.Icon(ft.Icons.CALENDAR_MONTH, size=20),
+                            ft.Text("Exportar Año", size=16, weight=ft.FontWeight.BOLD)
+                        ], spacing=8, tight=True),
+                        on_click=self._export_year_workbook,
+                        style=ft.ButtonStyle(
+                            bgcolor=ft.Colors.TEAL_600,
+                            color=ft.Colors.WHITE,
+                            elevation=6,
+                            shadow_color=ft.Colors.TEAL_200,
+                            shape=ft.RoundedRectangleBorder(radius=12)
+                        ),
+                        height=50
+                    )
+                ),
                 ft.Container(
                     content=ft.ElevatedButton(
                         content=ft.Row([
@@ -331,6 +353,7 @@ class InfoPerdidasMainScreen:
             )
             
             if self.resumen_provincial:
+                self.periodo = (año, mes)
                 self.municipios_data = self.resumen_provincial.municipios
                 self._update_resumen_card()
                 self._update_data_table()
@@ -345,6 +368,36 @@ class InfoPerdidasMainScreen:
             self.logger.error(f"Error cargando datos: {e}")
             self._show_error("Error al cargar los datos de pérdidas")
 
+    def on_data_changed(self, events: List[ChangeEvent]):
+        """Recalcula (sin guardar) si otra sesión cambió datos del período o de meses anteriores
+
+        Solo se reconstruyen las filas de los municipios cuyo cálculo cambió.
+        """
+        if not self.resumen_provincial or not self.periodo:
+            return
+        año, mes = self.periodo
+        if not any(event.affects(año, mes, hasta_mes=True) for event in events):
+            return
+        
+        self._update_status_card(self.perdidas_service.verificar_datos_disponibles(año, mes))
+        resumen = self.perdidas_service.calcular_perdidas_provincia(año, mes)
+        if not resumen:
+            return
+        
+        anteriores, self.municipios_data = self.municipios_data, resumen.municipios
+        self.resumen_provincial = resumen
+        if len(anteriores) != len(self.municipios_data):
+            self._update_data_table()
+            cambiadas = len(self.municipios_data)
+        else:
+            cambiadas = 0
+            for i, (anterior, municipio) in enumerate(zip(anteriores, self.municipios_data)):
+                if anterior != municipio:
+                    self.data_table.rows[i] = self._build_data_row(i, municipio)
+                    cambiadas += 1
+        self._update_resumen_card()
+        self.logger.info("InfoPérdidas %02d/%s actualizado por cambios de otra sesión: %s filas", mes, año, cambiadas)
+
     def _update_status_card(self, disponibilidad: Dict[str, Any]):
         """Actualiza la tarjeta de estado"""
         status_items = []
@@ -692,50 +745,48 @@ class InfoPerdidasMainScreen:
         if not self.municipios_data:
             return
         
-        self.data_table.rows.clear()
+        self.data_table.rows = [self._build_data_row(i, municipio) for i, municipio in enumerate(self.municipios_data)]
+        self.page.update()
+
+    def _build_data_row(self, i: int, municipio: PerdidasCalculoModel) -> ft.DataRow:
+        """Fila de la tabla para un municipio"""
+        # Colores alternados para las filas
+        row_color = ft.Colors.GREY_50 if i % 2 == 0 else ft.Colors.WHITE
         
-        for i, municipio in enumerate(self.municipios_data):
-            # Colores alternados para las filas
-            row_color = ft.Colors.GREY_50 if i % 2 == 0 else ft.Colors.WHITE
-            
-            # Colores condicionales para pérdidas
-            perdidas_color = ft.Colors.RED_600 if municipio.perdidas_pct > municipio.plan_perdidas_pct else ft.Colors.GREEN_600
-            perdidas_acum_color = ft.Colors.RED_600 if municipio.perdidas_acumuladas_pct > municipio.plan_perdidas_acumulado_pct else ft.Colors.GREEN_600
-            
-            self.data_table.rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(
-                            ft.Container(
-                                content=ft.Text(
-                                    municipio.municipio_nombre or "N/A", 
-                                    weight=ft.FontWeight.BOLD,
-                                    color=ft.Colors.GREY_800,
-                                    size=12,
-                                    overflow=ft.TextOverflow.ELLIPSIS
-                                ),
-                                padding=ft.padding.symmetric(horizontal=4, vertical=6),
-                                width=115,
-                                alignment=ft.alignment.center_left
-                            )
-                        ),
-                        ft.DataCell(self._create_data_cell(f"{municipio.energia_barra_mwh:,.1f}", ft.Colors.BLUE_600)),
-                        ft.DataCell(self._create_data_cell(f"{municipio.facturacion_mayor:,.1f}", ft.Colors.GREEN_600)),
-                        ft.DataCell(self._create_data_cell(f"{municipio.facturacion_menor:,.1f}", ft.Colors.GREEN_700)),
-                        ft.DataCell(self._create_data_cell(f"{municipio.total_ventas:,.1f}", ft.Colors.GREEN_800)),
-                        ft.DataCell(self._create_data_cell(f"{municipio.perdidas_distribucion_mwh:,.1f}", perdidas_color)),
-                        ft.DataCell(self._create_percentage_cell(municipio.perdidas_pct, perdidas_color)),
-                        ft.DataCell(self._create_percentage_cell(municipio.plan_perdidas_pct, ft.Colors.BLUE_600)),
-                        ft.DataCell(self._create_data_cell(f"{municipio.energia_barra_acumulada:,.1f}", ft.Colors.PURPLE_600)),
-                        ft.DataCell(self._create_data_cell(f"{municipio.perdidas_acumuladas_mwh:,.1f}", perdidas_acum_color)),
-                        ft.DataCell(self._create_percentage_cell(municipio.perdidas_acumuladas_pct, perdidas_acum_color)),
-                        ft.DataCell(self._create_percentage_cell(municipio.plan_perdidas_acumulado_pct, ft.Colors.INDIGO_600))
-                    ],
-                    color=row_color
-                )
-            )
+        # Colores condicionales para pérdidas
+        perdidas_color = ft.Colors.RED_600 if municipio.perdidas_pct > municipio.plan_perdidas_pct else ft.Colors.GREEN_600
+        perdidas_acum_color = ft.Colors.RED_600 if municipio.perdidas_acumuladas_pct > municipio.plan_perdidas_acumulado_pct else ft.Colors.GREEN_600
         
-        self.page.update()
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(
+                    ft.Container(
+                        content=ft.Text(
+                            municipio.municipio_nombre or "N/A", 
+                            weight=ft.FontWeight.BOLD,
+                            color=ft.Colors.GREY_800,
+                            size=12,
+                            overflow=ft.TextOverflow.ELLIPSIS
+                        ),
+                        padding=ft.padding.symmetric(horizontal=4, vertical=6),
+                        width=115,
+                        alignment=ft.alignment.center_left
+                    )
+                ),
+                ft.DataCell(self._create_data_cell(f"{municipio.energia_barra_mwh:,.1f}", ft.Colors.BLUE_600)),
+                ft.DataCell(self._create_data_cell(f"{municipio.facturacion_mayor:,.1f}", ft.Colors.GREEN_600)),
+                ft.DataCell(self._create_data_cell(f"{municipio.facturacion_menor:,.1f}", ft.Colors.GREEN_700)),
+                ft.DataCell(self._create_data_cell(f"{municipio.total_ventas:,.1f}", ft.Colors.GREEN_800)),
+                ft.DataCell(self._create_data_cell(f"{municipio.perdidas_distribucion_mwh:,.1f}", perdidas_color)),
+                ft.DataCell(self._create_percentage_cell(municipio.perdidas_pct, perdidas_color)),
+                ft.DataCell(self._create_percentage_cell(municipio.plan_perdidas_pct, ft.Colors.BLUE_600)),
+                ft.DataCell(self._create_data_cell(f"{municipio.energia_barra_acumulada:,.1f}", ft.Colors.PURPLE_600)),
+                ft.DataCell(self._create_data_cell(f"{municipio.perdidas_acumuladas_mwh:,.1f}", perdidas_acum_color)),
+                ft.DataCell(self._create_percentage_cell(municipio.perdidas_acumuladas_pct, perdidas_acum_color)),
+                ft.DataCell(self._create_percentage_cell(municipio.plan_perdidas_acumulado_pct, ft.Colors.INDIGO_600))
+            ],
+            color=row_color
+        )
 
     def _enable_export_button(self):
         """Habilita el botón de exportar"""
@@ -750,58 +801,14 @@ class InfoPerdidasMainScreen:
                 self._show_warning("No hay datos para exportar")
                 return
             
-            import pandas as pd
-            from pathlib import Path
+            from core.export import default_export_path, export_rows
             
-            # Preparar datos para exportación
-            export_data = []
-            
-            # Agregar resumen provincial
+            headers = ['Municipio'] + self.perdidas_service.COLUMNAS_EXPORTACION
             r = self.resumen_provincial
-            export_data.append({
-                'Municipio': 'TOTAL PROVINCIAL',
-                'Energía Barra (MWh)': r.total_energia_barra,
-                'Facturación Mayor (MWh)': r.total_facturacion_mayor,
-                'Facturación Menor (MWh)': r.total_facturacion_menor,
-                'Total Ventas (MWh)': r.total_ventas,
-                'Pérdidas (MWh)': r.total_perdidas_mwh,
-                'Pérdidas (%)': r.total_perdidas_pct,
-                'Plan (%)': r.total_plan_perdidas_pct,
-                'Energía Acumulada (MWh)': r.total_energia_acumulada,
-                'Pérdidas Acumuladas (MWh)': r.total_perdidas_acumuladas_mwh,
-                'Pérdidas Acumuladas (%)': r.total_perdidas_acumuladas_pct,
-                'Plan Acumulado (%)': r.total_plan_acumulado_pct
-            })
-            
-            # Agregar línea separadora
-            export_data.append({col: '' for col in export_data[0].keys()})
-            
-            # Agregar datos por municipio
-            for municipio in self.municipios_data:
-                export_data.append({
-                    'Municipio': municipio.municipio_nombre,
-                    'Energía Barra (MWh)': municipio.energia_barra_mwh,
-                    'Facturación Mayor (MWh)': municipio.facturacion_mayor,
-                    'Facturación Menor (MWh)': municipio.facturacion_menor,
-                    'Total Ventas (MWh)': municipio.total_ventas,
-                    'Pérdidas (MWh)': municipio.perdidas_distribucion_mwh,
-                    'Pérdidas (%)': municipio.perdidas_pct,
-                    'Plan (%)': municipio.plan_perdidas_pct,
-                    'Energía Acumulada (MWh)': municipio.energia_barra_acumulada,
-                    'Pérdidas Acumuladas (MWh)': municipio.perdidas_acumuladas_mwh,
-                    'Pérdidas Acumuladas (%)': municipio.perdidas_acumuladas_pct,
-                    'Plan Acumulado (%)': municipio.plan_perdidas_acumulado_pct
-                })
-            
-            # Crear DataFrame y exportar
-            df = pd.DataFrame(export_data)
+            rows = self.perdidas_service.filas_exportacion(r)
             
-            # Guardar archivo
-            downloads_path = Path.home() / "Downloads"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_path = downloads_path / f"infoperdidas_{r.mes:02d}_{r.año}_{timestamp}.xlsx"
-            
-            df.to_excel(file_path, index=False, sheet_name=f"Pérdidas {r.mes:02d}-{r.año}")
+            file_path = default_export_path(f"infoperdidas_{r.mes:02d}_{r.año}")
+            export_rows(file_path, headers, rows, sheet_name=f"Pérdidas {r.mes:02d}-{r.año}")
             
             self._show_success(f"Datos exportados a: {file_path}")
             
@@ -809,6 +816,23 @@ class InfoPerdidasMainScreen:
             self.logger.error(f"Error exportando a Excel: {ex}")
             self._show_error("Error al exportar los datos")
     
+    def _export_year_workbook(self, e):
+        """Exporta el libro anual con una hoja por mes y el resumen provincial"""
+        try:
+            from core.export import default_export_path
+            
+            año = int(self.año_field.value) if self.año_field.value else self.current_año
+            file_path = default_export_path(f"infoperdidas_anual_{año}", "xlsx")
+            
+            if self.perdidas_service.exportar_libro_anual(año, str(file_path)):
+                self._show_success(f"Libro anual exportado a: {file_path}")
+            else:
+                self._show_warning(f"No hay datos de pérdidas para {año}")
+            
+        except Exception as ex:
+            self.logger.error(f"Error exportando libro anual: {ex}")
+            self._show_error("Error al exportar el libro anual")
+    
     def _show_success(self, message: str):
         """Muestra mensaje de éxito"""
         snack_bar = ft.SnackBar(
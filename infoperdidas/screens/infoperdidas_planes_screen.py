@@ -10,6 +10,8 @@ from typing import List, Dict, Any, Optional
 from infoperdidas.services import get_perdidas_service
 from infoperdidas.models import PlanPerdidasModel
 from core.logger import get_logger
+from core.page_updates import flush_now
+from core.components import PagedDataTable
 
 class InfoPerdidasPlanesScreen:
     """Pantalla de gestión de planes de pérdidas"""
@@ -29,6 +31,7 @@ class InfoPerdidasPlanesScreen:
         self.año_field = None
         self.mes_dropdown = None
         self.data_table = None
+        self.paged_table = None
         self.edit_dialog = None
         
         # Cargar municipios
@@ -38,7 +41,7 @@ class InfoPerdidasPlanesScreen:
         """Carga la lista de municipios"""
         try:
             self.municipios = self.perdidas_service.get_municipios_activos()
-            self.logger.info(f"Municipios cargados: {len(self.municipios)}")
+            self.logger.info("Municipios cargados: %s", len(self.municipios))
         except Exception as e:
             self.logger.error(f"Error cargando municipios: {e}")
             self.municipios = []
@@ -182,7 +185,9 @@ class InfoPerdidasPlanesScreen:
     
     def _build_data_table(self) -> ft.Control:
         """Construye la tabla de datos"""
-        self.data_table = ft.DataTable(
+        # Un año completo son 12 × 15 planes: solo se construye la página visible
+        self.paged_table = PagedDataTable(
+            self.page,
             columns=[
                 ft.DataColumn(ft.Text("Municipio")),
                 ft.DataColumn(ft.Text("Año")),
@@ -193,14 +198,16 @@ class InfoPerdidasPlanesScreen:
                 ft.DataColumn(ft.Text("Fecha Modificación")),
                 ft.DataColumn(ft.Text("Acciones"))
             ],
-            rows=[]
+            row_builder=self._build_data_row,
+            empty_message="Sin planes para los filtros seleccionados"
         )
+        self.data_table = self.paged_table.data_table
         
         return ft.Container(
             content=ft.Column([
                 ft.Text("Planes de Pérdidas", size=18, weight=ft.FontWeight.BOLD),
                 ft.Container(
-                    content=self.data_table,
+                    content=self.paged_table.build(),
                     border=ft.border.all(1, ft.Colors.GREY_300),
                     border_radius=5,
                     padding=10
@@ -281,54 +288,51 @@ class InfoPerdidasPlanesScreen:
             self._show_error("Error al cargar los planes de pérdidas")
 
     def _update_data_table(self):
-        """Actualiza la tabla de datos"""
-        self.data_table.rows.clear()
-        
-        for plan in self.planes_data:
-            # Determinar nombre del municipio
-            municipio_nombre = plan.municipio_nombre if plan.municipio_nombre else "PROVINCIAL"
-            
-            # Formatear fecha
-            fecha_mod = ""
-            if plan.fecha_modificacion:
-                try:
-                    if isinstance(plan.fecha_modificacion, str):
-                        fecha_mod = plan.fecha_modificacion[:16]  # YYYY-MM-DD HH:MM
-                    else:
-                        fecha_mod = plan.fecha_modificacion.strftime("%Y-%m-%d %H:%M")
-                except:
-                    fecha_mod = str(plan.fecha_modificacion)[:16]
-            
-            self.data_table.rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(municipio_nombre, weight=ft.FontWeight.BOLD if not plan.municipio_id else None)),
-                        ft.DataCell(ft.Text(str(plan.año))),
-                        ft.DataCell(ft.Text(self._get_month_name(plan.mes))),
-                        ft.DataCell(ft.Text(f"{plan.plan_perdidas_pct:.2f}%", 
-                                          color=ft.Colors.BLUE, weight=ft.FontWeight.BOLD)),
-                        ft.DataCell(ft.Text(plan.observaciones or "", max_lines=2)),
-                        ft.DataCell(ft.Text(plan.usuario_nombre or "")),
-                        ft.DataCell(ft.Text(fecha_mod)),
-                        ft.DataCell(
-                            ft.Row([
-                                ft.IconButton(
-                                    icon=ft.Icons.EDIT,
-                                    tooltip="Editar",
-                                    on_click=lambda e, p=plan: self._edit_plan(p)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.DELETE,
-                                    tooltip="Eliminar",
-                                    on_click=lambda e, p=plan: self._delete_plan(p)
-                                )
-                            ], spacing=5)
+        """Actualiza la tabla de datos mostrando la primera página"""
+        self.paged_table.set_items(self.planes_data)
+    
+    def _build_data_row(self, plan: PlanPerdidasModel) -> ft.DataRow:
+        """Construye la fila de un plan"""
+        # Determinar nombre del municipio
+        municipio_nombre = plan.municipio_nombre if plan.municipio_nombre else "PROVINCIAL"
+        
+        # Formatear fecha
+        fecha_mod = ""
+        if plan.fecha_modificacion:
+            try:
+                if isinstance(plan.fecha_modificacion, str):
+                    fecha_mod = plan.fecha_modificacion[:16]  # YYYY-MM-DD HH:MM
+                else:
+                    fecha_mod = plan.fecha_modificacion.strftime("%Y-%m-%d %H:%M")
+            except:
+                fecha_mod = str(plan.fecha_modificacion)[:16]
+        
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(municipio_nombre, weight=ft.FontWeight.BOLD if not plan.municipio_id else None)),
+                ft.DataCell(ft.Text(str(plan.año))),
+                ft.DataCell(ft.Text(self._get_month_name(plan.mes))),
+                ft.DataCell(ft.Text(f"{plan.plan_perdidas_pct:.2f}%", 
+                                  color=ft.Colors.BLUE, weight=ft.FontWeight.BOLD)),
+                ft.DataCell(ft.Text(plan.observaciones or "", max_lines=2)),
+                ft.DataCell(ft.Text(plan.usuario_nombre or "")),
+                ft.DataCell(ft.Text(fecha_mod)),
+                ft.DataCell(
+                    ft.Row([
+                        ft.IconButton(
+                            icon=ft.Icons.EDIT,
+                            tooltip="Editar",
+                            on_click=lambda e, p=plan: self._edit_plan(p)
+                        ),
+                        ft.IconButton(
+                            icon=ft.Icons.DELETE,
+                            tooltip="Eliminar",
+                            on_click=lambda e, p=plan: self._delete_plan(p)
                         )
-                    ]
+                    ], spacing=5)
                 )
-            )
-        
-        self.page.update()
+            ]
+        )
     
     def _get_month_name(self, mes: int) -> str:
         """Obtiene el nombre del mes"""
@@ -692,7 +696,7 @@ class InfoPerdidasPlanesScreen:
         # Crear file picker
         file_picker = ft.FilePicker(on_result=on_file_selected)
         self.page.overlay.append(file_picker)
-        self.page.update()
+        flush_now(self.page)
         
         # Abrir diálogo de selección de archivo
         file_picker.pick_files(
@@ -853,7 +857,7 @@ class InfoPerdidasPlanesScreen:
         # Crear file picker
         file_picker = ft.FilePicker(on_result=on_file_selected)
         self.page.overlay.append(file_picker)
-        self.page.update()
+        flush_now(self.page)
         
         # Abrir diálogo de selección de archivo
         file_picker.pick_files(
@@ -1279,7 +1283,7 @@ class InfoPerdidasPlanesScreen:
         
         self.page.overlay.append(progress_dialog)
         progress_dialog.open = True
-        self.page.update()
+        flush_now(self.page)
         
         return progress_dialog
     
@@ -1335,31 +1339,19 @@ class InfoPerdidasPlanesScreen:
                 self._show_warning("No hay planes para exportar")
                 return
             
-            import pandas as pd
-            from pathlib import Path
-            # Preparar datos para exportación
-            export_data = []
-            for plan in self.planes_data:
-                export_data.append({
-                    'municipio': plan.municipio_nombre if plan.municipio_nombre else 'PROVINCIAL',
-                    'año': plan.año,
-                    'mes': plan.mes,
-                    'mes_nombre': self._get_month_name(plan.mes),
-                    'plan_perdidas_pct': plan.plan_perdidas_pct,
-                    'observaciones': plan.observaciones or '',
-                    'usuario': plan.usuario_nombre or '',
-                    'fecha_modificacion': plan.fecha_modificacion
-                })
+            from core.export import default_export_path, export_rows
             
-            # Crear DataFrame
-            df = pd.DataFrame(export_data)
-            
-            # Guardar archivo
-            downloads_path = Path.home() / "Downloads"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_path = downloads_path / f"planes_perdidas_{timestamp}.xlsx"
+            headers = ['municipio', 'año', 'mes', 'mes_nombre', 'plan_perdidas_pct', 'observaciones',
+                       'usuario', 'fecha_modificacion']
+            rows = (
+                (plan.municipio_nombre if plan.municipio_nombre else 'PROVINCIAL', plan.año, plan.mes,
+                 self._get_month_name(plan.mes), plan.plan_perdidas_pct, plan.observaciones or '',
+                 plan.usuario_nombre or '', plan.fecha_modificacion)
+                for plan in self.planes_data
+            )
             
-            df.to_excel(file_path, index=False, sheet_name="Planes de Pérdidas")
+            file_path = default_export_path("planes_perdidas")
+            export_rows(file_path, headers, rows, sheet_name="Planes de Pérdidas")
             
             self._show_success(f"Planes exportados a: {file_path}")
             
@@ -7,6 +7,9 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from core.database import get_db_manager
 from core.logger import get_logger
+from core.query_cache import cached_query
+from core.query_stats import query_action
+from core.records import row_mapper
 from ..models.perdidas_model import PlanPerdidasModel, PerdidasCalculoModel, PerdidasResumenModel
 
 class PerdidasService:
@@ -243,6 +246,11 @@ class PerdidasService:
 
     def calcular_perdidas_provincia(self, año: int, mes: int) -> Optional[PerdidasResumenModel]:
         """Calcula pérdidas para toda la provincia"""
+        with query_action(f"calcular_perdidas_provincia:{año}-{mes:02d}"):
+            return self._calcular_perdidas_provincia(año, mes)
+
+    def _calcular_perdidas_provincia(self, año: int, mes: int) -> Optional[PerdidasResumenModel]:
+        """Implementación del cálculo provincial (consultas por municipio)"""
         try:
             # Obtener todos los municipios activos
             municipios_query = "SELECT id FROM municipios WHERE activo = 1"
@@ -294,6 +302,116 @@ class PerdidasService:
             self.logger.error(f"Error calculando pérdidas provincia: {e}")
             return None
 
+    def calcular_perdidas_anuales(self, año: int) -> List[PerdidasResumenModel]:
+        """Calcula los resúmenes provinciales de todos los meses del año en una pasada
+
+        Lee energía, facturación y planes del año con una consulta por tabla y
+        arrastra los acumulados de un mes al siguiente, en lugar de repetir el
+        cálculo provincial (y la agregación desde enero) para cada mes.
+        Solo se devuelven los meses con energía o facturación registrada.
+        """
+        with query_action(f"calcular_perdidas_anuales:{año}"):
+            return self._calcular_perdidas_anuales(año)
+
+    def _calcular_perdidas_anuales(self, año: int) -> List[PerdidasResumenModel]:
+        try:
+            municipios = self.db_manager.execute_query("SELECT * FROM municipios WHERE activo = 1")
+            if not municipios:
+                return []
+
+            energia: Dict[tuple, float] = {}
+            for row in self.db_manager.execute_query(
+                    "SELECT municipio_id, mes, energia_mwh FROM energia_barra WHERE año = ?", (año,)):
+                energia[(row['municipio_id'], row['mes'])] = row['energia_mwh'] or 0.0
+
+            facturacion: Dict[tuple, tuple] = {}
+            for row in self.db_manager.execute_query(
+                    "SELECT municipio_id, mes, facturacion_mayor, facturacion_menor FROM facturacion WHERE año = ?",
+                    (año,)):
+                # Convertir de kW a MW dividiendo por 1000
+                facturacion[(row['municipio_id'], row['mes'])] = (
+                    (row['facturacion_mayor'] or 0.0) / 1000.0,
+                    (row['facturacion_menor'] or 0.0) / 1000.0
+                )
+
+            # Los planes sin valor (NULL) se conservan como None: no cuentan en el promedio
+            planes: Dict[tuple, Optional[float]] = {}
+            for row in self.db_manager.execute_query(
+                    "SELECT municipio_id, mes, plan_perdidas_pct FROM planes_perdidas WHERE año = ?", (año,)):
+                planes[(row['municipio_id'], row['mes'])] = row['plan_perdidas_pct']
+
+            meses = sorted({mes for _, mes in energia} | {mes for _, mes in facturacion})
+            ids = [None] + [m['id'] for m in municipios]
+
+            # Acumulados por municipio: energía, ventas y (suma, cantidad) de planes, como AVG en SQL
+            energia_acumulada = dict.fromkeys(ids, 0.0)
+            ventas_acumuladas = dict.fromkeys(ids, 0.0)
+            planes_acumulados = {municipio_id: [0.0, 0] for municipio_id in ids}
+
+            resumenes = []
+            for mes in range(1, (meses[-1] if meses else 0) + 1):
+                for municipio_id in ids:
+                    energia_acumulada[municipio_id] += energia.get((municipio_id, mes), 0.0)
+                    ventas_acumuladas[municipio_id] += sum(facturacion.get((municipio_id, mes), (0.0, 0.0)))
+                    plan = planes.get((municipio_id, mes))
+                    if plan is not None:
+                        planes_acumulados[municipio_id][0] += plan
+                        planes_acumulados[municipio_id][1] += 1
+                if mes in meses:
+                    resumenes.append(self._resumen_mes(año, mes, municipios, energia, facturacion, planes,
+                                                       energia_acumulada, ventas_acumuladas, planes_acumulados))
+            return resumenes
+
+        except Exception as e:
+            self.logger.error(f"Error calculando pérdidas anuales: {e}")
+            return []
+
+    def _resumen_mes(self, año: int, mes: int, municipios: List[Dict[str, Any]], energia: Dict[tuple, float],
+                     facturacion: Dict[tuple, tuple], planes: Dict[tuple, Optional[float]],
+                     energia_acumulada: Dict, ventas_acumuladas: Dict, planes_acumulados: Dict) -> PerdidasResumenModel:
+        """Arma el resumen provincial de un mes con los acumulados ya calculados"""
+        def plan_acumulado(municipio_id):
+            total, cantidad = planes_acumulados[municipio_id]
+            return total / cantidad if cantidad else 0.0
+
+        resumen = PerdidasResumenModel(año=año, mes=mes)
+        for municipio in municipios:
+            municipio_id = municipio['id']
+            fac_mayor, fac_menor = facturacion.get((municipio_id, mes), (0.0, 0.0))
+            calculo = PerdidasCalculoModel(
+                municipio_id=municipio_id,
+                municipio_nombre=municipio['nombre'],
+                año=año,
+                mes=mes,
+                energia_barra_mwh=energia.get((municipio_id, mes), 0.0),
+                facturacion_mayor=fac_mayor,
+                facturacion_menor=fac_menor,
+                plan_perdidas_pct=planes.get((municipio_id, mes)) or 0.0,
+                energia_barra_acumulada=energia_acumulada[municipio_id],
+                perdidas_acumuladas_mwh=energia_acumulada[municipio_id] - ventas_acumuladas[municipio_id],
+                plan_perdidas_acumulado_pct=plan_acumulado(municipio_id)
+            )
+            calculo.calcular_totales()
+            resumen.municipios.append(calculo)
+
+            resumen.total_energia_barra += calculo.energia_barra_mwh
+            resumen.total_facturacion_mayor += calculo.facturacion_mayor
+            resumen.total_facturacion_menor += calculo.facturacion_menor
+            resumen.total_energia_acumulada += calculo.energia_barra_acumulada
+            resumen.total_perdidas_acumuladas_mwh += calculo.perdidas_acumuladas_mwh
+
+        resumen.total_ventas = resumen.total_facturacion_mayor + resumen.total_facturacion_menor
+        resumen.total_perdidas_mwh = resumen.total_energia_barra - resumen.total_ventas
+        if resumen.total_energia_barra > 0:
+            resumen.total_perdidas_pct = (resumen.total_perdidas_mwh / resumen.total_energia_barra) * 100
+        if resumen.total_energia_acumulada > 0:
+            resumen.total_perdidas_acumuladas_pct = (resumen.total_perdidas_acumuladas_mwh / resumen.total_energia_acumulada) * 100
+
+        # El plan provincial se guarda con municipio_id NULL
+        resumen.total_plan_perdidas_pct = planes.get((None, mes)) or 0.0
+        resumen.total_plan_acumulado_pct = plan_acumulado(None)
+        return resumen
+
     # === MÉTODOS AUXILIARES ===
     
     def _calcular_energia_acumulada(self, municipio_id: int, año: int, mes_hasta: int) -> float:
@@ -354,22 +472,10 @@ class PerdidasService:
             self.logger.error(f"Error calculando plan acumulado: {e}")
             return 0.0
     
-    def _row_to_plan_model(self, row: Dict[str, Any]) -> PlanPerdidasModel:
-        """Convierte una fila de BD a modelo de plan de pérdidas"""
-        return PlanPerdidasModel(
-            id=row.get('id'),
-            municipio_id=row.get('municipio_id'),
-            año=row.get('año'),
-            mes=row.get('mes'),
-            plan_perdidas_pct=row.get('plan_perdidas_pct', 0.0),
-            observaciones=row.get('observaciones'),
-            usuario_id=row.get('usuario_id'),
-            fecha_creacion=row.get('fecha_creacion'),
-            fecha_modificacion=row.get('fecha_modificacion'),
-            municipio_nombre=row.get('municipio_nombre'),
-            usuario_nombre=row.get('usuario_nombre')
-        )
+    # Convierte una fila de BD a modelo de plan de pérdidas
+    _row_to_plan_model = staticmethod(row_mapper(PlanPerdidasModel))
     
+    @cached_query(tables=["municipios"], maxsize=1)
     def get_municipios_activos(self) -> List[Dict[str, Any]]:
         """Obtiene todos los municipios activos"""
         try:
@@ -379,6 +485,7 @@ class PerdidasService:
             self.logger.error(f"Error obteniendo municipios: {e}")
             return []
     
+    @cached_query(tables=["energia_barra", "facturacion", "planes_perdidas"])
     def verificar_datos_disponibles(self, año: int, mes: int) -> Dict[str, Any]:
         """Verifica qué datos están disponibles para el cálculo"""
         try:
@@ -599,7 +706,7 @@ class PerdidasService:
                 if self.save_calculo_perdidas(municipio_calculo, usuario_id):
                     saved_count += 1
             
-            self.logger.info(f"Guardados {saved_count} cálculos de municipios para {mes:02d}/{año}")
+            self.logger.info("Guardados %s cálculos de municipios para %02d/%s", saved_count, mes, año)
             
             return resumen
             
@@ -607,6 +714,56 @@ class PerdidasService:
             self.logger.error(f"Error calculando y guardando pérdidas: {e}")
             return None
 
+    # === EXPORTACIÓN ===
+
+    COLUMNAS_EXPORTACION = ['Energía Barra (MWh)', 'Facturación Mayor (MWh)', 'Facturación Menor (MWh)',
+                            'Total Ventas (MWh)', 'Pérdidas (MWh)', 'Pérdidas (%)', 'Plan (%)',
+                            'Energía Acumulada (MWh)', 'Pérdidas Acumuladas (MWh)', 'Pérdidas Acumuladas (%)',
+                            'Plan Acumulado (%)']
+
+    def filas_exportacion(self, resumen: PerdidasResumenModel):
+        """Filas de exportación de un mes: total provincial, separador y municipios"""
+        yield ('TOTAL PROVINCIAL',) + self._valores_resumen(resumen)
+        yield ('',) * (len(self.COLUMNAS_EXPORTACION) + 1)
+        for municipio in resumen.municipios:
+            yield (municipio.municipio_nombre, municipio.energia_barra_mwh, municipio.facturacion_mayor,
+                   municipio.facturacion_menor, municipio.total_ventas, municipio.perdidas_distribucion_mwh,
+                   municipio.perdidas_pct, municipio.plan_perdidas_pct, municipio.energia_barra_acumulada,
+                   municipio.perdidas_acumuladas_mwh, municipio.perdidas_acumuladas_pct,
+                   municipio.plan_perdidas_acumulado_pct)
+
+    def exportar_libro_anual(self, año: int, file_path: str) -> bool:
+        """Exporta el libro anual: resumen provincial por mes y una hoja por mes
+
+        Todos los meses salen de una sola pasada de ``calcular_perdidas_anuales``.
+        """
+        try:
+            from core.export import ExportSheet, export_sheets
+
+            resumenes = self.calcular_perdidas_anuales(año)
+            if not resumenes:
+                self.logger.warning(f"No hay datos de pérdidas para exportar en {año}")
+                return False
+
+            sheets = [ExportSheet(f"Resumen Provincial {año}", ['Mes'] + self.COLUMNAS_EXPORTACION,
+                                  ((f"{r.mes:02d}/{año}",) + self._valores_resumen(r) for r in resumenes))]
+            sheets += [ExportSheet(f"Pérdidas {r.mes:02d}-{año}", ['Municipio'] + self.COLUMNAS_EXPORTACION,
+                                   self.filas_exportacion(r)) for r in resumenes]
+
+            export_sheets(file_path, sheets)
+            self.logger.info("Libro anual de pérdidas %s exportado: %s meses", año, len(resumenes))
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error exportando libro anual: {e}")
+            return False
+
+    @staticmethod
+    def _valores_resumen(r: PerdidasResumenModel) -> tuple:
+        return (r.total_energia_barra, r.total_facturacion_mayor, r.total_facturacion_menor, r.total_ventas,
+                r.total_perdidas_mwh, r.total_perdidas_pct, r.total_plan_perdidas_pct, r.total_energia_acumulada,
+                r.total_perdidas_acumuladas_mwh, r.total_perdidas_acumuladas_pct, r.total_plan_acumulado_pct)
+
 # Instancia global del servicio
 _perdidas_service = None
 
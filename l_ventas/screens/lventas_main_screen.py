@@ -6,6 +6,7 @@ Visualización de datos para usuarios invitados - VERSIÓN CON PESTAÑAS
 import flet as ft
 import sys
 from typing import List, Dict, Any, Optional
+from core.change_events import ChangeEvent
 from core.logger import get_logger
 from datetime import datetime
 
@@ -19,6 +20,9 @@ from .tabs.config import get_theme, get_tab_config, get_message
 class LVentasMainScreen:
     """Pantalla principal de LVentas - Visualización de datos con pestañas"""
 
+    # Escrituras de otras sesiones que cambian los datos de las pestañas
+    change_tables = ("energia_barra", "facturacion", "planes_perdidas", "calculos_perdidas", "municipios")
+
     def __init__(self, app=None):
         self.app = app
         self.page = app.page if app else None
@@ -78,7 +82,7 @@ class LVentasMainScreen:
                 }
             ]
             
-            self.logger.info(f"Inicializadas {len(self.tabs)} pestañas")
+            self.logger.info("Inicializadas %s pestañas", len(self.tabs))
             
         except Exception as e:
             self.logger.error(f"Error inicializando pestañas: {e}")
@@ -263,12 +267,13 @@ class LVentasMainScreen:
                 # Construir el contenido de la pestaña
                 content = tab_instance.build()
                 
-                return ft.Container(
+                self.tab_container = ft.Container(
                     content=content,
                     expand=True,
                     padding=0
                     
                 )
+                return self.tab_container
             else:
                 return self._build_no_tab_view()
                 
@@ -368,7 +373,7 @@ class LVentasMainScreen:
         """Maneja el clic en una pestaña"""
         try:
             if 0 <= tab_index < len(self.tabs):
-                self.logger.info(f"Cambiando a pestaña {tab_index}: {self.tabs[tab_index]['key']}")
+                self.logger.info("Cambiando a pestaña %s: %s", tab_index, self.tabs[tab_index]['key'])
                 
                 # Cambiar pestaña activa
                 old_tab = self.selected_tab
@@ -447,6 +452,23 @@ class LVentasMainScreen:
             self.logger.error(f"Error refrescando página: {e}")
             self.show_error_message(f"Error al recargar: {e}")
 
+    def on_data_changed(self, events: List[ChangeEvent]):
+        """Reconstruye solo el contenido de la pestaña activa si otra sesión cambió su período"""
+        try:
+            if not (0 <= self.selected_tab < len(self.tabs)) or self.tab_container is None:
+                return
+            tab_instance = self.tabs[self.selected_tab]['instance']
+            if not tab_instance.affected_by(events):
+                return
+            
+            # Las demás pestañas se construyen de nuevo al activarse
+            self.tab_container.content = tab_instance.build()
+            self.tab_container.update()
+            self.logger.info("Pestaña %s actualizada por cambios de otra sesión", self.tabs[self.selected_tab]['key'])
+            
+        except Exception as e:
+            self.logger.error(f"Error aplicando cambios de otra sesión: {e}")
+
     # Métodos de utilidad para mostrar mensajes
     def show_loading_message(self, message: str):
         """Muestra mensaje de carga"""
@@ -552,7 +574,7 @@ class LVentasMainScreen:
         try:
             self.current_year = year
             self.current_month = month
-            self.logger.info(f"Período actualizado a: {month}/{year}")
+            self.logger.info("Período actualizado a: %s/%s", month, year)
             
             # Actualiza el contenido de la pantalla con el mes seleccionado
             self.page.clean()
@@ -687,7 +709,7 @@ class LVentasMainScreen:
         """Registra una acción del usuario"""
         try:
             user_info = self.get_user_info()
-            self.logger.info(f"Acción de usuario: {user_info.get('name', 'Desconocido')} - {action} - {details}")
+            self.logger.info("Acción de usuario: %s - %s - %s", user_info.get('name', 'Desconocido'), action, details)
         except Exception as e:
             self.logger.error(f"Error registrando acción de usuario: {e}")
 
@@ -316,36 +316,12 @@ class AccumulatedTab(BaseTab):
     
     def _get_accumulated_data(self) -> list:
         """Obtiene datos acumulados de la base de datos"""
-        query = """
-        SELECT 
-            m.nombre as municipio,
-            COALESCE(SUM(eb.energia_mwh), 0) as energia_barra_acum_mw,
-            COALESCE(SUM(f.facturacion_total), 0) / 1000.0 as plan_ventas,
-            COALESCE(AVG(pp.plan_perdidas_pct), 0) as plan_perdidas_acum,
-            COALESCE(SUM(f.facturacion_total), 0) / 1000.0 as total_ventas_acum_mw,
-            COALESCE(AVG(cp.perdidas_pct), 0) as pct_real_ventas_acum,
-            COALESCE(SUM(eb.energia_mwh) - SUM(f.facturacion_total) / 1000.0, 0) as ahorro_energia
-        FROM municipios m
-        LEFT JOIN energia_barra eb ON m.id = eb.municipio_id 
-            AND eb.año = ? AND eb.mes BETWEEN 1 AND ?
-        LEFT JOIN facturacion f ON m.id = f.municipio_id 
-            AND f.año = ? AND f.mes BETWEEN 1 AND ?
-        LEFT JOIN planes_perdidas pp ON m.id = pp.municipio_id 
-            AND pp.año = ? AND pp.mes BETWEEN 1 AND ?
-        LEFT JOIN calculos_perdidas cp ON m.id = cp.municipio_id 
-            AND cp.año = ? AND cp.mes BETWEEN 1 AND ?
-        WHERE m.activo = 1
-        GROUP BY m.id, m.nombre
-        ORDER BY m.nombre
-        """
-        
-        params = (self.selected_year, self.selected_month) * 4
-        return self.get_data_from_db(query, params)
+        return self.get_accumulated_data()
     
     def _refresh_summary(self, e=None):
         """Refresca el resumen"""
         try:
-            self.logger.info(f"Refrescando resumen para período {self.selected_month}/{self.selected_year}")
+            self.logger.info("Refrescando resumen para período %s/%s", self.selected_month, self.selected_year)
             
             # Validar que los dropdowns estén correctamente inicializados
             if not self.validate_dropdowns():
@@ -367,14 +343,24 @@ class AccumulatedTab(BaseTab):
     def _export_to_excel(self, e):
         """Exporta datos acumulados a Excel"""
         try:
+            from core.export import default_export_path, export_rows
+            
             self.logger.info("Exportando datos acumulados a Excel")
             self.main_screen.show_loading_message("Exportando datos acumulados...")
             
-            # Aquí implementarías la lógica de exportación
-            import time
-            time.sleep(1)  # Simular proceso
+            headers = ["Municipio", "Energía Barra (MW)", "Plan Ventas (MW)", "Plan Pérdidas (%)",
+                       "Ventas Reales (MW)", "Pérdidas Reales (%)", "Ahorro (MW)"]
+            rows = (
+                (dato.get('municipio'), dato.get('energia_barra_acum_mw', 0), dato.get('plan_ventas', 0),
+                 dato.get('plan_perdidas_acum', 0), dato.get('total_ventas_acum_mw', 0),
+                 dato.get('pct_real_ventas_acum', 0), dato.get('ahorro_energia', 0))
+                for dato in self._get_accumulated_data()
+            )
+            
+            file_path = default_export_path(f"lventas_acumulado_{self.selected_month:02d}_{self.selected_year}")
+            export_rows(file_path, headers, rows, sheet_name=f"Acumulado {self.selected_month:02d}-{self.selected_year}")
             
-            self.main_screen.show_success_message("Datos acumulados exportados correctamente")
+            self.main_screen.show_success_message(f"Datos acumulados exportados a: {file_path}")
         except Exception as e:
             self.logger.error(f"Error exportando datos acumulados: {e}")
             self.main_screen.show_error_message("Error al exportar datos")
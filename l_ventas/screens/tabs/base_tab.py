@@ -6,6 +6,57 @@ import flet as ft
 from datetime import datetime
 from core.logger import get_logger
 
+# Datos del mes por municipio: cada tabla aporta una fila por municipio y mes
+MONTHLY_QUERY = """
+SELECT 
+    m.nombre as municipio,
+    COALESCE(eb.energia_mwh, 0) as energia_barra_mw,
+    COALESCE(f.facturacion_total, 0) / 1000.0 as total_facturacion_mw,
+    COALESCE(pp.plan_perdidas_pct, 0) as plan_mes,
+    COALESCE(cp.perdidas_pct, 0) as real_mes
+FROM municipios m
+LEFT JOIN energia_barra eb ON m.id = eb.municipio_id 
+    AND eb.año = ? AND eb.mes = ?
+LEFT JOIN facturacion f ON m.id = f.municipio_id 
+    AND f.año = ? AND f.mes = ?
+LEFT JOIN planes_perdidas pp ON m.id = pp.municipio_id 
+    AND pp.año = ? AND pp.mes = ?
+LEFT JOIN calculos_perdidas cp ON m.id = cp.municipio_id 
+    AND cp.año = ? AND cp.mes = ?
+WHERE m.activo = 1
+ORDER BY m.nombre
+"""
+
+# Acumulado enero..mes: cada tabla se agrega por municipio ANTES del JOIN.
+# Unir los cuatro rangos de meses directamente multiplicaría las filas
+# (hasta 12⁴ por municipio) y falsearía las sumas.
+ACCUMULATED_QUERY = """
+SELECT 
+    m.nombre as municipio,
+    COALESCE(eb.energia_mwh, 0) as energia_barra_acum_mw,
+    COALESCE(f.facturacion_total, 0) / 1000.0 as plan_ventas,
+    COALESCE(pp.plan_perdidas_pct, 0) as plan_perdidas_acum,
+    COALESCE(f.facturacion_total, 0) / 1000.0 as total_ventas_acum_mw,
+    COALESCE(cp.perdidas_pct, 0) as pct_real_ventas_acum,
+    COALESCE(eb.energia_mwh - f.facturacion_total / 1000.0, 0) as ahorro_energia
+FROM municipios m
+LEFT JOIN (SELECT municipio_id, SUM(energia_mwh) as energia_mwh FROM energia_barra
+           WHERE año = ? AND mes BETWEEN 1 AND ? GROUP BY municipio_id) eb
+    ON m.id = eb.municipio_id
+LEFT JOIN (SELECT municipio_id, SUM(facturacion_total) as facturacion_total FROM facturacion
+           WHERE año = ? AND mes BETWEEN 1 AND ? GROUP BY municipio_id) f
+    ON m.id = f.municipio_id
+LEFT JOIN (SELECT municipio_id, AVG(plan_perdidas_pct) as plan_perdidas_pct FROM planes_perdidas
+           WHERE año = ? AND mes BETWEEN 1 AND ? GROUP BY municipio_id) pp
+    ON m.id = pp.municipio_id
+LEFT JOIN (SELECT municipio_id, AVG(perdidas_pct) as perdidas_pct FROM calculos_perdidas
+           WHERE año = ? AND mes BETWEEN 1 AND ? GROUP BY municipio_id) cp
+    ON m.id = cp.municipio_id
+WHERE m.activo = 1
+ORDER BY m.nombre
+"""
+
+
 class BaseTab:
     """Clase base para todas las pestañas"""
     
@@ -130,7 +181,7 @@ class BaseTab:
                 border=ft.border.all(1, self.theme['border'])
             )
             
-            self.logger.info(f"Selector de período creado para {self.__class__.__name__}")
+            self.logger.info("Selector de período creado para %s", self.__class__.__name__)
             return self.period_container
             
         except Exception as e:
@@ -149,7 +200,7 @@ class BaseTab:
             old_month = self.selected_month
             new_month = int(e.control.value)
             
-            self.logger.info(f"Mes cambiado de {old_month} a {new_month}")
+            self.logger.info("Mes cambiado de %s a %s", old_month, new_month)
             
             self.selected_month = new_month
             
@@ -170,7 +221,7 @@ class BaseTab:
             old_year = self.selected_year
             new_year = int(e.control.value)
             
-            self.logger.info(f"Año cambiado de {old_year} a {new_year}")
+            self.logger.info("Año cambiado de %s a %s", old_year, new_year)
             
             self.selected_year = new_year
             
@@ -185,7 +236,7 @@ class BaseTab:
     def _auto_refresh_data(self):
         """Actualiza datos automáticamente al cambiar período"""
         try:
-            self.logger.info(f"Auto-actualizando datos para período {self.selected_month}/{self.selected_year}")
+            self.logger.info("Auto-actualizando datos para período %s/%s", self.selected_month, self.selected_year)
             
             # Mostrar mensaje de carga
             if hasattr(self.main_screen, 'show_loading_message'):
@@ -206,7 +257,7 @@ class BaseTab:
     def _on_refresh_data(self, e=None):
         """Maneja la actualización manual de datos"""
         try:
-            self.logger.info(f"Actualización manual solicitada para período {self.selected_month}/{self.selected_year}")
+            self.logger.info("Actualización manual solicitada para período %s/%s", self.selected_month, self.selected_year)
             
             if hasattr(self.main_screen, 'show_loading_message'):
                 self.main_screen.show_loading_message("Actualizando datos...")
@@ -242,13 +293,13 @@ class BaseTab:
             
             if self.month_dropdown is not None:
                 self.month_dropdown.value = str(self.selected_month)
-                self.logger.debug(f"Month dropdown actualizado a: {self.selected_month}")
+                self.logger.debug("Month dropdown actualizado a: %s", self.selected_month)
             else:
                 self.logger.warning("month_dropdown es None, no se puede actualizar")
             
             if self.year_dropdown is not None:
                 self.year_dropdown.value = str(self.selected_year)
-                self.logger.debug(f"Year dropdown actualizado a: {self.selected_year}")
+                self.logger.debug("Year dropdown actualizado a: %s", self.selected_year)
             else:
                 self.logger.warning("year_dropdown es None, no se puede actualizar")
             
@@ -271,7 +322,7 @@ class BaseTab:
             if update_display:
                 self.update_period_display()
                 
-            self.logger.info(f"Período establecido a {month}/{year}")
+            self.logger.info("Período establecido a %s/%s", month, year)
             
         except Exception as ex:
             self.logger.error(f"Error estableciendo período: {ex}")
@@ -298,10 +349,22 @@ class BaseTab:
             self.logger.error(f"Error obteniendo datos: {e}")
             return []
     
+    def get_monthly_data(self) -> list:
+        """Datos por municipio del mes seleccionado"""
+        return self.get_data_from_db(MONTHLY_QUERY, (self.selected_year, self.selected_month) * 4)
+    
+    def get_accumulated_data(self) -> list:
+        """Datos por municipio acumulados de enero al mes seleccionado"""
+        return self.get_data_from_db(ACCUMULATED_QUERY, (self.selected_year, self.selected_month) * 4)
+    
+    def affected_by(self, events: list) -> bool:
+        """Indica si algún ``ChangeEvent`` cambia los datos del período (acumulado hasta el mes)"""
+        return any(event.affects(self.selected_year, self.selected_month, hasta_mes=True) for event in events)
+    
     def on_tab_activated(self):
         """Llamado cuando la pestaña se activa"""
         try:
-            self.logger.info(f"Pestaña {self.__class__.__name__} activada")
+            self.logger.info("Pestaña %s activada", self.__class__.__name__)
             # Actualizar la visualización del período
             self.update_period_display()
         except Exception as ex:
@@ -310,14 +373,14 @@ class BaseTab:
     def on_tab_deactivated(self):
         """Llamado cuando la pestaña se desactiva"""
         try:
-            self.logger.info(f"Pestaña {self.__class__.__name__} desactivada")
+            self.logger.info("Pestaña %s desactivada", self.__class__.__name__)
         except Exception as ex:
             self.logger.error(f"Error en desactivación de pestaña: {ex}")
     
     def refresh(self):
         """Método para refrescar la pestaña"""
         try:
-            self.logger.info(f"Refrescando pestaña {self.__class__.__name__}")
+            self.logger.info("Refrescando pestaña %s", self.__class__.__name__)
             self._refresh_current_tab_only()
         except Exception as ex:
             self.logger.error(f"Error en refresh: {ex}")
@@ -329,7 +392,7 @@ class BaseTab:
             self.year_dropdown = None
             self.period_callback = None
             self.period_container = None
-            self.logger.info(f"Recursos de {self.__class__.__name__} limpiados")
+            self.logger.info("Recursos de %s limpiados", self.__class__.__name__)
         except Exception as ex:
             self.logger.error(f"Error en cleanup: {ex}")
     
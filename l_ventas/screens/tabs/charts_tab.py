@@ -523,6 +523,11 @@ class ChartsTab(BaseTab):
             self.logger.error(f"Error obteniendo datos del gráfico: {e}")
             return []
     
+    def affected_by(self, events: list) -> bool:
+        """Con datos mensuales solo afectan los cambios del mes seleccionado"""
+        acumulado = self.selected_data_source != "mensual"
+        return any(event.affects(self.selected_year, self.selected_month, hasta_mes=acumulado) for event in events)
+    
     def _get_chart_value(self, item: Dict[str, Any]) -> float:
         """Obtiene el valor a graficar según la métrica seleccionada"""
         try:
@@ -651,7 +656,7 @@ class ChartsTab(BaseTab):
         """Maneja el cambio de tipo de gráfico"""
         try:
             self.selected_chart_type = e.control.value
-            self.logger.info(f"Tipo de gráfico cambiado a: {self.selected_chart_type}")
+            self.logger.info("Tipo de gráfico cambiado a: %s", self.selected_chart_type)
             self._refresh_chart()
         except Exception as ex:
             self.logger.error(f"Error cambiando tipo de gráfico: {ex}")
@@ -660,7 +665,7 @@ class ChartsTab(BaseTab):
         """Maneja el cambio de métrica"""
         try:
             self.selected_metric = e.control.value
-            self.logger.info(f"Métrica cambiada a: {self.selected_metric}")
+            self.logger.info("Métrica cambiada a: %s", self.selected_metric)
             self._refresh_chart()
         except Exception as ex:
             self.logger.error(f"Error cambiando métrica: {ex}")
@@ -669,7 +674,7 @@ class ChartsTab(BaseTab):
         """Maneja el cambio de fuente de datos"""
         try:
             self.selected_data_source = e.control.value
-            self.logger.info(f"Fuente de datos cambiada a: {self.selected_data_source}")
+            self.logger.info("Fuente de datos cambiada a: %s", self.selected_data_source)
             self._refresh_chart()
         except Exception as ex:
             self.logger.error(f"Error cambiando fuente de datos: {ex}")
@@ -687,7 +692,7 @@ class ChartsTab(BaseTab):
     def _refresh_chart(self, e=None):
         """Refresca el gráfico"""
         try:
-            self.logger.info(f"Refrescando gráfico para período {self.selected_month}/{self.selected_year}")
+            self.logger.info("Refrescando gráfico para período %s/%s", self.selected_month, self.selected_year)
             
             # Validar que los dropdowns estén correctamente inicializados
             if not self.validate_dropdowns():
@@ -737,28 +742,4 @@ class ChartsTab(BaseTab):
         except:
             return f"Período {self.selected_month}/{self.selected_year}"
 
-    def get_monthly_data(self) -> List[Dict[str, Any]]:
-        """Obtiene datos mensuales para gráficos"""
-        query = """
-        SELECT 
-            m.nombre as municipio,
-            COALESCE(eb.energia_mwh, 0) as energia_barra_mw,
-            COALESCE(f.facturacion_total, 0) / 1000.0 as total_facturacion_mw,
-            COALESCE(pp.plan_perdidas_pct, 0) as plan_mes,
-            COALESCE(cp.perdidas_pct, 0) as real_mes
-        FROM municipios m
-        LEFT JOIN energia_barra eb ON m.id = eb.municipio_id 
-            AND eb.año = ? AND eb.mes = ?
-        LEFT JOIN facturacion f ON m.id = f.municipio_id 
-            AND f.año = ? AND f.mes = ?
-        LEFT JOIN planes_perdidas pp ON m.id = pp.municipio_id 
-            AND pp.año = ? AND pp.mes = ?
-        LEFT JOIN calculos_perdidas cp ON m.id = cp.municipio_id 
-            AND cp.año = ? AND cp.mes = ?
-        WHERE m.activo = 1
-        ORDER BY m.nombre
-        """
-        params = (self.selected_year, self.selected_month) * 4
-        return self.get_data_from_db(query, params)
-
       
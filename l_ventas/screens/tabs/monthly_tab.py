@@ -277,33 +277,16 @@ class MonthlyTab(BaseTab):
     
     def _get_monthly_data(self) -> list:
         """Obtiene datos mensuales de la base de datos"""
-        query = """
-        SELECT 
-            m.nombre as municipio,
-            COALESCE(eb.energia_mwh, 0) as energia_barra_mw,
-            COALESCE(f.facturacion_total, 0) / 1000.0 as total_facturacion_mw,
-            COALESCE(pp.plan_perdidas_pct, 0) as plan_mes,
-            COALESCE(cp.perdidas_pct, 0) as real_mes
-        FROM municipios m
-        LEFT JOIN energia_barra eb ON m.id = eb.municipio_id 
-            AND eb.año = ? AND eb.mes = ?
-        LEFT JOIN facturacion f ON m.id = f.municipio_id 
-            AND f.año = ? AND f.mes = ?
-        LEFT JOIN planes_perdidas pp ON m.id = pp.municipio_id 
-            AND pp.año = ? AND pp.mes = ?
-        LEFT JOIN calculos_perdidas cp ON m.id = cp.municipio_id 
-            AND cp.año = ? AND cp.mes = ?
-        WHERE m.activo = 1
-        ORDER BY m.nombre
-        """
-        
-        params = (self.selected_year, self.selected_month) * 4
-        return self.get_data_from_db(query, params)
+        return self.get_monthly_data()
+    
+    def affected_by(self, events: list) -> bool:
+        """Solo afectan los cambios del mes seleccionado"""
+        return any(event.affects(self.selected_year, self.selected_month) for event in events)
     
     def _refresh_table(self):
         """Refresca solo esta tabla"""
         try:
-            self.logger.info(f"Refrescando tabla mensual para período {self.selected_month}/{self.selected_year}")
+            self.logger.info("Refrescando tabla mensual para período %s/%s", self.selected_month, self.selected_year)
             
             # Validar que los dropdowns estén correctamente inicializados
             if not self.validate_dropdowns():
@@ -319,14 +302,22 @@ class MonthlyTab(BaseTab):
     def _export_to_excel(self, e):
         """Exporta datos mensuales a Excel"""
         try:
+            from core.export import default_export_path, export_rows
+            
             self.logger.info("Exportando datos mensuales a Excel")
             self.main_screen.show_loading_message("Exportando datos mensuales...")
             
-            # Aquí implementarías la lógica de exportación
-            import time
-            time.sleep(1)  # Simular proceso
+            headers = ["Municipio", "Energía Barra (MW)", "Facturación (MW)", "Plan (%)", "Real (%)"]
+            rows = (
+                (dato.get('municipio'), dato.get('energia_barra_mw', 0), dato.get('total_facturacion_mw', 0),
+                 dato.get('plan_mes', 0), dato.get('real_mes', 0))
+                for dato in self._get_monthly_data()
+            )
+            
+            file_path = default_export_path(f"lventas_mensual_{self.selected_month:02d}_{self.selected_year}")
+            export_rows(file_path, headers, rows, sheet_name=f"Mensual {self.selected_month:02d}-{self.selected_year}")
             
-            self.main_screen.show_success_message("Datos mensuales exportados correctamente")
+            self.main_screen.show_success_message(f"Datos mensuales exportados a: {file_path}")
         except Exception as e:
             self.logger.error(f"Error exportando datos mensuales: {e}")
             self.main_screen.show_error_message("Error al exportar datos")
@@ -510,31 +510,7 @@ class SummaryTab(BaseTab):
     
     def _get_accumulated_summary_data(self):
         """Obtiene datos acumulados para el resumen"""
-        query = """
-        SELECT 
-            m.nombre as municipio,
-            COALESCE(SUM(eb.energia_mwh), 0) as energia_barra_acum_mw,
-            COALESCE(SUM(f.facturacion_total), 0) / 1000.0 as plan_ventas,
-            COALESCE(AVG(pp.plan_perdidas_pct), 0) as plan_perdidas_acum,
-            COALESCE(SUM(f.facturacion_total), 0) / 1000.0 as total_ventas_acum_mw,
-            COALESCE(AVG(cp.perdidas_pct), 0) as pct_real_ventas_acum,
-            COALESCE(SUM(eb.energia_mwh) - SUM(f.facturacion_total) / 1000.0, 0) as ahorro_energia
-        FROM municipios m
-        LEFT JOIN energia_barra eb ON m.id = eb.municipio_id 
-            AND eb.año = ? AND eb.mes BETWEEN 1 AND ?
-        LEFT JOIN facturacion f ON m.id = f.municipio_id 
-            AND f.año = ? AND f.mes BETWEEN 1 AND ?
-        LEFT JOIN planes_perdidas pp ON m.id = pp.municipio_id 
-            AND pp.año = ? AND pp.mes BETWEEN 1 AND ?
-        LEFT JOIN calculos_perdidas cp ON m.id = cp.municipio_id 
-            AND cp.año = ? AND cp.mes BETWEEN 1 AND ?
-        WHERE m.activo = 1
-        GROUP BY m.id, m.nombre
-        ORDER BY m.nombre
-        """
-        
-        params = (self.selected_year, self.selected_month) * 4
-        return self.get_data_from_db(query, params)
+        return self.get_accumulated_data()
     
     def _get_default_summary_data(self):
         """Datos por defecto para el resumen"""
@@ -0,0 +1,3 @@
+"""
+Suite de rendimiento (pytest-benchmark) sobre datos sintéticos
+"""
@@ -0,0 +1,120 @@
+"""
+Baselines JSON de la suite de rendimiento y detección de regresiones
+
+Uso:
+    python -m pytest tests/benchmarks --benchmark-json=resultado.json
+    python -m tests.benchmarks.compare save resultado.json [--name reference]
+    python -m tests.benchmarks.compare check resultado.json [--name reference] [--tolerance 0.20] [--stat median]
+
+``save`` guarda el resultado (sin las muestras individuales) como
+tests/benchmarks/baselines/<name>.json. ``check`` sale con código 1 si algún
+benchmark es más lento que el baseline por encima de la tolerancia
+(fracción, 0.20 = 20 %).
+
+Los tiempos absolutos dependen de la máquina, así que los baselines no se
+versionan (baselines/ está en .gitignore): se generan en la misma máquina o
+runner de CI que el resultado a comparar (p. ej. ejecutando la suite sobre la
+rama base) y solo se compara el cambio relativo.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+
+
+def load_results(path: str, stat: str) -> Dict[str, float]:
+    """Lee un JSON de pytest-benchmark y devuelve {nombre: estadístico}"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {bench["name"]: float(bench["stats"][stat]) for bench in data.get("benchmarks", [])}
+
+
+def save_baseline(result_path: str, name: str) -> Path:
+    """Guarda un resultado como baseline, descartando las muestras individuales"""
+    data = json.loads(Path(result_path).read_text(encoding="utf-8"))
+    for bench in data.get("benchmarks", []):
+        bench.get("stats", {}).pop("data", None)
+    BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+    target = BASELINES_DIR / f"{name}.json"
+    target.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return target
+
+
+def compare(baseline: Dict[str, float], current: Dict[str, float], tolerance: float) -> List[Dict]:
+    """Calcula el cambio relativo de cada benchmark presente en ambos resultados"""
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        before, after = baseline.get(name), current.get(name)
+        if before is None or after is None:
+            rows.append({"name": name, "before": before, "after": after, "change": None,
+                         "status": "nuevo" if before is None else "ausente"})
+            continue
+        change = (after - before) / before if before else 0.0
+        if change > tolerance:
+            status = "REGRESIÓN"
+        elif change < -tolerance:
+            status = "mejora"
+        else:
+            status = "ok"
+        rows.append({"name": name, "before": before, "after": after, "change": change, "status": status})
+    return rows
+
+
+def _format_seconds(value) -> str:
+    if value is None:
+        return "-"
+    if value >= 1:
+        return f"{value:.3f} s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.3f} ms"
+    return f"{value * 1e6:.1f} us"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Baselines de benchmarks y detección de regresiones")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = subparsers.add_parser("save", help="Guarda un resultado como baseline")
+    save_parser.add_argument("result", help="JSON generado con pytest --benchmark-json")
+    save_parser.add_argument("--name", default="reference", help="Nombre del baseline (por defecto reference)")
+
+    check_parser = subparsers.add_parser("check", help="Compara un resultado contra un baseline")
+    check_parser.add_argument("result", help="JSON generado con pytest --benchmark-json")
+    check_parser.add_argument("--name", default="reference", help="Baseline en tests/benchmarks/baselines")
+    check_parser.add_argument("--baseline", help="Ruta explícita del baseline (ignora --name)")
+    check_parser.add_argument("--tolerance", type=float, default=0.20,
+                              help="Empeoramiento relativo permitido (por defecto 0.20)")
+    check_parser.add_argument("--stat", default="median", choices=["min", "mean", "median", "max"],
+                              help="Estadístico a comparar (por defecto median)")
+    args = parser.parse_args(argv)
+
+    if args.command == "save":
+        print(f"Baseline guardado en {save_baseline(args.result, args.name)}")
+        return 0
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINES_DIR / f"{args.name}.json"
+    if not baseline_path.exists():
+        print(f"No existe el baseline {baseline_path}: genérelo en esta máquina con 'save'")
+        return 2
+    rows = compare(load_results(baseline_path, args.stat), load_results(args.result, args.stat), args.tolerance)
+
+    width = max([len(r["name"]) for r in rows] + [9])
+    print(f"{'Benchmark':<{width}}  {'Baseline':>12}  {'Actual':>12}  {'Cambio':>8}  Estado")
+    for row in rows:
+        change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "-"
+        print(f"{row['name']:<{width}}  {_format_seconds(row['before']):>12}  "
+              f"{_format_seconds(row['after']):>12}  {change:>8}  {row['status']}")
+
+    regressions = [r for r in rows if r["status"] == "REGRESIÓN"]
+    if regressions:
+        print(f"\n{len(regressions)} regresión(es) por encima de {args.tolerance * 100:.0f}% ({args.stat})")
+        return 1
+    print(f"\nSin regresiones por encima de {args.tolerance * 100:.0f}% ({args.stat})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Fixtures de la suite de rendimiento
+
+La escala de los datos se controla con variables de entorno:
+BENCH_YEARS (años, por defecto 1), BENCH_MUNICIPIOS (por defecto 13),
+BENCH_CUSTOMERS (filas del volcado CODCLI/KWHT, por defecto 20000) y
+BENCH_SEED (semilla, por defecto 42).
+
+La caché de consultas de los servicios se desactiva para medir las
+consultas; los benchmarks de la caché la activan explícitamente.
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+os.environ.setdefault("LOG_TO_FILE", "false")
+os.environ.setdefault("QUERY_CACHE", "false")
+
+import core.database as database_module
+from core.database import WebDatabaseManager
+from database.seeds.synthetic import generate_dataset
+
+
+@pytest.fixture(scope="session")
+def bench_scale():
+    return SimpleNamespace(
+        years=int(os.getenv("BENCH_YEARS", "1")),
+        municipios=int(os.getenv("BENCH_MUNICIPIOS", "13")),
+        customers=int(os.getenv("BENCH_CUSTOMERS", "20000")),
+        seed=int(os.getenv("BENCH_SEED", "42")),
+        start_year=2024
+    )
+
+
+@pytest.fixture(scope="session")
+def synthetic_dataset(bench_scale):
+    return generate_dataset(
+        years=bench_scale.years,
+        municipios=bench_scale.municipios,
+        start_year=bench_scale.start_year,
+        seed=bench_scale.seed
+    )
+
+
+@pytest.fixture
+def synthetic_db(synthetic_dataset, monkeypatch):
+    """Gestor en memoria cargado con el dataset e instalado como global"""
+    db_manager = WebDatabaseManager()
+    synthetic_dataset.load_into(db_manager)
+    db_manager.initialize()
+    monkeypatch.setattr(database_module, "_db_manager", db_manager)
+    return db_manager
+
+
+@pytest.fixture
+def last_period(bench_scale):
+    return bench_scale.start_year + bench_scale.years - 1, 12
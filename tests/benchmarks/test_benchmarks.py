@@ -0,0 +1,239 @@
+"""
+Benchmarks de las operaciones principales
+
+Ejecución, baseline y comparación:
+    python -m pytest tests/benchmarks --benchmark-json=resultado.json
+    python -m tests.benchmarks.compare save resultado.json --name reference
+    python -m tests.benchmarks.compare check resultado.json --name reference
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from database.seeds.synthetic import write_customer_dump, write_energia_workbook
+
+
+def _lventas_tab(tab_class, año: int, mes: int):
+    main_screen = SimpleNamespace(page=None, theme={})
+    tab = tab_class(main_screen)
+    tab.selected_year = año
+    tab.selected_month = mes
+    return tab
+
+
+# === INFOPÉRDIDAS ===
+
+def test_calcular_perdidas_provincia(benchmark, synthetic_db, last_period):
+    from infoperdidas.services.perdidas_service import PerdidasService
+
+    service = PerdidasService()
+    año, mes = last_period
+    benchmark(service.calcular_perdidas_provincia, año, mes)
+
+
+def test_calcular_perdidas_anuales(benchmark, synthetic_db, last_period):
+    """Los 12 meses del año en una sola pasada (base del libro anual)"""
+    from infoperdidas.services.perdidas_service import PerdidasService
+
+    service = PerdidasService()
+    año, _ = last_period
+    resumenes = benchmark(service.calcular_perdidas_anuales, año)
+    assert [r.mes for r in resumenes] == list(range(1, 13))
+
+
+# === L_VENTAS ===
+
+def test_lventas_monthly_dataset(benchmark, synthetic_db, last_period):
+    from l_ventas.screens.tabs.monthly_tab import MonthlyTab
+
+    tab = _lventas_tab(MonthlyTab, *last_period)
+    assert benchmark(tab._get_monthly_data)
+
+
+def test_lventas_accumulated_dataset(benchmark, synthetic_db, last_period):
+    """Cada tabla se agrega por municipio antes del LEFT JOIN (sin multiplicar filas)"""
+    from l_ventas.screens.tabs.accumulated_tab import AccumulatedTab
+
+    tab = _lventas_tab(AccumulatedTab, *last_period)
+    filas = benchmark(tab._get_accumulated_data)
+    año, mes = last_period
+    energia = {m["id"]: 0.0 for m in synthetic_db.municipios}
+    for registro in synthetic_db.energia_barra:
+        if registro["año"] == año and registro["mes"] <= mes:
+            energia[registro["municipio_id"]] += registro["energia_mwh"] or 0
+    nombres = {m["nombre"]: m["id"] for m in synthetic_db.municipios}
+    assert filas
+    for fila in filas:
+        assert fila["energia_barra_acum_mw"] == pytest.approx(energia[nombres[fila["municipio"]]])
+
+
+# === EXCEL ===
+
+def test_energia_excel_import(benchmark, synthetic_db, synthetic_dataset, last_period, tmp_path):
+    from calculo_energia.services.energia_service import EnergiaService
+
+    año, mes = last_period
+    workbook = write_energia_workbook(tmp_path / "energia.xlsx", synthetic_dataset, año, mes)
+    service = EnergiaService()
+    result = benchmark.pedantic(service.importar_desde_excel, args=(str(workbook), 1), rounds=5, iterations=1)
+    assert result["imported"] + result["errors"] > 0
+
+
+def test_energia_excel_export(benchmark, synthetic_db, last_period, tmp_path):
+    from calculo_energia.services.energia_service import EnergiaService
+
+    año, mes = last_period
+    service = EnergiaService()
+    assert benchmark.pedantic(service.exportar_a_excel, args=(año, mes, str(tmp_path / "export.xlsx")),
+                              rounds=5, iterations=1)
+
+
+def test_energia_iter_list(benchmark, synthetic_db):
+    """Recorre la tabla completa con iter_query (listados y exportaciones por lotes)"""
+    from calculo_energia.services.energia_service import EnergiaService
+
+    service = EnergiaService()
+    filas = benchmark(lambda: sum(1 for _ in service.iter_energia_list()))
+    assert filas == len(synthetic_db.energia_barra)
+
+
+def test_energia_buscar_registros_pagina(benchmark, synthetic_db):
+    """Recorre por cursor las tres primeras páginas de una búsqueda multianual"""
+    from calculo_energia.services.energia_service import EnergiaService
+
+    service = EnergiaService()
+
+    def paginar():
+        cursor, paginas = None, []
+        for _ in range(3):
+            filtros = {"limite": 50}
+            if cursor:
+                filtros["despues_de"] = cursor
+            pagina = service.buscar_registros(filtros)
+            if not pagina:
+                break
+            paginas.append(pagina)
+            cursor = pagina[-1].cursor
+        return paginas
+
+    paginas = benchmark(paginar)
+    assert paginas and len(paginas[0]) <= 50
+
+
+def test_customer_dump_lookup(benchmark, synthetic_dataset, bench_scale, tmp_path):
+    """Lectura de un volcado CODCLI/KWHT y búsqueda de los servicios de transferencias"""
+    pytest.importorskip("pandas")
+    from facturacion.services.facturacion_service import FacturacionService
+
+    servicios = sorted({t["servicio_id"] for t in synthetic_dataset.transferencias_consumos})
+    dump = write_customer_dump(tmp_path / "clientes.xlsx", bench_scale.customers, bench_scale.seed, servicios)
+    service = FacturacionService()
+
+    lectura = benchmark.pedantic(service.leer_consumos_clientes, args=(str(dump), servicios),
+                                 rounds=3, iterations=1)
+    assert lectura["filas"] == bench_scale.customers
+    assert set(lectura["consumos"]) == set(servicios)
+    assert len(lectura["encontrados"]) + len(lectura["no_encontrados"]) == len(servicios)
+
+
+def test_energia_periodos_disponibles(benchmark, synthetic_db):
+    """GROUP BY año, mes sobre toda la tabla con el agregador por hash"""
+    from calculo_energia.services.energia_service import EnergiaService
+
+    service = EnergiaService()
+    periodos = benchmark(service.get_periodos_disponibles)
+    assert sum(p["registros"] for p in periodos) == len(synthetic_db.energia_barra)
+
+
+def test_energia_validacion_cacheada(benchmark, synthetic_db, last_period, monkeypatch):
+    """Validación + resumen del período con la caché de consultas (lecturas repetidas)"""
+    from calculo_energia.services.energia_service import EnergiaService
+    from core.query_cache import get_query_caches
+
+    monkeypatch.setattr(get_query_caches(), "enabled", True)
+    service = EnergiaService()
+    año, mes = last_period
+
+    def accion():
+        return service.validar_periodo_completo(año, mes), service.get_resumen_periodo(año, mes)
+
+    validacion, resumen = benchmark(accion)
+    assert validacion["total_municipios"] == resumen["total_municipios"]
+    assert EnergiaService.get_municipios.cache_info()["hits"] > 0
+
+    # Una escritura en el período invalida el resumen cacheado
+    synthetic_db.execute_update(
+        "INSERT INTO energia_barra (municipio_id, año, mes, energia_mwh) VALUES (?, ?, ?, ?)",
+        (resumen["total_municipios"] + 1, año, mes, 1000.0)
+    )
+    assert service.get_resumen_periodo(año, mes)["total_registros"] == resumen["total_registros"] + 1
+
+
+def test_query_cache_estimate_size(benchmark, synthetic_db, last_period):
+    """Tamaño estimado de un período de registros (cada put de la caché lo calcula)"""
+    from calculo_energia.services.energia_service import EnergiaService
+    from core.query_cache import estimate_size
+
+    registros = EnergiaService().get_energia_by_periodo(*last_period)
+    assert registros
+    assert benchmark(estimate_size, registros) > 0
+
+    # Los campos de texto de un registro con __slots__ también cuentan
+    registro = registros[0]
+    base = estimate_size(registro)
+    registro.observaciones = "x" * 7000
+    assert estimate_size(registro) >= base + 7000
+
+
+# === TABLAS COLUMNARES ===
+
+def test_columnar_energia_por_periodo(benchmark, synthetic_dataset):
+    """SUM/AVG/MAX de energía agrupados por (año, mes) sobre todos los años"""
+    pytest.importorskip("numpy")
+    from core.database import WebDatabaseManager
+
+    db_manager = WebDatabaseManager(columnar=True)
+    synthetic_dataset.load_into(db_manager)
+    table = db_manager.energia_barra
+
+    def por_periodo():
+        return table.aggregate({"total": ("sum", "energia_mwh"), "promedio": ("avg", "energia_mwh"),
+                                "maximo": ("max", "energia_mwh"), "registros": ("count", None)},
+                               table.mask([("energia_mwh", ">", 0)]), group_by=("año", "mes"))
+
+    periodos = benchmark(por_periodo)
+    assert sum(p["registros"] for p in periodos) == len(synthetic_dataset.energia_barra)
+
+
+# === INSTANTÁNEAS ===
+
+def test_snapshot_roundtrip(benchmark, synthetic_db):
+    """Exporta el gestor en memoria a una instantánea binaria y la vuelve a leer"""
+    import io
+    import json
+    from core.snapshot import read_snapshot
+    from database.snapshots import export_memory_snapshot
+    from database.statistics import MEMORY_TABLES
+
+    def roundtrip():
+        buffer = io.BytesIO()
+        export_memory_snapshot(synthetic_db, buffer)
+        filas = sum(1 for _, _, _, rows in read_snapshot(io.BytesIO(buffer.getvalue())) for _ in rows)
+        return buffer.getvalue(), filas
+
+    data, filas = benchmark(roundtrip)
+    assert filas >= len(synthetic_db.energia_barra) + len(synthetic_db.facturacion)
+    volcado_json = json.dumps({tabla: list(getattr(synthetic_db, atributo)) for tabla, atributo in MEMORY_TABLES.items()},
+                              ensure_ascii=False).encode()
+    assert len(data) * 4 < len(volcado_json)
+
+
+# === AUTENTICACIÓN ===
+
+def test_login(benchmark):
+    from authentication.services.auth_service import AuthService
+
+    service = AuthService()
+    result = benchmark(service.login, "admin", "admin")
+    assert result["success"]
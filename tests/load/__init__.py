@@ -0,0 +1,3 @@
+"""
+Pruebas de carga multi-sesión sin navegador
+"""
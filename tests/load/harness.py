@@ -0,0 +1,375 @@
+"""
+Harness de carga: N sesiones Flet simuladas contra PerdidasMatanzasApp
+
+Cada sesión usa una ``ft.Page`` de prueba (sin navegador ni red) y recorre
+el flujo típico: login → dashboard → infoperdidas → l_ventas, cambia de
+pestaña y de período, e importa un libro de energía. Todas las sesiones
+comparten proceso y singletons, igual que en el servidor web.
+
+Uso:
+    python -m tests.load.harness --sessions 20 --concurrency 10
+    python -m tests.load.harness --sessions 50 --years 3 --municipios 40 --json carga.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("LOG_TO_FILE", "false")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.metrics import get_process_rss_bytes
+
+
+class _StubStorage:
+    """client_storage / session en memoria"""
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+
+    def get(self, key: str):
+        return self._data.get(key)
+
+    def set(self, key: str, value: Any) -> bool:
+        self._data[key] = value
+        return True
+
+    def contains_key(self, key: str) -> bool:
+        return key in self._data
+
+    def remove(self, key: str):
+        self._data.pop(key, None)
+
+    def get_keys(self, prefix: str = "") -> List[str]:
+        return [k for k in self._data if k.startswith(prefix)]
+
+    def clear(self):
+        self._data.clear()
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class StubPage:
+    """Sustituto mínimo de ``ft.Page`` para sesiones sin navegador
+
+    ``update()`` solo cuenta llamadas; los métodos de ``ft.Page`` que no se
+    modelan aquí se resuelven como no-op.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.controls: List[Any] = []
+        self.overlay: List[Any] = []
+        self.dialog = None
+        self.snack_bar = None
+        self.banner = None
+        self.title = ""
+        self.route = "/"
+        self.width = 1366
+        self.height = 768
+        self.window = SimpleNamespace(width=1366, height=768)
+        self.client_storage = _StubStorage()
+        self.session = _StubStorage()
+        self.updates = 0
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+
+    def clean(self):
+        self.controls.clear()
+
+    def update(self, *controls):
+        self.updates += 1
+
+    def open(self, control):
+        control.open = True
+        if control not in self.overlay:
+            self.overlay.append(control)
+
+    def close(self, control):
+        control.open = False
+
+    def go(self, route: str):
+        self.route = route
+
+    def run_thread(self, handler: Callable, *args, **kwargs):
+        handler(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _noop
+
+
+class StepRecorder:
+    """Latencias y errores por paso, compartido entre sesiones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.page_updates = {"requested": 0, "sent": 0}
+
+    def run(self, step: str, action: Callable[[], bool]) -> bool:
+        start = time.perf_counter()
+        try:
+            ok = bool(action())
+        except Exception:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self.latencies.setdefault(step, []).append(elapsed_ms)
+            if not ok:
+                self.errors[step] = self.errors.get(step, 0) + 1
+        return ok
+
+    def add_page_updates(self, stats: Dict[str, Any]):
+        with self._lock:
+            for key in self.page_updates:
+                self.page_updates[key] += stats.get(key, 0)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        rows = []
+        with self._lock:
+            for step, values in self.latencies.items():
+                ordered = sorted(values)
+                rows.append({
+                    "step": step,
+                    "count": len(ordered),
+                    "errors": self.errors.get(step, 0),
+                    "p50_ms": round(_percentile(ordered, 50), 2),
+                    "p95_ms": round(_percentile(ordered, 95), 2),
+                    "p99_ms": round(_percentile(ordered, 99), 2),
+                    "max_ms": round(ordered[-1], 2),
+                    "total_ms": round(sum(ordered), 2)
+                })
+        return rows
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    # Percentil por rango más cercano
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MemorySampler(threading.Thread):
+    """Muestrea la memoria residente del proceso para obtener el pico"""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = get_process_rss_bytes()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, get_process_rss_bytes())
+
+    def stop(self) -> int:
+        self._stopped.set()
+        self.join()
+        self.peak = max(self.peak, get_process_rss_bytes())
+        return self.peak
+
+
+def _as_event(page: StubPage, action: Callable[[], bool]) -> Callable[[], bool]:
+    """Ejecuta la acción como un manejador de eventos de Flet (``page.run_thread``)"""
+    def run():
+        result = []
+        page.run_thread(lambda: result.append(action()))
+        return bool(result and result[0])
+    return run
+
+
+def _run_session(index: int, recorder: StepRecorder, periods: List[tuple], workbook: Optional[Path]) -> bool:
+    """Recorre el flujo completo de una sesión"""
+    from core.app import PerdidasMatanzasApp
+
+    page = StubPage(f"load-{index}")
+    app = PerdidasMatanzasApp(page)
+    manager = app.screen_manager
+
+    def start():
+        app.initialize()
+        return manager.current_screen == "login"
+
+    def login():
+        screen = manager.current_instance
+        screen.username_field.value = "admin"
+        screen.password_field.value = "admin"
+        screen._on_login_click(None)
+        return app.is_authenticated() and manager.current_screen == "dashboard"
+
+    def navigate(screen_name: str):
+        def action():
+            app.navigate_to(screen_name)
+            return manager.current_screen == screen_name
+        return action
+
+    def switch_tab(tab_index: int):
+        def action():
+            screen = manager.current_instance
+            screen._on_tab_click(tab_index)
+            return screen.selected_tab == tab_index
+        return action
+
+    def switch_period(año: int, mes: int):
+        def action():
+            tab = manager.current_instance.monthly_tab
+            tab._on_year_change(SimpleNamespace(control=SimpleNamespace(value=str(año))))
+            tab._on_month_change(SimpleNamespace(control=SimpleNamespace(value=str(mes))))
+            return tab.selected_year == año and tab.selected_month == mes
+        return action
+
+    def import_workbook():
+        from calculo_energia.services.energia_service import EnergiaService
+        result = EnergiaService().importar_desde_excel(str(workbook), app.current_user["id"])
+        return result.get("imported", 0) > 0
+
+    steps = [("start", start), ("login", login), ("dashboard", navigate("dashboard")),
+             ("infoperdidas", navigate("infoperdidas")), ("l_ventas", navigate("l_ventas")),
+             ("tab_monthly", switch_tab(1))]
+    steps += [("switch_period", switch_period(año, mes)) for año, mes in periods]
+    if workbook is not None:
+        steps.append(("import_workbook", import_workbook))
+
+    completed = True
+    for step, action in steps:
+        if not recorder.run(step, _as_event(page, action)):
+            completed = False
+            if step in ("start", "login"):
+                # Sin sesión iniciada el resto del flujo no tiene sentido
+                break
+    app.page_updates.flush()
+    recorder.add_page_updates(app.page_updates.get_stats())
+    return completed
+
+
+def run_load_test(sessions: int = 10, concurrency: int = 10, years: int = 0, municipios: int = 13,
+                  seed: int = 42, import_workbook: bool = True, quiet: bool = True) -> Dict[str, Any]:
+    """Lanza ``sessions`` sesiones simuladas y devuelve el informe
+
+    Con ``years`` > 0 se cargan datos sintéticos en el gestor global; con 0
+    se usan los datos de muestra del gestor en memoria.
+    """
+    from core.database import get_db_manager
+    from database.seeds.synthetic import generate_dataset, write_energia_workbook
+
+    if quiet:
+        logging.disable(logging.CRITICAL)
+
+    try:
+        db_manager = get_db_manager()
+        dataset = None
+        if years > 0:
+            dataset = generate_dataset(years=years, municipios=municipios, seed=seed)
+            dataset.load_into(db_manager)
+            año = dataset.años[-1]
+            periods = [(año, mes) for mes in (12, 6, 1)]
+        else:
+            periods = [(2024, mes) for mes in (3, 2, 1)]
+
+        workbook = None
+        tmpdir = tempfile.TemporaryDirectory(prefix="perdidas_load_")
+        if import_workbook:
+            if dataset is None:
+                dataset = generate_dataset(years=1, municipios=len(db_manager.municipios), seed=seed)
+            workbook = write_energia_workbook(Path(tmpdir.name) / "energia.xlsx", dataset, *periods[0])
+
+        recorder = StepRecorder()
+        sampler = MemorySampler()
+        rss_start = get_process_rss_bytes()
+        sampler.start()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="load-session") as pool:
+            results = list(pool.map(lambda i: _run_session(i, recorder, periods, workbook), range(sessions)))
+        wall_seconds = time.perf_counter() - start
+
+        peak_rss = sampler.stop()
+        tmpdir.cleanup()
+
+        steps = recorder.summary()
+        total_steps = sum(row["count"] for row in steps)
+        return {
+            "sessions": sessions,
+            "concurrency": concurrency,
+            "completed_sessions": sum(1 for ok in results if ok),
+            "wall_seconds": round(wall_seconds, 3),
+            "sessions_per_second": round(sessions / wall_seconds, 3) if wall_seconds else 0.0,
+            "steps_per_second": round(total_steps / wall_seconds, 3) if wall_seconds else 0.0,
+            "rss_start_mb": round(rss_start / 1024 / 1024, 1),
+            "rss_peak_mb": round(peak_rss / 1024 / 1024, 1),
+            "page_updates_requested": recorder.page_updates["requested"],
+            "page_updates_sent": recorder.page_updates["sent"],
+            "steps": steps
+        }
+    finally:
+        if quiet:
+            logging.disable(logging.NOTSET)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Sesiones: {report['completed_sessions']}/{report['sessions']} completadas "
+        f"(concurrencia {report['concurrency']})",
+        f"Tiempo total: {report['wall_seconds']:.2f} s | "
+        f"{report['sessions_per_second']:.2f} sesiones/s | {report['steps_per_second']:.1f} pasos/s",
+        f"Memoria residente: {report['rss_start_mb']:.1f} MB al inicio, pico {report['rss_peak_mb']:.1f} MB",
+        f"Actualizaciones de página: {report['page_updates_requested']} pedidas, "
+        f"{report['page_updates_sent']} enviadas",
+        "",
+        f"{'Paso':<16}{'N':>6}{'Err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    ]
+    for row in report["steps"]:
+        lines.append(f"{row['step']:<16}{row['count']:>6}{row['errors']:>6}{row['p50_ms']:>10.1f}"
+                     f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga multi-sesión sin navegador")
+    parser.add_argument("--sessions", type=int, default=10, help="Sesiones simuladas (por defecto 10)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Sesiones simultáneas (por defecto 10)")
+    parser.add_argument("--years", type=int, default=0, help="Años de datos sintéticos (0 = datos de muestra)")
+    parser.add_argument("--municipios", type=int, default=13, help="Municipios de los datos sintéticos")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos sintéticos")
+    parser.add_argument("--no-import", action="store_true", help="Omite el paso de importación")
+    parser.add_argument("--verbose", action="store_true", help="Mantiene los logs de la aplicación")
+    parser.add_argument("--json", help="Guarda el informe en este archivo JSON")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        years=args.years,
+        municipios=args.municipios,
+        seed=args.seed,
+        import_workbook=not args.no_import,
+        quiet=not args.verbose
+    )
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0 if report["completed_sessions"] == report["sessions"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
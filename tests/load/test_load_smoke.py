@@ -0,0 +1,21 @@
+"""
+Prueba rápida del harness de carga con pocas sesiones
+"""
+
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from tests.load.harness import run_load_test
+
+
+def test_load_harness_smoke():
+    report = run_load_test(sessions=2, concurrency=2)
+
+    assert report["completed_sessions"] == 2
+    steps = {row["step"]: row for row in report["steps"]}
+    for step in ("login", "dashboard", "infoperdidas", "l_ventas", "switch_period", "import_workbook"):
+        assert steps[step]["count"] >= 2
+        assert steps[step]["errors"] == 0
+    assert report["rss_peak_mb"] > 0
+    assert 0 < report["page_updates_sent"] < report["page_updates_requested"]
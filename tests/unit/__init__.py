@@ -0,0 +1,3 @@
+"""
+Pruebas unitarias de corrección (sin medir tiempos)
+"""
@@ -0,0 +1,8 @@
+"""
+Fixtures de las pruebas unitarias
+"""
+
+import os
+
+os.environ.setdefault("LOG_TO_FILE", "false")
+os.environ.setdefault("QUERY_CACHE", "false")
@@ -0,0 +1,70 @@
+"""
+Copias de seguridad: creación, retención y restauración
+"""
+
+import sqlite3
+
+import pytest
+
+from database.backup import BackupManager
+
+
+def _write_value(path, value: int):
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE IF NOT EXISTS datos (id INTEGER PRIMARY KEY, valor INTEGER)")
+    conn.execute("DELETE FROM datos")
+    conn.execute("INSERT INTO datos (valor) VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+
+def _read_value(path) -> int:
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT valor FROM datos").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_BACKUP_KEEP", "2")
+    monkeypatch.setenv("DB_BACKUP_STEP_PAUSE", "0")
+    db_path = tmp_path / "app.db"
+    _write_value(db_path, 1)
+    return BackupManager(db_path, tmp_path / "backups")
+
+
+def test_retencion_conserva_los_mas_recientes(manager):
+    archivos = []
+    for valor in range(1, 4):
+        _write_value(manager.db_path, valor)
+        archivos.append(manager.create_backup())
+
+    assert [b["path"] for b in manager.list_backups()] == archivos[:0:-1]
+
+
+def test_restaurar_el_mas_antiguo_no_lo_elimina(manager):
+    antiguo = manager.create_backup()
+    _write_value(manager.db_path, 2)
+    reciente = manager.create_backup()
+    _write_value(manager.db_path, 3)
+
+    assert manager.restore_backup(antiguo)
+    assert _read_value(manager.db_path) == 1
+
+    # La copia previa a restaurar se suma a las existentes sin aplicar la retención
+    paths = [b["path"] for b in manager.list_backups()]
+    assert antiguo in paths and reciente in paths and len(paths) == 3
+    previa = paths[0]
+    assert manager.restore_backup(previa)
+    assert _read_value(manager.db_path) == 3
+
+
+def test_restaurar_archivo_corrupto_no_toca_la_base(manager, tmp_path):
+    corrupto = tmp_path / "corrupto.db"
+    corrupto.write_bytes(b"no es una base de datos" * 100)
+
+    with pytest.raises(sqlite3.DatabaseError):
+        manager.restore_backup(corrupto)
+    assert _read_value(manager.db_path) == 1
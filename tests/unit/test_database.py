@@ -0,0 +1,21 @@
+"""
+Motor en memoria: lecturas en streaming
+"""
+
+import pytest
+
+from core.database import WebDatabaseManager
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_iter_query_entrega_copias(columnar):
+    if columnar:
+        pytest.importorskip("numpy")
+    db_manager = WebDatabaseManager(columnar=columnar)
+    db_manager.execute_update(
+        "INSERT INTO energia_barra (municipio_id, año, mes, energia_mwh) VALUES (?, ?, ?, ?)", (1, 2024, 1, 100.0)
+    )
+    antes = [dict(fila) for fila in db_manager.energia_barra]
+    for fila in db_manager.iter_query("SELECT * FROM energia_barra"):
+        fila.clear()
+    assert [dict(fila) for fila in db_manager.energia_barra] == antes
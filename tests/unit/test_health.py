@@ -0,0 +1,54 @@
+"""
+Comprobación de salud del proceso de Flet
+"""
+
+import sqlite3
+
+import core.database as database_module
+from core.database import WebDatabaseManager
+from core.health import check_health
+
+
+def _sqlite_file(path):
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE municipios (id INTEGER PRIMARY KEY)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_sano_con_datos_y_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_module, "_db_manager", WebDatabaseManager())
+    healthy, report = check_health(_sqlite_file(tmp_path / "app.db"))
+
+    assert healthy and report["status"] == "healthy"
+    assert report["checks"]["storage"]["municipios"] > 0
+    assert report["checks"]["sqlite"]["ok"]
+
+
+def test_falla_sin_municipios(tmp_path, monkeypatch):
+    db_manager = WebDatabaseManager()
+    db_manager.municipios = []
+    monkeypatch.setattr(database_module, "_db_manager", db_manager)
+    healthy, report = check_health(_sqlite_file(tmp_path / "app.db"))
+
+    assert not healthy
+    assert not report["checks"]["storage"]["ok"]
+
+
+def test_falla_con_sqlite_corrupto(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_module, "_db_manager", WebDatabaseManager())
+    corrupto = tmp_path / "app.db"
+    corrupto.write_bytes(b"no es una base de datos" * 100)
+    healthy, report = check_health(corrupto)
+
+    assert not healthy
+    assert "error" in report["checks"]["sqlite"]
+
+
+def test_falla_sin_sqlite_en_modo_escritorio(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLET_WEB_MODE", "false")
+    monkeypatch.setattr(database_module, "_db_manager", WebDatabaseManager())
+    healthy, report = check_health(tmp_path / "no_existe.db")
+
+    assert not healthy and not report["checks"]["sqlite"]["ok"]
@@ -0,0 +1,55 @@
+"""
+Mantenimiento de SQLite: ANALYZE solo cuando cambian los datos
+"""
+
+import sqlite3
+
+from database.maintenance import MaintenanceScheduler
+
+
+def _create_table(path, rows: int):
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE lecturas (id INTEGER PRIMARY KEY, valor REAL)")
+    conn.executemany("INSERT INTO lecturas (valor) VALUES (?)", ((float(i),) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def test_analyze_no_se_repite_tras_borrados(tmp_path):
+    path = tmp_path / "mantenimiento.db"
+    _create_table(path, 5000)
+    scheduler = MaintenanceScheduler(path)
+    try:
+        assert scheduler.run_maintenance(force=True)["analyzed"] == ["lecturas"]
+
+        # Tras borrar la mayoría de filas MAX(rowid) sigue en 5000
+        conn = sqlite3.connect(str(path))
+        conn.execute("DELETE FROM lecturas WHERE id <= 4000")
+        conn.commit()
+        conn.close()
+
+        analyzed = [scheduler.run_maintenance(force=True)["analyzed"] for _ in range(4)]
+        assert analyzed == [["lecturas"], [], [], []]
+        report = scheduler.get_report()["analyze"]
+        assert report["runs"] == 2
+        assert (report["rows"], report["estimate"]) == (1000, 5000)
+    finally:
+        scheduler.stop()
+
+
+def test_analyze_detecta_escrituras_de_otra_conexion(tmp_path):
+    path = tmp_path / "mantenimiento.db"
+    _create_table(path, 1000)
+    scheduler = MaintenanceScheduler(path)
+    try:
+        scheduler.run_maintenance(force=True)
+        assert scheduler.run_maintenance(force=True)["analyzed"] == []
+
+        conn = sqlite3.connect(str(path))
+        conn.executemany("INSERT INTO lecturas (valor) VALUES (?)", ((1.0,) for _ in range(1000)))
+        conn.commit()
+        conn.close()
+
+        assert scheduler.run_maintenance(force=True)["analyzed"] == ["lecturas"]
+    finally:
+        scheduler.stop()
@@ -0,0 +1,135 @@
+"""
+Agrupador de page.update(): manejadores, ventana de tiempo y fallos de envío
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.page_updates import PageUpdateCoalescer, flush_now, install_update_coalescer
+
+
+class _FakePage:
+    def __init__(self):
+        self.sent = []
+        self.opened = []
+        self.fail = False
+        self.sent_event = threading.Event()
+
+    def update(self, *controls):
+        if self.fail:
+            raise ConnectionError("websocket cerrado")
+        self.sent.append(controls)
+        self.sent_event.set()
+
+    def add(self, *controls):
+        self.sent.append(("add",) + controls)
+
+    def open(self, control):
+        self.opened.append(control)
+        self.update(control)
+
+    def close(self, control):
+        self.sent.append(("close", control))
+
+    def run_thread(self, handler, *args, **kwargs):
+        handler(*args, **kwargs)
+
+
+@pytest.fixture
+def page(monkeypatch):
+    monkeypatch.setenv("PAGE_UPDATE_COALESCE", "true")
+    monkeypatch.setenv("PAGE_UPDATE_WINDOW_MS", "5")
+    page = _FakePage()
+    install_update_coalescer(page)
+    return page
+
+
+def test_manejador_envia_una_vez_al_terminar(page):
+    def handler():
+        page.update()
+        page.update()
+        # Más que la ventana: el temporizador no debe enviar a mitad del manejador
+        time.sleep(0.05)
+        assert page.sent == []
+        page.update()
+
+    page.run_thread(handler)
+
+    assert page.sent == [()]
+    assert page._update_coalescer.get_stats()["saved"] == 2
+
+
+def test_temporizador_no_envia_mientras_otro_manejador_esta_en_curso(page):
+    coalescer = page._update_coalescer
+    # Actualización de fondo pendiente cuando empieza un manejador
+    page.update()
+
+    def handler():
+        time.sleep(0.05)
+        assert page.sent == []
+
+    page.run_thread(handler)
+    assert page.sent == [()]
+    assert coalescer._timer is None
+
+
+def test_actualizacion_de_fondo_se_envia_al_cerrar_la_ventana(page):
+    control = SimpleNamespace(page=page)
+    page.update(control)
+    page.update(control)
+
+    assert page.sent_event.wait(1.0)
+    time.sleep(0.02)
+    assert page.sent == [(control,)]
+
+
+def test_actualizacion_completa_absorbe_controles_y_descarta_los_retirados(page):
+    coalescer = page._update_coalescer
+    montado, retirado = SimpleNamespace(page=page), SimpleNamespace(page=None)
+
+    page.update(montado, retirado)
+    coalescer.flush()
+    assert page.sent == [(montado,)]
+
+    page.update(montado)
+    page.update()
+    page.update(retirado)
+    coalescer.flush()
+    assert page.sent == [(montado,), ()]
+
+
+def test_fallo_de_envio_conserva_lo_pendiente(page):
+    coalescer = page._update_coalescer
+    page.fail = True
+    page.run_thread(page.update)
+    assert page.sent == []
+
+    page.fail = False
+    coalescer.flush()
+    assert page.sent == [()]
+
+
+def test_open_envia_lo_pendiente_y_el_dialogo_sin_agrupar(page):
+    dialogo = SimpleNamespace(page=page)
+
+    def handler():
+        page.update()
+        page.open(dialogo)
+
+    page.run_thread(handler)
+    assert page.opened == [dialogo]
+    assert page.sent == [(), (dialogo,)]
+
+
+def test_flush_now_sin_agrupador_llama_a_update(monkeypatch):
+    monkeypatch.setenv("PAGE_UPDATE_COALESCE", "false")
+    page = _FakePage()
+    coalescer = install_update_coalescer(page)
+
+    assert isinstance(coalescer, PageUpdateCoalescer)
+    assert not hasattr(page, "_update_coalescer")
+    flush_now(page)
+    assert page.sent == [()]
@@ -0,0 +1,62 @@
+"""
+Operadores en memoria: semántica de NULL en agregados y joins
+"""
+
+import pytest
+
+from core.query_ops import hash_aggregate, hash_index, hash_left_join
+
+FILAS = [
+    {"municipio_id": 1, "valor": 10.0},
+    {"municipio_id": 1, "valor": None},
+    {"municipio_id": 2, "valor": 4.0},
+    {"municipio_id": None, "valor": 1.0},
+]
+
+AGREGADOS = {
+    "filas": ("COUNT", None),
+    "con_valor": ("count", lambda r: r["valor"]),
+    "total": ("sum", lambda r: r["valor"]),
+    "media": ("avg", lambda r: r["valor"]),
+    "minimo": ("min", lambda r: r["valor"]),
+    "maximo": ("max", lambda r: r["valor"]),
+}
+
+
+def test_agregados_ignoran_null():
+    grupos = hash_aggregate(FILAS, ["municipio_id"], AGREGADOS)
+
+    assert grupos[0] == {"municipio_id": 1, "filas": 2, "con_valor": 1, "total": 10.0,
+                         "media": 10.0, "minimo": 10.0, "maximo": 10.0}
+    # NULL en la clave forma su propio grupo, como en GROUP BY
+    assert [g["municipio_id"] for g in grupos] == [1, 2, None]
+
+
+def test_grupo_solo_con_null_da_count_cero_y_sum_null():
+    (fila,) = hash_aggregate([{"valor": None}], [], AGREGADOS)
+    assert fila == {"filas": 1, "con_valor": 0, "total": None, "media": None, "minimo": None, "maximo": None}
+
+
+def test_sin_group_by_devuelve_una_fila_sin_datos():
+    assert hash_aggregate([], [], AGREGADOS) == [
+        {"filas": 0, "con_valor": 0, "total": None, "media": None, "minimo": None, "maximo": None}
+    ]
+    assert hash_aggregate([], ["municipio_id"], AGREGADOS) == []
+
+
+def test_funcion_no_soportada():
+    with pytest.raises(ValueError):
+        hash_aggregate(FILAS, [], {"x": ("median", lambda r: r["valor"])})
+
+
+def test_left_join_conserva_filas_sin_pareja_y_clave_null():
+    municipios = [{"id": 1, "nombre": "Matanzas"}, {"id": None, "nombre": "Sin id"}]
+    index = hash_index(municipios, "id")
+    assert list(index) == [1]
+
+    filas = [dict(fila, id=fila["municipio_id"]) for fila in FILAS]
+    resultado = list(hash_left_join(filas, "id", index))
+
+    assert [fila.get("nombre") for fila in resultado] == ["Matanzas", "Matanzas", None, None]
+    # Las filas combinadas son copias; las originales no cambian
+    assert "nombre" not in filas[0]
@@ -0,0 +1,48 @@
+"""
+Huellas de consultas y detección de N+1
+"""
+
+from core.query_stats import QueryStats, normalize_query
+
+
+def test_normalize_query_quita_literales_y_espacios():
+    assert (normalize_query("SELECT *  FROM energia_barra\n WHERE año = 2024 AND nombre = 'Cárdenas'")
+            == "select * from energia_barra where año = ? and nombre = ?")
+    assert normalize_query("select 1.5, 'it''s'") == "select ?, ?"
+
+
+def test_normalize_query_agrupa_listas_in():
+    uno = normalize_query("SELECT * FROM municipios WHERE id IN (1)")
+    varios = normalize_query("SELECT * FROM municipios WHERE id IN (?, ?, 3)")
+    assert uno == varios == "select * from municipios where id in (?+)"
+
+
+def test_record_acumula_por_huella():
+    stats = QueryStats(slow_query_ms=50, n_plus_one_threshold=10)
+    stats.record("SELECT * FROM municipios WHERE id = 1", None, "select", 2.0, 1)
+    stats.record("SELECT * FROM municipios WHERE id = ?", (2,), "select", 80.0, 1)
+    stats.record("SELECT * FROM municipios WHERE id = ?", (3,), "select", 1.0, 0, error=True)
+
+    fila = stats.get_fingerprint_stats("select * from municipios where id = 42")
+    assert fila["count"] == 3 and fila["rows"] == 2 and fila["errors"] == 1
+    assert fila["max_ms"] == 80.0
+    assert len(stats.get_slow_queries()) == 1
+    assert stats.get_summary()["fingerprints"] == 1
+
+
+def test_action_detecta_n_mas_uno():
+    stats = QueryStats(slow_query_ms=1000, n_plus_one_threshold=3)
+    with stats.action("energia.cargar"):
+        for municipio_id in range(3):
+            stats.record("SELECT * FROM municipios WHERE id = ?", (municipio_id,), "select", 1.0, 1)
+        stats.record("SELECT COUNT(*) FROM energia_barra", None, "select", 1.0, 1)
+
+    (entrada,) = stats.get_n_plus_one()
+    assert entrada["action"] == "energia.cargar"
+    assert entrada["executions"] == 3
+    assert entrada["fingerprint"] == "select * from municipios where id = ?"
+
+    # Fuera de una acción no se cuenta
+    for municipio_id in range(5):
+        stats.record("SELECT * FROM municipios WHERE id = ?", (municipio_id,), "select", 1.0, 1)
+    assert len(stats.get_n_plus_one()) == 1
@@ -0,0 +1,35 @@
+"""
+Conversión de filas a modelos con ``row_mapper``
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from core.records import row_mapper
+
+
+@dataclass(slots=True)
+class _Registro:
+    id: int
+    nombre: str
+    valor: float = 0.0
+    etiquetas: List[str] = field(default_factory=list)
+    modificado: Optional[str] = None
+
+
+def test_row_mapper_usa_columnas_y_valores_por_defecto():
+    mapper = row_mapper(_Registro, {"modificado": ("fecha_modificacion", "fecha_registro")})
+
+    registro = mapper({"id": 1, "nombre": "Matanzas", "fecha_registro": "2024-01-01", "extra": 5})
+    assert registro == _Registro(1, "Matanzas", 0.0, [], "2024-01-01")
+    assert mapper({"id": 2, "fecha_modificacion": "b", "fecha_registro": "a"}).modificado == "b"
+    assert mapper({"id": 3}).nombre is None
+
+    # Cada fila recibe su propia lista por defecto
+    assert mapper({"id": 4}).etiquetas is not mapper({"id": 5}).etiquetas
+
+
+def test_row_mapper_se_compila_una_vez_por_forma():
+    assert row_mapper(_Registro) is row_mapper(_Registro)
+    assert row_mapper(_Registro) is not row_mapper(_Registro, {"valor": "energia_mwh"})
+    assert row_mapper(_Registro, {"valor": "energia_mwh"})({"id": 1, "energia_mwh": 7.5}).valor == 7.5
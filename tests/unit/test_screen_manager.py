@@ -0,0 +1,123 @@
+"""
+Caché de pantallas keep-alive del gestor de pantallas
+"""
+
+import pytest
+
+from core.screen_manager import ScreenManager
+
+
+class _FakePage:
+    def __init__(self):
+        self.controls = []
+
+    def clean(self):
+        self.controls = []
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+
+    def update(self, *controls):
+        pass
+
+
+class _Pantalla:
+    keep_alive = True
+    instances = []
+
+    def __init__(self, name: str, size: int = 1):
+        self.name = name
+        self.size = size
+        self.events = []
+        _Pantalla.instances.append(self)
+
+    def build(self):
+        return object()
+
+    def estimate_memory(self):
+        return self.size
+
+    def on_show(self):
+        self.events.append("show")
+
+    def on_hide(self):
+        self.events.append("hide")
+
+    def cleanup(self):
+        self.events.append("cleanup")
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("SCREEN_CACHE_SIZE", "2")
+    monkeypatch.setenv("SCREEN_CACHE_MAX_MB", "1")
+    _Pantalla.instances = []
+    manager = ScreenManager(_FakePage())
+    for name in ("a", "b", "c"):
+        manager.register_screen(name, lambda name=name: _Pantalla(name))
+    return manager
+
+
+def _instancias(name):
+    return [instance for instance in _Pantalla.instances if instance.name == name]
+
+
+def test_go_back_reanuda_la_pantalla_cacheada(manager):
+    assert manager.navigate_to("a")
+    assert manager.navigate_to("b")
+    assert manager.go_back()
+
+    (a,) = _instancias("a")
+    assert manager.current_instance is a
+    assert a.events == ["show", "hide", "show"]
+
+
+def test_expulsa_la_menos_usada_al_superar_el_numero(manager):
+    manager.navigate_to("a")
+    manager.navigate_to("b")
+    manager.navigate_to("c")
+
+    assert manager.get_cache_info()["screens"] == ["b", "c"]
+    (a,) = _instancias("a")
+    assert a.events[-1] == "cleanup"
+
+    # Volver a "a" la construye de nuevo
+    manager.navigate_to("a", resume=True)
+    assert len(_instancias("a")) == 2
+    assert manager.get_cache_info()["screens"] == ["c", "a"]
+
+
+def test_reanudar_mueve_la_pantalla_al_final_de_la_lru(manager):
+    manager.navigate_to("a")
+    manager.navigate_to("b")
+    manager.navigate_to("a", resume=True)
+    manager.navigate_to("c")
+
+    assert manager.get_cache_info()["screens"] == ["a", "c"]
+    (b,) = _instancias("b")
+    assert "cleanup" in b.events
+
+
+def test_expulsa_por_memoria_pero_nunca_la_actual(manager):
+    manager.register_screen("grande", lambda: _Pantalla("grande", 2 * 1024 * 1024))
+    manager.navigate_to("a")
+    manager.navigate_to("grande")
+
+    assert manager.get_cache_info()["screens"] == ["grande"]
+    (grande,) = _instancias("grande")
+    assert "cleanup" not in grande.events
+
+
+def test_pantallas_con_parametros_no_se_cachean(manager):
+    manager.register_screen("detalle", lambda municipio_id: _Pantalla("detalle"))
+    manager.navigate_to("detalle", municipio_id=3)
+    assert manager.get_cache_info()["screens"] == []
+
+
+def test_invalidate_no_limpia_la_pantalla_visible(manager):
+    manager.navigate_to("a")
+    manager.invalidate("a")
+
+    (a,) = _instancias("a")
+    assert "cleanup" not in a.events
+    assert manager.get_cache_info()["screens"] == []
@@ -0,0 +1,70 @@
+"""
+Migraciones y datos iniciales: idempotencia
+"""
+
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import database.seeds as seeds
+from database.migrations import SCHEMA_VERSION, get_schema_version, run_migrations
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "perdidas.db")
+    assert run_migrations(path) == SCHEMA_VERSION
+    return path
+
+
+def _tablas(path):
+    with closing(sqlite3.connect(path)) as conn:
+        return {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+                for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_migraciones_se_aplican_una_vez(db_path):
+    antes = _tablas(db_path)
+    assert run_migrations(db_path) == SCHEMA_VERSION
+    assert _tablas(db_path) == antes
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+
+
+def test_migraciones_retoman_desde_la_version_guardada(db_path):
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("PRAGMA user_version = 2")
+    antes = _tablas(db_path)
+
+    assert run_migrations(db_path) == SCHEMA_VERSION
+    assert _tablas(db_path) == antes
+
+
+def test_seeds_solo_se_insertan_si_cambia_el_checksum(db_path, monkeypatch):
+    assert seeds.run_seeds(db_path) is True
+    primera = _tablas(db_path)
+    assert primera["energia_barra"] >= len(seeds.SAMPLE_ENERGIA)
+
+    assert seeds.run_seeds(db_path) is False
+    assert _tablas(db_path) == primera
+
+    # Datos nuevos: se vuelven a insertar sin duplicar los existentes
+    monkeypatch.setattr(seeds, "SAMPLE_ENERGIA", seeds.SAMPLE_ENERGIA + [(3, 2024, 2, 90.0, "Datos de prueba febrero")])
+    assert seeds.run_seeds(db_path) is True
+    assert _tablas(db_path)["energia_barra"] == primera["energia_barra"] + 1
+    assert seeds.run_seeds(db_path) is False
+
+
+def test_error_en_seeds_deshace_la_transaccion(db_path, monkeypatch):
+    monkeypatch.setattr(seeds, "SAMPLE_ENERGIA", seeds.SAMPLE_ENERGIA + [(1, 2024)])
+    antes = _tablas(db_path)
+
+    with pytest.raises(sqlite3.Error):
+        seeds.run_seeds(db_path)
+
+    assert _tablas(db_path) == antes
+    with closing(sqlite3.connect(db_path)) as conn:
+        assert conn.execute("SELECT valor FROM configuraciones WHERE clave = ?",
+                            (seeds.SEED_CHECKSUM_KEY,)).fetchone() is None
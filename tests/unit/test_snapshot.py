@@ -0,0 +1,72 @@
+"""
+Formato binario PMSNAP
+"""
+
+import io
+
+import pytest
+
+from core.snapshot import SnapshotError, SnapshotTable, columns_of, read_snapshot, rows_from_dicts, write_snapshot
+
+
+def _leer(data: bytes):
+    return {name: (columns, types, list(rows)) for name, columns, types, rows in read_snapshot(io.BytesIO(data))}
+
+
+def test_ida_y_vuelta_con_enteros_y_reales_mezclados():
+    registros = [
+        {"id": 1, "municipio": "Matanzas", "energia_mwh": 10, "perdidas": 1.25, "extra": None},
+        {"id": 2, "municipio": "Cárdenas", "energia_mwh": 12.5, "perdidas": None, "extra": {"nota": "x"}},
+        {"id": 3, "municipio": None, "energia_mwh": 7, "perdidas": 0.0, "extra": [1, "a"]},
+        {"id": 4, "municipio": "Colón", "energia_mwh": 8.0, "perdidas": 2, "extra": None},
+    ]
+    columnas = columns_of(registros)
+    buffer = io.BytesIO()
+    total = write_snapshot(buffer, [
+        SnapshotTable("energia_barra", columnas, rows_from_dicts(registros, columnas), ["INTEGER"] * 5),
+        SnapshotTable("vacia", ["id"], []),
+    ], chunk_rows=2)
+
+    assert total == 4
+    tablas = _leer(buffer.getvalue())
+    columns, types, rows = tablas["energia_barra"]
+    assert columns == ["id", "municipio", "energia_mwh", "perdidas", "extra"]
+    assert types == ["INTEGER"] * 5
+    assert [dict(zip(columns, row)) for row in rows] == registros
+    assert all(type(row[0]) is int for row in rows)
+    assert tablas["vacia"] == (["id"], [""], [])
+
+
+def test_enteros_grandes_en_columna_mixta_no_pierden_precision():
+    filas = [(2 ** 53 + 1,), (1.5,), (-(2 ** 62),)]
+    buffer = io.BytesIO()
+    write_snapshot(buffer, [SnapshotTable("lecturas", ["valor"], filas)])
+
+    _, _, rows = _leer(buffer.getvalue())["lecturas"]
+    assert rows == filas
+    assert [type(row[0]) for row in rows] == [int, float, int]
+
+
+def test_filas_no_leidas_se_saltan():
+    buffer = io.BytesIO()
+    write_snapshot(buffer, [
+        SnapshotTable("a", ["x"], [(i,) for i in range(10)]),
+        SnapshotTable("b", ["y"], [("z",)]),
+    ], chunk_rows=3)
+
+    nombres = []
+    for name, _, _, rows in read_snapshot(io.BytesIO(buffer.getvalue())):
+        nombres.append(name)
+        if name == "b":
+            assert list(rows) == [("z",)]
+    assert nombres == ["a", "b"]
+
+
+def test_rechaza_datos_que_no_son_instantaneas():
+    with pytest.raises(SnapshotError):
+        list(read_snapshot(io.BytesIO(b'[{"id": 1}]')))
+
+
+def test_rechaza_filas_con_columnas_de_menos():
+    with pytest.raises(SnapshotError):
+        write_snapshot(io.BytesIO(), [SnapshotTable("a", ["x", "y"], [(1,)])])
@@ -0,0 +1,88 @@
+"""
+Contadores y versiones por tabla y partición
+"""
+
+from core.table_stats import TableStats
+
+
+def test_version_por_particion():
+    stats = TableStats()
+    stats.record_write("INSERT INTO energia_barra (municipio_id, año, mes) VALUES (?, ?, ?)", 1, (1, 2024, 1))
+
+    assert stats.version("energia_barra") == 1
+    assert stats.version("energia_barra", 2024) == 1
+    assert stats.version("energia_barra", 2023) == 0
+
+    stats.record_write("DELETE FROM energia_barra WHERE año = ?", 3, (2023,))
+    assert stats.version("energia_barra", 2024) == 1
+    assert stats.version("energia_barra", 2023) == 1
+    assert stats.version("energia_barra") == 2
+
+
+def test_escritura_sin_año_cambia_todas_las_particiones():
+    stats = TableStats()
+    stats.record_write("UPDATE energia_barra SET año = ? WHERE id = ?", 1, (2025, 9))
+
+    assert stats.version("energia_barra", 2024) == 1
+    assert stats.version("energia_barra", 2025) == 1
+
+
+def test_escrituras_sin_filas_no_cambian_versiones():
+    stats = TableStats()
+    stats.record_write("DELETE FROM energia_barra WHERE año = ?", 0, (2024,))
+    stats.record_write("SELECT * FROM energia_barra", 5)
+    assert stats.version("energia_barra") == 0
+
+
+def test_count_se_ajusta_con_insert_y_delete():
+    stats = TableStats()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return 10
+
+    assert stats.count("municipios", loader) == 10
+    stats.record_write("INSERT INTO municipios (nombre) VALUES (?)", 2, ("Colón",))
+    stats.record_write("DELETE FROM municipios WHERE id = ?", 1, (3,))
+    assert stats.count("municipios", loader) == 11
+    assert len(loads) == 1
+
+
+def test_count_filtrado_se_recuenta_tras_escritura():
+    stats = TableStats()
+    valores = iter([4, 5])
+    assert stats.count("usuarios:activos", lambda: next(valores)) == 4
+    stats.record_write("UPDATE usuarios SET activo = 1 WHERE id = ?", 1, (2,))
+    assert stats.count("usuarios:activos", lambda: next(valores)) == 5
+
+
+def test_invalidate_cambia_todas_las_versiones():
+    stats = TableStats()
+    stats.record_write("INSERT INTO energia_barra (año) VALUES (?)", 1, (2024,))
+    stats.count("energia_barra", lambda: 1)
+    eventos = []
+    stats.add_listener(lambda table, action, values: eventos.append((table, action)))
+
+    stats.invalidate()
+
+    assert stats.version("energia_barra") == 2
+    assert stats.version("energia_barra", 2024) == 2
+    assert stats.version("municipios", 2020) == 1
+    assert stats.snapshot()["counts"] == {}
+    assert eventos == [("*", "invalidate")]
+
+
+def test_oyentes_reciben_valores_de_la_sentencia():
+    stats = TableStats()
+    eventos = []
+    stats.add_listener(lambda table, action, values: eventos.append((table, action, values)))
+
+    stats.record_write("INSERT OR REPLACE INTO energia_barra (municipio_id, año, mes) VALUES (?, ?, ?)",
+                       1, (4, 2024, 6))
+    stats.record_write("DELETE FROM energia_barra WHERE año = 2023", 2)
+
+    assert eventos == [
+        ("energia_barra", "replace", {"año": 2024, "mes": 6, "municipio_id": 4}),
+        ("energia_barra", "delete", {"año": 2023, "mes": None, "municipio_id": None}),
+    ]
@@ -0,0 +1,80 @@
+"""
+Almacenamiento web: códec de valores e importación de instantáneas
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from core.query_cache import cached_query, get_query_caches
+from core.web_storage import CODEC_PREFIX, WebStorageManager, decode_value, encode_value
+
+
+class _ClientStorage(dict):
+    def get(self, key):
+        return dict.get(self, key)
+
+    def set(self, key, value):
+        self[key] = value
+
+
+@pytest.fixture
+def storage():
+    return WebStorageManager(SimpleNamespace(client_storage=_ClientStorage()))
+
+
+def test_codec_lee_valores_planos_y_comprimidos():
+    texto = json.dumps([{"municipio": "Matanzas", "valor": i} for i in range(200)])
+    comprimido = encode_value(texto, min_bytes=16)
+
+    assert comprimido.startswith(CODEC_PREFIX) and len(comprimido) < len(texto)
+    assert decode_value(comprimido) == texto
+    # Valores guardados antes del códec (JSON sin prefijo) se leen igual
+    assert decode_value(texto) == texto
+    assert encode_value("[1, 2]", min_bytes=16) == "[1, 2]"
+
+
+def test_get_raw_lee_json_plano_existente(storage):
+    storage.page.client_storage.set(storage.prefix + "facturacion", json.dumps([{"id": 7}]))
+    assert storage._get_raw("facturacion") == [{"id": 7}]
+
+
+class _EnergiaReader:
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.calls = 0
+
+    @cached_query(tables=["energia_barra"], partition=None)
+    def energia(self):
+        self.calls += 1
+        return self.db_manager._get_raw("energia_barra")
+
+
+def _energia(valor: float):
+    return [{"id": 1, "municipio_id": 1, "año": 2024, "mes": 1, "energia_mwh": valor}]
+
+
+def test_import_snapshot_invalida_la_cache(storage, monkeypatch):
+    monkeypatch.setattr(get_query_caches(), "enabled", True)
+    storage._set_raw("energia_barra", _energia(10.0))
+    snapshot = storage.export_snapshot()
+    storage._set_raw("energia_barra", _energia(99.0))
+
+    reader = _EnergiaReader(storage)
+    assert reader.energia()[0]["energia_mwh"] == 99.0
+    assert reader.energia()[0]["energia_mwh"] == 99.0
+    assert reader.calls == 1
+
+    storage.import_snapshot(snapshot)
+    assert reader.energia()[0]["energia_mwh"] == 10.0
+    assert reader.calls == 2
+
+
+def test_import_snapshot_guarda_formato_compacto(storage):
+    storage._set_raw("energia_barra", _energia(1.5) * 500)
+    counts = storage.import_snapshot(storage.export_snapshot())
+
+    assert counts["energia_barra"] == 500
+    assert storage.page.client_storage[storage.prefix + "energia_barra"].startswith("s1:")
+    assert storage._get_raw("energia_barra") == _energia(1.5) * 500
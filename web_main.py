@@ -2,6 +2,7 @@
 Punto de entrada para la aplicación web
 """
 import flet as ft
+import os
 import sys
 from pathlib import Path
 
@@ -10,7 +11,22 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from main import main
 
+def _start_metrics():
+    """Expone /metrics y /health desde este proceso, que es el que ejecuta las sesiones"""
+    port = int(os.getenv("METRICS_PORT", "9100"))
+    if port <= 0:
+        return
+    from core.metrics import get_metrics_registry, start_metrics_server
+    from authentication.services.auth_service import get_auth_service
+    get_metrics_registry().register_gauge(
+        "perdidas_active_sessions", get_auth_service().get_active_sessions_count,
+        help_text="Sesiones de usuario activas"
+    )
+    start_metrics_server(port)
+    print(f"Métricas Prometheus y salud en el puerto {port} (/metrics, /health)")
+
 if __name__ == "__main__":
+    _start_metrics()
     print("Iniciando aplicación web en puerto 8000...")
     ft.app(
         target=main,
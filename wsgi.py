@@ -16,7 +16,7 @@ os.environ["FLET_WEB_MODE"] = "true"
 # Importar Flask para servir la aplicación
 from flask import Flask, Response, request, jsonify
 import flet as ft
-from web_main import main_web
+from core.config import get_config
 
 app = Flask(__name__)
 
@@ -199,25 +199,77 @@ def status():
 
 @app.route('/health')
 def health():
-    """Health check para monitoreo"""
+    """Health check para monitoreo - consulta el proceso de Flet
+    
+    Las sesiones (y su gestor de datos) viven en el proceso de ``ft.app``
+    (web_main.py), que sirve su propio ``/health`` en METRICS_PORT. Aquí se
+    reenvía esa respuesta; si el proceso no responde, el servicio no está sano.
+    """
+    import json
+    import urllib.error
+    import urllib.request
+    
+    port = os.environ.get("METRICS_PORT", "9100")
+    url = os.environ.get("FLET_HEALTH_URL", f"http://127.0.0.1:{port}/health")
+    try:
+        with urllib.request.urlopen(url, timeout=float(os.environ.get("HEALTH_TIMEOUT", "3"))) as response:
+            return jsonify(json.loads(response.read().decode("utf-8"))), response.status
+    except urllib.error.HTTPError as e:
+        # 503 del proceso de Flet: se conserva su informe
+        try:
+            return jsonify(json.loads(e.read().decode("utf-8"))), e.code
+        except ValueError:
+            error = f"HTTP {e.code}"
+    except Exception as e:
+        error = str(e)
+    
     return jsonify({
-        "status": "healthy",
+        "status": "unhealthy",
         "service": "perdidas-matanzas-web",
-        "version": "1.0.0"
-    })
+        "version": get_config().APP_VERSION,
+        "checks": {"flet_process": {"ok": False, "url": url, "error": error}}
+    }), 503
+
+def _register_metrics():
+    """Gauges de este proceso (una sola vez, al importar el módulo)"""
+    from core.metrics import get_metrics_registry
+    from authentication.services.auth_service import get_auth_service
+    
+    get_metrics_registry().register_gauge(
+        "perdidas_active_sessions", get_auth_service().get_active_sessions_count,
+        help_text="Sesiones de usuario activas"
+    )
+
+_register_metrics()
+
+@app.route('/metrics')
+def metrics():
+    """Métricas en formato de exposición Prometheus de ESTE proceso Flask
+    
+    Las sesiones de Flet se ejecutan en el proceso de ``ft.app`` (web_main.py),
+    no aquí: las series de consultas, cachés, sesiones e importaciones de este
+    endpoint solo describen el proceso WSGI. Para monitorizar la aplicación se
+    debe hacer scrape del ``/metrics`` que web_main.py sirve en METRICS_PORT.
+    """
+    from core.metrics import render_prometheus
+    
+    response = Response(render_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+    response.headers["X-Metrics-Scope"] = "wsgi-process"
+    return response
 
 @app.route('/api/info')
 def api_info():
     """Información de la API"""
     return jsonify({
         "name": "Pérdidas Eléctricas - Matanzas",
-        "version": "1.0.0",
+        "version": get_config().APP_VERSION,
         "mode": "web",
         "endpoints": [
             "/",
             "/app", 
             "/status",
             "/health",
+            "/metrics",
             "/api/info"
         ]
     })